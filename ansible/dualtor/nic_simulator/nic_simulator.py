@@ -12,6 +12,7 @@ import abc
 import argparse
 import contextlib
 import fcntl
+import functools
 import grpc
 import json
 import logging
@@ -21,7 +22,9 @@ import socket
 import sys
 import struct
 import subprocess
+import tempfile
 import threading
+import time
 
 from concurrent import futures
 from logging.handlers import RotatingFileHandler
@@ -35,6 +38,8 @@ import nic_simulator_grpc_mgmt_service_pb2_grpc
 
 THREAD_CONCURRENCY_PER_SERVER = 2
 USE_HASH_SELECTION_METHOD_EXPLICITLY = False
+# apply the flow and group modifications of one gRPC call in one OpenFlow bundle, needs OpenFlow 1.4+
+USE_OPENFLOW_BUNDLE = False
 
 # name templates
 ACTIVE_ACTIVE_BRIDGE_TEMPLATE = r"baa-%s-%d"
@@ -104,6 +109,7 @@ class OVSCommand(object):
     OVS_OFCTL_DEL_GROUPS_CMD = "ovs-ofctl -O OpenFlow13 del-groups {bridge_name}"
     OVS_OFCTL_ADD_GROUP_CMD = "ovs-ofctl -O OpenFlow13 add-group {bridge_name} {group}"
     OVS_OFCTL_MOD_GROUP_CMD = "ovs-ofctl -O OpenFlow13 mod-group {bridge_name} {group}"
+    OVS_OFCTL_BUNDLE_CMD = "ovs-ofctl -O OpenFlow15 bundle {bridge_name} {bundle_file}"
 
     @staticmethod
     def setup_openflow_version():
@@ -118,7 +124,9 @@ class OVSCommand(object):
             # NOTE: use openflow15 for OVS 2.10 and above
             if ovs_version >= _versiontuple("2.10"):
                 global USE_HASH_SELECTION_METHOD_EXPLICITLY
+                global USE_OPENFLOW_BUNDLE
                 USE_HASH_SELECTION_METHOD_EXPLICITLY = True
+                USE_OPENFLOW_BUNDLE = True
                 OVSCommand.OVS_OFCTL_DEL_GROUPS_CMD = "ovs-ofctl -O OpenFlow15 del-groups {bridge_name}"
                 OVSCommand.OVS_OFCTL_ADD_GROUP_CMD = "ovs-ofctl -O OpenFlow15 add-group {bridge_name} {group}"
                 OVSCommand.OVS_OFCTL_MOD_GROUP_CMD = "ovs-ofctl -O OpenFlow15 mod-group {bridge_name} {group}"
@@ -157,6 +165,56 @@ class OVSCommand(object):
     def ovs_ofctl_mod_groups(bridge_name, group):
         return run_command(OVSCommand.OVS_OFCTL_MOD_GROUP_CMD.format(bridge_name=bridge_name, group=group))
 
+    @staticmethod
+    def ovs_ofctl_bundle(bridge_name, bundle_file):
+        return run_command(OVSCommand.OVS_OFCTL_BUNDLE_CMD.format(bridge_name=bridge_name, bundle_file=bundle_file))
+
+
+class RpcLatencyStats(object):
+    """Latency statistics of the gRPC calls served, and of the OVS updates made for them."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.stats = {}
+
+    def record(self, server, rpc, seconds):
+        """Record one call of rpc served by server that took seconds."""
+        latency_ms = seconds * 1000
+        with self.lock:
+            stat = self.stats.setdefault((server, rpc), [0, 0.0, 0.0, 0.0])
+            stat[0] += 1
+            stat[1] += latency_ms
+            stat[2] = max(stat[2], latency_ms)
+            stat[3] = latency_ms
+
+    def query(self, reset=False):
+        """Return the statistics as a list of RpcLatency, clear them if reset."""
+        with self.lock:
+            latencies = [
+                nic_simulator_grpc_mgmt_service_pb2.RpcLatency(
+                    server=server, rpc=rpc, count=count, total_ms=total_ms, max_ms=max_ms, last_ms=last_ms
+                )
+                for (server, rpc), (count, total_ms, max_ms, last_ms) in sorted(self.stats.items())
+            ]
+            if reset:
+                self.stats.clear()
+        return latencies
+
+
+RPC_LATENCY_STATS = RpcLatencyStats()
+
+
+def record_rpc_latency(rpc):
+    """Decorator to record the latency of a gRPC call into RPC_LATENCY_STATS by the server latency_label."""
+    @functools.wraps(rpc)
+    def _record_rpc_latency(self, request, context):
+        start = time.monotonic()
+        try:
+            return rpc(self, request, context)
+        finally:
+            RPC_LATENCY_STATS.record(self.latency_label, rpc.__name__, time.monotonic() - start)
+    return _record_rpc_latency
+
 
 class StrObj(abc.ABC):
     """Abstract class defines objects that could be represented as a string."""
@@ -292,6 +350,54 @@ class OVSUpstreamFlow(OVSFlow):
             self.reset()
 
 
+class OVSBundle(object):
+    """
+    Collect the flow and group modifications to an OVS bridge and apply them in one ovs-ofctl call.
+
+    The flow and group objects hold the state, so only the objects are collected and their strings are taken when the
+    bundle is committed. An object modified several times is sent once with its last state.
+    """
+
+    __slots__ = ("bridge_name", "flows", "groups")
+
+    def __init__(self, bridge_name):
+        self.bridge_name = bridge_name
+        self.flows = []
+        self.groups = []
+
+    def mod_flow(self, flow):
+        if all(flow is not _ for _ in self.flows):
+            self.flows.append(flow)
+
+    def mod_group(self, group):
+        if all(group is not _ for _ in self.groups):
+            self.groups.append(group)
+
+    def commit(self):
+        """Apply the modifications, in one OpenFlow bundle if supported, otherwise one ovs-ofctl call for each."""
+        if not self.flows and not self.groups:
+            return
+        start = time.monotonic()
+        try:
+            if USE_OPENFLOW_BUNDLE:
+                with tempfile.NamedTemporaryFile("w", prefix="nic_simulator_bundle_", suffix=".txt") as bundle_file:
+                    for group in self.groups:
+                        bundle_file.write("group modify %s\n" % group)
+                    for flow in self.flows:
+                        bundle_file.write("flow modify_strict %s\n" % flow)
+                    bundle_file.flush()
+                    OVSCommand.ovs_ofctl_bundle(self.bridge_name, bundle_file.name)
+            else:
+                for group in self.groups:
+                    OVSCommand.ovs_ofctl_mod_groups(self.bridge_name, group)
+                for flow in self.flows:
+                    OVSCommand.ovs_ofctl_mod_flow(self.bridge_name, flow)
+        finally:
+            RPC_LATENCY_STATS.record(self.bridge_name, "ovs-ofctl", time.monotonic() - start)
+            self.flows = []
+            self.groups = []
+
+
 class ForwardingState(object):
     """Forwarding state"""
     STANDBY = False
@@ -632,12 +738,14 @@ class OVSBridge(object):
     def set_forwarding_state(self, portids, states):
         """Set forwarding state."""
         with self.lock:
+            bundle = OVSBundle(self.bridge_name)
             for portid, state in zip(portids, states):
                 logging.info("Set bridge %s port %s forwarding state: %s",
                              self.bridge_name, portid, ForwardingState.STATE_LABELS[state])
-                self.flap_counter[portid] += self.states_setter[portid](state)
-            OVSCommand.ovs_ofctl_mod_groups(
-                self.bridge_name, self.upstream_ecmp_group)
+                if self.states_setter[portid](state):
+                    self.flap_counter[portid] += 1
+                    bundle.mod_group(self.upstream_ecmp_group)
+            bundle.commit()
             return self.query_forwarding_state(portids)
 
     def query_forwarding_state(self, portids):
@@ -653,6 +761,7 @@ class OVSBridge(object):
         logging.info("Set drop on bridge %s: portids=%s, directions=%s, recover=%s"
                      % (self.bridge_name, portids, directions, recover))
         with self.lock:
+            bundle = OVSBundle(self.bridge_name)
             result = []
             for portid, direction in zip(portids, directions):
                 downstream_flow = self.downstream_flows[portid]
@@ -663,8 +772,7 @@ class OVSBridge(object):
                     # recover downstream
                     if downstream_flow.drop:
                         downstream_flow.set_drop(recover=recover)
-                        OVSCommand.ovs_ofctl_mod_flow(
-                            self.bridge_name, downstream_flow)
+                        bundle.mod_flow(downstream_flow)
 
                     # recover upstream
                     # recover upstream traffic from server NiC
@@ -672,115 +780,99 @@ class OVSBridge(object):
                         if self.upstream_upper_tor_nic_flow.get_drop(portid):
                             self.upstream_upper_tor_nic_flow.set_drop(
                                 portid=portid, recover=recover)
-                            OVSCommand.ovs_ofctl_mod_flow(
-                                self.bridge_name, self.upstream_upper_tor_nic_flow)
+                            bundle.mod_flow(self.upstream_upper_tor_nic_flow)
                     if self.upstream_lower_tor_nic_flow.get_port_enable(portid):
                         if self.upstream_lower_tor_nic_flow.get_drop(portid):
                             self.upstream_lower_tor_nic_flow.set_drop(
                                 portid=portid, recover=recover)
-                            OVSCommand.ovs_ofctl_mod_flow(
-                                self.bridge_name, self.upstream_lower_tor_nic_flow)
+                            bundle.mod_flow(self.upstream_lower_tor_nic_flow)
                     if self.upstream_nic_flow.get_drop(portid):
                         self.upstream_nic_flow.set_drop(
                             portid=portid, recover=recover)
-                        OVSCommand.ovs_ofctl_mod_flow(
-                            self.bridge_name, self.upstream_nic_flow)
+                        bundle.mod_flow(self.upstream_nic_flow)
                     # recover upstream loopback2 traffic from ptf
                     if self.upstream_loopback2_flow.get_drop(portid):
                         self.upstream_loopback2_flow.set_drop(
                             portid=portid, recover=recover)
-                        OVSCommand.ovs_ofctl_mod_flow(
-                            self.bridge_name, self.upstream_loopback2_flow)
+                        bundle.mod_flow(self.upstream_loopback2_flow)
                     # recover upstream upper ToR loopback3 traffic from ptf
                     if self.upstream_upper_tor_loopback3_flow.get_drop(portid):
                         self.upstream_upper_tor_loopback3_flow.set_drop(
                             portid=portid, recover=recover)
-                        OVSCommand.ovs_ofctl_mod_flow(
-                            self.bridge_name, self.upstream_upper_tor_loopback3_flow)
+                        bundle.mod_flow(self.upstream_upper_tor_loopback3_flow)
                     # recover upstream lower ToR loopback3 traffic from ptf
                     if self.upstream_lower_tor_loopback3_flow.get_drop(portid):
                         self.upstream_lower_tor_loopback3_flow.set_drop(
                             portid=portid, recover=recover)
-                        OVSCommand.ovs_ofctl_mod_flow(
-                            self.bridge_name, self.upstream_lower_tor_loopback3_flow)
+                        bundle.mod_flow(self.upstream_lower_tor_loopback3_flow)
                     # recover upstream arp traffic from ptf
                     if self.upstream_arp_flow.get_drop(portid):
                         self.upstream_arp_flow.set_drop(
                             portid=portid, recover=recover)
-                        OVSCommand.ovs_ofctl_mod_flow(
-                            self.bridge_name, self.upstream_arp_flow)
+                        bundle.mod_flow(self.upstream_arp_flow)
                     # recover upstream icmpv6 traffic from ptf
                     if self.upstream_icmpv6_flow.get_drop(portid):
                         self.upstream_icmpv6_flow.set_drop(
                             portid=portid, recover=recover)
-                        OVSCommand.ovs_ofctl_mod_flow(
-                            self.bridge_name, self.upstream_icmpv6_flow)
+                        bundle.mod_flow(self.upstream_icmpv6_flow)
 
                     forwarding_state = forwarding_state_getter()
                     if forwarding_state == ForwardingState.STANDBY:
                         forwarding_state_setter(ForwardingState.ACTIVE)
-                        OVSCommand.ovs_ofctl_mod_groups(
-                            self.bridge_name, self.upstream_ecmp_group)
+                        bundle.mod_group(self.upstream_ecmp_group)
                 else:
                     if direction == 0:
                         # downstream
                         if not downstream_flow.drop:
                             downstream_flow.set_drop()
-                            OVSCommand.ovs_ofctl_mod_flow(
-                                self.bridge_name, downstream_flow)
+                            bundle.mod_flow(downstream_flow)
                     elif direction == 1:
                         # upstream
                         # drop upstream traffic from server NiC
                         if self.upstream_upper_tor_nic_flow.get_port_enable(portid):
                             if not self.upstream_upper_tor_nic_flow.get_drop(portid):
                                 self.upstream_upper_tor_nic_flow.set_drop(portid)
-                                OVSCommand.ovs_ofctl_mod_flow(
-                                    self.bridge_name, self.upstream_upper_tor_nic_flow)
+                                bundle.mod_flow(self.upstream_upper_tor_nic_flow)
                         if self.upstream_lower_tor_nic_flow.get_port_enable(portid):
                             if not self.upstream_lower_tor_nic_flow.get_drop(portid):
                                 self.upstream_lower_tor_nic_flow.set_drop(portid)
-                                OVSCommand.ovs_ofctl_mod_flow(
-                                    self.bridge_name, self.upstream_lower_tor_nic_flow)
+                                bundle.mod_flow(self.upstream_lower_tor_nic_flow)
                         if not self.upstream_nic_flow.get_drop(portid):
                             self.upstream_nic_flow.set_drop(portid)
-                            OVSCommand.ovs_ofctl_mod_flow(
-                                self.bridge_name, self.upstream_nic_flow)
+                            bundle.mod_flow(self.upstream_nic_flow)
                         # drop upstream loopback2 traffic from ptf
                         if not self.upstream_loopback2_flow.get_drop(portid):
                             self.upstream_loopback2_flow.set_drop(portid)
-                            OVSCommand.ovs_ofctl_mod_flow(
-                                self.bridge_name, self.upstream_loopback2_flow)
+                            bundle.mod_flow(self.upstream_loopback2_flow)
                         # drop upstream upper ToR loopback3 traffic from ptf
                         if not self.upstream_upper_tor_loopback3_flow.get_drop(portid):
                             self.upstream_upper_tor_loopback3_flow.set_drop(portid)
-                            OVSCommand.ovs_ofctl_mod_flow(
-                                self.bridge_name, self.upstream_upper_tor_loopback3_flow)
+                            bundle.mod_flow(self.upstream_upper_tor_loopback3_flow)
                         # drop upstream lower ToR loopback3 traffic from ptf
                         if not self.upstream_lower_tor_loopback3_flow.get_drop(portid):
                             self.upstream_lower_tor_loopback3_flow.set_drop(portid)
-                            OVSCommand.ovs_ofctl_mod_flow(
-                                self.bridge_name, self.upstream_lower_tor_loopback3_flow)
+                            bundle.mod_flow(self.upstream_lower_tor_loopback3_flow)
                         # drop upstream arp traffic from ptf
                         if not self.upstream_arp_flow.get_drop(portid):
                             self.upstream_arp_flow.set_drop(portid)
-                            OVSCommand.ovs_ofctl_mod_flow(
-                                self.bridge_name, self.upstream_arp_flow)
+                            bundle.mod_flow(self.upstream_arp_flow)
                         # drop upstream icmpv6 traffic from ptf
                         if not self.upstream_icmpv6_flow.get_drop(portid):
                             self.upstream_icmpv6_flow.set_drop(portid)
-                            OVSCommand.ovs_ofctl_mod_flow(
-                                self.bridge_name, self.upstream_icmpv6_flow)
+                            bundle.mod_flow(self.upstream_icmpv6_flow)
 
                         forwarding_state = forwarding_state_getter()
                         # use set forwarding state to standby to simulator link drop
                         if forwarding_state == ForwardingState.ACTIVE:
                             forwarding_state_setter(ForwardingState.STANDBY)
-                            OVSCommand.ovs_ofctl_mod_groups(
-                                self.bridge_name, self.upstream_ecmp_group)
+                            bundle.mod_group(self.upstream_ecmp_group)
                     else:
+                        # apply the changes made for the previous ports
+                        bundle.commit()
                         raise ValueError("Invalid direction %s, please use 0 for downstream and 1 for upstream"
                                          % (direction))
                 result.append(True)
+            bundle.commit()
             return result
 
     def query_flap_counter(self, portids):
@@ -853,6 +945,11 @@ class NiCServer(nic_simulator_grpc_service_pb2_grpc.DualToRActiveServicer):
         self.thread = None
         self.started = False
 
+    @property
+    def latency_label(self):
+        return self.nic_addr
+
+    @record_rpc_latency
     def QueryAdminForwardingPortState(self, request, context):
         logging.debug("QueryAdminForwardingPortState: request to server %s from client %s\n",
                       self.nic_addr, context.peer())
@@ -865,6 +962,7 @@ class NiCServer(nic_simulator_grpc_service_pb2_grpc.DualToRActiveServicer):
                       context.peer(), self.nic_addr, response)
         return response
 
+    @record_rpc_latency
     def SetAdminForwardingPortState(self, request, context):
         logging.debug("SetAdminForwardingPortState: request to server %s from client %s\n",
                       self.nic_addr, context.peer())
@@ -889,6 +987,7 @@ class NiCServer(nic_simulator_grpc_service_pb2_grpc.DualToRActiveServicer):
         # TODO: add QueryServerVersion implementation
         return nic_simulator_grpc_service_pb2.ServerVersionReply()
 
+    @record_rpc_latency
     def SetDrop(self, request, context):
         logging.debug("SetDrop: request to server %s from client %s\n",
                       self.nic_addr, context.peer())
@@ -901,6 +1000,7 @@ class NiCServer(nic_simulator_grpc_service_pb2_grpc.DualToRActiveServicer):
                       context.peer(), self.nic_addr, response)
         return response
 
+    @record_rpc_latency
     def QueryFlapCounter(self, request, context):
         logging.debug("QueryFlapCounter: request to server %s from client %s\n",
                       self.nic_addr, context.peer())
@@ -913,6 +1013,7 @@ class NiCServer(nic_simulator_grpc_service_pb2_grpc.DualToRActiveServicer):
                       context.peer(), self.nic_addr, response)
         return response
 
+    @record_rpc_latency
     def ResetFlapCounter(self, request, context):
         logging.debug("ResetFlapCounter: request to server %s from client %s\n",
                       self.nic_addr, context.peer())
@@ -968,6 +1069,10 @@ class MgmtServer(nic_simulator_grpc_mgmt_service_pb2_grpc.DualTorMgmtServiceServ
         self.client_stubs = {}
         self.server = None
 
+    @property
+    def latency_label(self):
+        return "mgmt"
+
     def _get_client_stub(self, nic_address):
         if nic_address in self.client_stubs:
             client_stub = self.client_stubs[nic_address]
@@ -981,6 +1086,32 @@ class MgmtServer(nic_simulator_grpc_mgmt_service_pb2_grpc.DualTorMgmtServiceServ
             self.client_stubs[nic_address] = client_stub
         return client_stub
 
+    @staticmethod
+    def _wait_nic_replies(rpc, nic_addresses, reply_futures, context):
+        """
+        Wait for the replies of all the NiC servers the requests were sent to.
+
+        The NiC servers apply the requests independently, so a failed NiC server doesn't stop the others from changing
+        state. If any of them fails, abort with the result of each NiC server in the details and return None.
+        """
+        replies = []
+        succeeded = []
+        errors = []
+        for nic_address, reply_future in zip(nic_addresses, reply_futures):
+            try:
+                replies.append(reply_future.result())
+                succeeded.append(nic_address)
+            except Exception as e:
+                errors.append("%s: %s" % (nic_address, repr(e)))
+        if errors:
+            context.set_code(grpc.StatusCode.ABORTED)
+            context.set_details(
+                "Error in %s to %s; succeeded on %s, their state is changed" %
+                (rpc, ", ".join(errors), ", ".join(succeeded) or "none"))
+            return None
+        return replies
+
+    @record_rpc_latency
     def QueryAdminForwardingPortState(self, request, context):
         nic_addresses = request.nic_addresses
         admin_requests = request.admin_requests
@@ -1008,25 +1139,24 @@ class MgmtServer(nic_simulator_grpc_mgmt_service_pb2_grpc.DualTorMgmtServiceServ
             "QueryAdminForwardingPortState[mgmt]: response of query: %s", response)
         return response
 
+    @record_rpc_latency
     def SetAdminForwardingPortState(self, request, context):
         nic_addresses = request.nic_addresses
         admin_requests = request.admin_requests
         logging.debug(
             "SetAdminForwardingPortState[mgmt]: request set admin port state: %s\n", request)
-        set_responses = []
-        for nic_address, admin_request in zip(nic_addresses, admin_requests):
-            client_stub = self._get_client_stub(nic_address)
-            try:
-                state = client_stub.SetAdminForwardingPortState(
-                    admin_request,
-                    timeout=GRPC_TIMEOUT
-                )
-                set_responses.append(state)
-            except Exception as e:
-                context.set_code(grpc.StatusCode.ABORTED)
-                context.set_details(
-                    "Error in SetAdminForwardingPortState to %s: %s" % (nic_address, repr(e)))
-                return nic_simulator_grpc_mgmt_service_pb2.ListOfAdminRequest()
+        # NOTE: send the requests to all NiC servers before waiting for the replies,
+        # so the NiCs are switched concurrently
+        set_futures = [
+            self._get_client_stub(nic_address).SetAdminForwardingPortState.future(
+                admin_request,
+                timeout=GRPC_TIMEOUT
+            )
+            for nic_address, admin_request in zip(nic_addresses, admin_requests)
+        ]
+        set_responses = self._wait_nic_replies("SetAdminForwardingPortState", nic_addresses, set_futures, context)
+        if set_responses is None:
+            return nic_simulator_grpc_mgmt_service_pb2.ListOfAdminReply()
         response = nic_simulator_grpc_mgmt_service_pb2.ListOfAdminReply(
             nic_addresses=nic_addresses,
             admin_replies=set_responses
@@ -1038,24 +1168,21 @@ class MgmtServer(nic_simulator_grpc_mgmt_service_pb2_grpc.DualTorMgmtServiceServ
     def QueryOperationPortState(self, request, context):
         return nic_simulator_grpc_mgmt_service_pb2.ListOfOperationReply()
 
+    @record_rpc_latency
     def SetDrop(self, request, context):
         nic_addresses = request.nic_addresses
         drop_requests = request.drop_requests
         logging.debug("SetDrop[mgmt]: request set drop: %s\n", request)
-        set_drop_responses = []
-        for nic_address, drop_request in zip(nic_addresses, drop_requests):
-            client_stub = self._get_client_stub(nic_address)
-            try:
-                set_drop_response = client_stub.SetDrop(
-                    drop_request,
-                    timeout=10
-                )
-                set_drop_responses.append(set_drop_response)
-            except Exception as e:
-                context.set_code(grpc.StatusCode.ABORTED)
-                context.set_details("Error in SetDrop to %s: %s" %
-                                    (nic_address, repr(e)))
-                return nic_simulator_grpc_mgmt_service_pb2.ListOfDropReply()
+        set_drop_futures = [
+            self._get_client_stub(nic_address).SetDrop.future(
+                drop_request,
+                timeout=10
+            )
+            for nic_address, drop_request in zip(nic_addresses, drop_requests)
+        ]
+        set_drop_responses = self._wait_nic_replies("SetDrop", nic_addresses, set_drop_futures, context)
+        if set_drop_responses is None:
+            return nic_simulator_grpc_mgmt_service_pb2.ListOfDropReply()
         response = nic_simulator_grpc_mgmt_service_pb2.ListOfDropReply(
             nic_addresses=nic_addresses,
             drop_replies=set_drop_responses
@@ -1104,6 +1231,7 @@ class MgmtServer(nic_simulator_grpc_mgmt_service_pb2_grpc.DualTorMgmtServiceServ
             "SetNicServerAdminState[mgmt]: response of set nic server admin state:%s\n", response)
         return response
 
+    @record_rpc_latency
     def QueryFlapCounter(self, request, context):
         nic_addresses = request.nic_addresses
         flap_counter_requests = request.flap_counter_requests
@@ -1133,6 +1261,7 @@ class MgmtServer(nic_simulator_grpc_mgmt_service_pb2_grpc.DualTorMgmtServiceServ
             "QueryFlapCounter[mgmt]: response of query: %s", response)
         return response
 
+    @record_rpc_latency
     def ResetFlapCounter(self, request, context):
         nic_addresses = request.nic_addresses
         flap_counter_requests = request.flap_counter_requests
@@ -1162,6 +1291,14 @@ class MgmtServer(nic_simulator_grpc_mgmt_service_pb2_grpc.DualTorMgmtServiceServ
             "ResetFlapCounter[mgmt]: response of reset: %s", response)
         return response
 
+    def QueryRpcLatency(self, request, context):
+        logging.debug("QueryRpcLatency[mgmt]: request query rpc latency, reset: %s\n", request.reset)
+        response = nic_simulator_grpc_mgmt_service_pb2.RpcLatencyReply(
+            latencies=RPC_LATENCY_STATS.query(reset=request.reset)
+        )
+        logging.debug("QueryRpcLatency[mgmt]: response of query: %s", response)
+        return response
+
     def start(self):
         self.server = grpc.server(
             futures.ThreadPoolExecutor(
@@ -15,7 +15,7 @@ _sym_db = _symbol_database.Default()
 import nic_simulator_grpc_service_pb2 as nic__simulator__grpc__service__pb2     # noqa: E402 F401
 
 
-DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n%nic_simulator_grpc_mgmt_service.proto\x1a nic_simulator_grpc_service.proto\"R\n\x12ListOfAdminRequest\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12%\n\x0e\x61\x64min_requests\x18\x02 \x03(\x0b\x32\r.AdminRequest\"M\n\x10ListOfAdminReply\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12\"\n\radmin_replies\x18\x02 \x03(\x0b\x32\x0b.AdminReply\"^\n\x16ListOfOperationRequest\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12-\n\x12operation_requests\x18\x02 \x03(\x0b\x32\x11.OperationRequest\"Y\n\x14ListOfOperationReply\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12*\n\x11operation_replies\x18\x02 \x03(\x0b\x32\x0f.OperationReply\"O\n\x11ListOfDropRequest\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12#\n\rdrop_requests\x18\x02 \x03(\x0b\x32\x0c.DropRequest\"J\n\x0fListOfDropReply\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12 \n\x0c\x64rop_replies\x18\x02 \x03(\x0b\x32\n.DropReply\"O\n ListOfNiCServerAdminStateRequest\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12\x14\n\x0c\x61\x64min_states\x18\x02 \x03(\x08\"`\n\x1eListOfNiCServerAdminStateReply\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12\x14\n\x0c\x61\x64min_states\x18\x02 \x03(\x08\x12\x11\n\tsuccesses\x18\x03 \x03(\x08\"e\n\x18ListOfFlapCounterRequest\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12\x32\n\x15\x66lap_counter_requests\x18\x02 \x03(\x0b\x32\x13.FlapCounterRequest\"`\n\x16ListOfFlapCounterReply\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12/\n\x14\x66lap_counter_replies\x18\x02 \x03(\x0b\x32\x11.FlapCounterReply2\x9c\x04\n\x12\x44ualTorMgmtService\x12I\n\x1dQueryAdminForwardingPortState\x12\x13.ListOfAdminRequest\x1a\x11.ListOfAdminReply\"\x00\x12G\n\x1bSetAdminForwardingPortState\x12\x13.ListOfAdminRequest\x1a\x11.ListOfAdminReply\"\x00\x12K\n\x17QueryOperationPortState\x12\x17.ListOfOperationRequest\x1a\x15.ListOfOperationReply\"\x00\x12\x31\n\x07SetDrop\x12\x12.ListOfDropRequest\x1a\x10.ListOfDropReply\"\x00\x12^\n\x16SetNicServerAdminState\x12!.ListOfNiCServerAdminStateRequest\x1a\x1f.ListOfNiCServerAdminStateReply\"\x00\x12H\n\x10QueryFlapCounter\x12\x19.ListOfFlapCounterRequest\x1a\x17.ListOfFlapCounterReply\"\x00\x12H\n\x10ResetFlapCounter\x12\x19.ListOfFlapCounterRequest\x1a\x17.ListOfFlapCounterReply\"\x00\x62\x06proto3')     # noqa: E501
+DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(b'\n%nic_simulator_grpc_mgmt_service.proto\x1a nic_simulator_grpc_service.proto\"R\n\x12ListOfAdminRequest\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12%\n\x0e\x61\x64min_requests\x18\x02 \x03(\x0b\x32\r.AdminRequest\"M\n\x10ListOfAdminReply\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12\"\n\radmin_replies\x18\x02 \x03(\x0b\x32\x0b.AdminReply\"^\n\x16ListOfOperationRequest\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12-\n\x12operation_requests\x18\x02 \x03(\x0b\x32\x11.OperationRequest\"Y\n\x14ListOfOperationReply\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12*\n\x11operation_replies\x18\x02 \x03(\x0b\x32\x0f.OperationReply\"O\n\x11ListOfDropRequest\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12#\n\rdrop_requests\x18\x02 \x03(\x0b\x32\x0c.DropRequest\"J\n\x0fListOfDropReply\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12 \n\x0c\x64rop_replies\x18\x02 \x03(\x0b\x32\n.DropReply\"O\n ListOfNiCServerAdminStateRequest\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12\x14\n\x0c\x61\x64min_states\x18\x02 \x03(\x08\"`\n\x1eListOfNiCServerAdminStateReply\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12\x14\n\x0c\x61\x64min_states\x18\x02 \x03(\x08\x12\x11\n\tsuccesses\x18\x03 \x03(\x08\"e\n\x18ListOfFlapCounterRequest\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12\x32\n\x15\x66lap_counter_requests\x18\x02 \x03(\x0b\x32\x13.FlapCounterRequest\"`\n\x16ListOfFlapCounterReply\x12\x15\n\rnic_addresses\x18\x01 \x03(\t\x12/\n\x14\x66lap_counter_replies\x18\x02 \x03(\x0b\x32\x11.FlapCounterReply\"\"\n\x11RpcLatencyRequest\x12\r\n\x05reset\x18\x01 \x01(\x08\"k\n\nRpcLatency\x12\x0e\n\x06server\x18\x01 \x01(\t\x12\x0b\n\x03rpc\x18\x02 \x01(\t\x12\r\n\x05\x63ount\x18\x03 \x01(\x04\x12\x10\n\x08total_ms\x18\x04 \x01(\x01\x12\x0e\n\x06max_ms\x18\x05 \x01(\x01\x12\x0f\n\x07last_ms\x18\x06 \x01(\x01\"1\n\x0fRpcLatencyReply\x12\x1e\n\tlatencies\x18\x01 \x03(\x0b\x32\x0b.RpcLatency2\xd7\x04\n\x12\x44ualTorMgmtService\x12I\n\x1dQueryAdminForwardingPortState\x12\x13.ListOfAdminRequest\x1a\x11.ListOfAdminReply\"\x00\x12G\n\x1bSetAdminForwardingPortState\x12\x13.ListOfAdminRequest\x1a\x11.ListOfAdminReply\"\x00\x12K\n\x17QueryOperationPortState\x12\x17.ListOfOperationRequest\x1a\x15.ListOfOperationReply\"\x00\x12\x31\n\x07SetDrop\x12\x12.ListOfDropRequest\x1a\x10.ListOfDropReply\"\x00\x12^\n\x16SetNicServerAdminState\x12!.ListOfNiCServerAdminStateRequest\x1a\x1f.ListOfNiCServerAdminStateReply\"\x00\x12H\n\x10QueryFlapCounter\x12\x19.ListOfFlapCounterRequest\x1a\x17.ListOfFlapCounterReply\"\x00\x12H\n\x10ResetFlapCounter\x12\x19.ListOfFlapCounterRequest\x1a\x17.ListOfFlapCounterReply\"\x00\x12\x39\n\x0fQueryRpcLatency\x12\x12.RpcLatencyRequest\x1a\x10.RpcLatencyReply\"\x00\x62\x06proto3')     # noqa: E501
 
 
 _LISTOFADMINREQUEST = DESCRIPTOR.message_types_by_name['ListOfAdminRequest']
@@ -30,6 +30,9 @@ _LISTOFNICSERVERADMINSTATEREPLY = DESCRIPTOR.message_types_by_name[
     'ListOfNiCServerAdminStateReply']
 _LISTOFFLAPCOUNTERREQUEST = DESCRIPTOR.message_types_by_name['ListOfFlapCounterRequest']
 _LISTOFFLAPCOUNTERREPLY = DESCRIPTOR.message_types_by_name['ListOfFlapCounterReply']
+_RPCLATENCYREQUEST = DESCRIPTOR.message_types_by_name['RpcLatencyRequest']
+_RPCLATENCY = DESCRIPTOR.message_types_by_name['RpcLatency']
+_RPCLATENCYREPLY = DESCRIPTOR.message_types_by_name['RpcLatencyReply']
 ListOfAdminRequest = _reflection.GeneratedProtocolMessageType('ListOfAdminRequest', (_message.Message,), {
     'DESCRIPTOR': _LISTOFADMINREQUEST,
     '__module__': 'nic_simulator_grpc_mgmt_service_pb2'
@@ -100,6 +103,27 @@ ListOfFlapCounterReply = _reflection.GeneratedProtocolMessageType('ListOfFlapCou
 })
 _sym_db.RegisterMessage(ListOfFlapCounterReply)
 
+RpcLatencyRequest = _reflection.GeneratedProtocolMessageType('RpcLatencyRequest', (_message.Message,), {
+    'DESCRIPTOR': _RPCLATENCYREQUEST,
+    '__module__': 'nic_simulator_grpc_mgmt_service_pb2'
+    # @@protoc_insertion_point(class_scope:RpcLatencyRequest)
+})
+_sym_db.RegisterMessage(RpcLatencyRequest)
+
+RpcLatency = _reflection.GeneratedProtocolMessageType('RpcLatency', (_message.Message,), {
+    'DESCRIPTOR': _RPCLATENCY,
+    '__module__': 'nic_simulator_grpc_mgmt_service_pb2'
+    # @@protoc_insertion_point(class_scope:RpcLatency)
+})
+_sym_db.RegisterMessage(RpcLatency)
+
+RpcLatencyReply = _reflection.GeneratedProtocolMessageType('RpcLatencyReply', (_message.Message,), {
+    'DESCRIPTOR': _RPCLATENCYREPLY,
+    '__module__': 'nic_simulator_grpc_mgmt_service_pb2'
+    # @@protoc_insertion_point(class_scope:RpcLatencyReply)
+})
+_sym_db.RegisterMessage(RpcLatencyReply)
+
 _DUALTORMGMTSERVICE = DESCRIPTOR.services_by_name['DualTorMgmtService']
 if _descriptor._USE_C_DESCRIPTORS == False:                                 # noqa: E712
 
@@ -124,6 +148,12 @@ if _descriptor._USE_C_DESCRIPTORS == False:                                 # no
     _LISTOFFLAPCOUNTERREQUEST._serialized_end = 862
     _LISTOFFLAPCOUNTERREPLY._serialized_start = 864
     _LISTOFFLAPCOUNTERREPLY._serialized_end = 960
-    _DUALTORMGMTSERVICE._serialized_start = 963
-    _DUALTORMGMTSERVICE._serialized_end = 1503
+    _RPCLATENCYREQUEST._serialized_start = 962
+    _RPCLATENCYREQUEST._serialized_end = 996
+    _RPCLATENCY._serialized_start = 998
+    _RPCLATENCY._serialized_end = 1105
+    _RPCLATENCYREPLY._serialized_start = 1107
+    _RPCLATENCYREPLY._serialized_end = 1156
+    _DUALTORMGMTSERVICE._serialized_start = 1159
+    _DUALTORMGMTSERVICE._serialized_end = 1758
 # @@protoc_insertion_point(module_scope)
@@ -49,6 +49,11 @@ class DualTorMgmtServiceStub(object):
             request_serializer=nic__simulator__grpc__mgmt__service__pb2.ListOfFlapCounterRequest.SerializeToString,
             response_deserializer=nic__simulator__grpc__mgmt__service__pb2.ListOfFlapCounterReply.FromString,
         )
+        self.QueryRpcLatency = channel.unary_unary(
+            '/DualTorMgmtService/QueryRpcLatency',
+            request_serializer=nic__simulator__grpc__mgmt__service__pb2.RpcLatencyRequest.SerializeToString,
+            response_deserializer=nic__simulator__grpc__mgmt__service__pb2.RpcLatencyReply.FromString,
+        )
 
 
 class DualTorMgmtServiceServicer(object):
@@ -96,6 +101,12 @@ class DualTorMgmtServiceServicer(object):
         context.set_details('Method not implemented!')
         raise NotImplementedError('Method not implemented!')
 
+    def QueryRpcLatency(self, request, context):
+        """Missing associated documentation comment in .proto file."""
+        context.set_code(grpc.StatusCode.UNIMPLEMENTED)
+        context.set_details('Method not implemented!')
+        raise NotImplementedError('Method not implemented!')
+
 
 def add_DualTorMgmtServiceServicer_to_server(servicer, server):
     rpc_method_handlers = {
@@ -134,6 +145,11 @@ def add_DualTorMgmtServiceServicer_to_server(servicer, server):
             request_deserializer=nic__simulator__grpc__mgmt__service__pb2.ListOfFlapCounterRequest.FromString,
             response_serializer=nic__simulator__grpc__mgmt__service__pb2.ListOfFlapCounterReply.SerializeToString,
         ),
+        'QueryRpcLatency': grpc.unary_unary_rpc_method_handler(
+            servicer.QueryRpcLatency,
+            request_deserializer=nic__simulator__grpc__mgmt__service__pb2.RpcLatencyRequest.FromString,
+            response_serializer=nic__simulator__grpc__mgmt__service__pb2.RpcLatencyReply.SerializeToString,
+        ),
     }
     generic_handler = grpc.method_handlers_generic_handler(
         'DualTorMgmtService', rpc_method_handlers)
@@ -263,3 +279,20 @@ class DualTorMgmtService(object):
                                              nic__simulator__grpc__mgmt__service__pb2.ListOfFlapCounterReply.FromString,
                                              options, channel_credentials,
                                              insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
+
+    @staticmethod
+    def QueryRpcLatency(request,
+                        target,
+                        options=(),
+                        channel_credentials=None,
+                        call_credentials=None,
+                        insecure=False,
+                        compression=None,
+                        wait_for_ready=None,
+                        timeout=None,
+                        metadata=None):
+        return grpc.experimental.unary_unary(request, target, '/DualTorMgmtService/QueryRpcLatency',
+                                             nic__simulator__grpc__mgmt__service__pb2.RpcLatencyRequest.SerializeToString,                                          # noqa: E501
+                                             nic__simulator__grpc__mgmt__service__pb2.RpcLatencyReply.FromString,
+                                             options, channel_credentials,
+                                             insecure, call_credentials, compression, wait_for_ready, timeout, metadata)
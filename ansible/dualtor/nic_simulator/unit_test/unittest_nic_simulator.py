@@ -0,0 +1,134 @@
+import os
+import sys
+import unittest
+from unittest import mock
+
+import grpc
+
+NIC_SIMULATOR_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+# Like the nic_simulator service runs it, the generated gRPC modules are importable from its folder
+sys.path.insert(0, NIC_SIMULATOR_PATH)
+
+import nic_simulator  # noqa: E402
+
+BRIDGE = "baa-vms-1-0"
+
+
+class TestOVSBundle(unittest.TestCase):
+
+    def setUp(self):
+        self.commands = []
+        self.bundles = []
+        patcher = mock.patch.object(nic_simulator, "run_command", side_effect=self.run_command)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.group = nic_simulator.OVSGroup(1, "select", output_ports=[2, 3])
+        self.flow = nic_simulator.OVSFlow(4, packet_filter="ip", output_ports=[5], priority=10)
+        self.upstream_flow = nic_simulator.OVSUpstreamFlow(6, output_ports=[2, 3], priority=20)
+
+    def run_command(self, cmd, check=True):
+        self.commands.append(cmd)
+        if " bundle " in cmd:
+            # The bundle file is removed once committed, keep its content
+            with open(cmd.split()[-1]) as bundle_file:
+                self.bundles.append(bundle_file.read())
+
+    def modify(self, bundle):
+        bundle.mod_flow(self.flow)
+        bundle.mod_group(self.group)
+        self.flow.set_drop()
+        bundle.mod_flow(self.upstream_flow)
+        bundle.mod_flow(self.flow)
+        self.upstream_flow.set_drop(portid=0)
+        bundle.mod_group(self.group)
+
+    def test_commit_bundle(self):
+        bundle = nic_simulator.OVSBundle(BRIDGE)
+        self.modify(bundle)
+        with mock.patch.object(nic_simulator, "USE_OPENFLOW_BUNDLE", True):
+            bundle.commit()
+
+        self.assertEqual(len(self.commands), 1)
+        self.assertTrue(self.commands[0].startswith("ovs-ofctl -O OpenFlow15 bundle %s " % BRIDGE))
+        self.assertFalse(os.path.exists(self.commands[0].split()[-1]))
+        # Groups first as flows may refer to them, each object once with its last state
+        self.assertEqual(self.bundles, [
+            "group modify group_id=1,type=select,bucket=output:2,bucket=output:3\n"
+            "flow modify_strict priority=10,ip,in_port=4,actions=drop\n"
+            "flow modify_strict priority=20,in_port=6,actions=output:3\n"
+        ])
+        self.assertEqual((bundle.flows, bundle.groups), ([], []))
+
+        # Nothing left to commit
+        bundle.commit()
+        self.assertEqual(len(self.commands), 1)
+
+    def test_commit_without_bundle(self):
+        bundle = nic_simulator.OVSBundle(BRIDGE)
+        self.modify(bundle)
+        with mock.patch.object(nic_simulator, "USE_OPENFLOW_BUNDLE", False):
+            bundle.commit()
+
+        self.assertEqual(self.commands, [
+            "ovs-ofctl -O OpenFlow13 mod-group %s group_id=1,type=select,bucket=output:2,bucket=output:3" % BRIDGE,
+            "ovs-ofctl --strict mod-flows %s priority=10,ip,in_port=4,actions=drop" % BRIDGE,
+            "ovs-ofctl --strict mod-flows %s priority=20,in_port=6,actions=output:3" % BRIDGE,
+        ])
+        self.assertEqual(self.bundles, [])
+        self.assertEqual((bundle.flows, bundle.groups), ([], []))
+
+    def test_commit_error(self):
+        bundle = nic_simulator.OVSBundle(BRIDGE)
+        self.modify(bundle)
+        with mock.patch.object(nic_simulator, "USE_OPENFLOW_BUNDLE", True), \
+                mock.patch.object(nic_simulator, "run_command", side_effect=RuntimeError("ovs-ofctl failed")):
+            with self.assertRaises(RuntimeError):
+                bundle.commit()
+        self.assertEqual((bundle.flows, bundle.groups), ([], []))
+
+
+class TestWaitNiCReplies(unittest.TestCase):
+
+    @staticmethod
+    def future(reply=None, error=None):
+        future = mock.Mock()
+        future.result.side_effect = error
+        future.result.return_value = reply
+        return future
+
+    def test_all_succeeded(self):
+        context = mock.Mock()
+        replies = nic_simulator.MgmtServer._wait_nic_replies(
+            "SetDrop", ["192.168.0.3", "192.168.0.5"], [self.future("reply3"), self.future("reply5")], context)
+        self.assertEqual(replies, ["reply3", "reply5"])
+        context.set_code.assert_not_called()
+
+    def test_failed(self):
+        context = mock.Mock()
+        reply_futures = [
+            self.future(error=RuntimeError("timeout")),
+            self.future("reply5"),
+            self.future(error=RuntimeError("unavailable")),
+        ]
+        replies = nic_simulator.MgmtServer._wait_nic_replies(
+            "SetDrop", ["192.168.0.3", "192.168.0.5", "192.168.0.7"], reply_futures, context)
+        self.assertIsNone(replies)
+        # Waited for all the NiC servers, and reported the result of each
+        for future in reply_futures:
+            future.result.assert_called_once_with()
+        context.set_code.assert_called_once_with(grpc.StatusCode.ABORTED)
+        context.set_details.assert_called_once_with(
+            "Error in SetDrop to 192.168.0.3: RuntimeError('timeout'), 192.168.0.7: RuntimeError('unavailable'); "
+            "succeeded on 192.168.0.5, their state is changed")
+
+        context = mock.Mock()
+        nic_simulator.MgmtServer._wait_nic_replies(
+            "SetAdminForwardingPortState", ["192.168.0.3"], [self.future(error=RuntimeError("timeout"))], context)
+        context.set_details.assert_called_once_with(
+            "Error in SetAdminForwardingPortState to 192.168.0.3: RuntimeError('timeout'); "
+            "succeeded on none, their state is changed")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,11 +1,11 @@
 #!/usr/bin/python
 
+import collections
 import itertools
 import math
 import os
 import yaml
 import re
-import requests
 import ipaddress
 import json
 import sys
@@ -14,14 +14,19 @@ import random
 import logging
 import time
 from multiprocessing.pool import ThreadPool
+from threading import Lock, Semaphore, Thread
 from ansible.module_utils.basic import AnsibleModule
 from ansible.module_utils.debug_utils import config_module_logging
 from ansible.module_utils.multi_servers_utils import MultiServersUtils
 
 if sys.version_info.major == 3:
     UNICODE_TYPE = str
+    from queue import Queue
+    from urllib.parse import quote_plus
 else:
     UNICODE_TYPE = unicode      # noqa: F821
+    from Queue import Queue
+    from urllib import quote_plus
 
 DOCUMENTATION = '''
 module:  announce_routes
@@ -45,6 +50,17 @@ Options:
     - option-name: path
       description: to figure out the path of topo_{}.yml
       required: False
+
+    - option-name: routes_batch_size
+      description: number of routes posted to exabgp in one HTTP request
+      required: False
+
+    - option-name: max_parallel_peers
+      description: max number of peers to send routes to in parallel, 0 means all peers in parallel
+      required: False
+
+Routes are streamed to each exabgp HTTP API over one keep-alive connection, with batches pipelined. The number of
+routes, seconds and routes/sec of each exabgp HTTP port are returned in route_injection.
 '''
 
 EXAMPLES = '''
@@ -84,6 +100,10 @@ BGP_SCALE_T1S = [
     't1-isolated-d510u2', 't1-isolated-d510u2s2'
 ]
 ROUTES_BATCH_SIZE = 200
+# Max number of peers to send routes to in parallel, 0 means no limit
+MAX_PARALLEL_PEERS = 0
+# Max number of batches sent to an exabgp HTTP API without response
+MAX_PENDING_BATCHES = 4
 
 # Describe default number of COLOs
 COLO_NUMBER = 30
@@ -132,6 +152,7 @@ def wait_for_http(host_ip, http_port, timeout=10):
             started = True
         except socket.error:
             tries += 1
+    s.close()
 
     return started
 
@@ -171,53 +192,340 @@ def read_topo(topo_name, path):
         return {}
 
 
-def change_routes(action, ptf_ip, port, routes, routes_batch_size=ROUTES_BATCH_SIZE):
+# Form encoding of the ascii characters, same as requests does for the "commands" form field
+FORM_QUOTE_TABLE = dict((i, quote_plus(chr(i))) for i in range(128) if quote_plus(chr(i)) != chr(i))
+
+
+class ExabgpHttpConnection(object):
+    """
+    Keep-alive HTTP/1.1 connection to the HTTP API of an exabgp process.
+
+    Batches of routes are pipelined: up to max_pending_batches requests are sent before waiting for their responses,
+    then a new batch is sent only after the oldest response is received, so a slow exabgp process throttles the sender.
+    A new connection sends one batch at a time until a response shows the server keeps the connection alive, servers
+    closing the connection after each response are never pipelined to.
+    If the connection is broken, it is reconnected and the oldest batch without response is sent again, the others
+    are sent again once it is answered.
+    """
+
+    def __init__(self, host, port, max_pending_batches=None, timeout=360):
+        self.host = host
+        self.port = port
+        self.url = "http://%s:%d" % (host, port)
+        # Batches without response allowed on a connection known to be kept alive
+        self.pipelined_batches = max_pending_batches or MAX_PENDING_BATCHES
+        # Batches without response allowed on current connection, 1 until a response shows keep-alive
+        self.max_pending_batches = 1
+        self.timeout = timeout
+        # Route sets of a port are sent one after another, so that they reach exabgp in order
+        self.lock = Lock()
+        self.sock = None
+        self.rfile = None
+        # Batches without response, the first "sent" of them are sent on current connection
+        self.pending = collections.deque()
+        self.sent = 0
+
+    def connect(self):
+        self.sock = socket.create_connection((self.host, self.port), timeout=self.timeout)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.rfile = self.sock.makefile("rb")
+
+    def close(self):
+        if self.sock:
+            self.rfile.close()
+            self.sock.close()
+        self.sock = None
+        self.rfile = None
+        self.sent = 0
+
+    def send_request(self, payload):
+        body = payload.encode("ascii")
+        head = ("POST / HTTP/1.1\r\nHost: {}:{}\r\nContent-Type: application/x-www-form-urlencoded\r\n"
+                "Content-Length: {}\r\n\r\n").format(self.host, self.port, len(body))
+        self.sock.sendall(head.encode("ascii") + body)
+
+    def read_response(self):
+        """
+        Read a response, return (status_code, reason, headers, text, keep_alive).
+        """
+        status_line = self.rfile.readline()
+        if not status_line:
+            raise socket.error("Connection closed by exabgp HTTP API {}".format(self.url))
+        version, status_code, reason = (status_line.decode("latin-1").rstrip("\r\n").split(" ", 2) + [""])[:3]
+        headers = {}
+        while True:
+            line = self.rfile.readline()
+            if not line:
+                raise socket.error("Connection closed by exabgp HTTP API {}".format(self.url))
+            if line in (b"\r\n", b"\n"):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            chunks = []
+            while True:
+                size = int(self.rfile.readline().split(b";")[0], 16)
+                chunk = self.rfile.read(size + 2)[:size]
+                if not size:
+                    break
+                chunks.append(chunk)
+            text = b"".join(chunks)
+        elif "content-length" in headers:
+            text = self.rfile.read(int(headers["content-length"]))
+        else:
+            text = self.rfile.read()
+            headers["connection"] = "close"
+        keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+        return int(status_code), reason, headers, text.decode("utf-8", "replace"), keep_alive
+
+    def send_pending(self):
+        """
+        Send the pending batches not sent on current connection yet, max_pending_batches batches at most.
+        """
+        if self.sock is None:
+            self.connect()
+        while self.sent < min(len(self.pending), self.max_pending_batches):
+            self.send_request(self.pending[self.sent])
+            self.sent += 1
+
+    def reconnect(self, error):
+        # nosemgrep-next-line
+        # Flaky error `ConnectionResetError(104, 'Connection reset by peer')` may happen while sending routes.
+        # To avoid this error, we reconnect and resend the oldest batch without response after a short sleep.
+        # We use a "backoff" algorithm here, the maximum retry times is five.
+        # If one retry fails, we increase the waiting time.
+        for attempt in range(0, 5):
+            logging.debug("Got exception {} from {}, will try to connect again".format(error, self.url))
+            self.close()
+            # Don't pipeline on the new connection before a response shows it is kept alive
+            self.max_pending_batches = 1
+            time.sleep(0.01 * (attempt + 1))
+            try:
+                self.send_pending()
+                return
+            except socket.error as e:
+                error = e
+        self.close()
+        raise error
+
+    def receive(self):
+        """
+        Receive the response of the oldest pending batch.
+        """
+        for attempt in range(0, 5):
+            try:
+                status_code, reason, headers, text, keep_alive = self.read_response()
+                break
+            except (socket.error, ValueError) as e:
+                if attempt == 4:
+                    self.close()
+                    raise
+                self.reconnect(e)
+
+        payload = self.pending.popleft()
+        self.sent -= 1
+        if status_code != 200:
+            raise Exception(
+                "Change routes failed: url={}, data={}, r.status_code={}, r.reason={}, r.headers={}, r.text={}".format(
+                    self.url,
+                    json.dumps(payload),
+                    status_code,
+                    reason,
+                    headers,
+                    text
+                )
+            )
+        if keep_alive:
+            self.max_pending_batches = self.pipelined_batches
+        else:
+            # The server closes connection after the response, batches can't be pipelined
+            self.close()
+            self.max_pending_batches = 1
+        try:
+            self.send_pending()
+        except socket.error as e:
+            self.reconnect(e)
+
+    def post(self, payload):
+        """
+        Send a batch, wait for the oldest response first if max_pending_batches batches are without response.
+        """
+        while len(self.pending) >= self.max_pending_batches:
+            self.receive()
+        self.pending.append(payload)
+        try:
+            self.send_pending()
+        except socket.error as e:
+            self.reconnect(e)
+
+    def flush(self):
+        """
+        Wait for the responses of all pending batches.
+        """
+        while self.pending:
+            self.receive()
+
+    def reset(self):
+        """
+        Drop the pending batches and the connection, after sending routes failed.
+        """
+        self.close()
+        self.pending.clear()
+
+
+exabgp_connections = {}
+exabgp_connections_lock = Lock()
+
+
+def get_exabgp_connection(ptf_ip, port):
+    """
+    Get the pooled connection to the exabgp HTTP API listening on the port, one connection per port.
+    """
+    with exabgp_connections_lock:
+        if (ptf_ip, port) not in exabgp_connections:
+            exabgp_connections[(ptf_ip, port)] = ExabgpHttpConnection(ptf_ip, port)
+        return exabgp_connections[(ptf_ip, port)]
+
+
+def form_quote(command):
+    try:
+        command.encode("ascii")
+    except UnicodeError:
+        return quote_plus(command)
+    return command.translate(FORM_QUOTE_TABLE)
+
+
+def route_command(action, prefix, nexthop, aspath):
+    if aspath:
+        return "{} route {} next-hop {} as-path [ {} ]".format(action, prefix, nexthop, aspath)
+    return "{} route {} next-hop {}".format(action, prefix, nexthop)
+
+
+def iter_route_payloads(action, routes, routes_batch_size):
+    """
+    Generate the form encoded payloads of exabgp HTTP API, each payload has routes_batch_size routes at most.
+    Commands are encoded once while being generated, instead of encoding the whole form of each batch.
+    """
+    separator = form_quote(";")
+    batch = []
+    for prefix, nexthop, aspath in routes:
+        batch.append(form_quote(route_command(action, prefix, nexthop, aspath)))
+        if len(batch) >= routes_batch_size:
+            yield "commands=" + separator.join(batch)
+            batch = []
+    if batch:
+        yield "commands=" + separator.join(batch)
+
+
+class RouteInjector(object):
+    """
+    Announce or withdraw the routes of a whole topology as one streaming call.
+
+    Route sets submitted for a port are sent in order by a sender thread of the port, over the pooled connection of
+    the port. Senders of different ports run in parallel, at most max_parallel_peers of them at the same time if it
+    is set. submit() doesn't wait for the routes to be sent, so routes of next peers are generated while routes of
+    previous peers are being sent.
+    """
+
+    def __init__(self, ptf_ip, max_parallel_peers=0):
+        self.ptf_ip = ptf_ip
+        self.parallel_peers = Semaphore(max_parallel_peers) if max_parallel_peers > 0 else None
+        self.senders = {}
+        self.errors = []
+        self.stats = {}
+
+    def submit(self, action, port, routes):
+        if port not in self.senders:
+            route_sets = Queue()
+            sender = Thread(target=self.send_route_sets, args=(port, route_sets))
+            sender.daemon = True
+            self.senders[port] = (sender, route_sets)
+            sender.start()
+        # Copy the routes, callers may go on changing their lists while the routes are being sent
+        self.senders[port][1].put((action, list(routes)))
+
+    def send_route_sets(self, port, route_sets):
+        while True:
+            route_set = route_sets.get()
+            if route_set is None:
+                return
+            if self.errors:
+                continue
+            action, routes = route_set
+            try:
+                if self.parallel_peers:
+                    with self.parallel_peers:
+                        seconds = send_routes(action, self.ptf_ip, port, routes)
+                else:
+                    seconds = send_routes(action, self.ptf_ip, port, routes)
+                stats = self.stats.setdefault(port, {"routes": 0, "seconds": 0.0})
+                stats["routes"] += len(routes)
+                stats["seconds"] += seconds
+            except Exception as e:
+                logging.error("Sending routes to port {} failed: {}".format(port, repr(e)))
+                self.errors.append(e)
+
+    def wait(self):
+        """
+        Wait until all submitted routes are sent, raise the first error of senders.
+
+        Returns:
+            dict: Routes sent, seconds spent and routes/sec of each port.
+        """
+        for _, route_sets in self.senders.values():
+            route_sets.put(None)
+        for sender, _ in self.senders.values():
+            sender.join()
+        if self.errors:
+            raise self.errors[0]
+
+        stats = {}
+        for port, port_stats in sorted(self.stats.items()):
+            routes, seconds = port_stats["routes"], port_stats["seconds"]
+            stats[port] = {
+                "routes": routes,
+                "seconds": round(seconds, 3),
+                "routes_per_sec": int(routes / seconds) if seconds else 0
+            }
+            logging.info("Sent {} routes to port {} in {:.3f} seconds, {} routes/sec".format(
+                routes, port, seconds, stats[port]["routes_per_sec"]))
+        return stats
+
+
+# The RouteInjector used by change_routes, set when the routes of a topology are announced or withdrawn as a whole
+route_injector = None
+
+
+def change_routes(action, ptf_ip, port, routes, routes_batch_size=None):
+    if route_injector is not None and route_injector.ptf_ip == ptf_ip and routes_batch_size is None:
+        route_injector.submit(action, port, routes)
+    else:
+        send_routes(action, ptf_ip, port, routes, routes_batch_size)
+
+
+def send_routes(action, ptf_ip, port, routes, routes_batch_size=None):
+    """
+    Send the routes to the exabgp HTTP API over the pooled connection, return seconds spent on sending.
+    """
+    routes_batch_size = routes_batch_size or ROUTES_BATCH_SIZE
     logging.debug("action = {}, ptf_ip = {}, port = {}, routes_batch_size = {}, routes = {}"
                   .format(action, ptf_ip, port, routes_batch_size, routes))
-    messages = []
-    for prefix, nexthop, aspath in routes:
-        if aspath:
-            messages.append(
-                "{} route {} next-hop {} as-path [ {} ]".format(action, prefix, nexthop, aspath))
-        else:
-            messages.append(
-                "{} route {} next-hop {}".format(action, prefix, nexthop))
-    wait_for_http(ptf_ip, port, timeout=60)
-    url = "http://%s:%d" % (ptf_ip, port)
-    for i in range(0, len(messages), routes_batch_size):
-        batch_messages = messages[i:i+routes_batch_size]
-        data = {"commands": ";".join(batch_messages)}
-        logging.debug("Posting to url={} data={}".format(url, json.dumps(data)))
-        post_data_to_url(url, data)
-
-
-def post_data_to_url(url, data):
-    # nosemgrep-next-line
-    # Flaky error `ConnectionResetError(104, 'Connection reset by peer')` may happen while using `requests.post`
-    # To avoid this error, we add sleep time before sending request.
-    # We use a "backoff" algorithm here, the maximum retry times is five.
-    # If one retry fails, we increase the waiting time.
-    for i in range(0, 5):
+    connection = get_exabgp_connection(ptf_ip, port)
+    with connection.lock:
+        if connection.sock is None:
+            wait_for_http(ptf_ip, port, timeout=60)
+        start = time.time()
         try:
-            r = requests.post(url, data=data, timeout=360, proxies={"http": None, "https": None})
-            break
-        except Exception as e:
-            logging.debug("Got exception {}, will try to connect again".format(e))
-            time.sleep(0.01 * (i+1))
-            if i == 4:
-                raise e
-
-    if r.status_code != 200:
-        raise Exception(
-            "Change routes failed: url={}, data={}, r.status_code={}, r.reason={}, r.headers={}, r.text={}".format(
-                url,
-                json.dumps(data),
-                r.status_code,
-                r.reason,
-                r.headers,
-                r.text
-            )
-        )
+            for payload in iter_route_payloads(action, routes, routes_batch_size):
+                logging.debug("Posting to url={} data={}".format(connection.url, payload))
+                connection.post(payload)
+            connection.flush()
+        except Exception:
+            # Don't leave responses of the failed route set to next route sets of the port
+            connection.reset()
+            raise
+    return time.time() - start
 
 
 def send_routes_for_each_set(args):
@@ -228,6 +536,7 @@ def send_routes_for_each_set(args):
 def send_routes_in_parallel(route_set):
     """
     Sends the given set of routes in parallel using a thread pool.
+    Route sets are submitted to the RouteInjector instead if routes of the topology are sent by it.
 
     Args:
         route_set (list): A list of route sets to send.
@@ -235,8 +544,19 @@ def send_routes_in_parallel(route_set):
     Returns:
         None
     """
-    # Create a pool of worker processes
-    pool = ThreadPool(processes=len(route_set))
+    if not route_set:
+        return
+
+    if route_injector is not None:
+        for route_set_args in route_set:
+            send_routes_for_each_set(route_set_args)
+        return
+
+    # Create a pool of worker threads, at most MAX_PARALLEL_PEERS of them if it is set
+    processes = len(route_set)
+    if MAX_PARALLEL_PEERS > 0:
+        processes = min(processes, MAX_PARALLEL_PEERS)
+    pool = ThreadPool(processes=processes)
 
     # Use the ThreadPool.map function to apply the function to each set of routes
     results = pool.map(send_routes_for_each_set, route_set)
@@ -298,9 +618,15 @@ def get_uplink_router_as_path(uplink_router_type, spine_asn):
     return default_route_as_path
 
 
+def ip_int_to_str(ip, version):
+    if version == 4:
+        return "{}.{}.{}.{}".format(ip >> 24 & 0xff, ip >> 16 & 0xff, ip >> 8 & 0xff, ip & 0xff)
+    return str(ipaddress.IPv6Address(ip))
+
+
 # Generate prefixs of route
 def generate_prefix(subnet_size, ip_base, offset):
-    ip = get_new_ip(ip_base, offset)
+    ip = ip_int_to_str(int(ip_base) + offset, ip_base.version)
     prefixlen = (ip_base.max_prefixlen - int(math.log(subnet_size, 2)))
     prefix = "{}/{}".format(ip, prefixlen)
     return prefix
@@ -404,122 +730,158 @@ def generate_routes(family, podset_number, tor_number, tor_subnet_number,
     # us to overflow the 192.168.0.0/16 private address space here.
     # This should be fine for internal use, but may pose an issue if used otherwise
     suffix = 0
+    tor_subnet_routes = iter_tor_subnet_routes(podset_number, tor_number, tor_subnet_number, spine_asn,
+                                               leaf_asn_start, tor_asn_start, tor_subnet_size, max_tor_subnet_number,
+                                               topo, router_type, tor_index, set_num, core_ra_asn,
+                                               ipv6_address_pattern, offset)
+    for suffix, prefix, prefix_v6, aspath in tor_subnet_routes:
+        if family in ["v4", "both"]:
+            routes.append((prefix, nexthop, aspath))
+        if family in ["v6", "both"]:
+            routes.append((prefix_v6, nexthop_v6, aspath))
+
+    return routes, suffix
+
+
+tor_subnet_prefixes_cache = {}
+
+
+def get_tor_subnet_prefixes(podset_number, tor_number, tor_subnet_number, max_tor_subnet_number, tor_subnet_size,
+                            ipv6_address_pattern, offset):
+    """
+    Get the (suffix, prefix, prefix_v6) of all tor subnets, indexed by (podset * tor_number + tor) * tor_subnet_number
+    + subnet. Prefixes are computed with integer arithmetic once and shared by all routers advertising them.
+    """
+    key = (podset_number, tor_number, tor_subnet_number, max_tor_subnet_number, tor_subnet_size,
+           ipv6_address_pattern, offset)
+    if key in tor_subnet_prefixes_cache:
+        return tor_subnet_prefixes_cache[key]
+
+    prefixlen_v4 = (32 - int(math.log(tor_subnet_size, 2)))
+    prefixes = []
     for podset in range(0, podset_number):
         for tor in range(0, tor_number):
             for subnet in range(0, tor_subnet_number):
-                if router_type == "core":
-                    # Advertise podset 3+ to T2 DUT
-                    if podset < 3:
-                        continue
+                suffix = ((podset * tor_number * max_tor_subnet_number * tor_subnet_size) +
+                          (tor * max_tor_subnet_number * tor_subnet_size) +
+                          (subnet * tor_subnet_size) + offset)
+                octet2 = 168 + suffix // (256 ** 2)
+                octet1 = 192 + octet2 // 256
+                octet2 = octet2 % 256
+                octet3 = (suffix // 256) % 256
+                octet4 = suffix % 256
+                prefix = "{}.{}.{}.{}/{}".format(octet1, octet2, octet3, octet4, prefixlen_v4)
+                prefix_v6 = ipv6_address_pattern % (octet1, octet2, octet3, octet4)
+                prefixes.append((suffix, prefix, prefix_v6))
+    tor_subnet_prefixes_cache[key] = prefixes
+    return prefixes
+
+
+def iter_tor_subnet_routes(podset_number, tor_number, tor_subnet_number, spine_asn, leaf_asn_start, tor_asn_start,
+                           tor_subnet_size, max_tor_subnet_number, topo, router_type, tor_index, set_num,
+                           core_ra_asn, ipv6_address_pattern, offset):
+    """
+    Generate (suffix, prefix, prefix_v6, aspath) of the tor subnets advertised by a router.
+    Podsets and tors the router doesn't advertise are skipped as a whole.
+    """
+    prefixes = get_tor_subnet_prefixes(podset_number, tor_number, tor_subnet_number, max_tor_subnet_number,
+                                       tor_subnet_size, ipv6_address_pattern, offset)
+    # First 3 pods are advertised from T1 - so remove 3 from the total pods being advertised by T3
+    first_third_podset_number = int(math.ceil((podset_number - 3) / 3.0))
+    second_third_podset_number = int(math.ceil(((podset_number - 3) * 2) / 3.0))
 
-                    # First 3 pods are advertised from T1 - so remove 3 from the total pods being advertised by T3
-                    first_third_podset_number = int(
-                        math.ceil((podset_number - 3) / 3.0))
-                    second_third_podset_number = int(
-                        math.ceil(((podset_number - 3) * 2) / 3.0))
-
-                    if set_num is not None:
-                        # For T2, we have 3 sets - 1 set advertises first 1/3 podsets,
-                        # second set advertises second 1/3 podsets, and all VM's advertises the last 1/3 podsets
-                        if podset <= first_third_podset_number and set_num != 0:
-                            continue
-                        elif podset > first_third_podset_number and \
-                                podset < second_third_podset_number and set_num != 1:
-                            continue
-                if router_type == "spine" or router_type == "mgmtleaf":
-                    # Skip podset 0 for T2
-                    if podset == 0:
+    for podset in range(0, podset_number):
+        if router_type == "core":
+            # Advertise podset 3+ to T2 DUT
+            if podset < 3:
+                continue
+
+            if set_num is not None:
+                # For T2, we have 3 sets - 1 set advertises first 1/3 podsets,
+                # second set advertises second 1/3 podsets, and all VM's advertises the last 1/3 podsets
+                if podset <= first_third_podset_number and set_num != 0:
+                    continue
+                elif podset > first_third_podset_number and \
+                        podset < second_third_podset_number and set_num != 1:
+                    continue
+        if router_type == "spine" or router_type == "mgmtleaf":
+            # Skip podset 0 for T2
+            if podset == 0:
+                continue
+        elif router_type == "leaf":
+            if topo == 't2':
+                # Send routes for podset 0-2 (first 3 pods) to the T2 DUT
+                if podset > 2:
+                    continue
+
+                if set_num is not None:
+                    # For T2, we have 3 sets - 1 set advertises podset 1,
+                    # second set advertises podset 2, and all VM's advertises podset3
+                    if podset == 0 and set_num != 0:
                         continue
-                elif router_type == "leaf":
-                    if topo == 't2':
-                        # Send routes for podset 0-2 (first 3 pods) to the T2 DUT
-                        if podset > 2:
-                            continue
-
-                        if set_num is not None:
-                            # For T2, we have 3 sets - 1 set advertises podset 1,
-                            # second set advertises podset 2, and all VM's advertises podset3
-                            if podset == 0 and set_num != 0:
-                                continue
-                            elif podset == 1 and set_num != 1:
-                                continue
-                    elif topo == 't0-mclag':
-                        if podset > 1:
-                            continue
-                        if set_num is not None:
-                            if podset == 0 and set_num != 0:
-                                continue
-                            elif podset == 1 and set_num != 1:
-                                continue
-                    else:
-                        # Skip tor 0 podset 0 for T1
-                        if podset == 0 and tor == 0:
-                            continue
-                elif router_type == "tor":
-                    # Skip non podset 0 for T0
-                    if podset != 0:
+                    elif podset == 1 and set_num != 1:
                         continue
-                    # Skip subnet 0 (vlan ip) for M0
-                    elif topo == "m0" and subnet == 0:
+            elif topo == 't0-mclag':
+                if podset > 1:
+                    continue
+                if set_num is not None:
+                    if podset == 0 and set_num != 0:
                         continue
-                    elif tor != tor_index:
+                    elif podset == 1 and set_num != 1:
                         continue
+        elif router_type == "tor":
+            # Skip non podset 0 for T0
+            if podset != 0:
+                continue
 
-                suffix = ((podset * tor_number * max_tor_subnet_number * tor_subnet_size) +
-                          (tor * max_tor_subnet_number * tor_subnet_size) +
-                          (subnet * tor_subnet_size) + offset)
-                octet2 = (168 + int(suffix / (256 ** 2)))
-                octet1 = (192 + int(octet2 / 256))
-                octet2 = (octet2 % 256)
-                octet3 = (int(suffix / 256) % 256)
-                octet4 = (suffix % 256)
-                prefixlen_v4 = (32 - int(math.log(tor_subnet_size, 2)))
-
-                prefix = "{}.{}.{}.{}/{}".format(octet1,
-                                                 octet2, octet3, octet4, prefixlen_v4)
-                prefix_v6 = ipv6_address_pattern % (
-                    octet1, octet2, octet3, octet4)
-
-                leaf_asn = leaf_asn_start + podset
-                tor_asn = tor_asn_start + tor
-
-                aspath = None
-                if router_type == "core":
-                    aspath = "{} {}".format(leaf_asn, core_ra_asn)
-                elif router_type == "spine" or router_type == "mgmtleaf":
-                    aspath = "{} {}".format(leaf_asn, tor_asn)
-                elif router_type == "leaf":
-                    if topo == "t2":
-                        aspath = "{}".format(tor_asn)
-                    elif topo == "t0-mclag":
+        leaf_asn = leaf_asn_start + podset
+        for tor in range(0, tor_number):
+            if router_type == "leaf" and topo not in ["t2", "t0-mclag"]:
+                # Skip tor 0 podset 0 for T1
+                if podset == 0 and tor == 0:
+                    continue
+            elif router_type == "tor" and tor != tor_index:
+                continue
+
+            tor_asn = tor_asn_start + tor
+            aspath = None
+            if router_type == "core":
+                aspath = "{} {}".format(leaf_asn, core_ra_asn)
+            elif router_type == "spine" or router_type == "mgmtleaf":
+                aspath = "{} {}".format(leaf_asn, tor_asn)
+            elif router_type == "leaf":
+                if topo == "t2":
+                    aspath = "{}".format(tor_asn)
+                elif topo == "t0-mclag":
+                    aspath = "{}".format(tor_asn)
+                else:
+                    if podset == 0:
                         aspath = "{}".format(tor_asn)
                     else:
-                        if podset == 0:
-                            aspath = "{}".format(tor_asn)
-                        else:
-                            aspath = "{} {} {}".format(
-                                spine_asn, leaf_asn, tor_asn)
-
-                if family in ["v4", "both"]:
-                    routes.append((prefix, nexthop, aspath))
-                if family in ["v6", "both"]:
-                    routes.append((prefix_v6, nexthop_v6, aspath))
+                        aspath = "{} {} {}".format(
+                            spine_asn, leaf_asn, tor_asn)
 
-    return routes, suffix
+            index = (podset * tor_number + tor) * tor_subnet_number
+            for subnet in range(0, tor_subnet_number):
+                # Skip subnet 0 (vlan ip) for M0
+                if router_type == "tor" and topo == "m0" and subnet == 0:
+                    continue
+                suffix, prefix, prefix_v6 = prefixes[index + subnet]
+                yield suffix, prefix, prefix_v6, aspath
 
 
 def generate_t1_to_t0_routes(family, offset, leaf_number, subnet_size, tor_asn, leaf_asn_start, nexthop, nexthop_v6,
                              podset_num=1, ipv6_address_pattern=IPV6_ADDRESS_PATTERN_DEFAULT_VALUE):
     routes = []
+    prefixlen_v4 = (32 - int(math.log(subnet_size, 2)))
     for podset in range(0, podset_num):
         for leaf in range(0, leaf_number):
             suffix = offset + leaf
-            octet2 = (168 + int(suffix / (256 ** 2)))
-            octet1 = (192 + int(octet2 / 256))
-            octet2 = (octet2 % 256)
-            octet3 = (int(suffix / 256) % 256)
-            octet4 = (suffix % 256)
-            prefixlen_v4 = (32 - int(math.log(subnet_size, 2)))
+            octet2 = 168 + suffix // (256 ** 2)
+            octet1 = 192 + octet2 // 256
+            octet2 = octet2 % 256
+            octet3 = (suffix // 256) % 256
+            octet4 = suffix % 256
             prefix = "{}.{}.{}.{}/{}".format(octet1, octet2, octet3, octet4, prefixlen_v4)
             prefix_v6 = ipv6_address_pattern % (
                 octet1, octet2, octet3, octet4)
@@ -762,10 +1124,8 @@ def fib_t1_lag(topo, ptf_ip, topo_name, no_default_route=False, action="announce
             routes_to_change[port] += routes_vips
 
     if action != GENERATE_WITHOUT_APPLY:
-        for port, routes in routes_to_change.items():
-            if len(routes) <= 0:
-                continue
-            change_routes(action, ptf_ip, port, routes)
+        send_routes_in_parallel([(routes, port, action, ptf_ip) for port, routes in routes_to_change.items()
+                                 if len(routes) > 0])
 
 
 def get_new_ip(curr_ip, skip_count):
@@ -1683,10 +2043,14 @@ def filterout_subnet_ipv6(aggregate_routes, candidate_routes):
 
 def filterout_subnet(aggregate_routes, candidate_routes):
     subnets = []
+    if not aggregate_routes:
+        return list(set(candidate_routes))
+    # Parse the candidate routes once, not once per aggregate route
+    candidate_nets = [(ipaddress.ip_network(UNICODE_TYPE(cr[0])), cr) for cr in candidate_routes]
     for ar in aggregate_routes:
         ar_net = ipaddress.ip_network(UNICODE_TYPE(ar[0]))
-        for cr in candidate_routes:
-            if ipaddress.ip_network(UNICODE_TYPE(cr[0])).subnet_of(ar_net):
+        for cr_net, cr in candidate_nets:
+            if cr_net.subnet_of(ar_net):
                 subnets.append(cr)
     return list(set(candidate_routes) - set(subnets))
 
@@ -1701,6 +2065,8 @@ def convert_routes_to_str(topo_routes):
 
 
 def main():
+    global ROUTES_BATCH_SIZE, MAX_PARALLEL_PEERS, route_injector
+
     module = AnsibleModule(
         argument_spec=dict(
             topo_name=dict(required=True, type='str'),
@@ -1713,7 +2079,9 @@ def main():
             peers_routes_to_change=dict(required=False, type='dict', default={}),
             log_path=dict(required=False, type='str', default='/tmp'),
             upstream_neighbor_groups=dict(required=False, type='int', default=0),
-            downstream_neighbor_groups=dict(required=False, type='int', default=0)
+            downstream_neighbor_groups=dict(required=False, type='int', default=0),
+            routes_batch_size=dict(required=False, type='int', default=ROUTES_BATCH_SIZE),
+            max_parallel_peers=dict(required=False, type='int', default=MAX_PARALLEL_PEERS)
         ),
         supports_check_mode=False)
 
@@ -1729,6 +2097,8 @@ def main():
     peers_routes_to_change = module.params['peers_routes_to_change']
     upstream_neighbor_groups = module.params['upstream_neighbor_groups']
     downstream_neighbor_groups = module.params['downstream_neighbor_groups']
+    ROUTES_BATCH_SIZE = module.params['routes_batch_size']
+    MAX_PARALLEL_PEERS = module.params['max_parallel_peers']
 
     topo = read_topo(topo_name, path)
     if not topo:
@@ -1750,53 +2120,61 @@ def main():
 
     topo_type = get_topo_type(topo_name)
     topo_routes = {}
+    if action != GENERATE_WITHOUT_APPLY:
+        # Routes of all peers are streamed to exabgp while the routes of next peers are being generated
+        route_injector = RouteInjector(ptf_ip, MAX_PARALLEL_PEERS)
     try:
         if adhoc:
             adhoc_routes(topo, ptf_ip, peers_routes_to_change, action)
-            module.exit_json(change=True)
+            exit_args = dict(change=True)
         elif topo_type == "t0":
             fib_t0(topo, ptf_ip, no_default_route=is_storage_backend, action=action,
                    upstream_neighbor_groups=upstream_neighbor_groups, topo_routes=topo_routes)
-            module.exit_json(changed=True, topo_routes=convert_routes_to_str(topo_routes))
+            exit_args = dict(changed=True, topo_routes=topo_routes)
         elif topo_type == "t1" or topo_type == "smartswitch-t1":
             fib_t1_lag(
                 topo, ptf_ip, topo_name, no_default_route=is_storage_backend, action=action,
                 tor_default_route=tor_default_route, downstream_neighbor_groups=downstream_neighbor_groups,
                 topo_routes=topo_routes)
-            module.exit_json(changed=True, topo_routes=convert_routes_to_str(topo_routes))
+            exit_args = dict(changed=True, topo_routes=topo_routes)
         elif topo_type == "t2":
             fib_t2_lag(topo, ptf_ip, action=action, topo_routes=topo_routes)
-            module.exit_json(changed=True, topo_routes=convert_routes_to_str(topo_routes))
+            exit_args = dict(changed=True, topo_routes=topo_routes)
         elif topo_type == "t0-mclag":
             fib_t0_mclag(topo, ptf_ip, action=action, topo_routes=topo_routes)
-            module.exit_json(changed=True, topo_routes=convert_routes_to_str(topo_routes))
+            exit_args = dict(changed=True, topo_routes=topo_routes)
         elif topo_type == "m1":
             fib_m1(topo, ptf_ip, action=action, topo_routes=topo_routes)
-            module.exit_json(changed=True, topo_routes=convert_routes_to_str(topo_routes))
+            exit_args = dict(changed=True, topo_routes=topo_routes)
         elif topo_type == "m0":
             fib_m0(topo, ptf_ip, action=action, topo_routes=topo_routes)
-            module.exit_json(changed=True, topo_routes=convert_routes_to_str(topo_routes))
+            exit_args = dict(changed=True, topo_routes=topo_routes)
         elif topo_type == "mx":
             fib_mx(topo, ptf_ip, action=action, topo_routes=topo_routes)
-            module.exit_json(changed=True, topo_routes=convert_routes_to_str(topo_routes))
+            exit_args = dict(changed=True, topo_routes=topo_routes)
         elif topo_type == "c0":
             fib_c0(topo, ptf_ip, action=action, topo_routes=topo_routes)
-            module.exit_json(changed=True, topo_routes=convert_routes_to_str(topo_routes))
+            exit_args = dict(changed=True, topo_routes=topo_routes)
         elif topo_type == "dpu":
             fib_dpu(topo, ptf_ip, action=action, topo_routes=topo_routes)
-            module.exit_json(change=True, topo_routes=convert_routes_to_str(topo_routes))
+            exit_args = dict(change=True, topo_routes=topo_routes)
         elif topo_type == "lt2":
             fib_lt2_routes(topo, ptf_ip, action=action, topo_routes=topo_routes)
-            module.exit_json(change=True, topo_routes=convert_routes_to_str(topo_routes))
+            exit_args = dict(change=True, topo_routes=topo_routes)
         elif topo_type == "ft2":
             fib_ft2_routes(topo, ptf_ip, action=action, topo_routes=topo_routes)
-            module.exit_json(change=True, topo_routes=convert_routes_to_str(topo_routes))
+            exit_args = dict(change=True, topo_routes=topo_routes)
         else:
             module.exit_json(
                 msg='Unsupported topology "{}" - skipping announcing routes'.format(topo_name))
+        if route_injector is not None:
+            exit_args['route_injection'] = route_injector.wait()
+        if 'topo_routes' in exit_args:
+            convert_routes_to_str(topo_routes)
     except Exception as e:
         module.fail_json(msg='Announcing routes failed, topo_name={}, topo_type={}, exception={}'
                          .format(topo_name, topo_type, repr(e)))
+    module.exit_json(**exit_args)
 
 
 if __name__ == '__main__':
@@ -2,6 +2,8 @@
 from __future__ import print_function
 from ansible.module_utils.basic import AnsibleModule
 import calendar
+import hashlib
+import inspect
 import os
 import sys
 import traceback
@@ -10,6 +12,7 @@ import time
 import ipaddr as ipaddress
 from collections import defaultdict
 from natsort import natsorted
+from ansible.module_utils import port_utils
 from ansible.module_utils.port_utils import get_port_alias_to_name_map, get_port_indices_for_asic
 from lxml import etree as ET
 from lxml.etree import QName
@@ -29,6 +32,21 @@ options:
         description:
             - Set to target snmp server (normally {{inventory_hostname}})
         required: true
+    filename:
+        description:
+            - The minigraph file to parse, defaults to <host>.xml if it exists, else /etc/sonic/minigraph.xml
+        required: false
+    namespace:
+        description:
+            - The ASIC namespace, like asic0, to get the facts of
+        required: false
+    use_cache:
+        description:
+            - Reuse the facts parsed from the same minigraph content and mtime, cached in ~/.ansible/minigraph/parsed
+              on the host running the module. The fact minigraph_parse_cache tells if the facts are from the cache, the
+              digest of the minigraph and the seconds taken to get the facts.
+        required: false
+        default: true
 '''
 
 EXAMPLES = '''
@@ -45,6 +63,9 @@ ns3 = "http://www.w3.org/2001/XMLSchema-instance"
 ANSIBLE_USER_MINIGRAPH_PATH = os.path.expanduser('~/.ansible/minigraph')
 ANSIBLE_LOCAL_MINIGRAPH_PATH = '{}.xml'
 ANSIBLE_USER_MINIGRAPH_MAX_AGE = 86400  # 24-hours (in seconds)
+ANSIBLE_USER_MINIGRAPH_PARSE_CACHE_PATH = os.path.join(ANSIBLE_USER_MINIGRAPH_PATH, 'parsed')
+# Bump it when the facts parsed from the same minigraph change
+MINIGRAPH_PARSE_CACHE_VERSION = 1
 backend_device_types = ['BackEndToRRouter', 'BackEndLeafRouter']
 VLAN_SUB_INTERFACE_VLAN_ID = '10'
 VLAN_SUB_INTERFACE_SEPARATOR = '.'
@@ -621,17 +642,19 @@ def reconcile_mini_graph_locations(filename, hostname):
     :param hostname: the hostname to load (required)
     :return: tuple(the absolute filepath of the {cached,loaded} mini-graph, the root node of the loaded graph)
     """
-    if filename is not None:
-        # literal filename specified. read directly from the file.
-        mini_graph_path = filename
-    else:
-        # only the hostname was specified, determine the output path
-        mini_graph_path = '/etc/sonic/minigraph.xml'
-
+    mini_graph_path = get_mini_graph_path(filename)
     root = ET.parse(mini_graph_path).getroot()
     return mini_graph_path, root
 
 
+def get_mini_graph_path(filename):
+    if filename is not None:
+        # literal filename specified. read directly from the file.
+        return filename
+    # only the hostname was specified, determine the output path
+    return '/etc/sonic/minigraph.xml'
+
+
 def port_alias_to_name_map_50G(all_ports, s100G_ports):
     # 50G ports
     s50G_ports = list(set(all_ports) - set(s100G_ports))
@@ -678,8 +701,12 @@ def parse_linkmeta(meta, hname):
     return macsec_enabled_ports, macsec_neighbors
 
 
-def parse_xml(filename, hostname, asic_name=None):
-    mini_graph_path, root = reconcile_mini_graph_locations(filename, hostname)
+def parse_xml(filename, hostname, asic_name=None, content=None):
+    if content is None:
+        mini_graph_path, root = reconcile_mini_graph_locations(filename, hostname)
+    else:
+        # Content of the minigraph already read, like for its digest
+        mini_graph_path, root = get_mini_graph_path(filename), ET.fromstring(content)
 
     u_neighbors = None
     u_devices = None
@@ -912,6 +939,94 @@ def parse_xml(filename, hostname, asic_name=None):
     return results
 
 
+def get_parser_digest():
+    """
+    :return: digest of the code parsing the minigraph, or '' if the source is not available.
+    """
+    try:
+        source = inspect.getsource(sys.modules[__name__]) + inspect.getsource(port_utils)
+    except (IOError, OSError, TypeError):
+        return ''
+    return hashlib.sha256(source.encode('utf-8')).hexdigest()
+
+
+def get_parse_cache_file(hostname, asic_name, digest):
+    return os.path.join(ANSIBLE_USER_MINIGRAPH_PARSE_CACHE_PATH,
+                        '{}.{}.{}.json'.format(hostname, asic_name or 'global', digest))
+
+
+def load_parse_cache(cache_file):
+    """
+    :return: the cached facts, or None if they are not cached.
+    """
+    try:
+        with open(cache_file) as f:
+            return json.load(f)
+    except (IOError, OSError, ValueError):
+        return None
+
+
+def save_parse_cache(cache_file, results):
+    """
+    Write the facts to the cache file, and remove the cache files of other minigraph content of the same host and asic.
+    A failure to write the cache is ignored, the facts are parsed again next time.
+    """
+    tmp_file = '{}.{}.tmp'.format(cache_file, os.getpid())
+    try:
+        if not os.path.isdir(ANSIBLE_USER_MINIGRAPH_PARSE_CACHE_PATH):
+            os.makedirs(ANSIBLE_USER_MINIGRAPH_PARSE_CACHE_PATH)
+        with open(tmp_file, 'w') as f:
+            json.dump(results, f)
+        # Replaced atomically, a concurrent module run reads either no cache file or a complete one
+        os.rename(tmp_file, cache_file)
+        prefix = os.path.basename(cache_file).rsplit('.', 2)[0] + '.'
+        for name in os.listdir(ANSIBLE_USER_MINIGRAPH_PARSE_CACHE_PATH):
+            stale_file = os.path.join(ANSIBLE_USER_MINIGRAPH_PARSE_CACHE_PATH, name)
+            if name.startswith(prefix) and name.endswith('.json') and stale_file != cache_file:
+                os.remove(stale_file)
+    except (IOError, OSError) as e:
+        print("Warning: failed to cache the parsed minigraph: " + str(e), file=sys.stderr)
+        if os.path.exists(tmp_file):
+            os.remove(tmp_file)
+
+
+def parse_xml_with_cache(filename, hostname, asic_name=None, use_cache=True):
+    """
+    Get the facts of parse_xml, from the cache if the same minigraph was parsed for the host and asic before.
+
+    The cache is keyed by the digest of the minigraph content and mtime, asic_name and the parsing code, so a changed
+    or rewritten minigraph or a changed parser is parsed again.
+
+    :return: the facts encoded by minigraph_encoder, with the fact minigraph_parse_cache telling if they are from the
+        cache, the digest and the seconds taken to get them.
+    """
+    start = time.time()
+    mini_graph_path = get_mini_graph_path(filename)
+    with open(mini_graph_path, 'rb') as f:
+        content = f.read()
+        mtime = os.fstat(f.fileno()).st_mtime
+    sha = hashlib.sha256()
+    sha.update('{}\n{}\n{}\n{!r}\n'.format(MINIGRAPH_PARSE_CACHE_VERSION, asic_name, get_parser_digest(), mtime)
+               .encode('utf-8'))
+    sha.update(content)
+    digest = sha.hexdigest()
+    cache_file = get_parse_cache_file(hostname, asic_name, digest)
+
+    results = load_parse_cache(cache_file) if use_cache else None
+    hit = results is not None
+    if not hit:
+        results = json.loads(json.dumps(parse_xml(filename, hostname, asic_name, content), cls=minigraph_encoder))
+        if use_cache:
+            save_parse_cache(cache_file, results)
+    results['minigraph_as_xml'] = mini_graph_path
+    results['minigraph_parse_cache'] = {
+        'hit': hit,
+        'digest': digest,
+        'seconds': round(time.time() - start, 3)
+    }
+    return results
+
+
 ports = {}
 port_alias_to_name_map = {}
 port_name_to_alias_map = {}
@@ -926,6 +1041,7 @@ def main():
             host=dict(required=True),
             filename=dict(),
             namespace=dict(required=False, default=None),
+            use_cache=dict(required=False, type='bool', default=True),
         ),
         supports_check_mode=True
     )
@@ -954,8 +1070,7 @@ def main():
     namespace = m_args['namespace']
 
     try:
-        results = parse_xml(filename, m_args['host'], namespace)
-        results_clean = json.loads(json.dumps(results, cls=minigraph_encoder))
+        results_clean = parse_xml_with_cache(filename, m_args['host'], namespace, m_args['use_cache'])
         module.exit_json(ansible_facts=results_clean)
     except Exception as e:
         tb = traceback.format_exc()
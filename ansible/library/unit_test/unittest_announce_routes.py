@@ -0,0 +1,550 @@
+import importlib.util
+import ipaddress
+import itertools
+import math
+import os
+import random
+import socket
+import sys
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
+from urllib.parse import urlencode
+
+import ansible.module_utils
+
+LIBRARY_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+ANSIBLE_PATH = os.path.dirname(LIBRARY_PATH)
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Like ansible running the module, module_utils of this repo are importable from ansible.module_utils
+for module_utils in ["debug_utils", "multi_servers_utils"]:
+    setattr(ansible.module_utils, module_utils,
+            load_module("ansible.module_utils." + module_utils,
+                        os.path.join(ANSIBLE_PATH, "module_utils", module_utils + ".py")))
+announce_routes = load_module("announce_routes", os.path.join(LIBRARY_PATH, "announce_routes.py"))
+
+
+# Route generators and payload encoding before they were rewritten for speed, the rewritten ones must give the same
+# routes and payloads. Keep them as they are.
+
+def old_generate_routes(family, podset_number, tor_number, tor_subnet_number,
+                        spine_asn, leaf_asn_start, tor_asn_start, nexthop,
+                        nexthop_v6, tor_subnet_size, max_tor_subnet_number, topo,
+                        router_type="leaf", tor_index=None, set_num=None,
+                        no_default_route=False, core_ra_asn=announce_routes.CORE_RA_ASN,
+                        ipv6_address_pattern=announce_routes.IPV6_ADDRESS_PATTERN_DEFAULT_VALUE,
+                        tor_default_route=False, offset=0):
+    routes = []
+    if not no_default_route and (router_type != "tor" or tor_default_route):
+        default_route_as_path = announce_routes.get_uplink_router_as_path(router_type, spine_asn)
+
+        if topo != "t2" or (topo == "t2" and router_type == "core"):
+            if family in ["v4", "both"]:
+                routes.append(("0.0.0.0/0", nexthop, default_route_as_path))
+            if family in ["v6", "both"]:
+                routes.append(("::/0", nexthop_v6, default_route_as_path))
+
+    suffix = 0
+    for podset in range(0, podset_number):
+        for tor in range(0, tor_number):
+            for subnet in range(0, tor_subnet_number):
+                if router_type == "core":
+                    if podset < 3:
+                        continue
+                    first_third_podset_number = int(math.ceil((podset_number - 3) / 3.0))
+                    second_third_podset_number = int(math.ceil(((podset_number - 3) * 2) / 3.0))
+                    if set_num is not None:
+                        if podset <= first_third_podset_number and set_num != 0:
+                            continue
+                        elif podset > first_third_podset_number and \
+                                podset < second_third_podset_number and set_num != 1:
+                            continue
+                if router_type == "spine" or router_type == "mgmtleaf":
+                    if podset == 0:
+                        continue
+                elif router_type == "leaf":
+                    if topo == 't2':
+                        if podset > 2:
+                            continue
+                        if set_num is not None:
+                            if podset == 0 and set_num != 0:
+                                continue
+                            elif podset == 1 and set_num != 1:
+                                continue
+                    elif topo == 't0-mclag':
+                        if podset > 1:
+                            continue
+                        if set_num is not None:
+                            if podset == 0 and set_num != 0:
+                                continue
+                            elif podset == 1 and set_num != 1:
+                                continue
+                    else:
+                        if podset == 0 and tor == 0:
+                            continue
+                elif router_type == "tor":
+                    if podset != 0:
+                        continue
+                    elif topo == "m0" and subnet == 0:
+                        continue
+                    elif tor != tor_index:
+                        continue
+
+                suffix = ((podset * tor_number * max_tor_subnet_number * tor_subnet_size) +
+                          (tor * max_tor_subnet_number * tor_subnet_size) +
+                          (subnet * tor_subnet_size) + offset)
+                octet2 = (168 + int(suffix / (256 ** 2)))
+                octet1 = (192 + int(octet2 / 256))
+                octet2 = (octet2 % 256)
+                octet3 = (int(suffix / 256) % 256)
+                octet4 = (suffix % 256)
+                prefixlen_v4 = (32 - int(math.log(tor_subnet_size, 2)))
+
+                prefix = "{}.{}.{}.{}/{}".format(octet1, octet2, octet3, octet4, prefixlen_v4)
+                prefix_v6 = ipv6_address_pattern % (octet1, octet2, octet3, octet4)
+
+                leaf_asn = leaf_asn_start + podset
+                tor_asn = tor_asn_start + tor
+
+                aspath = None
+                if router_type == "core":
+                    aspath = "{} {}".format(leaf_asn, core_ra_asn)
+                elif router_type == "spine" or router_type == "mgmtleaf":
+                    aspath = "{} {}".format(leaf_asn, tor_asn)
+                elif router_type == "leaf":
+                    if topo == "t2":
+                        aspath = "{}".format(tor_asn)
+                    elif topo == "t0-mclag":
+                        aspath = "{}".format(tor_asn)
+                    else:
+                        if podset == 0:
+                            aspath = "{}".format(tor_asn)
+                        else:
+                            aspath = "{} {} {}".format(spine_asn, leaf_asn, tor_asn)
+
+                if family in ["v4", "both"]:
+                    routes.append((prefix, nexthop, aspath))
+                if family in ["v6", "both"]:
+                    routes.append((prefix_v6, nexthop_v6, aspath))
+
+    return routes, suffix
+
+
+def old_generate_t1_to_t0_routes(family, offset, leaf_number, subnet_size, tor_asn, leaf_asn_start, nexthop,
+                                 nexthop_v6, podset_num=1,
+                                 ipv6_address_pattern=announce_routes.IPV6_ADDRESS_PATTERN_DEFAULT_VALUE):
+    routes = []
+    for podset in range(0, podset_num):
+        for leaf in range(0, leaf_number):
+            suffix = offset + leaf
+            octet2 = (168 + int(suffix / (256 ** 2)))
+            octet1 = (192 + int(octet2 / 256))
+            octet2 = (octet2 % 256)
+            octet3 = (int(suffix / 256) % 256)
+            octet4 = (suffix % 256)
+            prefixlen_v4 = (32 - int(math.log(subnet_size, 2)))
+            prefix = "{}.{}.{}.{}/{}".format(octet1, octet2, octet3, octet4, prefixlen_v4)
+            prefix_v6 = ipv6_address_pattern % (octet1, octet2, octet3, octet4)
+            leaf_asn = leaf_asn_start + podset
+            aspath = "{} {}".format(leaf_asn, tor_asn)
+            if family in ["v4", "both"]:
+                routes.append((prefix, nexthop, aspath))
+            if family in ["v6", "both"]:
+                routes.append((prefix_v6, nexthop_v6, aspath))
+    return routes, suffix
+
+
+def old_generate_prefix(subnet_size, ip_base, offset):
+    ip = announce_routes.get_new_ip(ip_base, offset)
+    prefixlen = (ip_base.max_prefixlen - int(math.log(subnet_size, 2)))
+    return "{}/{}".format(ip, prefixlen)
+
+
+def old_filterout_subnet(aggregate_routes, candidate_routes):
+    subnets = []
+    for ar in aggregate_routes:
+        ar_net = ipaddress.ip_network(str(ar[0]))
+        for cr in candidate_routes:
+            if ipaddress.ip_network(str(cr[0])).subnet_of(ar_net):
+                subnets.append(cr)
+    return list(set(candidate_routes) - set(subnets))
+
+
+def old_payloads(action, routes, routes_batch_size):
+    """Form encoded bodies posted by change_routes, like requests encodes data={"commands": ...}."""
+    messages = []
+    for prefix, nexthop, aspath in routes:
+        if aspath:
+            messages.append("{} route {} next-hop {} as-path [ {} ]".format(action, prefix, nexthop, aspath))
+        else:
+            messages.append("{} route {} next-hop {}".format(action, prefix, nexthop))
+    return [urlencode({"commands": ";".join(messages[i:i + routes_batch_size])})
+            for i in range(0, len(messages), routes_batch_size)]
+
+
+OLD_GENERATORS = {
+    "generate_routes": old_generate_routes,
+    "generate_t1_to_t0_routes": old_generate_t1_to_t0_routes,
+    "generate_prefix": old_generate_prefix,
+    "filterout_subnet": old_filterout_subnet,
+}
+
+
+def generate_topo_routes(topo_name, **common_config):
+    topo = announce_routes.read_topo(topo_name, ANSIBLE_PATH)
+    topo["configuration_properties"]["common"].update(common_config)
+    topo_routes = {}
+    # Routes of some peers are shuffled
+    random.seed(topo_name)
+    topo_type = announce_routes.get_topo_type(topo_name)
+    action = announce_routes.GENERATE_WITHOUT_APPLY
+    if topo_type == "t0":
+        announce_routes.fib_t0(topo, "10.255.0.1", action=action, topo_routes=topo_routes)
+    elif topo_type == "t1":
+        announce_routes.fib_t1_lag(topo, "10.255.0.1", topo_name, action=action, topo_routes=topo_routes)
+    elif topo_type == "t2":
+        announce_routes.fib_t2_lag(topo, "10.255.0.1", action=action, topo_routes=topo_routes)
+    elif topo_type == "m0":
+        announce_routes.fib_m0(topo, "10.255.0.1", action=action, topo_routes=topo_routes)
+    return announce_routes.convert_routes_to_str(topo_routes)
+
+
+class RoutesTestCase(unittest.TestCase):
+
+    def assert_same_list(self, items, old_items, msg):
+        """Compare lists of routes or payloads, report the first difference instead of diffing the long lists."""
+        for index, (item, old_item) in enumerate(zip(items, old_items)):
+            if item != old_item:
+                self.fail("{}: item {} is {!r}, old one is {!r}".format(msg, index, item, old_item))
+        self.assertEqual(len(items), len(old_items), msg)
+
+
+class TestRouteGeneration(RoutesTestCase):
+
+    def assert_same_topo_routes(self, topo_name, **common_config):
+        topo_routes = generate_topo_routes(topo_name, **common_config)
+        with mock.patch.multiple(announce_routes, **OLD_GENERATORS):
+            old_topo_routes = generate_topo_routes(topo_name, **common_config)
+        self.assertEqual(sorted(topo_routes.keys()), sorted(old_topo_routes.keys()))
+        families = set()
+        for vm, routes in old_topo_routes.items():
+            self.assertEqual(sorted(topo_routes[vm].keys()), sorted(routes.keys()))
+            for family, family_routes in routes.items():
+                self.assert_same_list(topo_routes[vm][family], family_routes,
+                                      "{} routes of {} in {}".format(family, vm, topo_name))
+                if family_routes:
+                    families.add(family)
+        return families
+
+    def test_t0(self):
+        self.assertEqual(self.assert_same_topo_routes("t0"), {announce_routes.IPV4, announce_routes.IPV6})
+        self.assert_same_topo_routes("t0-64")
+
+    def test_t1(self):
+        self.assertEqual(self.assert_same_topo_routes("t1-64-lag"), {announce_routes.IPV4, announce_routes.IPV6})
+
+    def test_t2(self):
+        # Fewer podsets than topo_t2.yml to keep the old generators fast, still more than the 3 podsets of T1s
+        self.assertEqual(self.assert_same_topo_routes("t2", podset_number=20),
+                         {announce_routes.IPV4, announce_routes.IPV6})
+
+    def test_m0(self):
+        self.assert_same_topo_routes("m0")
+
+    def test_generate_routes(self):
+        routers = itertools.product(["v4", "v6", "both"], ["t0", "t1", "t2", "m0", "t0-mclag"],
+                                    ["leaf", "spine", "mgmtleaf", "core", "tor"], [None, 0, 1, 2])
+        for family, topo, router_type, set_num in routers:
+            for kwargs in [{"offset": 0}, {"offset": 1000, "tor_index": 1, "tor_default_route": True},
+                           {"no_default_route": True, "tor_index": 0}]:
+                args = (family, 11, 4, 3, 65534, 64600, 65500, "10.10.246.254", "fc0a::ff", 128, 16, topo)
+                kwargs = dict(kwargs, router_type=router_type, set_num=set_num)
+                routes, suffix = announce_routes.generate_routes(*args, **kwargs)
+                old_routes, old_suffix = old_generate_routes(*args, **kwargs)
+                self.assert_same_list(routes, old_routes, "{} {}".format(args, kwargs))
+                self.assertEqual(suffix, old_suffix)
+
+
+class TestRoutePayloads(RoutesTestCase):
+
+    def setUp(self):
+        topo_routes = generate_topo_routes("t1-64-lag")
+        self.routes = {}
+        for vm_routes in topo_routes.values():
+            for family, routes in vm_routes.items():
+                self.routes.setdefault(family, []).extend(routes)
+
+    def test_same_payloads_as_old_encoding(self):
+        for family, routes in self.routes.items():
+            # With and without as-path, like default routes of some peers
+            routes = routes[:300] + [(prefix, nexthop, None) for prefix, nexthop, _ in routes[:5]]
+            for action in ["announce", "withdraw"]:
+                for routes_batch_size in [1, 7, 200, 305]:
+                    self.assert_same_list(list(announce_routes.iter_route_payloads(action, routes, routes_batch_size)),
+                                          old_payloads(action, routes, routes_batch_size),
+                                          "{} {} batch size {}".format(family, action, routes_batch_size))
+
+    def test_batch_size_edges(self):
+        routes = self.routes[announce_routes.IPV4][:400]
+        for routes_batch_size in [199, 200, 201, 399, 400, 401, 1000]:
+            payloads = list(announce_routes.iter_route_payloads("announce", routes, routes_batch_size))
+            self.assert_same_list(payloads, old_payloads("announce", routes, routes_batch_size),
+                                  "batch size {}".format(routes_batch_size))
+            self.assertEqual(len(payloads), int(math.ceil(400.0 / routes_batch_size)))
+        self.assertEqual(list(announce_routes.iter_route_payloads("announce", [], 200)), [])
+
+    def test_form_quote(self):
+        for command in ["announce route 192.168.0.0/25 next-hop 10.0.0.1 as-path [ 65534 64601 65501 ]",
+                        "withdraw route fc00::/64 next-hop fc0a::ff", ";", "a+b=c&d %/?#[]~*'!", "café ✓"]:
+            self.assertEqual("commands=" + announce_routes.form_quote(command), urlencode({"commands": command}))
+
+
+class ExabgpHandler(BaseHTTPRequestHandler):
+    """HTTP API of exabgp keeping the connection alive, records the posted batches."""
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers["Content-Length"])).decode("ascii")
+        with self.server.lock:
+            self.server.count += 1
+            drop = self.server.count in self.server.drop_requests
+            if not drop:
+                self.server.requests.append((self.client_address, body))
+        if drop:
+            # Connection broken before the response, requests pipelined after it are lost too
+            self.close_connection = True
+            return
+        text = b"done\n"
+        self.send_response(self.server.status)
+        if self.protocol_version == "HTTP/1.1":
+            self.send_header("Content-Length", str(len(text)))
+        self.end_headers()
+        self.wfile.write(text)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class ClosingExabgpHandler(ExabgpHandler):
+    """HTTP API of exabgp closing the connection after each response, the response has no Content-Length."""
+    protocol_version = "HTTP/1.0"
+
+
+class ExabgpServerTestCase(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.dict(announce_routes.exabgp_connections, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def start_server(self, handler=ExabgpHandler, status=200, drop_requests=()):
+        server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+        server.daemon_threads = True
+        server.lock = threading.Lock()
+        server.count = 0
+        server.requests = []
+        server.status = status
+        server.drop_requests = set(drop_requests)
+        thread = threading.Thread(target=server.serve_forever)
+        thread.daemon = True
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+        return server
+
+    def get_connection(self, server):
+        connection = announce_routes.get_exabgp_connection("127.0.0.1", server.server_address[1])
+        self.addCleanup(connection.close)
+        return connection
+
+    @staticmethod
+    def payloads(count):
+        return ["commands=announce+route+10.0.{}.0%2F24+next-hop+10.0.0.1".format(i) for i in range(count)]
+
+
+class TestExabgpHttpConnection(ExabgpServerTestCase):
+
+    def post_all(self, connection, payloads):
+        """Post the payloads, return the max number of batches sent without response."""
+        max_sent = 0
+        for payload in payloads:
+            connection.post(payload)
+            max_sent = max(max_sent, connection.sent)
+        connection.flush()
+        self.assertEqual(connection.sent, 0)
+        return max_sent
+
+    def test_keep_alive_pipelined(self):
+        server = self.start_server()
+        connection = self.get_connection(server)
+        payloads = self.payloads(50)
+        with mock.patch.object(connection, "reconnect", wraps=connection.reconnect) as reconnect:
+            # Only one batch is sent before the first response shows keep-alive
+            connection.post(payloads[0])
+            self.assertEqual((connection.sent, connection.max_pending_batches), (1, 1))
+            max_sent = self.post_all(connection, payloads[1:])
+        reconnect.assert_not_called()
+        self.assertEqual(max_sent, announce_routes.MAX_PENDING_BATCHES)
+        self.assertEqual(connection.max_pending_batches, announce_routes.MAX_PENDING_BATCHES)
+        self.assertEqual([body for _, body in server.requests], payloads)
+        # All batches on the same connection
+        self.assertEqual(len(set(address for address, _ in server.requests)), 1)
+
+    def test_close_after_response_not_pipelined(self):
+        server = self.start_server(ClosingExabgpHandler)
+        connection = self.get_connection(server)
+        payloads = self.payloads(20)
+        with mock.patch.object(connection, "reconnect", wraps=connection.reconnect) as reconnect:
+            max_sent = self.post_all(connection, payloads)
+        # No broken pipe or reset of batches pipelined to a connection the server closes
+        reconnect.assert_not_called()
+        self.assertEqual(max_sent, 1)
+        self.assertEqual(connection.max_pending_batches, 1)
+        self.assertEqual([body for _, body in server.requests], payloads)
+        self.assertEqual(len(set(address for address, _ in server.requests)), len(payloads))
+
+    def test_broken_connection_resent(self):
+        # The 8th request is while batches are pipelined, the 1st is before any response
+        for drop_request in [8, 1]:
+            server = self.start_server(drop_requests=[drop_request])
+            connection = self.get_connection(server)
+            payloads = self.payloads(30)
+            with mock.patch.object(connection, "reconnect", wraps=connection.reconnect) as reconnect:
+                max_sent = self.post_all(connection, payloads)
+            reconnect.assert_called()
+            self.assertEqual(max_sent, announce_routes.MAX_PENDING_BATCHES)
+            # Each batch once and in order, the oldest batch without response is sent first on the new connection
+            self.assertEqual([body for _, body in server.requests], payloads)
+            self.assertEqual(server.count, len(payloads) + 1)
+
+    def test_error_status(self):
+        server = self.start_server(status=500)
+        connection = self.get_connection(server)
+        connection.post(self.payloads(1)[0])
+        with self.assertRaisesRegex(Exception, "r.status_code=500"):
+            connection.flush()
+
+    def test_send_routes(self):
+        server = self.start_server()
+        port = server.server_address[1]
+        routes = [("10.0.{}.0/24".format(i), "10.0.0.1", "65534 64601") for i in range(1000)]
+        announce_routes.send_routes("announce", "127.0.0.1", port, routes, routes_batch_size=30)
+        announce_routes.send_routes("withdraw", "127.0.0.1", port, routes[:10])
+        self.assertEqual([body for _, body in server.requests],
+                         list(announce_routes.iter_route_payloads("announce", routes, 30))
+                         + list(announce_routes.iter_route_payloads("withdraw", routes[:10], 200)))
+
+        # Pending batches and the connection are dropped after a failure, next route sets of the port start afresh
+        server.status = 500
+        with self.assertRaises(Exception):
+            announce_routes.send_routes("announce", "127.0.0.1", port, routes[:30], routes_batch_size=30)
+        connection = announce_routes.get_exabgp_connection("127.0.0.1", port)
+        self.assertEqual((len(connection.pending), connection.sock), (0, None))
+        server.status = 200
+        del server.requests[:]
+        announce_routes.send_routes("withdraw", "127.0.0.1", port, routes[:10])
+        self.assertEqual([body for _, body in server.requests],
+                         list(announce_routes.iter_route_payloads("withdraw", routes[:10], 200)))
+
+
+class TestReadResponse(unittest.TestCase):
+
+    def connection(self, raw, eof=True):
+        connection = announce_routes.ExabgpHttpConnection("127.0.0.1", 5000)
+        connection.sock, peer = socket.socketpair()
+        connection.rfile = connection.sock.makefile("rb")
+        self.addCleanup(connection.close)
+        self.addCleanup(peer.close)
+        peer.sendall(raw)
+        if eof:
+            peer.shutdown(socket.SHUT_WR)
+        return connection
+
+    def test_content_length(self):
+        connection = self.connection(b"HTTP/1.1 200 OK\r\nServer: exabgp\r\ncontent-LENGTH: 5\r\n\r\nhello"
+                                     b"HTTP/1.1 500 Internal Server Error\r\nContent-Length: 0\r\n\r\n",
+                                     eof=False)
+        self.assertEqual(connection.read_response(),
+                         (200, "OK", {"server": "exabgp", "content-length": "5"}, "hello", True))
+        self.assertEqual(connection.read_response(),
+                         (500, "Internal Server Error", {"content-length": "0"}, "", True))
+
+    def test_chunked(self):
+        connection = self.connection(b"HTTP/1.1 200 OK\r\nTransfer-Encoding: Chunked\r\n\r\n"
+                                     b"5;name=value\r\nhello\r\n6\r\n world\r\nB\r\n\r\nline\r\nend\r\n0\r\n\r\n"
+                                     b"HTTP/1.1 200 OK\r\nContent-Length: 2\r\n\r\nok", eof=False)
+        status_code, reason, headers, text, keep_alive = connection.read_response()
+        self.assertEqual((status_code, text, keep_alive), (200, "hello world\r\nline\r\nend", True))
+        self.assertEqual(connection.read_response()[3], "ok")
+
+    def test_not_kept_alive(self):
+        # Body until the connection is closed
+        connection = self.connection(b"HTTP/1.0 200 OK\r\nServer: exabgp\r\n\r\ndone\nall\n")
+        self.assertEqual(connection.read_response(),
+                         (200, "OK", {"server": "exabgp", "connection": "close"}, "done\nall\n", False))
+        connection = self.connection(b"HTTP/1.1 200 OK\r\nConnection: Close\r\nContent-Length: 2\r\n\r\nok")
+        self.assertFalse(connection.read_response()[4])
+        connection = self.connection(b"HTTP/1.0 200 OK\r\nContent-Length: 2\r\n\r\nok")
+        self.assertFalse(connection.read_response()[4])
+
+    def test_broken_response(self):
+        for raw in [b"", b"HTTP/1.1 200 OK\r\n", b"HTTP/1.1 200 OK\r\nContent-Length: 2"]:
+            with self.assertRaises(socket.error):
+                self.connection(raw).read_response()
+        for raw in [b"garbage\r\n\r\n", b"HTTP/1.1 200 OK\r\nTransfer-Encoding: chunked\r\n\r\nxyz\r\n"]:
+            with self.assertRaises(ValueError):
+                self.connection(raw).read_response()
+
+
+class TestRouteInjector(ExabgpServerTestCase):
+
+    def route_sets(self, port_index):
+        return [("announce", [("10.{}.{}.0/24".format(port_index, i), "10.0.0.1", "65534") for i in range(450)]),
+                ("withdraw", [("10.{}.{}.0/24".format(port_index, i), "10.0.0.1", None) for i in range(3)]),
+                ("announce", [("fc{:02x}::{:x}/64".format(port_index, i), "fc0a::ff", "65534") for i in range(10)])]
+
+    def test_route_sets_in_order(self):
+        for max_parallel_peers in [0, 1]:
+            servers = [self.start_server() for _ in range(3)]
+            injector = announce_routes.RouteInjector("127.0.0.1", max_parallel_peers=max_parallel_peers)
+            with mock.patch.object(announce_routes, "route_injector", injector):
+                for port_index, server in enumerate(servers):
+                    for action, routes in self.route_sets(port_index):
+                        announce_routes.change_routes(action, "127.0.0.1", server.server_address[1], routes)
+                        # Routes are copied when submitted
+                        routes.clear()
+            stats = injector.wait()
+
+            self.assertEqual(sorted(stats.keys()), sorted(server.server_address[1] for server in servers))
+            for port_index, server in enumerate(servers):
+                route_sets = self.route_sets(port_index)
+                payloads = [payload for action, routes in route_sets
+                            for payload in announce_routes.iter_route_payloads(action, routes, 200)]
+                self.assertEqual([body for _, body in server.requests], payloads)
+                self.assertEqual(stats[server.server_address[1]]["routes"],
+                                 sum(len(routes) for _, routes in route_sets))
+
+    def test_error_raised(self):
+        server = self.start_server(status=500)
+        injector = announce_routes.RouteInjector("127.0.0.1")
+        with mock.patch.object(announce_routes, "logging"):
+            for action, routes in self.route_sets(0):
+                injector.submit(action, server.server_address[1], routes)
+            with self.assertRaisesRegex(Exception, "r.status_code=500"):
+                injector.wait()
+        # Only the first batch is sent, the other batches and route sets after the failure are not
+        self.assertEqual(server.count, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
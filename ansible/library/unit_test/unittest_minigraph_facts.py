@@ -0,0 +1,131 @@
+import importlib.util
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+from unittest import mock
+
+import ansible.module_utils
+
+LIBRARY_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+ANSIBLE_PATH = os.path.dirname(LIBRARY_PATH)
+MINIGRAPH = os.path.join(ANSIBLE_PATH, "minigraph", "SONIC01DPU.xml")
+HOSTNAME = "SONIC01DPU"
+
+
+def load_module(name, path):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+# Like ansible running the module, module_utils of this repo are importable from ansible.module_utils
+ansible.module_utils.port_utils = load_module("ansible.module_utils.port_utils",
+                                              os.path.join(ANSIBLE_PATH, "module_utils", "port_utils.py"))
+minigraph_facts = load_module("minigraph_facts", os.path.join(LIBRARY_PATH, "minigraph_facts.py"))
+
+
+class TestMinigraphParseCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.minigraph = os.path.join(self.tmpdir, "minigraph.xml")
+        shutil.copy(MINIGRAPH, self.minigraph)
+        self.cache_path = os.path.join(self.tmpdir, "parsed")
+        patcher = mock.patch.object(minigraph_facts, "ANSIBLE_USER_MINIGRAPH_PARSE_CACHE_PATH", self.cache_path)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def get_facts(self, use_cache=True):
+        facts = minigraph_facts.parse_xml_with_cache(self.minigraph, HOSTNAME, use_cache=use_cache)
+        return facts.pop("minigraph_parse_cache"), facts
+
+    def cache_files(self):
+        return sorted(os.listdir(self.cache_path))
+
+    def assert_parsed_again(self, digest=None):
+        """Facts are not from the cache, and are the same as a fresh parse without the cache."""
+        parse_cache, facts = self.get_facts()
+        self.assertFalse(parse_cache["hit"])
+        if digest:
+            self.assertNotEqual(parse_cache["digest"], digest)
+        self.assertEqual(facts, self.get_facts(use_cache=False)[1])
+        return parse_cache, facts
+
+    def test_hit_same_as_fresh_parse(self):
+        parse_cache, facts = self.get_facts()
+        self.assertFalse(parse_cache["hit"])
+        self.assertEqual(self.cache_files(), ["{}.global.{}.json".format(HOSTNAME, parse_cache["digest"])])
+
+        cached_parse_cache, cached_facts = self.get_facts()
+        self.assertTrue(cached_parse_cache["hit"])
+        self.assertEqual(cached_parse_cache["digest"], parse_cache["digest"])
+        self.assertEqual(cached_facts, facts)
+
+        fresh_parse_cache, fresh_facts = self.get_facts(use_cache=False)
+        self.assertFalse(fresh_parse_cache["hit"])
+        self.assertEqual(cached_facts, fresh_facts)
+        self.assertEqual(fresh_facts["minigraph_hostname"], HOSTNAME)
+        self.assertEqual(fresh_facts["minigraph_as_xml"], self.minigraph)
+
+    def test_content_change_reparses(self):
+        parse_cache, facts = self.get_facts()
+        stat = os.stat(self.minigraph)
+        with open(self.minigraph) as f:
+            content = f.read()
+        with open(self.minigraph, "w") as f:
+            f.write(content.replace("10.0.0.1;10.0.0.2", "10.0.0.3;10.0.0.4"))
+        # Same mtime as the minigraph parsed before, only the content tells it changed
+        os.utime(self.minigraph, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        new_parse_cache, new_facts = self.assert_parsed_again(parse_cache["digest"])
+        self.assertEqual(new_facts["ntp_servers"], ["10.0.0.3", "10.0.0.4"])
+        self.assertNotEqual(new_facts["ntp_servers"], facts["ntp_servers"])
+        # Cache file of the older content is removed
+        self.assertEqual(self.cache_files(), ["{}.global.{}.json".format(HOSTNAME, new_parse_cache["digest"])])
+        self.assertTrue(self.get_facts()[0]["hit"])
+
+    def test_mtime_change_reparses(self):
+        parse_cache, facts = self.get_facts()
+        stat = os.stat(self.minigraph)
+        os.utime(self.minigraph, (stat.st_atime, stat.st_mtime + 10))
+
+        new_parse_cache, new_facts = self.assert_parsed_again(parse_cache["digest"])
+        self.assertEqual(new_facts, facts)
+        self.assertTrue(self.get_facts()[0]["hit"])
+
+    def test_corrupt_cache_parsed_again(self):
+        parse_cache, facts = self.get_facts()
+        cache_file = os.path.join(self.cache_path, self.cache_files()[0])
+        for content in ["", '{"minigraph_hostname": ', "not json"]:
+            with open(cache_file, "w") as f:
+                f.write(content)
+            self.assertEqual(self.assert_parsed_again()[1], facts)
+            # Cache file is written again
+            self.assertTrue(self.get_facts()[0]["hit"])
+
+    def test_unreadable_cache_parsed_again(self):
+        parse_cache, facts = self.get_facts()
+        cache_file = os.path.join(self.cache_path, self.cache_files()[0])
+        os.remove(cache_file)
+        os.mkdir(cache_file)
+        with mock.patch("sys.stderr"):
+            self.assertEqual(self.assert_parsed_again()[1], facts)
+        self.assertTrue(os.path.isdir(cache_file))
+
+        # Cache folder can't be created
+        shutil.rmtree(self.cache_path)
+        with open(self.cache_path, "w") as f:
+            f.write("not a folder")
+        with mock.patch("sys.stderr"):
+            self.assertEqual(self.assert_parsed_again()[1], facts)
+
+
+if __name__ == "__main__":
+    unittest.main()
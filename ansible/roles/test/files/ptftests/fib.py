@@ -1,7 +1,7 @@
 import re
 import six
 
-from ipaddress import ip_address, ip_network
+from ipaddress import ip_address
 from lpm import LpmDict
 
 # These subnets are excluded from FIB test
@@ -57,17 +57,24 @@ class Fib():
         # filter out empty lines and lines starting with '#'
         pattern = re.compile("^#.*$|^[ \t]*$")
 
+        ipv4_routes = []
+        ipv6_routes = []
+        # Routes with the same next hops share a NextHop object
+        next_hops = {}
         with open(file_path, 'r') as f:
-            for line in f.readlines():
+            for line in f:
                 if pattern.match(line):
                     continue
                 entry = line.split(' ', 1)
-                prefix = ip_network(six.text_type(entry[0]))
-                next_hop = self.NextHop(entry[1])
-                if prefix.version == 4:
-                    self._ipv4_lpm_dict[str(prefix)] = next_hop
-                elif prefix.version == 6:
-                    self._ipv6_lpm_dict[str(prefix)] = next_hop
+                next_hop = next_hops.get(entry[1])
+                if next_hop is None:
+                    next_hop = next_hops[entry[1]] = self.NextHop(entry[1])
+                if ':' in entry[0]:
+                    ipv6_routes.append((entry[0], next_hop))
+                else:
+                    ipv4_routes.append((entry[0], next_hop))
+        self._ipv4_lpm_dict.update(ipv4_routes)
+        self._ipv6_lpm_dict.update(ipv6_routes)
 
     def __getitem__(self, ip):
         ip = ip_address(six.text_type(ip))
@@ -190,7 +190,7 @@ class FibTest(BaseTest):
             if len(ip_ranges) > 150:
                 # Limit test execution time
                 covered_ip_ranges = ip_ranges[:100] + \
-                    random.sample(ip_ranges[100:], 50)
+                    [ip_ranges[i] for i in random.sample(range(100, len(ip_ranges)), 50)]
             else:
                 covered_ip_ranges = ip_ranges[:]
 
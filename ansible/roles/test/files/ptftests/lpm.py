@@ -1,9 +1,17 @@
+import binascii
+import bisect
 import random
 import six
+import socket
 
-from ipaddress import ip_address, ip_network
+from ipaddress import ip_address, ip_network, IPv4Address, IPv6Address
 from SubnetTree import SubnetTree
 
+try:
+    from collections.abc import Sequence
+except ImportError:
+    from collections import Sequence
+
 '''
 LpmDict is a class used in FIB test for LPM and IP segmentation.
 
@@ -14,10 +22,15 @@ segments from start to end according to the prefixes (networks) it reads.
 
 Initially, the whole IP space contains only one range. After inserting
 prefixes, the IP space is segmented into multiple ranges. The ranges()
-function returns all ranges in the LpmDict with a list of IpIntervals. The
-sub-class IpInterval then could be used to get the first/last/random IP within
-this range. It could also check the length of the range and if an IP is within
-this range.
+function returns all ranges in the LpmDict as an IpRanges sequence of
+IpIntervals. The sub-class IpInterval then could be used to get the
+first/last/random IP within this range. It could also check the length of
+the range and if an IP is within this range.
+
+The range boundaries are kept as integers and sorted once after the prefixes
+are changed. IpRanges creates the IpInterval objects on access only, so a FIB
+with hundreds of thousands of prefixes doesn't need an object per range.
+Use update() to insert all prefixes of a FIB file at once.
 
 To achieve the LPM functionality, use the LpmDict as a dictionary and use
 [] operator to get the corresponding value using the key (IP).
@@ -25,6 +38,27 @@ To achieve the LPM functionality, use the LpmDict as a dictionary and use
 Please check the test_lpm.py file to see the details of how this class works.
 '''
 
+IPV4_MAX = (1 << 32) - 1
+IPV6_MAX = (1 << 128) - 1
+
+
+def parse_prefix(key):
+    """Parse a prefix to (network address as integer, prefix length, ip version).
+
+    Same as ip_network(key) but much faster, ip_network() is used to raise the error of an invalid prefix.
+    """
+    addr, _, prefixlen = six.text_type(key).partition(u'/')
+    family, bits = (socket.AF_INET6, 128) if u':' in addr else (socket.AF_INET, 32)
+    try:
+        network = int(binascii.hexlify(socket.inet_pton(family, addr)), 16)
+        prefixlen = int(prefixlen) if prefixlen.isdigit() else -1 if prefixlen else bits
+    except (socket.error, ValueError):
+        network, prefixlen = 0, -1
+    if not 0 <= prefixlen <= bits or network & ((1 << (bits - prefixlen)) - 1):
+        prefix = ip_network(six.text_type(key))
+        return int(prefix.network_address), prefix.prefixlen, prefix.version
+    return network, prefixlen, 6 if bits == 128 else 4
+
 
 class LpmDict():
     class IpInterval:
@@ -53,62 +87,100 @@ class LpmDict():
         def __str__(self):
             return str(self._start) + ' - ' + str(self._end)
 
+    class IpRanges(Sequence):
+        """Read only sequence of the IpIntervals between sorted boundaries, IpInterval objects are created on access.
+        """
+        def __init__(self, boundaries, ipv4=True):
+            self._boundaries = boundaries
+            self._address = IPv4Address if ipv4 else IPv6Address
+            self._max_ip = IPV4_MAX if ipv4 else IPV6_MAX
+
+        def __len__(self):
+            return len(self._boundaries)
+
+        def _bounds(self, index):
+            start = self._boundaries[index]
+            end = self._boundaries[index + 1] - 1 if index + 1 < len(self._boundaries) else self._max_ip
+            return start, end
+
+        def __getitem__(self, index):
+            if isinstance(index, slice):
+                return [self[i] for i in range(*index.indices(len(self)))]
+            if index < 0:
+                index += len(self)
+            if not 0 <= index < len(self):
+                raise IndexError('IpRanges index out of range')
+            start, end = self._bounds(index)
+            return LpmDict.IpInterval(self._address(start), self._address(end))
+
+        def index_of(self, ip):
+            """Return index of the range containing the IP, in O(log n)."""
+            return bisect.bisect_right(self._boundaries, int(ip_address(six.text_type(ip)))) - 1
+
+        def get_random_ips(self, indexes=None):
+            """Return a random IP of each range, or of the ranges at the given indexes.
+
+            Same as calling get_random_ip() of the IpIntervals, without creating them.
+            """
+            if indexes is None:
+                indexes = range(len(self))
+            bounds = [self._bounds(index) for index in indexes]
+            return [str(self._address(random.randint(start, end))) for start, end in bounds]
+
     def __init__(self, ipv4=True):
         self._ipv4 = ipv4
         self._prefix_set = set()
         self._subnet_tree = SubnetTree()
         # 0.0.0.0 is a non-routable meta-address that needs to be skipped
-        self._boundaries = {ip_address(u'0.0.0.0'): 1} if ipv4 else {
-            ip_address(u'::'): 1}
+        # Boundaries are integers of IP addresses and the number of prefixes starting or ending at them
+        self._boundaries = {0: 1}
+        self._sorted_boundaries = None
+        self._max_ip = IPV4_MAX if ipv4 else IPV6_MAX
+
+    def _add_boundary(self, boundary, count):
+        self._boundaries[boundary] = self._boundaries.get(boundary, 0) + count
+        if not self._boundaries[boundary]:
+            del self._boundaries[boundary]
+        self._sorted_boundaries = None
+
+    def _insert(self, key, value, prefix):
+        network, prefixlen, _ = prefix
+        # add the current key to self._prefix_set only when it is not the default route and it is not a duplicate key
+        if prefixlen and (network, prefixlen) not in self._prefix_set:
+            bits = 32 if self._ipv4 else 128
+            self._add_boundary(network, 1)
+            last = network + (1 << (bits - prefixlen)) - 1
+            if last != self._max_ip:
+                self._add_boundary(last + 1, 1)
+            self._prefix_set.add((network, prefixlen))
+        self._subnet_tree[key] = value
 
     def __setitem__(self, key, value):
-        prefix = ip_network(six.text_type(key))
-        # add the current key to self._prefix_set only when it is not the default route and it is not a duplicate key
-        if prefix.prefixlen and key not in self._prefix_set:
-            boundary = prefix[0]
-            self._boundaries[boundary] = self._boundaries.get(boundary, 0) + 1
-            if prefix[-1] != ip_address(u'255.255.255.255') \
-                    and prefix[-1] != ip_address(u'ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff'):
-                next_boundary = prefix[-1] + 1
-                self._boundaries[next_boundary] = self._boundaries.get(
-                    next_boundary, 0) + 1
-            self._prefix_set.add(key)
-        self._subnet_tree.__setitem__(key, value)
+        self._insert(key, value, parse_prefix(key))
+
+    def update(self, items):
+        """Insert (prefix, value) pairs, like all routes of a FIB file. Ranges are sorted once by next ranges()."""
+        for key, value in items:
+            self._insert(key, value, parse_prefix(key))
 
     def __getitem__(self, key):
         return self._subnet_tree[key]
 
     def __delitem__(self, key):
-        if '/0' not in key:
-            prefix = ip_network(six.text_type(key))
-            boundary = prefix[0]
-            next_boundary = prefix[-1] + 1
-            self._boundaries[boundary] = self._boundaries.get(boundary) - 1
-            if not self._boundaries[boundary]:
-                del self._boundaries[boundary]
-            self._boundaries[next_boundary] = self._boundaries.get(
-                next_boundary) - 1
-            if not self._boundaries[next_boundary]:
-                del self._boundaries[next_boundary]
-            self._prefix_set.remove(key)
+        network, prefixlen, _ = parse_prefix(key)
+        if prefixlen:
+            self._prefix_set.remove((network, prefixlen))
+            bits = 32 if self._ipv4 else 128
+            self._add_boundary(network, -1)
+            last = network + (1 << (bits - prefixlen)) - 1
+            if last != self._max_ip:
+                self._add_boundary(last + 1, -1)
         self._subnet_tree.__delitem__(key)
 
     def ranges(self):
-        sorted_boundaries = sorted(self._boundaries.keys())
-        ranges = []
-        for index, boundary in enumerate(sorted_boundaries):
-            if index != len(sorted_boundaries) - 1:
-                interval = self.IpInterval(
-                    sorted_boundaries[index], sorted_boundaries[index + 1] - 1)
-            else:
-                if self._ipv4:
-                    interval = self.IpInterval(
-                        sorted_boundaries[index], ip_address(u'255.255.255.255'))
-                else:
-                    interval = self.IpInterval(sorted_boundaries[index], ip_address(
-                        u'ffff:ffff:ffff:ffff:ffff:ffff:ffff:ffff'))
-            ranges.append(interval)
-        return ranges
+        if self._sorted_boundaries is None:
+            self._sorted_boundaries = sorted(self._boundaries)
+        return self.IpRanges(self._sorted_boundaries, self._ipv4)
 
     def contains(self, key):
         return key in self._subnet_tree
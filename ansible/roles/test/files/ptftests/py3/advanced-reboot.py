@@ -65,6 +65,8 @@ import multiprocessing
 import itertools
 import ast
 import socket
+import bisect
+import collections
 
 import ptf
 import ptf.testutils as testutils
@@ -73,6 +75,7 @@ import scapy.all as scapyall
 from scapy.arch.linux import attach_filter as attach_filter
 
 import sad_path as sp
+from pcap_flow import NUMPY_AVAILABLE, mac_to_int, read_tcp_flow
 
 from ptf import config
 from ptf.base_tests import BaseTest
@@ -88,6 +91,10 @@ from device_connection import DeviceConnection
 from host_device import HostDevice
 
 PHYSICAL_PORT = "physical_port"
+# Sequence number of a sender packet is the payload after this prefix
+SEQUENCE_PAYLOAD_PREFIX = b'0' * 60
+# Max seconds the sender sends late packets back to back, to catch up with its schedule
+SENDER_MAX_CATCH_UP = 0.1
 
 
 class StateMachine():
@@ -180,6 +187,7 @@ class ReloadTest(BaseTest):
         self.check_param('allow_vlan_flooding', False, required=False)
         self.check_param('allow_mac_jumping', False, required=False)
         self.check_param('sniff_time_incr', 300, required=False)
+        self.check_param('send_interval', 0.0035, required=False)
         self.check_param('vnet', False, required=False)
         self.check_param('vnet_pkts', None, required=False)
         self.check_param('target_version', '', required=False)
@@ -223,6 +231,8 @@ class ReloadTest(BaseTest):
         self.log_fp = open(self.log_file_name, 'w')
 
         self.packets_list = []
+        # TCP test flow packets read from the sniffer pcap file
+        self.flow = None
         self.vnet = self.test_params['vnet']
         if (self.vnet):
             self.packets_list = json.load(open(self.test_params['vnet_pkts']))
@@ -250,8 +260,9 @@ class ReloadTest(BaseTest):
         self.time_to_listen = 240.0
         #   Inter-packet interval, to be used in send_in_background method.
         #   Improve this interval to gain more precision of disruptions.
-        self.send_interval = 0.0035
+        self.send_interval = self.test_params['send_interval']
         self.sent_packet_count = 0
+        self.sender_report = {}
         # Thread pool for background watching operations
         self.pool = ThreadPool(processes=3)
 
@@ -1416,6 +1427,7 @@ class ReloadTest(BaseTest):
         dataplane_report["downtime"] = str(dataplane_downtime)
         dataplane_report["lost_packets"] = str(self.total_disrupt_packets) \
             if self.total_disrupt_packets is not None else ""
+        dataplane_report["sender"] = self.sender_report
         controlplane_report = dict()
 
         if self.no_control_stop and self.no_control_start:
@@ -1847,12 +1859,32 @@ class ReloadTest(BaseTest):
             port = p.get_packet_source()
             attach_filter(port.socket, filter_expression, port.interface_name)
 
+    def build_send_templates(self, packets):
+        """
+        This method splits each (port, packet) of the sender into the bytes before and after the sequence payload.
+        The sequence number is put between them when sending, which gives the same bytes as setting the load of
+        the parsed packet, without parsing and building the packet for every packet sent.
+        """
+        templates = []
+        for port, packet in packets:
+            load = scapyall.Ether(packet)[scapyall.Raw]
+            # Bytes after the load, like padding, are kept after the new load
+            trailer = bytes(load.payload)
+            header = packet[:len(packet) - len(bytes(load))] + SEQUENCE_PAYLOAD_PREFIX
+            templates.append((port, header, trailer))
+        return templates
+
     def send_in_background(self, packets_list=None):
         """
         This method sends predefined list of packets with predefined interval.
+        Packets are sent on a schedule of send_interval from the sender start, so the time spent on sending a packet
+        doesn't add up to the interval. A packet sent late is followed by the next one right away to catch up, unless
+        the sender is late by more than SENDER_MAX_CATCH_UP seconds, then the schedule restarts from now.
         """
         if not packets_list:
             packets_list = self.packets_list
+        from_t1_iter = itertools.cycle(self.build_send_templates(self.from_t1))
+        from_vlan_iter = itertools.cycle(self.build_send_templates(self.from_servers))
         self.sniffer_started.wait(timeout=self.start_sender_delay)
         with self.dataplane_io_lock:
             # While running fast data plane sender thread there are two reasons for filter to be applied
@@ -1867,30 +1899,51 @@ class ReloadTest(BaseTest):
             self.log("Sender started at %s" % str(sender_start))
 
             self.packets_list = []
-            from_t1_iter = itertools.cycle(self.from_t1)
             sent_count_vlan_to_t1 = 0
             sent_count_t1_to_vlan = 0
+            start_packet_count = self.sent_packet_count
+            max_lag, total_lag, schedule_restarts = 0.0, 0.0, 0
+            start_time = time.monotonic()
+            next_send_time = start_time + self.send_interval
 
             while True:
-                time.sleep(self.send_interval)
+                now = time.monotonic()
+                if now < next_send_time:
+                    time.sleep(next_send_time - now)
+                else:
+                    lag = now - next_send_time
+                    total_lag += lag
+                    max_lag = max(max_lag, lag)
+                    if lag > SENDER_MAX_CATCH_UP:
+                        next_send_time = now
+                        schedule_restarts += 1
                 if self.reboot_start and self.finalizer_state == "inactive":
                     # keep sending packets until device reboots and finalizer enters inactive state
                     break
-                payload = '0' * 60 + str(self.sent_packet_count)
                 if (self.sent_packet_count % 5) == 0:   # From vlan to T1.
-                    from_port, packet = next(self.watcher_from_server_iter)
-                    packet = scapyall.Ether(packet)
-                    packet.load = payload
+                    from_port, header, trailer = next(from_vlan_iter)
                     sent_count_vlan_to_t1 += 1
                 else:   # From T1 to vlan.
-                    src_port, packet = next(from_t1_iter)
-                    packet = scapyall.Ether(packet)
-                    packet.load = payload
-                    from_port = src_port
+                    from_port, header, trailer = next(from_t1_iter)
                     sent_count_t1_to_vlan += 1
-                testutils.send_packet(self, from_port, bytes(packet))
+                testutils.send_packet(self, from_port, header + str(self.sent_packet_count).encode() + trailer)
                 self.sent_packet_count = self.sent_packet_count + 1
-
+                next_send_time += self.send_interval
+
+            sent = self.sent_packet_count - start_packet_count
+            elapsed = time.monotonic() - start_time
+            self.sender_report = {
+                "requested_pps": round(1 / self.send_interval, 1),
+                "achieved_pps": round(sent / elapsed, 1) if elapsed else 0.0,
+                "max_lag_ms": round(max_lag * 1000, 3),
+                "mean_lag_ms": round(total_lag * 1000 / sent, 3) if sent else 0.0,
+                "schedule_restarts": schedule_restarts,
+            }
+            self.log("Sender rate: requested {requested_pps} pps, achieved {achieved_pps} pps, "
+                     "max lag {max_lag_ms} ms, mean lag {mean_lag_ms} ms, "
+                     "schedule restarts {schedule_restarts}".format(**self.sender_report))
+            if self.sender_report["achieved_pps"] < 0.95 * self.sender_report["requested_pps"]:
+                self.log("Sender could not keep the requested rate, disruption times are less precise")
             self.log("Sent count vlan to t1: {}".format(sent_count_vlan_to_t1))
             self.log("Sent count t1 to vlan: {}".format(sent_count_t1_to_vlan))
             self.log("Sender has been running for %s" %
@@ -1912,7 +1965,7 @@ class ReloadTest(BaseTest):
         """
         This function listens on all ports, in both directions, for the TCP src=1234 dst=5000 packets, until timeout.
         Once found, all packets are dumped to local pcap file,
-        and all packets are saved to self.packets as scapy type(pcap format).
+        and the TCP test flow packets are saved to self.flow as columns.
         """
         if not wait:
             wait = self.time_to_listen + self.test_params['sniff_time_incr']
@@ -1946,8 +1999,9 @@ class ReloadTest(BaseTest):
             else:
                 self.start_sniffer_on_ptf(self.capture_pcap, sniff_filter, wait)
 
-            self.packets = scapyall.rdpcap(self.capture_pcap)
-            self.log("Number of all packets captured: {}".format(len(self.packets)))
+            self.flow = self.read_flow(self.capture_pcap)
+            self.log("Number of all packets captured: {}".format(
+                self.flow.total_packets if NUMPY_AVAILABLE else len(self.flow)))
         except Exception:
             traceback_msg = traceback.format_exc()
             self.log("Error in tcpdump_sniff: {}".format(traceback_msg))
@@ -2046,9 +2100,20 @@ class ReloadTest(BaseTest):
         if process.returncode is not None:
             self.log("Dumpcap process killed")
 
+    def read_flow(self, filename):
+        """
+        This method reads the TCP test flow of a pcap file into columns, see pcap_flow.read_tcp_flow().
+        A packet is in the flow if it has a valid TCP sequential TCP payload, packets decapsulated from VXLAN
+        packets are included for vnet.
+        Without NumPy, all the packets of the pcap file are read with scapy instead.
+        """
+        if not NUMPY_AVAILABLE:
+            return scapyall.rdpcap(filename)
+        return read_tcp_flow(filename, sport=1234, dport=5000, vxlan_sport=1234 if self.vnet else None)
+
     def check_tcp_payload(self, packet):
         """
-        This method is used by examine_flow() method.
+        This method is used by scan_packets() method.
         It returns True if a packet is not corrupted and has a valid TCP sequential TCP Payload
         """
         try:
@@ -2058,7 +2123,7 @@ class ReloadTest(BaseTest):
         except Exception:
             return False
 
-    def no_flood(self, packet):
+    def no_flood_packet(self, packet):
         """
         This method filters packets which are unique (i.e. no floods).
         """
@@ -2077,22 +2142,34 @@ class ReloadTest(BaseTest):
         else:
             return False
 
-    def examine_flow(self, filename=None):
+    def no_flood(self, flow):
         """
-        This method examines pcap file (if given), or self.packets scapy file.
-        The method compares TCP payloads of the packets one by one (assuming all payloads are consecutive integers),
-        and the losses if found - are treated as disruptions in Dataplane forwarding.
-        All disruptions are saved to self.lost_packets dictionary, in format:
-        disrupt_start_id = (missing_packets_count, disrupt_time, disrupt_start_timestamp, disrupt_stop_timestamp)
+        This method filters packets which are unique (i.e. no floods).
+        Returns a mask of the sent packets and the first received copy of each payload ID.
+        """
+        import numpy as np
+
+        macs = [mac_to_int(self.dut_mac), mac_to_int(self.vlan_mac)]
+        # for dualtor, t1->server rcvd pkt will have src MAC as vlan_mac,
+        # and server->t1 rcvd pkt will have src MAC as dut_mac
+        received = np.isin(flow.src_mac, macs)
+        # for dualtor, t1->server sent pkt will have dst MAC as dut_mac,
+        # and server->t1 sent pkt will have dst MAC as vlan_mac
+        sent = np.isin(flow.dst_mac, macs)
+        # Packets are in capture order, a received packet is unique if its payload ID was not received before
+        unique = np.zeros(len(flow), dtype=bool)
+        received_rows = np.flatnonzero(received)
+        _, first = np.unique(flow.payload_id[received_rows], return_index=True)
+        unique[received_rows[first]] = True
+        return unique | sent
+
+    def scan_packets(self, all_packets):
+        """
+        This method is used by examine_flow() method when NumPy is not available.
+        It filters out floods, re-arranges the packets by Payload ID and Timestamp, and compares the TCP payloads of
+        the scapy packets one by one, saving the disruptions to self.lost_packets.
+        Returns the filtered packets, the counters of the packets and the last received payload ID.
         """
-        if filename:
-            all_packets = scapyall.rdpcap(filename)
-        elif self.packets:
-            all_packets = self.packets
-        else:
-            self.log("Filename and self.packets are not defined.")
-            self.fails['dut'].add("Filename and self.packets are not defined")
-            return None
         # Filter out packets and remove floods:
         # This list will contain all unique Payload ID, to filter out received floods.
         self.unique_id = list()
@@ -2102,7 +2179,7 @@ class ReloadTest(BaseTest):
                             pkt[scapyall.TCP].sport == 1234 and
                             pkt[scapyall.TCP].dport == 5000 and
                             self.check_tcp_payload(pkt) and
-                            self.no_flood(pkt)
+                            self.no_flood_packet(pkt)
                             ]
 
         if self.vnet:
@@ -2116,15 +2193,13 @@ class ReloadTest(BaseTest):
                                       pkt[scapyall.TCP].sport == 1234 and
                                       pkt[scapyall.TCP].dport == 5000 and
                                       self.check_tcp_payload(pkt) and
-                                      self.no_flood(pkt)
+                                      self.no_flood_packet(pkt)
                                       ]
             filtered_packets = filtered_packets + filtered_decap_packets
 
         # Re-arrange packets, if delayed, by Payload ID and Timestamp:
         packets = sorted(filtered_packets, key=lambda packet: (
             int(bytes(packet[scapyall.TCP].payload)), float(packet.time)))
-        self.lost_packets = dict()
-        self.max_disrupt, self.total_disruption = 0, 0
         sent_packets = dict()
         # Track packet id's that were neither sent or received
         missing_sent_and_received_packet_id_sequences = []
@@ -2245,6 +2320,172 @@ class ReloadTest(BaseTest):
             self.log("*********** Missed received packets - vlan-to-t1 - {}".format(missed_vlan_to_t1))
             self.log("*********** Flooded pkts - {}".format(flooded_pkts))
             self.log("**************************************************************")
+        return (packets, sent_counter, received_counter, received_t1_to_vlan, received_vlan_to_t1, missed_t1_to_vlan,
+                missed_vlan_to_t1, prev_payload, missing_sent_and_received_packet_id_sequences)
+
+    def scan_flow(self, flow):
+        """
+        This method is used by examine_flow() method.
+        It filters out floods, re-arranges the packets by Payload ID and Timestamp, and compares the TCP payloads of
+        the packet columns one by one, saving the disruptions to self.lost_packets.
+        Returns the filtered packets, the counters of the packets and the last received payload ID.
+        """
+        import numpy as np
+
+        # Filter out floods, then re-arrange packets, if delayed, by Payload ID and Timestamp:
+        packets = flow.take(self.no_flood(flow)).sort_by_payload()
+        # Track packet id's that were neither sent or received
+        missing_sent_and_received_packet_id_sequences = []
+        self.fails['dut'].add("Sniffer failed to capture any traffic")
+        self.assertTrue(len(packets), "Sniffer failed to capture any traffic")
+        self.fails['dut'].clear()
+        prev_payload = None
+        if len(packets):
+            macs = [mac_to_int(self.dut_mac), mac_to_int(self.vlan_mac)]
+            # This is a sent packet - keep track of it as payload_id:timestamp.
+            # for dualtor both MACs are needed:
+            #   t1->server sent pkt will have dst MAC as dut_mac,
+            #   and server->t1 sent pkt will have dst MAC as vlan_mac
+            sent = np.isin(packets.dst_mac, macs)
+            sent_ids = packets.payload_id[sent]
+            sent_counter = len(sent_ids)
+            flooded = sent_ids[1:] == sent_ids[:-1]
+            flooded_pkts = sent_ids[1:][flooded].tolist()
+            # Sent packets are sorted by payload and time, the last copy of a payload ID gives its timestamp
+            last_copy = np.append(~flooded, True)
+            sent_packets = sent_ids[last_copy]
+            sent_packet_times = packets.time[sent][last_copy]
+
+            def sent_packet_time(payload):
+                pos = np.searchsorted(sent_packets, payload)
+                if pos < len(sent_packets) and sent_packets[pos] == payload:
+                    return float(sent_packet_times[pos])
+                return None
+
+            # This is a received packet.
+            # for dualtor both MACs are needed:
+            #   t1->server rcvd pkt will have src MAC as vlan_mac,
+            #   and server->t1 rcvd pkt will have src MAC as dut_mac
+            received = ~sent & np.isin(packets.src_mac, macs)
+            received_rows = np.flatnonzero(received)
+            received_payloads = packets.payload_id[received_rows].tolist()
+            received_times = packets.time[received_rows].tolist()
+            received_counter = len(received_payloads)    # Counts packets from dut.
+            received_vlan_to_t1 = int(np.count_nonzero(packets.payload_id[received_rows] % 5 == 0))  # From vlan to T1.
+            received_t1_to_vlan = received_counter - received_vlan_to_t1
+            received_but_not_sent_packets = []
+            missed_vlan_to_t1 = 0
+            missed_t1_to_vlan = 0
+            self.disruption_start, self.disruption_stop = None, None
+
+            # Received packets following the previous one are not a disruption, only look at the gaps. A received
+            # packet that was not sent is ignored, so the packet after it is compared to the same previous packet.
+            prev_payload, prev_time = -1, 0
+            gaps = collections.deque(np.flatnonzero(np.diff(packets.payload_id[received_rows], prepend=-1) > 1))
+            ignored_row = None
+            while gaps:
+                row = int(gaps.popleft())
+                if row > 0 and row - 1 != ignored_row:
+                    prev_payload, prev_time = received_payloads[row - 1], received_times[row - 1]
+                received_payload, received_time = received_payloads[row], received_times[row]
+                if received_payload - prev_payload <= 1:
+                    continue
+                if sent_packet_time(received_payload) is None:
+                    self.log("Ignoring received packet with payload {}, as it was not sent".format(
+                        received_payload))
+                    if not received_but_not_sent_packets or received_but_not_sent_packets[-1] != received_payload:
+                        received_but_not_sent_packets.append(received_payload)
+                    ignored_row = row
+                    if row + 1 < received_counter and (not gaps or gaps[0] != row + 1):
+                        gaps.appendleft(row + 1)
+                    continue
+                # Packets in a row are missing, a potential disruption.
+                self.log(
+                    "received_payload: {} (at {}), prev_payload: {} (at {}), "
+                    "sent_counter: {}, received_counter: {}".format(
+                        received_payload, datetime.datetime.fromtimestamp(received_time),
+                        prev_payload, datetime.datetime.fromtimestamp(prev_time),
+                        # Packets before this one in payload order
+                        int(received_rows[row]) - row, row + 1
+                    )
+                )
+                # How many packets lost in a row.
+                lost_id = (received_payload - 1) - prev_payload
+
+                # Find previous sequential sent packet that was captured
+                lost_start = np.searchsorted(sent_packets, prev_payload + 1)
+                lost_end = np.searchsorted(sent_packets, received_payload)
+                prev_sent_packet_time = None
+                prev_pkt_pt = received_payload
+                if lost_start < lost_end:
+                    prev_pkt_pt = int(sent_packets[lost_start])
+                    prev_sent_packet_time = float(sent_packet_times[lost_start])
+                missing_sent_and_received_pkt_count = (prev_pkt_pt - (prev_payload + 1)) - (
+                    bisect.bisect_left(received_but_not_sent_packets, prev_pkt_pt) -
+                    bisect.bisect_left(received_but_not_sent_packets, prev_payload + 1))
+                if missing_sent_and_received_pkt_count > 0:
+                    missing_sent_and_received_packet_id_sequences_fmtd = \
+                        str(prev_payload + 1) if missing_sent_and_received_pkt_count == 1\
+                        else "{}-{}".format(prev_payload + 1, received_payload - 1)
+                    missing_sent_and_received_packet_id_sequences.append(
+                        missing_sent_and_received_packet_id_sequences_fmtd)
+                if prev_sent_packet_time is not None:
+                    # Disruption occurred - some sent packets were not received
+
+                    # How long disrupt lasted.
+                    this_sent_packet_time = sent_packet_time(received_payload)
+                    disrupt = this_sent_packet_time - prev_sent_packet_time
+
+                    # Add disrupt to the dict:
+                    self.lost_packets[prev_payload] = (
+                        lost_id, disrupt, received_time - disrupt, received_time)
+                    self.log("Disruption between packet ID %d and %d. For %.4f " % (
+                        prev_payload, received_payload, disrupt))
+                    # lost received for packet sent from vlan to T1.
+                    lost_vlan_to_t1 = int(np.count_nonzero(sent_packets[lost_start:lost_end] % 5 == 0))
+                    missed_vlan_to_t1 += lost_vlan_to_t1
+                    missed_t1_to_vlan += (lost_end - lost_start) - lost_vlan_to_t1
+                    self.log("")
+                    if not self.disruption_start:
+                        self.disruption_start = datetime.datetime.fromtimestamp(
+                           float(prev_time))
+                    self.disruption_stop = datetime.datetime.fromtimestamp(
+                        float(received_time))
+            if received_counter:
+                prev_payload = prev_payload if ignored_row == received_counter - 1 else received_payloads[-1]
+            self.log(
+                "**************** Packet received summary: ********************")
+            self.log("*********** Sent packets captured - {}".format(sent_counter))
+            self.log("*********** received packets captured - t1-to-vlan - {}".format(received_t1_to_vlan))
+            self.log("*********** received packets captured - vlan-to-t1 - {}".format(received_vlan_to_t1))
+            self.log("*********** Missed received packets - t1-to-vlan - {}".format(missed_t1_to_vlan))
+            self.log("*********** Missed received packets - vlan-to-t1 - {}".format(missed_vlan_to_t1))
+            self.log("*********** Flooded pkts - {}".format(flooded_pkts))
+            self.log("**************************************************************")
+        return (packets, sent_counter, received_counter, received_t1_to_vlan, received_vlan_to_t1, missed_t1_to_vlan,
+                missed_vlan_to_t1, prev_payload, missing_sent_and_received_packet_id_sequences)
+
+    def examine_flow(self, filename=None):
+        """
+        This method examines pcap file (if given), or self.flow read from the sniffer pcap file.
+        The method compares TCP payloads of the packets one by one (assuming all payloads are consecutive integers),
+        and the losses if found - are treated as disruptions in Dataplane forwarding.
+        All disruptions are saved to self.lost_packets dictionary, in format:
+        disrupt_start_id = (missing_packets_count, disrupt_time, disrupt_start_timestamp, disrupt_stop_timestamp)
+        """
+        if filename:
+            flow = self.read_flow(filename)
+        elif self.flow is not None:
+            flow = self.flow
+        else:
+            self.log("Filename and self.flow are not defined.")
+            self.fails['dut'].add("Filename and self.flow are not defined")
+            return None
+        self.lost_packets = dict()
+        self.max_disrupt, self.total_disruption = 0, 0
+        scan = self.scan_flow if NUMPY_AVAILABLE else self.scan_packets
+        (packets, sent_counter, received_counter, received_t1_to_vlan, received_vlan_to_t1, missed_t1_to_vlan,
+         missed_vlan_to_t1, prev_payload, missing_sent_and_received_packet_id_sequences) = scan(flow)
         self.fails['dut'].add("Sniffer failed to filter any traffic from DUT")
         self.assertTrue(received_counter,
                         "Sniffer failed to filter any traffic from DUT")
@@ -2313,10 +2554,13 @@ class ReloadTest(BaseTest):
             self.fails["dut"].add(message)
 
         self.log("Total incoming packets captured %d" % received_counter)
-        if packets:
+        if len(packets):
             filename = ('/tmp/capture_filtered.pcap' if self.logfile_suffix is None
                         else "/tmp/capture_filtered_%s.pcap" % self.logfile_suffix)
-            scapyall.wrpcap(filename, packets)
+            if NUMPY_AVAILABLE:
+                packets.write_pcap(filename)
+            else:
+                scapyall.wrpcap(filename, packets)
             self.log("Filtered pcap dumped to %s" % filename)
 
     def check_forwarding_stop(self, signal):
@@ -0,0 +1 @@
+../../../../../../tests/common/helpers/pcap_flow.py
\ No newline at end of file
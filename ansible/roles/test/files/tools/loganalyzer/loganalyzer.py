@@ -29,11 +29,19 @@ import re
 import os
 import os.path
 import csv
+import json
 import time
 import logging
 import logging.handlers
 from datetime import datetime
 
+try:
+    import re._parser as sre_parse
+    import re._constants as sre_constants
+except ImportError:
+    import sre_parse
+    import sre_constants
+
 # ---------------------------------------------------------------------
 # Global variables
 # ---------------------------------------------------------------------
@@ -56,6 +64,271 @@ err_start_ignore_marker = -8
 # will not be picked up by the analyzer.
 MAX_LOG_MESSAGE_LENGTH = 1000
 
+# -- Streaming analysis
+# Block size used when searching backwards for the start marker.
+MARKER_SEARCH_BLOCK_SIZE = 1024 * 1024
+# Byte offsets of markers are kept in a small sidecar file next to the analyzed log,
+# so repeated analyses of the same file can seek straight to the start marker.
+MARKER_INDEX_SUFFIX = '.loganalyzer_index'
+MARKER_INDEX_MAX_ENTRIES = 64
+
+# -- Literal prefilter
+# Longest literal anchor kept per regular expression. A prefix of a required literal is
+# required as well, shorter anchors keep the prefilter pattern small.
+MAX_ANCHOR_LENGTH = 16
+
+
+def required_literals(parsed, flags):
+    '''
+    @summary: Find literal strings, at least one of which is present in any string matching
+              the given parsed regular expression.
+
+    @param parsed: Sequence of (opcode, argument) items, as returned by sre_parse.parse().
+    @param flags: Regular expression flags in effect.
+
+    @return: Set of literal strings, or None if no such set can be determined.
+    '''
+    if flags & re.IGNORECASE:
+        return None
+
+    candidates = []
+    literal_run = []
+    for opcode, argument in list(parsed) + [(None, None)]:
+        if opcode == sre_constants.LITERAL:
+            literal_run.append(chr(argument))
+            continue
+        if literal_run:
+            candidates.append(set([''.join(literal_run)]))
+            literal_run = []
+
+        literals = None
+        if opcode == sre_constants.SUBPATTERN:
+            add_flags = argument[1] if len(argument) == 4 else 0
+            literals = required_literals(argument[-1], flags | add_flags)
+        elif opcode in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and argument[0] >= 1:
+            literals = required_literals(argument[2], flags)
+        elif opcode == sre_constants.BRANCH:
+            literals = set()
+            for branch in argument[1]:
+                branch_literals = required_literals(branch, flags)
+                if branch_literals is None:
+                    literals = None
+                    break
+                literals |= branch_literals
+        if literals:
+            candidates.append(literals)
+
+    if not candidates:
+        return None
+    # -- The set whose shortest literal is the longest is the most selective
+    return max(candidates, key=lambda literals: min(len(literal) for literal in literals))
+
+
+def literal_trie_pattern(literals):
+    '''
+    @summary: Build a regular expression matching any of the literals, structured as a trie.
+
+    The regular expression engine then walks the trie at each position of the input, instead of
+    trying every literal one after another, like an Aho-Corasick automaton does.
+    '''
+    if not literals:
+        # -- Never matches
+        return '(?!)'
+
+    trie = {}
+    for literal in literals:
+        node = trie
+        for char in literal:
+            node = node.setdefault(char, {})
+        node[None] = True
+
+    def to_pattern(node):
+        # -- A string containing a literal also contains its prefixes, longer literals are not needed
+        if None in node:
+            return ''
+        branches = []
+        last_chars = []
+        for char in sorted(node):
+            sub_pattern = to_pattern(node[char])
+            if sub_pattern:
+                branches.append(re.escape(char) + sub_pattern)
+            else:
+                last_chars.append(re.escape(char))
+        if len(last_chars) == 1:
+            branches.append(last_chars[0])
+        elif last_chars:
+            branches.append('[' + ''.join(last_chars) + ']')
+        if len(branches) == 1:
+            return branches[0]
+        return '(?:' + '|'.join(branches) + ')'
+
+    return to_pattern(trie)
+
+
+def split_alternatives(pattern):
+    '''
+    @summary: Split a regular expression at the '|' which are not nested in a group or a set.
+
+    @return: List of alternatives, or None if they can't be used as standalone regular
+        expressions (back references are numbered across alternatives).
+    '''
+    if re.search(r'\\[1-9]|\(\?P=', pattern):
+        return None
+
+    alternatives = []
+    depth = 0
+    alternative_start = 0
+    index = 0
+    while index < len(pattern):
+        char = pattern[index]
+        if char == '\\':
+            index += 1
+        elif char == '[':
+            # -- A ']' right after '[' or '[^' is a literal
+            index += 1
+            if index < len(pattern) and pattern[index] == '^':
+                index += 1
+            if index < len(pattern) and pattern[index] == ']':
+                index += 1
+            while index < len(pattern) and pattern[index] != ']':
+                if pattern[index] == '\\':
+                    index += 1
+                index += 1
+        elif char == '(':
+            depth += 1
+        elif char == ')':
+            depth -= 1
+        elif char == '|' and depth == 0:
+            alternatives.append(pattern[alternative_start:index])
+            alternative_start = index + 1
+        index += 1
+    alternatives.append(pattern[alternative_start:])
+    return alternatives
+
+
+class MessagePatternSet:
+    '''
+    @summary: Set of message regular expressions, searched with the help of literal anchors.
+
+    The alternatives of the combined messages regular expression are compiled one by one, each with
+    the literals of which at least one must be present in a matching line. A line is searched only
+    with the alternatives whose literal is present in it, which is much cheaper than searching it with
+    the whole alternation, e.g. the few hundred '.* ERR ...' rows of the common ignore file.
+    '''
+
+    def __init__(self, messages_regex):
+        self.messages_regex = messages_regex
+        self.anchored = []
+        self.unanchored = []
+        # -- Literals of all the alternatives, None if any alternative has no literal anchor
+        self.literals = set()
+        if messages_regex is None:
+            return
+
+        alternatives = None
+        try:
+            # -- Comments of verbose regular expressions may hold any character
+            patterns = None if messages_regex.flags & re.VERBOSE else split_alternatives(messages_regex.pattern)
+            if patterns is not None:
+                alternatives = [re.compile(pattern, messages_regex.flags) for pattern in patterns]
+        except (re.error, ValueError, RecursionError):
+            alternatives = None
+        if alternatives is None:
+            alternatives = [messages_regex]
+
+        for alternative in alternatives:
+            literals = self.get_literals(alternative)
+            if literals:
+                self.anchored.append((tuple(literals), alternative))
+                if self.literals is not None:
+                    self.literals |= literals
+            else:
+                self.unanchored.append(alternative)
+                self.literals = None
+
+    def get_literals(self, regex):
+        '''
+        @summary: Literal anchors of a compiled regular expression, None if there are none.
+        '''
+        try:
+            parsed = sre_parse.parse(regex.pattern, regex.flags)
+            flags = parsed.state.flags if hasattr(parsed, 'state') else parsed.pattern.flags
+            literals = required_literals(parsed, flags)
+        except (re.error, RecursionError, AttributeError, TypeError):
+            return None
+        if not literals:
+            return None
+        return set(literal[:MAX_ANCHOR_LENGTH] for literal in literals)
+
+    def search(self, line, from_start=False):
+        '''
+        @summary: Check whether the line matches the messages regular expression.
+
+        @param from_start: Match at the beginning of the line only, like regex.match() does.
+
+        @return: True if messages_regex.search(line) (or messages_regex.match(line)) would match.
+        '''
+        for literals, alternative in self.anchored:
+            for literal in literals:
+                if literal in line:
+                    if alternative.match(line) if from_start else alternative.search(line):
+                        return True
+                    break
+        for alternative in self.unanchored:
+            if alternative.match(line) if from_start else alternative.search(line):
+                return True
+        return False
+
+
+class LineClassifier:
+    '''
+    @summary: Classify log lines as expected, matching or neither, in one pass.
+
+    Literal anchors of the match and expect regular expressions (e.g. the words of 's' rows
+    converted by error_to_regx) are combined into one trie shaped prefilter. Most log lines contain
+    none of the anchors and are classified with this single scan. Candidate lines are only searched
+    with the alternatives whose anchor they contain, see MessagePatternSet. The result is the same as
+    calling line_is_expected() and line_matches() for every line.
+    '''
+
+    def __init__(self, analyzer, match_messages_regex, ignore_messages_regex, expect_messages_regex):
+        self.analyzer = analyzer
+        self.match_messages_regex = match_messages_regex
+        self.ignore_messages_regex = ignore_messages_regex
+        self.expect_messages_regex = expect_messages_regex
+
+        self.match_set = MessagePatternSet(match_messages_regex)
+        self.ignore_set = MessagePatternSet(ignore_messages_regex)
+        self.expect_set = MessagePatternSet(expect_messages_regex)
+        # -- Lines holding none of the match and expect anchors are neither expected nor matching
+        self.candidate_prefilter = None
+        if self.match_set.literals is not None and self.expect_set.literals is not None:
+            self.candidate_prefilter = re.compile(
+                literal_trie_pattern(self.match_set.literals | self.expect_set.literals))
+
+    def classify(self, line):
+        '''
+        @summary: Classify a log line.
+
+        @return: 'expected' if line_is_expected(), otherwise 'match' if line_matches(), otherwise None.
+        '''
+        if self.candidate_prefilter is not None and not self.candidate_prefilter.search(line):
+            return None
+
+        # -- See line_is_expected()
+        if self.expect_set.search(line, from_start=self.analyzer.run_id.startswith("test_advanced_reboot_test_")):
+            return 'expected'
+
+        # -- See line_matches()
+        if self.match_set.search(line):
+            if self.ignore_messages_regex is None:
+                return 'match'
+            if not self.ignore_set.search(line):
+                self.analyzer.print_diagnostic_message('matching line: %s' % line)
+                return 'match'
+
+        return None
+
 
 class AnsibleLogAnalyzer:
     '''
@@ -98,10 +371,12 @@ class AnsibleLogAnalyzer:
         return logger
     # ---------------------------------------------------------------------
 
-    def __init__(self, run_id, verbose, start_marker=None):
+    def __init__(self, run_id, verbose, start_marker=None, streaming=False):
         self.run_id = run_id
         self.verbose = verbose
         self.start_marker = start_marker
+        self.streaming = streaming
+        self.line_classifier = None
     # ---------------------------------------------------------------------
 
     def print_diagnostic_message(self, message):
@@ -179,10 +454,13 @@ class AnsibleLogAnalyzer:
         self.print_diagnostic_message(
             'log file:{}, place marker {}'.format(log_file, marker))
         with open(log_file, 'a') as file:
+            marker_offset = file.tell()
             file.write(datetime.now().strftime("%b %d %H:%M:%S.%f") + ' ')
             file.write(marker)
             file.write('\n')
             file.flush()
+        if self.streaming:
+            self.save_marker_offset(log_file, marker, marker_offset)
 
     def place_marker_to_syslog(self, marker):
         '''
@@ -404,6 +682,22 @@ class AnsibleLogAnalyzer:
 
         return ret_code
 
+    def get_line_classifier(self, match_messages_regex, ignore_messages_regex, expect_messages_regex):
+        '''
+        @summary: Get a LineClassifier for the given regex class instances. The last one built is reused,
+                  since the same regular expressions are used for all the files of an analysis.
+        '''
+        line_classifier = self.line_classifier
+        if (line_classifier is None
+                or line_classifier.match_messages_regex is not match_messages_regex
+                or line_classifier.ignore_messages_regex is not ignore_messages_regex
+                or line_classifier.expect_messages_regex is not expect_messages_regex):
+            line_classifier = LineClassifier(self, match_messages_regex, ignore_messages_regex,
+                                             expect_messages_regex)
+            self.line_classifier = line_classifier
+        return line_classifier
+    # ---------------------------------------------------------------------
+
     def analyze_file(self, log_file_path, match_messages_regex, ignore_messages_regex, expect_messages_regex,
                      maximum_log_length=None):
         '''
@@ -430,6 +724,10 @@ class AnsibleLogAnalyzer:
 
         self.print_diagnostic_message('analyzing file: %s' % log_file_path)
 
+        if self.streaming and not self.is_filename_stdin(log_file_path):
+            return self.analyze_file_streaming(log_file_path, match_messages_regex, ignore_messages_regex,
+                                               expect_messages_regex, maximum_log_length=maximum_log_length)
+
         # -- indicates whether log analyzer currently is in the log range between start
         # -- and end marker. see analyze_file method.
         check_marker = self.require_marker_check(log_file_path)
@@ -446,6 +744,7 @@ class AnsibleLogAnalyzer:
 
         start_marker = self.create_start_marker()
         end_marker = self.create_end_marker()
+        line_classifier = self.get_line_classifier(match_messages_regex, ignore_messages_regex, expect_messages_regex)
 
         ignore_marker_run_ids = []
         for rev_line in reversed(log_file.readlines()):
@@ -510,10 +809,11 @@ class AnsibleLogAnalyzer:
                 if not check_marker and len(rev_line) > maximum_log_length:
                     continue
 
-                if self.line_is_expected(rev_line, expect_messages_regex):
+                line_class = line_classifier.classify(rev_line)
+                if line_class == 'expected':
                     expected_lines.append(rev_line)
 
-                elif self.line_matches(rev_line, match_messages_regex, ignore_messages_regex):
+                elif line_class == 'match':
                     matching_lines.append(rev_line)
 
         # care about the markers only if input is not stdin or no need to check start marker
@@ -529,6 +829,273 @@ class AnsibleLogAnalyzer:
         return matching_lines, expected_lines
     # ---------------------------------------------------------------------
 
+    def marker_index_path(self, log_file_path):
+        '''
+        @summary: Path of the sidecar file holding marker byte offsets of the given log file.
+        '''
+        log_dir, log_name = os.path.split(log_file_path)
+        return os.path.join(log_dir, '.' + log_name + MARKER_INDEX_SUFFIX)
+    # ---------------------------------------------------------------------
+
+    def load_marker_index(self, log_file_path):
+        '''
+        @summary: Load marker byte offsets recorded for the given log file.
+
+        @return: Dict of marker to byte offset. Empty if there is no index, or the index
+            was recorded for another file (e.g. the log file was rotated).
+        '''
+        try:
+            with open(self.marker_index_path(log_file_path), 'r') as index_file:
+                index = json.load(index_file)
+            if index.get('inode') == os.stat(log_file_path).st_ino:
+                return index.get('markers', {})
+        except (IOError, OSError, ValueError, AttributeError):
+            pass
+        return {}
+    # ---------------------------------------------------------------------
+
+    def save_marker_offset(self, log_file_path, marker, offset):
+        '''
+        @summary: Record byte offset of the line holding the marker in the sidecar index.
+            Failing to write the index is not an error, it only makes next analysis slower.
+        '''
+        markers = self.load_marker_index(log_file_path)
+        markers.pop(marker, None)
+        markers[marker] = offset
+        while len(markers) > MARKER_INDEX_MAX_ENTRIES:
+            markers.pop(next(iter(markers)))
+        index_path = self.marker_index_path(log_file_path)
+        try:
+            index = {'inode': os.stat(log_file_path).st_ino, 'markers': markers}
+            with open(index_path + '.tmp', 'w') as index_file:
+                json.dump(index, index_file)
+            os.rename(index_path + '.tmp', index_path)
+        except (IOError, OSError) as e:
+            self.print_diagnostic_message('failed to save marker index %s: %s' % (index_path, repr(e)))
+    # ---------------------------------------------------------------------
+
+    def lookup_marker_offset(self, log_file_path, marker):
+        '''
+        @summary: Get byte offset of the marker from the sidecar index.
+
+        @return: Offset of the line holding the marker, or None if it is not indexed or the
+            index doesn't match the file content anymore (e.g. the file was truncated).
+        '''
+        offset = self.load_marker_index(log_file_path).get(marker)
+        if offset is None:
+            return None
+        with open(log_file_path, 'rb') as log_file:
+            log_file.seek(offset)
+            line = log_file.readline()
+        if marker.encode('utf-8') not in line:
+            return None
+        return offset
+    # ---------------------------------------------------------------------
+
+    def find_marker_offset(self, log_file_path, start_marker, end_marker):
+        '''
+        @summary: Search the log file backwards, block by block, for the last start marker.
+
+        The same rules as in analyze_file() are used to recognize the start marker line,
+        a line which contains the end marker or an ignore marker is never a start marker.
+
+        @return: Byte offset of the line holding the last start marker, or 0 if not found.
+        '''
+        start = start_marker.encode('utf-8')
+        not_start = [end_marker.encode('utf-8'), self.end_ignore_marker_prefix.encode('utf-8'),
+                     self.start_ignore_marker_prefix.encode('utf-8'), b'extract_log']
+
+        with open(log_file_path, 'rb') as log_file:
+            log_file.seek(0, os.SEEK_END)
+            position = log_file.tell()
+            partial_line = b''
+            while position > 0:
+                read_size = min(MARKER_SEARCH_BLOCK_SIZE, position)
+                position -= read_size
+                log_file.seek(position)
+                block = log_file.read(read_size) + partial_line
+
+                # -- The first line of the block may continue in the previous block
+                first_line_end = block.find(b'\n') if position > 0 else -1
+                if first_line_end == -1 and position > 0:
+                    partial_line = block
+                    continue
+                partial_line = block[:first_line_end + 1] if position > 0 else b''
+
+                if start in block:
+                    line_end = position + len(block)
+                    for line in reversed(block[len(partial_line):].split(b'\n')):
+                        line_start = line_end - len(line)
+                        if start in line and not any(marker in line for marker in not_start):
+                            return line_start
+                        line_end = line_start - 1
+
+        return 0
+    # ---------------------------------------------------------------------
+
+    def get_marker_kind(self, line, start_marker, end_marker):
+        '''
+        @summary: Classify a log line the way analyze_file() does when walking the log backwards.
+
+        @return: One of 'end', 'end_ignore', 'start_ignore', 'start', or None for a regular line.
+        '''
+        if end_marker in line:
+            return 'end'
+        elif self.end_ignore_marker_prefix in line:
+            return 'end_ignore'
+        elif self.start_ignore_marker_prefix in line:
+            return 'start_ignore'
+        elif line.find(start_marker) != -1 and 'extract_log' not in line:
+            return 'start'
+        return None
+    # ---------------------------------------------------------------------
+
+    def iter_log_lines(self, log_file_path, offset):
+        '''
+        @summary: Generator of the lines of the log file, starting from the given byte offset.
+
+        Lines are split and their line endings translated the same way as when the file is read
+        in text mode by analyze_file().
+
+        @return: Tuples of (byte offset of the line, line).
+        '''
+        with open(log_file_path, 'r', newline='') as log_file:
+            encoding = log_file.encoding
+            log_file.seek(offset)
+            for raw_line in log_file:
+                line = raw_line
+                if line.endswith('\r\n'):
+                    line = line[:-2] + '\n'
+                elif line.endswith('\r'):
+                    line = line[:-1] + '\n'
+                yield offset, line
+                offset += len(raw_line) if raw_line.isascii() else len(raw_line.encode(encoding))
+    # ---------------------------------------------------------------------
+
+    def check_markers(self, markers, start_marker_line, check_marker):
+        '''
+        @summary: Validate start/end and ignore markers found in the analysis range.
+
+        Markers are validated walking backwards from the end of the log, exactly as analyze_file()
+        does, so the same error is reported for a malformed log.
+
+        @param markers: List of (marker kind, line) found after the start marker, in file order.
+        @param start_marker_line: The line holding the start marker, None if not found.
+        @param check_marker: Whether the log file must have start/end markers.
+        '''
+        in_analysis_range = not check_marker
+        found_end_marker = False
+        ignore_marker_run_ids = []
+        for kind, rev_line in reversed(markers):
+            if kind == 'end':
+                if (found_end_marker):
+                    print('ERROR: duplicate end marker found')
+                    sys.exit(err_duplicate_end_marker)
+                found_end_marker = True
+                in_analysis_range = True
+            elif kind == 'end_ignore':
+                marker_run_id = rev_line.split(self.end_ignore_marker_prefix)[1]
+                ignore_marker_run_ids.append(marker_run_id)
+                if not in_analysis_range:
+                    print('ERROR: duplicate end ignore marker found')
+                    sys.exit(err_end_ignore_marker)
+                in_analysis_range = False
+            elif kind == 'start_ignore':
+                marker_run_id = ignore_marker_run_ids.pop()
+                if in_analysis_range or marker_run_id not in rev_line:
+                    print('ERROR: unexpected start ignore marker found')
+                    sys.exit(err_start_ignore_marker)
+                in_analysis_range = True
+
+        if start_marker_line is not None and not in_analysis_range:
+            print(('ERROR: found start marker:%s without corresponding end marker' % start_marker_line))
+            sys.exit(err_no_end_marker)
+
+        if check_marker:
+            if (start_marker_line is None):
+                print('ERROR: start marker was not found')
+                sys.exit(err_no_start_marker)
+
+            if (not found_end_marker):
+                print('ERROR: end marker was not found')
+                sys.exit(err_no_end_marker)
+    # ---------------------------------------------------------------------
+
+    def analyze_file_streaming(self, log_file_path, match_messages_regex, ignore_messages_regex,
+                               expect_messages_regex, maximum_log_length=None):
+        '''
+        @summary: Same analysis as analyze_file(), without loading the whole log file into memory.
+
+        The start marker is located with the sidecar marker index, or by searching the file backwards
+        block by block. The log is then scanned forward from the start marker. Whether a line is in the
+        analysis range only depends on the first marker following it: lines followed by the end marker
+        or a start ignore marker are analyzed, lines followed by an end ignore marker are not. So the
+        result of lines is kept pending until the next marker is seen.
+
+        @return: Same as analyze_file(), lists of matching and expected lines in reverse order.
+        '''
+        check_marker = self.require_marker_check(log_file_path)
+        start_marker = self.create_start_marker()
+        end_marker = self.create_end_marker()
+        if maximum_log_length is None:
+            maximum_log_length = MAX_LOG_MESSAGE_LENGTH
+        line_classifier = self.get_line_classifier(match_messages_regex, ignore_messages_regex, expect_messages_regex)
+
+        offset = self.lookup_marker_offset(log_file_path, start_marker)
+        if offset is None:
+            offset = self.find_marker_offset(log_file_path, start_marker, end_marker)
+        self.print_diagnostic_message('analyzing file %s from offset %d' % (log_file_path, offset))
+
+        matching_lines = []
+        expected_lines = []
+        pending_matching_lines = []
+        pending_expected_lines = []
+        markers = []
+        start_marker_line = None
+        start_marker_offset = None
+
+        for line_offset, line in self.iter_log_lines(log_file_path, offset):
+            kind = self.get_marker_kind(line, start_marker, end_marker)
+            if kind is None:
+                if not check_marker and len(line) > maximum_log_length:
+                    continue
+                line_class = line_classifier.classify(line)
+                if line_class == 'expected':
+                    pending_expected_lines.append(line)
+                elif line_class == 'match':
+                    pending_matching_lines.append(line)
+
+            elif kind == 'start':
+                # -- Only the content after the last start marker is analyzed
+                self.print_diagnostic_message('found start marker: %s' % start_marker)
+                start_marker_line = line
+                start_marker_offset = line_offset
+                matching_lines, expected_lines = [], []
+                pending_matching_lines, pending_expected_lines = [], []
+                markers = []
+
+            else:
+                if kind in ('end', 'start_ignore'):
+                    matching_lines.extend(pending_matching_lines)
+                    expected_lines.extend(pending_expected_lines)
+                pending_matching_lines, pending_expected_lines = [], []
+                markers.append((kind, line))
+
+        # -- Lines after the last marker are analyzed only when markers are not required
+        if not check_marker:
+            matching_lines.extend(pending_matching_lines)
+            expected_lines.extend(pending_expected_lines)
+
+        self.check_markers(markers, start_marker_line, check_marker)
+
+        if start_marker_offset is not None:
+            self.save_marker_offset(log_file_path, start_marker, start_marker_offset)
+
+        matching_lines.reverse()
+        expected_lines.reverse()
+        return matching_lines, expected_lines
+    # ---------------------------------------------------------------------
+
     def analyze_file_list(self, log_file_list, match_messages_regex, ignore_messages_regex, expect_messages_regex,
                           maximum_log_length=None):
         '''
@@ -595,6 +1162,9 @@ def usage():
     print('                                 All the strings from these files will be expected to present')
     print('                                 in one of specified log files during the analysis. Must be present')
     print('                                 when action == analyze.')
+    print('--streaming                      Locate the start marker without reading the whole log file, then')
+    print('                                 scan forward from it. Marker byte offsets are kept in a sidecar')
+    print('                                 index file next to the log, for repeated analyses of the same file.')
 
 # ---------------------------------------------------------------------
 
@@ -760,12 +1330,13 @@ def main(argv):
     ignore_files_in = None
     expect_files_in = None
     verbose = False
+    streaming = False
 
     try:
         opts, args = getopt.getopt(argv, "a:r:s:l:o:m:i:e:vh",
                                    ["action=", "run_id=", "start_marker=", "logs=",
                                     "out_dir=", "match_files_in=", "ignore_files_in=",
-                                    "expect_files_in=", "verbose", "help"])
+                                    "expect_files_in=", "verbose", "help", "streaming"])
 
     except getopt.GetoptError:
         print("Invalid option specified")
@@ -804,12 +1375,15 @@ def main(argv):
         elif (opt in ("-v", "--verbose")):
             verbose = True
 
+        elif (opt == "--streaming"):
+            streaming = True
+
     if not (check_action(action, log_files_in, out_dir, match_files_in, ignore_files_in, expect_files_in)
             and check_run_id(run_id)):
         usage()
         sys.exit(err_invalid_input)
 
-    analyzer = AnsibleLogAnalyzer(run_id, verbose, start_marker)
+    analyzer = AnsibleLogAnalyzer(run_id, verbose, start_marker, streaming)
 
     log_file_list = list([_f for _f in log_files_in.split(tokenizer) if _f])
 
@@ -1,5 +1,6 @@
 #!/usr/bin/python
 
+from collections import OrderedDict
 from contextlib import contextmanager
 import functools
 import hashlib
@@ -230,6 +231,85 @@ def adaptive_temporary_interface(vm_set_name, interface_name, reserved_space=0):
     return t_int_if
 
 
+def phase_timing(func):
+    """
+    Record the time spent in a phase of the topology operation, like bind_fp_ports.
+
+    The seconds are accumulated into VMTopology.phase_timings by method name. A phase called from another phase is
+    counted in the outer phase only.
+    """
+    @functools.wraps(func)
+    def wrapper(self, *args, **kwargs):
+        if self._phase_depth > 0:
+            return func(self, *args, **kwargs)
+        self._phase_depth += 1
+        start = time.time()
+        try:
+            return func(self, *args, **kwargs)
+        finally:
+            self._phase_depth -= 1
+            elapsed = time.time() - start
+            self.phase_timings[func.__name__] = round(self.phase_timings.get(func.__name__, 0) + elapsed, 3)
+            logging.info("Phase %s took %.3f seconds", func.__name__, elapsed)
+    return wrapper
+
+
+class OvsTransaction(object):
+    """
+    Accumulate ovs-vsctl commands and run them in one 'ovs-vsctl -- cmd1 -- cmd2 ...' transaction.
+
+    Moving a port to a bridge deletes it from the bridge it is on in the same transaction, so the port is never left
+    unattached when the transaction fails.
+    """
+
+    def __init__(self, port_to_br=None):
+        """
+        Args:
+            port_to_br (dict): port => bridge of the ports on the host, see VMTopology.get_ovs_port_to_bridge.
+                Taken when needed if not given.
+        """
+        self._port_to_br = port_to_br
+        self.cmds = []
+
+    @property
+    def port_to_br(self):
+        if self._port_to_br is None:
+            self._port_to_br = VMTopology.get_ovs_port_to_bridge()
+        return self._port_to_br
+
+    def add_port(self, br_name, port):
+        """Add the port to br_name, delete it from the bridge it is on first if it is another one."""
+        br = self.port_to_br.get(port)
+        if br == br_name:
+            return
+        if br is not None:
+            self.del_port(br, port)
+        self.cmds.append('--may-exist add-port %s %s' % (br_name, port))
+        self.port_to_br[port] = br_name
+
+    def del_port(self, br_name, port):
+        self.cmds.append('--if-exists del-port %s %s' % (br_name, port))
+        if self._port_to_br is not None and self._port_to_br.get(port) == br_name:
+            del self._port_to_br[port]
+
+    def commit(self, processes=None):
+        """
+        Run the accumulated commands in one ovs-vsctl process.
+
+        Args:
+            processes (list): Run the transaction in background and append the process to it if given, see
+                VMTopologyWorker.safe_subprocess_manager.
+        """
+        if not self.cmds:
+            return
+        cmdline = 'ovs-vsctl -- %s' % ' -- '.join(self.cmds)
+        self.cmds = []
+        if processes is not None:
+            processes.append(VMTopology.fire_and_forget(cmdline))
+        else:
+            VMTopology.cmd(cmdline)
+
+
 class VMTopology(object):
 
     def __init__(self, vm_names, vm_properties, fp_mtu, max_fp_num, topo, worker, current_vm_name=None,
@@ -247,7 +327,10 @@ class VMTopology(object):
         self.worker = worker
         self._is_dpu = is_dpu
         self._is_vs_chassis = is_vs_chassis
+        self.phase_timings = OrderedDict()
+        self._phase_depth = 0
 
+    @phase_timing
     def init(self, vm_set_name, vm_base, duts_fp_ports, duts_name, ptf_exists=True, check_bridge=True):
         self.vm_set_name = vm_set_name
         self.duts_name = duts_name
@@ -457,20 +540,24 @@ class VMTopology(object):
             vlans[VM] = attr['vlans'][:]
         return vlans
 
+    @phase_timing
     def add_network_namespace(self):
         """Create a network namespace."""
         self.delete_network_namespace()
         VMTopology.cmd("ip netns add %s" % self.netns)
 
+    @phase_timing
     def delete_network_namespace(self):
         """Delete a network namespace."""
         if os.path.exists("/var/run/netns/%s" % self.netns):
             VMTopology.cmd("ip netns delete %s" % self.netns)
 
+    @phase_timing
     def enable_arp_filter_netns(self):
         """ENable ARP filter in the netns."""
         VMTopology.cmd("ip netns exec %s sysctl -w net.ipv4.conf.all.arp_filter=1" % self.netns)
 
+    @phase_timing
     def add_mgmt_port_to_netns(self, mgmt_bridge, mgmt_ip, mgmt_gw, mgmt_ipv6_addr=None, mgmt_gw_v6=None):
         if VMTopology.intf_not_exists(MGMT_PORT_NAME, netns=self.netns):
             self.add_br_if_to_netns(
@@ -478,6 +565,7 @@ class VMTopology(object):
         self.add_ip_to_netns_if(MGMT_PORT_NAME, mgmt_ip, ipv6_addr=mgmt_ipv6_addr,
                                 default_gw=mgmt_gw, default_gw_v6=mgmt_gw_v6)
 
+    @phase_timing
     def create_bridges(self):
         for vm in self.vm_names:
             for fp_num in range(self.max_fp_num):
@@ -494,6 +582,7 @@ class VMTopology(object):
 
         VMTopology.cmd('ifconfig %s up' % bridge_name)
 
+    @phase_timing
     def destroy_bridges(self):
         bridge_count = 0
         for vm in self.vm_names:
@@ -545,6 +634,7 @@ class VMTopology(object):
         # Timeout
         logging.error('Timeout after %d seconds, %d bridges may still exist' % (max_wait, remaining_count))
 
+    @phase_timing
     def add_injected_fp_ports_to_docker(self):
         """
         add injected front panel ports to docker
@@ -576,6 +666,7 @@ class VMTopology(object):
                 else:
                     self.add_veth_if_to_docker(ext_if, int_if)
 
+    @phase_timing
     def add_injected_VM_ports_to_docker(self):
         for k, attr in self.OVS_LINKs.items():
             vlans = attr['vlans'][:]
@@ -585,6 +676,7 @@ class VMTopology(object):
                 injected_iface = adaptive_name(INJECTED_INTERFACES_TEMPLATE, self.vm_set_name, ptf_index)
                 self.add_veth_if_to_docker(injected_iface, int_if)
 
+    @phase_timing
     def add_mgmt_port_to_docker(self, mgmt_bridge, mgmt_ip, mgmt_gw,
                                 mgmt_ipv6_addr=None, mgmt_gw_v6=None, extra_mgmt_ip_addr=None,
                                 api_server_pid=None):
@@ -601,12 +693,14 @@ class VMTopology(object):
                                  mgmt_gw=mgmt_gw, mgmt_gw_v6=mgmt_gw_v6,
                                  extra_mgmt_ip_addr=extra_mgmt_ip_addr, api_server_pid=api_server_pid)
 
+    @phase_timing
     def add_bp_port_to_docker(self, mgmt_ip, mgmt_ipv6):
         self.add_br_if_to_docker(
             self.bp_bridge, PTF_BP_IF_TEMPLATE % self.vm_set_name, BP_PORT_NAME)
         self.add_ip_to_docker_if(BP_PORT_NAME, mgmt_ip, mgmt_ipv6)
         VMTopology.iface_disable_txoff(BP_PORT_NAME, self.pid)
 
+    @phase_timing
     def add_bp_port_with_vlans_to_docker(self, vlan_data, vrf_map, multi_vrf_config):
         rev_vrf_map = {}
         for peer, vrfs in vrf_map.items():
@@ -641,6 +735,7 @@ class VMTopology(object):
 
         VMTopology.iface_disable_txoff(BP_PORT_NAME, self.pid)
 
+    @phase_timing
     def remove_bp_vlans_from_docker(self, vlan_data):
         for _, data in vlan_data.items():
             vlan_id = data.get("vlan")
@@ -918,6 +1013,7 @@ class VMTopology(object):
 
         VMTopology.iface_up(int_if, netns=self.netns)
 
+    @phase_timing
     def bind_mgmt_port(self, br_name, mgmt_port):
         logging.info('=== Bind mgmt port %s to bridge %s ===' %
                      (mgmt_port, br_name))
@@ -925,12 +1021,14 @@ class VMTopology(object):
         if mgmt_port not in if_to_br:
             VMTopology.cmd("brctl addif %s %s" % (br_name, mgmt_port))
 
+    @phase_timing
     def unbind_mgmt_port(self, mgmt_port):
         _, if_to_br = VMTopology.brctl_show()
         if mgmt_port in if_to_br:
             VMTopology.cmd("brctl delif %s %s" %
                            (if_to_br[mgmt_port], mgmt_port))
 
+    @phase_timing
     def bind_devices_interconnect(self):
         for link_index, vlans in self.devices_interconnect_interfaces.items():
             interconnection_bridge = OVS_INTERCONNECTION_BRIDGE_TEMPLATE % (
@@ -947,6 +1045,7 @@ class VMTopology(object):
             self.bind_devices_interconnect_ports(
                 interconnection_bridge, vlan1_iface, vlan2_iface)
 
+    @phase_timing
     def unbind_devices_interconnect(self):
         for link_index, vlans in self.devices_interconnect_interfaces.items():
             interconnection_bridge = OVS_INTERCONNECTION_BRIDGE_TEMPLATE % (
@@ -965,20 +1064,21 @@ class VMTopology(object):
 
     def bind_devices_interconnect_ports(self, br_name, vlan1_iface, vlan2_iface):
         ports = VMTopology.get_ovs_br_ports(br_name)
+        txn = OvsTransaction()
         if vlan1_iface not in ports:
-            VMTopology.cmd('ovs-vsctl --may-exist add-port %s %s' % (br_name, vlan1_iface))
+            txn.cmds.append('--may-exist add-port %s %s' % (br_name, vlan1_iface))
         if vlan2_iface not in ports:
-            VMTopology.cmd('ovs-vsctl --may-exist add-port %s %s' % (br_name, vlan2_iface))
+            txn.cmds.append('--may-exist add-port %s %s' % (br_name, vlan2_iface))
+        txn.commit()
         bindings = VMTopology.get_ovs_port_bindings(br_name)
         vlan1_iface_id = bindings[vlan1_iface]
         vlan2_iface_id = bindings[vlan2_iface]
         # clear old bindings
-        VMTopology.cmd('ovs-ofctl del-flows %s' % br_name)
-        VMTopology.cmd("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s" %
-                       (br_name, vlan1_iface_id, vlan2_iface_id))
-        VMTopology.cmd("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s" %
-                       (br_name, vlan2_iface_id, vlan1_iface_id))
+        VMTopology.replace_ovs_flows(br_name, [
+            "table=0,in_port=%s,action=output:%s" % (vlan1_iface_id, vlan2_iface_id),
+            "table=0,in_port=%s,action=output:%s" % (vlan2_iface_id, vlan1_iface_id)])
 
+    @phase_timing
     def bind_fp_ports(self, disconnect_vm=False):
         """
         bind dut front panel ports to VMs
@@ -1011,9 +1111,10 @@ class VMTopology(object):
                     (br_name, self.duts_fp_ports[self.duts_name[dut_index]][str(vlan_index)],
                      injected_iface, vm_iface, disconnect_vm)
                 )
+        port_to_br = VMTopology.get_ovs_port_to_bridge()
         with VMTopologyWorker.safe_subprocess_manager() as [processes, tmpdir]:
-            self.worker.map(lambda args: self.bind_ovs_ports(*args, processes=processes,
-                                                             tmpdir=tmpdir), bind_ovs_ports_args)
+            self.worker.map(lambda args: self.bind_ovs_ports(*args, processes=processes, tmpdir=tmpdir,
+                                                             port_to_br=port_to_br), bind_ovs_ports_args)
 
         for k, attr in self.VM_LINKs.items():
             logging.info("Create VM links for {} : {}".format(k, attr))
@@ -1047,6 +1148,7 @@ class VMTopology(object):
                 injected_iface = adaptive_name(INJECTED_INTERFACES_TEMPLATE, self.vm_set_name, ptf_index)
                 self.bind_ovs_ports(br_name, port1, injected_iface, port2, disconnect_vm)
 
+    @phase_timing
     def unbind_fp_ports(self):
         logging.info("=== unbind front panel ports ===")
         unbind_ovs_ports_args = []
@@ -1110,49 +1212,50 @@ class VMTopology(object):
     def bind_vm_link(self, br_name, port1, port2):
         if VMTopology.intf_not_exists(br_name):
             VMTopology.cmd('brctl addbr %s' % br_name)
-        VMTopology.iface_up(br_name)
 
         # Remove port from ovs bridge
-        br = VMTopology.get_ovs_bridge_by_port(port1)
-        if br is not None:
-            VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, port1))
-
-        br = VMTopology.get_ovs_bridge_by_port(port2)
-        if br is not None:
-            VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, port2))
+        txn = OvsTransaction()
+        for port in [port1, port2]:
+            br = txn.port_to_br.get(port)
+            if br is not None:
+                txn.del_port(br, port)
+        txn.commit()
 
         m_to_ifs, _ = VMTopology.brctl_show()
-        if port1 not in m_to_ifs[br_name]:
-            VMTopology.cmd("brctl addif %s %s" % (br_name, port1))
-        if port2 not in m_to_ifs[br_name]:
-            VMTopology.cmd("brctl addif %s %s" % (br_name, port2))
-        VMTopology.iface_up(port1)
-        VMTopology.iface_up(port2)
-
+        ip_cmds = ["link set dev %s up" % br_name]
+        for port in [port1, port2]:
+            if port not in m_to_ifs[br_name]:
+                ip_cmds.append("link set dev %s master %s" % (port, br_name))
+            ip_cmds.append("link set dev %s up" % port)
+        VMTopology.ip_batch(ip_cmds)
+
+    @phase_timing
     def bind_vm_backplane(self):
 
         if VMTopology.intf_not_exists(self.bp_bridge):
             VMTopology.cmd('brctl addbr %s' % self.bp_bridge)
 
-        VMTopology.iface_up(self.bp_bridge)
-
+        br_to_ifs, _ = VMTopology.brctl_show(self.bp_bridge)
+        bp_ifs = br_to_ifs.get(self.bp_bridge, [])
+        ip_cmds = ["link set dev %s up" % self.bp_bridge]
         for attr in self.VMs.values():
             vm_name = self.vm_names[self.vm_base_index + attr['vm_offset']]
             bp_port_name = OVS_BP_TAP_TEMPLATE % vm_name
 
-            br_to_ifs, _ = VMTopology.brctl_show()
-            if bp_port_name not in br_to_ifs[self.bp_bridge]:
-                VMTopology.cmd("brctl addif %s %s" %
-                               (self.bp_bridge, bp_port_name))
+            if bp_port_name not in bp_ifs:
+                ip_cmds.append("link set dev %s master %s" % (bp_port_name, self.bp_bridge))
+            ip_cmds.append("link set dev %s up" % bp_port_name)
 
-            VMTopology.iface_up(bp_port_name)
+        VMTopology.ip_batch(ip_cmds)
 
+    @phase_timing
     def unbind_vm_backplane(self):
 
         if VMTopology.intf_exists(self.bp_bridge):
             VMTopology.iface_down(self.bp_bridge)
             VMTopology.cmd('brctl delbr %s' % self.bp_bridge)
 
+    @phase_timing
     def bind_vs_chassis_ports(self, duts_midplane_ports, duts_inband_ports):
         # We have a KVM based virtaul chassis, create two ovs bridges, bind the midplane and inband ports
         self.create_ovs_bridge(self._vs_chassis_inband_br_name, self.fp_mtu)
@@ -1166,6 +1269,7 @@ class VMTopology(object):
             self.bind_vs_dut_ports(
                 self._vs_chassis_inband_br_name, dut, duts_inband_ports[dut])
 
+    @phase_timing
     def unbind_vs_chassis_ports(self, duts_midplane_ports, duts_inband_ports):
         # We have a KVM based virtaul chassis, bind the midplane and inband ports
         for dut in duts_midplane_ports.keys():
@@ -1180,22 +1284,20 @@ class VMTopology(object):
         self.destroy_ovs_bridge(self._vs_chassis_midplane_br_name)
 
     def bind_vs_dut_ports(self, br_name, dut_name, dut_ports):
-        br_ports = VMTopology.get_ovs_br_ports(br_name)
+        txn = OvsTransaction()
         for port in dut_ports:
-            br = VMTopology.get_ovs_bridge_by_port(port)
-            if br is not None and br != br_name:
-                VMTopology.cmd('ovs-vsctl --if-exists del-port {} {}'.format(br, port))
-
-            if port not in br_ports:
-                VMTopology.cmd('ovs-vsctl --may-exist add-port {} {}'.format(br_name, port))
+            txn.add_port(br_name, port)
+        txn.commit()
 
     def unbind_vs_dut_ports(self, br_name, dut_name, dut_ports):
         """unbind all ports except the vm port from an ovs bridge"""
         if VMTopology.intf_exists(br_name):
             br_ports = VMTopology.get_ovs_br_ports(br_name)
+            txn = OvsTransaction()
             for port in dut_ports:
                 if port in br_ports:
-                    VMTopology.cmd('ovs-vsctl --if-exists del-port {} {}'.format(br_name, port))
+                    txn.del_port(br_name, port)
+            txn.commit()
 
     def bind_ovs_ports(self, br_name, dut_iface, injected_iface, vm_iface, disconnect_vm=False, **kwargs):
         """
@@ -1206,56 +1308,39 @@ class VMTopology(object):
             PTF (injected_iface) --+ OVS bridge (br_name) |
                                    |                      +---- vm_iface
                                    +----------------------+
-        """
-        br = VMTopology.get_ovs_bridge_by_port(injected_iface)
-        if br is not None and br != br_name:
-            VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, injected_iface))
-
-        br = VMTopology.get_ovs_bridge_by_port(dut_iface)
-        if br is not None and br != br_name:
-            VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, dut_iface))
-
-        br = VMTopology.get_ovs_bridge_by_port(vm_iface)
-        if br is not None and br != br_name:
-            VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, vm_iface))
 
-        ports = VMTopology.get_ovs_br_ports(br_name)
-        if injected_iface not in ports:
-            VMTopology.cmd('ovs-vsctl --may-exist add-port %s %s' %
-                           (br_name, injected_iface))
-
-        if dut_iface not in ports:
-            VMTopology.cmd('ovs-vsctl --may-exist add-port %s %s' % (br_name, dut_iface))
-
-        if vm_iface not in ports:
-            VMTopology.cmd('ovs-vsctl --may-exist add-port %s %s' % (br_name, vm_iface))
+        The ports are moved to the bridge in one ovs-vsctl transaction, and the flows replace the old ones in one
+        ovs-ofctl call, which runs in background if kwargs has 'processes' and 'tmpdir' of
+        VMTopologyWorker.safe_subprocess_manager. kwargs 'port_to_br' is the port => bridge map of
+        VMTopology.get_ovs_port_to_bridge shared by the calls of bind_fp_ports.
+        """
+        txn = OvsTransaction(kwargs.get("port_to_br"))
+        for iface in [injected_iface, dut_iface, vm_iface]:
+            txn.add_port(br_name, iface)
+        txn.commit()
 
         bindings = VMTopology.get_ovs_port_bindings(br_name, [dut_iface])
         dut_iface_id = bindings[dut_iface]
         injected_iface_id = bindings[injected_iface]
         vm_iface_id = bindings[vm_iface]
 
-        # clear old bindings
-        VMTopology.cmd('ovs-ofctl del-flows %s' % br_name)
+        all_cmds = []
+        bind_helper = lambda cmd: \
+            all_cmds.append(cmd.split()[-1])  # noqa: E731
 
         if disconnect_vm:
             # Drop packets from VM
-            VMTopology.cmd(
-                "ovs-ofctl add-flow %s table=0,in_port=%s,action=drop" % (br_name, vm_iface_id))
+            bind_helper("ovs-ofctl add-flow %s table=0,in_port=%s,action=drop" % (br_name, vm_iface_id))
         else:
             # Add flow from a VM to an external iface
-            VMTopology.cmd("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s" %
-                           (br_name, vm_iface_id, dut_iface_id))
+            bind_helper("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s" %
+                        (br_name, vm_iface_id, dut_iface_id))
 
         if disconnect_vm:
             # Add flow from external iface to ptf container
-            VMTopology.cmd("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s" %
-                           (br_name, dut_iface_id, injected_iface_id))
+            bind_helper("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s" %
+                        (br_name, dut_iface_id, injected_iface_id))
         else:
-            all_cmds = []
-            bind_helper = lambda cmd: \
-                all_cmds.append(cmd.split()[-1])  # noqa: E731
-
             # Add flow from external iface to a VM and a ptf container
             # Allow BGP, IPinIP, fragmented packets, ICMP, SNMP packets and layer2 packets from DUT to neighbors
             # Block other traffic from DUT to EOS for EOS's stability,
@@ -1339,14 +1424,9 @@ class VMTopology(object):
             bind_helper("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s" %
                         (br_name, injected_iface_id, dut_iface_id))
 
-            if all_cmds:
-                processes = kwargs.get("processes")
-                tmpdir = kwargs.get("tmpdir")
-                with tempfile.NamedTemporaryFile("w", dir=tmpdir, delete=False) as f:
-                    for rule in all_cmds:
-                        f.write(rule.strip("'") + "\n")
-
-                processes.append(VMTopology.fire_and_forget("ovs-ofctl add-flows {} {}".format(br_name, f.name)))
+        # clear old bindings and add the flows in one call
+        VMTopology.replace_ovs_flows(br_name, [rule.strip("'") for rule in all_cmds],
+                                     processes=kwargs.get("processes"), tmpdir=kwargs.get("tmpdir"))
 
     def unbind_ovs_ports(self, br_name, vm_port, **kwargs):
         """unbind all ports except the vm port from an ovs bridge"""
@@ -1398,18 +1478,13 @@ class VMTopology(object):
 
         self.create_ovs_bridge(br_name, self.fp_mtu)
 
-        for intf in [host_if, upper_if, lower_if]:
-            br = VMTopology.get_ovs_bridge_by_port(intf)
-            if br is not None and br != br_name:
-                VMTopology.cmd('ovs-vsctl --if-exists del-port %s %s' % (br, intf))
-
-        ports = VMTopology.get_ovs_br_ports(br_name)
+        txn = OvsTransaction()
         ports_to_be_attached = [host_if, upper_if, lower_if]
         if nic_if is not None:
             ports_to_be_attached.append(nic_if)
         for intf in ports_to_be_attached:
-            if intf not in ports:
-                VMTopology.cmd('ovs-vsctl --may-exist add-port %s %s' % (br_name, intf))
+            txn.add_port(br_name, intf)
+        txn.commit()
 
         bridge_ports = [upper_if, lower_if]
         if nic_if is not None:
@@ -1419,22 +1494,20 @@ class VMTopology(object):
         upper_if_id = bindings[upper_if]
         lower_if_id = bindings[lower_if]
 
-        # clear old bindings
-        VMTopology.cmd('ovs-ofctl del-flows %s' % br_name)
-
+        flows = []
         if nic_if is not None:
             # TODO: open-flow configuration for ovs-bridge simulating server smart NIC
             pass
         else:
             # open-flow configuration for ovs-bridge simulating mux of dualtor y-cable
-            VMTopology.cmd("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s,%s" %
-                           (br_name, host_if_id, upper_if_id, lower_if_id))
+            flows.append("table=0,in_port=%s,action=output:%s,%s" % (host_if_id, upper_if_id, lower_if_id))
             if active_if_index == 0:
-                VMTopology.cmd("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s" %
-                               (br_name, upper_if_id, host_if_id))
+                flows.append("table=0,in_port=%s,action=output:%s" % (upper_if_id, host_if_id))
             else:
-                VMTopology.cmd("ovs-ofctl add-flow %s table=0,in_port=%s,action=output:%s" %
-                               (br_name, lower_if_id, host_if_id))
+                flows.append("table=0,in_port=%s,action=output:%s" % (lower_if_id, host_if_id))
+
+        # clear old bindings
+        VMTopology.replace_ovs_flows(br_name, flows)
 
     def remove_dualtor_cable(self, host_ifindex, is_active_active=False):
         """
@@ -1445,6 +1518,7 @@ class VMTopology(object):
 
         self.destroy_ovs_bridge(br_name)
 
+    @phase_timing
     def add_host_ports(self):
         """
         add dut port in the ptf docker
@@ -1529,10 +1603,12 @@ class VMTopology(object):
 
         self.worker.map(lambda args: _add_host_port(*args), enumerate(self.host_interfaces))
 
+    @phase_timing
     def enable_netns_loopback(self):
         """Enable loopback device in the netns."""
         VMTopology.cmd("ip netns exec %s ifconfig lo up" % self.netns)
 
+    @phase_timing
     def setup_netns_source_routing(self):
         """Setup policy-based routing to forward packet to its igress ports."""
 
@@ -1591,6 +1667,7 @@ class VMTopology(object):
                 VMTopology.cmd("ip netns exec %s ip route add default via %s dev %s table %s" % (
                     self.netns, gateway_addr, ns_if, rt_name))
 
+    @phase_timing
     def remove_host_ports(self):
         """
         remove dut port from the ptf docker
@@ -1639,16 +1716,19 @@ class VMTopology(object):
         if VMTopology.intf_exists(ext_if):
             VMTopology.cmd("ip link delete dev %s" % ext_if)
 
+    @phase_timing
     def remove_ptf_mgmt_port(self):
         ext_if = PTF_MGMT_IF_TEMPLATE % self.vm_set_name
         tmp_name = MGMT_PORT_NAME + VMTopology._generate_fingerprint(ext_if, MAX_INTF_LEN - len(MGMT_PORT_NAME))
         self.remove_veth_if_from_docker(ext_if, MGMT_PORT_NAME, tmp_name)
 
+    @phase_timing
     def remove_ptf_backplane_port(self):
         ext_if = PTF_BP_IF_TEMPLATE % self.vm_set_name
         tmp_name = BP_PORT_NAME + VMTopology._generate_fingerprint(ext_if, MAX_INTF_LEN - len(BP_PORT_NAME))
         self.remove_veth_if_from_docker(ext_if, BP_PORT_NAME, tmp_name)
 
+    @phase_timing
     def remove_injected_fp_ports_from_docker(self):
         for vm, vlans in self.injected_fp_ports.items():
             for vlan in vlans:
@@ -1873,6 +1953,83 @@ class VMTopology(object):
         bridge = out.rstrip()
         return bridge
 
+    @staticmethod
+    def get_ovs_port_to_bridge():
+        """Get port => bridge of all ovs ports on the host in one ovs-vsctl call, instead of port-to-br per port."""
+        out = VMTopology.cmd('ovs-vsctl --format=json -- --columns=name,ports list Bridge '
+                             '-- --columns=_uuid,name list Port')
+        tables = [json.loads(line) for line in out.splitlines() if line.strip()]
+        if len(tables) != 2:
+            raise Exception("Unexpected output of ovs-vsctl list Bridge/Port: %s" % out)
+        bridges, ports = tables
+
+        port_names = {}
+        for (_, uuid), name in ports['data']:
+            port_names[uuid] = name
+        port_to_br = {}
+        for br_name, br_ports in bridges['data']:
+            # A set of one port is the port itself: ["uuid", "<uuid>"], otherwise ["set", [["uuid", "<uuid>"], ...]]
+            br_ports = br_ports[1] if br_ports[0] == 'set' else [br_ports]
+            for _, uuid in br_ports:
+                if uuid in port_names:
+                    port_to_br[port_names[uuid]] = br_name
+        return port_to_br
+
+    @staticmethod
+    def replace_ovs_flows(bridge, flows, processes=None, tmpdir=None):
+        """
+        Replace all flows of an ovs bridge with the flows in one ovs-ofctl call.
+
+        It takes the place of 'ovs-ofctl del-flows' and an 'ovs-ofctl add-flow' for each flow.
+
+        Args:
+            bridge (str): Name of the bridge.
+            flows (list): Flows in the syntax of ovs-ofctl add-flow, like 'table=0,in_port=1,action=output:2'.
+            processes (list): Run ovs-ofctl in background and append the process to it if given, see
+                VMTopologyWorker.safe_subprocess_manager.
+            tmpdir (str): Directory of the flow file, it is removed with the file when processes is given.
+        """
+        with tempfile.NamedTemporaryFile("w", dir=tmpdir, delete=False) as f:
+            for flow in flows:
+                f.write(flow + "\n")
+
+        cmdline = "ovs-ofctl replace-flows %s %s" % (bridge, f.name)
+        if processes is not None:
+            processes.append(VMTopology.fire_and_forget(cmdline))
+        else:
+            try:
+                VMTopology.cmd(cmdline)
+            finally:
+                os.remove(f.name)
+
+    @staticmethod
+    def ip_batch(cmds, pid=None, netns=None):
+        """
+        Run ip commands in one 'ip -batch' process, which sends the netlink requests of all of them.
+
+        Args:
+            cmds (list): ip commands without the leading 'ip', like 'link set dev eth0 up'. The batch stops at the
+                first failed command.
+            pid (str): Run in the network namespace of the pid, like iface_updown.
+            netns (str): Run in the network namespace.
+        """
+        if not cmds:
+            return
+        with tempfile.NamedTemporaryFile("w", delete=False) as f:
+            f.write("\n".join(cmds) + "\n")
+
+        if pid is not None:
+            cmdline = 'nsenter -t %s -n ip -batch %s' % (pid, f.name)
+        elif netns is not None:
+            cmdline = 'ip -n %s -batch %s' % (netns, f.name)
+        else:
+            cmdline = 'ip -batch %s' % f.name
+        try:
+            logging.debug('*** IP BATCH: %s' % json.dumps(cmds, indent=2))
+            return VMTopology.cmd(cmdline)
+        finally:
+            os.remove(f.name)
+
     @staticmethod
     def get_ovs_port_bindings(bridge, vlan_iface=[]):
         # Vlan interface addition may take few secs to reflect in OVS Command,
@@ -2325,6 +2482,7 @@ def main():
     if cmd == 'bind_keysight_api_server_ip':
         vm_names = []
 
+    net = None
     try:
         topo = module.params['topo']
         worker = VMTopologyWorker(use_thread_worker, thread_worker_count)
@@ -2645,9 +2803,10 @@ def main():
 
     except Exception as error:
         logging.error(traceback.format_exc())
-        module.fail_json(msg=str(error))
+        module.fail_json(msg=str(error), phase_timings=net.phase_timings if net else {})
 
-    module.exit_json(changed=True)
+    logging.info("Phase timings of %s: %s", cmd, json.dumps(net.phase_timings, indent=2))
+    module.exit_json(changed=True, phase_timings=net.phase_timings)
 
 
 if __name__ == "__main__":
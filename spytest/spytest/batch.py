@@ -36,6 +36,7 @@ def trace_calls(event, data, fpath, line):
 def batch_init_env(wa):
     wa.debug_level = env.getint("SPYTEST_BATCH_DEBUG_LEVEL", "0")
     wa.max_bucket_setups = env.getint("SPYTEST_BATCH_MAX_BUCKET_SETUPS", "200")
+    wa.scheduling_policy = env.get("SPYTEST_BATCH_SCHEDULING_POLICY", "order")
 
 
 def batch_init():
@@ -69,6 +70,9 @@ def batch_init():
     wa.tclist_cache = {}
     wa.chip_coverate_history = {}
     wa.platform_coverate_history = {}
+    wa.module_history = {}
+    wa.module_history_rate = 0
+    wa.module_schedule = []
 
     # None disable backup/rerun nodes
     # 0 create same number of backup/rerun nodes
@@ -116,6 +120,50 @@ def load_coverage_history():
         tcmap.read_coverage_history(csv_file)
 
 
+def load_module_history():
+    # modules report (*_modules.csv) of earlier runs, comma separated paths or URLs
+    module_history = env.get("SPYTEST_BATCH_MODULE_HISTORY", "")
+    if not module_history or not is_master():
+        return
+    durations, total_secs, total_funcs = {}, 0, 0
+    for index, entry in enumerate(utils.csv2list(module_history)):
+        csv_file = entry
+        if "://" in entry:
+            csv_file = os.path.join(wa.logs_path, "module_history_{}.csv".format(index))
+            try:
+                utils.download_url(entry, csv_file)
+            except Exception as exp:
+                warn("Failed to download module history {} {}".format(entry, exp))
+                continue
+        rows = utils.read_csv(csv_file)
+        if not rows or "Exec Time" not in rows[0]:
+            warn("Module history {} does not have Exec Time".format(entry))
+            continue
+        time_col = rows[0].index("Exec Time")
+        fcnt_col = rows[0].index("FCNT") if "FCNT" in rows[0] else None
+        for row in rows[1:]:
+            if not row or not row[0].endswith(".py"):
+                continue
+            secs = utils.time_parse(row[time_col])
+            if secs <= 0:
+                continue
+            durations.setdefault(row[0], []).append(secs)
+            if fcnt_col is not None:
+                fcnt = utils.integer_parse(row[fcnt_col]) or 0
+                if fcnt > 0:
+                    total_secs, total_funcs = total_secs + secs, total_funcs + fcnt
+
+    # average over the runs, also indexed by basename to match the moved modules
+    for mname, secs_list in durations.items():
+        secs = sum(secs_list) / len(secs_list)
+        wa.module_history[mname] = secs
+        wa.module_history.setdefault(os.path.basename(mname), secs)
+    if total_funcs:
+        wa.module_history_rate = total_secs / total_funcs
+    trace("Module History: {} modules {:.1f} secs per function".format(
+          len(durations), wa.module_history_rate))
+
+
 def init_type_nodes():
     node_types = ["one", "two", "three", "four"]
     backup_nodes = env.get("SPYTEST_BATCH_BACKUP_NODES")
@@ -274,6 +322,8 @@ def save_report():
     save_pending_report()
     if wa.rerun_list:
         save_rerun_report()
+    if wa.module_schedule:
+        save_schedule_report()
 
 
 def save_running_report():
@@ -394,6 +444,42 @@ def save_rerun_report():
     utils.write_html_table3(header, rows, filepath, align=align)
 
 
+def get_schedule_rows():
+    # actual module time is from the previous module completion on the same node
+    rows, node_end, node_predicted = [], {}, {}
+    for entry in wa.module_schedule:
+        start = max(entry.assign_time, node_end.get(entry.node, entry.assign_time))
+        if entry.node not in node_predicted:
+            node_predicted[entry.node] = get_elapsed(wa.module_schedule[0].assign_time, end=start)
+        node_predicted[entry.node] = node_predicted[entry.node] + entry.estimate
+        actual = ""
+        if entry.complete_time:
+            node_end[entry.node] = entry.complete_time
+            actual = get_elapsed(start, True, end=entry.complete_time)
+        rows.append([len(rows) + 1, entry.module, entry.node, entry.functions,
+                     utils.time_format(int(entry.estimate)), entry.source, actual])
+    return rows, node_end, node_predicted
+
+
+def get_schedule_makespan():
+    rows, node_end, node_predicted = get_schedule_rows()
+    start = wa.module_schedule[0].assign_time
+    predicted = int(max(node_predicted.values()))
+    actual = max([get_elapsed(start, end=end) for end in node_end.values()] or [0])
+    return rows, predicted, actual
+
+
+def save_schedule_report():
+    header = ['#', "Module", "Node", "Functions", "Predicted", "Source", "Actual"]
+    rows, predicted, actual = get_schedule_makespan()
+    filepath = os.path.join(wa.logs_path, "batch_schedule.csv")
+    utils.write_csv_file(header, rows, filepath)
+    filepath = os.path.splitext(filepath)[0] + '.html'
+    align = {col: True for col in ["Module"]}
+    rows.append(["", "", "Makespan", "", utils.time_format(predicted), "", utils.time_format(actual)])
+    utils.write_html_table3(header, rows, filepath, align=align)
+
+
 def save_finished_testbeds():
 
     # 0: disable 1: save free pods 2: save free devices
@@ -523,6 +609,10 @@ def report(op, nodeid, node_name):
 def shutdown():
     if is_master():
         trace("batch shutdown")
+        if wa.module_schedule:
+            _, predicted, actual = get_schedule_makespan()
+            trace("Schedule {} Makespan Predicted {} Actual {}".format(wa.scheduling_policy,
+                  utils.time_format(predicted), utils.time_format(actual)))
 
 
 class SpyTestScheduling(object):
@@ -546,6 +636,7 @@ class SpyTestScheduling(object):
         self.use_basenames = False
         self.module_data = {}
         self.base_names = {}
+        self.schedule_entries = {}
         self.wa = wa
         self.default_bucket = int(env.get("SPYTEST_BATCH_DEFAULT_BUCKET", "1"))
         self.default_order = 2
@@ -993,6 +1084,7 @@ class SpyTestScheduling(object):
         item_list = self.collection[item_index]
         if item_index in self.node_modules[node]:
             self.node_modules[node].remove(item_index)
+            self._complete_schedule_entry(item_index)
             report("finish", item_list, name)
             debug("[{}]: ===== Completed {} {}".format(name, item_index, item_list))
         else:
@@ -1001,6 +1093,13 @@ class SpyTestScheduling(object):
         debug("[{}]: ===== NewList {}".format(name, self.node_modules[node]))
         wa.lock.release()
 
+    def _complete_schedule_entry(self, item_index):
+        entry = self.schedule_entries.pop(item_index, None)
+        if entry and item_index in entry.pending:
+            entry.pending.remove(item_index)
+            if not entry.pending:
+                entry.complete_time = get_timenow()
+
     def _assign_pretest(self, node):
         name = get_gw_name(node.gateway)
         worker = self.wa.workers[name]
@@ -1014,33 +1113,75 @@ class SpyTestScheduling(object):
                 return True
         return False
 
-    def _assign_test(self, node, modules=None):
+    def _estimate_module_time(self, mname, minfo):
+        for key in [mname, os.path.basename(mname)]:
+            if key in self.wa.module_history:
+                return self.wa.module_history[key], "history"
+        # new module: use the average function time of the history
+        rate = self.wa.module_history_rate or 1
+        return rate * len(minfo.node_indexes), "functions"
+
+    def _longest_module(self, modules, mnames):
+        # longest processing time first,
+        # the ones with lesser number of matching nodes first when equal
+        longest, longest_key = None, None
+        for mname in mnames:
+            minfo = modules[mname]
+            estimate = self._estimate_module_time(mname, minfo)[0]
+            key = (estimate, -len(minfo.nodes))
+            if longest is None or key > longest_key:
+                longest, longest_key = mname, key
+        return longest
+
+    def _assign_module(self, node, modules, mname, md):
         name = get_gw_name(node.gateway)
         worker = self.wa.workers[name]
+        minfo = modules.pop(mname)
+        self.node_modules[node].extend(minfo.node_indexes)
+        if self.test_spytest_infra_last is not None:
+            if env.match("SPYTEST_BATCH_APPEND_INFRA_TEST", "1", "1"):
+                self.node_modules[node].append(self.test_spytest_infra_last)
+        worker.assigned = worker.assigned + len(minfo.node_indexes)
+        estimate, source = self._estimate_module_time(mname, minfo)
+        entry = SpyTestDict(module=mname, node=name, functions=len(minfo.node_indexes),
+                            estimate=estimate, source=source, assign_time=get_timenow(),
+                            complete_time=None, pending=list(minfo.node_indexes))
+        self.wa.module_schedule.append(entry)
+        for item_index in minfo.node_indexes:
+            self.schedule_entries[item_index] = entry
+        msg = "[{}]: ===== Assigned order:{} {} {} predicted:{}"
+        debug(msg.format(name, md.order, mname, minfo.node_indexes, int(estimate)))
+        for item_index in minfo.node_indexes:
+            report("add", self.collection[item_index], name)
+        report("save", "", "")
+
+    def _assign_test(self, node, modules=None):
+        name = get_gw_name(node.gateway)
         modules = modules or self.main_modules
+        lpt = bool(self.wa.scheduling_policy == "lpt")
         orders = list(range(0, self.max_order + 1))
         if env.match("SPYTEST_BATCH_ORDER_HIGH2LOW", "1", "1"):
             orders = reversed(orders)
         for order in orders:
+            # modules of the order the node can execute, the first one is enough unless lpt
+            mnames = []
             for mname, minfo in modules.items():
                 if name not in minfo.nodes:
                     continue
                 md = self.get_module_data(mname, minfo.used_tpref)
                 if self.order_support and md.order != order:
                     continue
-                if self._assign_pretest(node):
-                    return True
-                del modules[mname]
-                self.node_modules[node].extend(minfo.node_indexes)
-                if self.test_spytest_infra_last is not None:
-                    if env.match("SPYTEST_BATCH_APPEND_INFRA_TEST", "1", "1"):
-                        self.node_modules[node].append(self.test_spytest_infra_last)
-                worker.assigned = worker.assigned + len(minfo.node_indexes)
-                debug("[{}]: ===== Assigned order:{} {} {}".format(name, md.order, mname, minfo.node_indexes))
-                for item_index in minfo.node_indexes:
-                    report("add", self.collection[item_index], name)
-                report("save", "", "")
+                mnames.append(mname)
+                if not lpt:
+                    break
+            if not mnames:
+                continue
+            if self._assign_pretest(node):
                 return True
+            mname = self._longest_module(modules, mnames) if lpt else mnames[0]
+            md = self.get_module_data(mname, modules[mname].used_tpref)
+            self._assign_module(node, modules, mname, md)
+            return True
         return False
 
     def _pending_count(self, worker, modules=None, dbg=False):
@@ -1626,6 +1767,7 @@ def configure(config, logs_path, root_logs_path):
     wa.tcmap = dict()
     load_module_csv()
     load_coverage_history()
+    load_module_history()
     init_stdout(config, logs_path)
     dist.configure(config, logs_path, is_worker(), wa)
     create_dashboard()
@@ -89,6 +89,8 @@ defaults = {
     "SPYTEST_BATCH_POLL_STATUS_TIME": "0",
     "SPYTEST_BATCH_SAVE_FREE_DEVICES": "1",
     "SPYTEST_BATCH_TOPO_PREF": "0",
+    "SPYTEST_PROFILE_TRACE": "0",
+    "SPYTEST_PROFILE_MAX_CMDS": "10000",
     "SPYTEST_TECH_SUPPORT_DELETE_ON_DUT": "0",
     "SPYTEST_SHOWTECH_MAXTIME": "1200",
     "SPYTEST_ABORT_ON_APPLY_BASE_CONFIG_FAIL": "1",
@@ -107,6 +109,10 @@ dev_defaults = {
     "SPYTEST_BATCH_MODULE_TOPO_PREF": None,
     "SPYTEST_BATCH_MATCHING_BUCKET_ORDER": "larger,largest",
     "SPYTEST_BATCH_RERUN": None,
+    # order: module order/bucket sequence,
+    # lpt: module order/bucket sequence too, longest module (as per history) first within an order
+    "SPYTEST_BATCH_SCHEDULING_POLICY": "order",
+    "SPYTEST_BATCH_MODULE_HISTORY": None,
     "SPYTEST_TESTBED_FILE": "testbed.yaml",
     "SPYTEST_FILE_MODE": "0",
     "SPYTEST_SCHEDULING": None,
@@ -903,6 +903,7 @@ class WorkArea(object):
         self.abort_function_msg = None
         self.ignore_post_function_epilog = False
         self.module_log_mode = {}
+        self.module_trace_name = None
         self.skips = {}
         self.module_tc_executed = 0
         self.verify_csv_min_topo = env.getint("SPYTEST_VERIFY_CSV_MIN_TOPOLOGY", "0")
@@ -1141,7 +1142,7 @@ class WorkArea(object):
             self.log("Sleep for {} sec(s)...{} @{}".format(val, msg, line), dut=dut)
         else:
             self.log("Sleep for {} sec(s)... @{}".format(val, line), dut=dut)
-        self.net.wait(val)
+        self.net.wait(val, msg="{} @{}".format(msg or "", line).strip())
 
     def tg_wait(self, val, msg=None):
         if self.is_soft_tgen():
@@ -1152,7 +1153,7 @@ class WorkArea(object):
             self.log("TG Sleep for {} sec(s)...{}".format(val, msg))
         else:
             self.log("TG Sleep for {} sec(s)...".format(val))
-        self._context.net.tg_wait(val)
+        self._context.net.tg_wait(val, msg)
 
     def get_ts_count(self, name):
         try:
@@ -2821,15 +2822,41 @@ class WorkArea(object):
     def tc_log_init(self, func_name):
         self._context.log.tc_log_init(func_name)
 
+    def _module_trace_finish(self):
+        if not self.module_trace_name:
+            return
+        rows = self._context.net.profile_trace_stop()
+        if rows:
+            header = ["#", "Kind", "Operation", "Count", "Time", "Savings", "DUTs"]
+            for index, row in enumerate(rows):
+                row[3] = utils.time_format(int(row[3]), True)
+                row[4] = utils.time_format(int(row[4]), True)
+                row.insert(0, index + 1)
+            filepath = paths.get_mserial_path(self.module_trace_name, _get_logs_path()[1])
+            utils.write_csv_file(header, rows, filepath)
+            self.log("Serialization opportunities: {}\n{}".format(filepath, utils.sprint_vtable(header, rows[:10])))
+        self.module_trace_name = None
+
+    def _module_trace_start(self, module_name):
+        if env.get("SPYTEST_PROFILE_TRACE", "0") == "0":
+            return
+        self.module_trace_name = module_name
+        filepath = paths.get_mtrace_path(module_name, _get_logs_path()[1])
+        self._context.net.profile_trace_start(filepath)
+
     def module_log_init(self, module_name):
         if not module_name:
             self._log_version_info(["module"])
 
+        # stream the profile of the module into trace file
+        self._module_trace_finish()
+
         # close the current module to see start message in session log
         self._context.log.module_log_init(None)
 
         # start new module log
         if module_name:
+            self._module_trace_start(module_name)
             self.banner("Executing Module {}".format(module_name))
             append = self.module_log_mode.get(module_name, False)
             self._context.log.module_log_init(module_name, append=append)
@@ -5528,6 +5528,14 @@ class Net(object):
     def get_stats():
         return profile.get_stats()
 
+    @staticmethod
+    def profile_trace_start(filepath=None):
+        return profile.trace_start(filepath)
+
+    @staticmethod
+    def profile_trace_stop():
+        return profile.trace_stop()
+
     def set_prev_tc(self, prev_tc=None):
         self.prev_testcase = prev_tc
         for devname in self.topo.duts:
@@ -5536,11 +5544,11 @@ class Net(object):
                 continue
             self._set_last_prompt(access, None)
 
-    def tg_wait(self, val):
-        self.wait(val, True)
+    def tg_wait(self, val, msg=None):
+        self.wait(val, True, msg=msg)
 
-    def wait(self, val, is_tg=False, check_max_timeout=True):
-        profile.wait(val, is_tg)
+    def wait(self, val, is_tg=False, check_max_timeout=True, msg=None):
+        profile.wait(val, is_tg, msg)
         if self.cfg.filemode:
             return
         if not check_max_timeout:
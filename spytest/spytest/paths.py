@@ -342,6 +342,14 @@ def get_mtgen_path(module, prefix=None):
     return get_file_path(log_name, "tgen", prefix)
 
 
+def get_mtrace_path(log_name, prefix=None):
+    return get_file_path("{}_trace".format(log_name), "json", prefix)
+
+
+def get_mserial_path(log_name, prefix=None):
+    return get_file_path("{}_serial".format(log_name), "csv", prefix)
+
+
 def get_stdout_log(prefix=None):
     return get_file_path("stdout", "log", prefix)
 
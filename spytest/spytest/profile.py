@@ -1,6 +1,10 @@
+import json
+import threading
+from collections import deque
 
 from spytest.st_time import get_timenow
 from spytest.dicts import SpyTestDict
+from spytest import env
 
 from utilities.parallel import get_thread_name
 
@@ -8,76 +12,166 @@ from utilities.parallel import get_thread_name
 class Profile(object):
 
     def init(self):
+        max_cmds = env.getint("SPYTEST_PROFILE_MAX_CMDS", "10000") or None
         self.pnfound = 0
         self.ts_files = 0
         self.tg_total_wait = 0
         self.tc_total_wait = 0
         self.tg_total_wait = 0
         self.tc_cmd_time = 0
-        self.tc_cmds = []
+        self.tc_cmds = deque(maxlen=max_cmds)
         self.tg_cmd_time = 0
-        self.tg_cmds = []
+        self.tg_cmds = deque(maxlen=max_cmds)
         self.helper_cmd_time = 0
-        self.helper_cmds = []
-        self.cmds = []
+        self.helper_cmds = deque(maxlen=max_cmds)
+        self.cmds = deque(maxlen=max_cmds)
         self.profile_ids = dict()
-        self.canbe_parallel = []
+        self.profile_count = 0
+        self.last_start = [None, None, None]
+        self.canbe_parallel = deque(maxlen=max_cmds)
 
     def __init__(self):
         self.init()
+        self.trace_lock = threading.Lock()
+        self.trace_file = None
+        self.trace_time = None
+        self.trace_ids = dict()
+        self.serial = dict()
+
+    def trace_start(self, filepath=None):
+        self.trace_stop()
+        if filepath:
+            self.trace_time = get_timenow()
+            self.trace_ids = dict()
+            self.trace_file = open(filepath, "w")
+            self.trace_file.write("[\n")
+
+    def trace_stop(self):
+        with self.trace_lock:
+            if self.trace_file:
+                self.trace_file.write("{}\n]\n".format(json.dumps(
+                    {"name": "trace_end", "ph": "i", "s": "g", "pid": 0, "tid": 0,
+                     "ts": int((get_timenow() - self.trace_time).total_seconds() * 1000000)})))
+                self.trace_file.close()
+                self.trace_file = None
+        rows = self.get_serialization_report()
+        with self.trace_lock:
+            self.serial = dict()
+        return rows
+
+    def _trace_id(self, kind, name, pid=0):
+        # trace event format needs numeric process/thread ids, names are given in metadata
+        key = (kind, pid, name)
+        if key not in self.trace_ids:
+            self.trace_ids[key] = len(self.trace_ids) + 1
+            meta = {"name": kind, "ph": "M", "pid": pid or self.trace_ids[key], "args": {"name": name}}
+            if pid:
+                meta["tid"] = self.trace_ids[key]
+            self.trace_file.write("{},\n".format(json.dumps(meta)))
+        return self.trace_ids[key]
+
+    def _trace(self, start_time, thid, ctype, dut, msg, msecs=None):
+        if not self.trace_file:
+            return
+        event = {"name": msg[:200], "cat": ctype,
+                 "ts": int((start_time - self.trace_time).total_seconds() * 1000000)}
+        if msecs is None:
+            event.update({"ph": "i", "s": "t"})
+        else:
+            event.update({"ph": "X", "dur": int(msecs * 1000)})
+        with self.trace_lock:
+            if self.trace_file:
+                event["pid"] = self._trace_id("process_name", dut or ctype)
+                event["tid"] = self._trace_id("thread_name", thid.strip(": "), event["pid"])
+                self.trace_file.write("{},\n".format(json.dumps(event)))
+
+    def _serial(self, kind, msg, msecs, savings, dut=None):
+        # recorded only while the module is traced, it is reported and reset at trace stop
+        if not self.trace_file:
+            return
+        with self.trace_lock:
+            entry = self.serial.setdefault((kind, msg), [0, 0, 0, set()])
+            entry[0] = entry[0] + 1
+            entry[1] = entry[1] + msecs
+            entry[2] = entry[2] + savings
+            if dut:
+                entry[3].add(dut)
+
+    def get_serialization_report(self):
+        # ranked on the time which can be saved by running in parallel or polling
+        rows = []
+        with self.trace_lock:
+            for (kind, msg), [count, msecs, savings, duts] in self.serial.items():
+                rows.append([kind, msg, count, msecs, savings, " ".join(sorted(duts))])
+        return sorted(rows, key=lambda row: row[4], reverse=True)
 
     def start(self, msg, dut=None, data=None):
         msg = msg.replace("\r", "")
         msg = msg.replace("\n", "\\n")
-        count = len(self.profile_ids)
-        self.profile_ids[count] = [get_timenow(), dut, msg, data]
+        count = self.profile_count
+        self.profile_count = count + 1
+        prev, self.last_start = self.last_start, [dut, msg, None]
+        self.profile_ids[count] = [get_timenow(), dut, msg, data, prev, self.last_start]
         return count
 
     def stop(self, pid):
-        [start_time, dut, msg, data] = self.profile_ids[pid]
+        [start_time, dut, msg, data, prev, this] = self.profile_ids.pop(pid)
         delta = get_timenow() - start_time
         cmd_time = int(delta.total_seconds() * 1000)
         thid = get_thread_name()
         if dut:
-            if pid > 0 and thid == "T0000: ":
-                [_, pdut, pmsg, _] = self.profile_ids[pid - 1]
+            [pdut, pmsg, ptime] = prev
+            if thid == "T0000: ":
                 if pmsg == msg and dut != pdut:
                     self.canbe_parallel.append([start_time, msg, dut, pdut])
+                    self._serial("parallel", msg, cmd_time, min(cmd_time, ptime or 0), dut)
+                this[2] = cmd_time
             if "spytest-helper.py" in msg:
                 self.helper_cmds.append([start_time, thid, dut, msg, cmd_time])
                 self.helper_cmd_time = self.helper_cmd_time + cmd_time
                 self.cmds.append([start_time, thid, "HELPER", dut, msg, cmd_time])
+                self._trace(start_time, thid, "HELPER", dut, msg, cmd_time)
             else:
                 self.tc_cmds.append([start_time, thid, dut, msg, cmd_time])
                 self.tc_cmd_time = self.tc_cmd_time + cmd_time
                 self.cmds.append([start_time, thid, "CMD", dut, msg, cmd_time])
+                self._trace(start_time, thid, "CMD", dut, msg, cmd_time)
         else:
             self.tg_cmds.append([start_time, thid, dut, msg, cmd_time])
             self.tg_cmd_time = self.tg_cmd_time + cmd_time
             self.cmds.append([start_time, thid, "TG", dut, msg, cmd_time])
+            self._trace(start_time, thid, "TG", dut, msg, cmd_time)
         return data
 
-    def wait(self, val, is_tg=False):
+    def wait(self, val, is_tg=False, msg=None):
         start_time = get_timenow()
         thid = get_thread_name()
         if is_tg:
+            msg = "TG sleep {}".format(msg) if msg else "TG sleep"
             self.tg_total_wait = self.tg_total_wait + val
-            self.cmds.append([start_time, thid, "TGWAIT", None, "TG sleep", val])
+            self.cmds.append([start_time, thid, "TGWAIT", None, msg, val])
+            self._trace(start_time, thid, "TGWAIT", None, msg, val * 1000)
+            self._serial("tgwait", msg, val * 1000, val * 1000)
         else:
+            msg = "static delay {}".format(msg) if msg else "static delay"
             self.tc_total_wait = self.tc_total_wait + val
-            self.cmds.append([start_time, thid, "WAIT", None, "static delay", val])
+            self.cmds.append([start_time, thid, "WAIT", None, msg, val])
+            self._trace(start_time, thid, "WAIT", None, msg, val * 1000)
+            self._serial("wait", msg, val * 1000, val * 1000)
 
     def prompt_nfound(self, cmd):
         start_time = get_timenow()
         thid = get_thread_name()
         self.pnfound = self.pnfound + 1
         self.cmds.append([start_time, thid, "PROMPT_NFOUND", None, cmd, ""])
+        self._trace(start_time, thid, "PROMPT_NFOUND", None, cmd)
 
     def tech_support(self, cmd):
         start_time = get_timenow()
         thid = get_thread_name()
         self.ts_files = self.ts_files + 1
         self.cmds.append([start_time, thid, "TECH_SUPPORT", None, cmd, ""])
+        self._trace(start_time, thid, "TECH_SUPPORT", None, cmd)
 
     def get_stats(self):
         stats = SpyTestDict()
@@ -111,8 +205,8 @@ def stop(pid):
     return obj.stop(pid)
 
 
-def wait(val, is_tg=False):
-    return obj.wait(val, is_tg)
+def wait(val, is_tg=False, msg=None):
+    return obj.wait(val, is_tg, msg)
 
 
 def get_stats():
@@ -125,3 +219,11 @@ def prompt_nfound(cmd):
 
 def tech_support(cmd):
     return obj.tech_support(cmd)
+
+
+def trace_start(filepath=None):
+    return obj.trace_start(filepath)
+
+
+def trace_stop():
+    return obj.trace_stop()
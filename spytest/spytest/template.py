@@ -2,6 +2,8 @@ import sys
 import os
 import re
 import json
+import time
+import threading
 from collections import OrderedDict
 
 bundled_parser = os.getenv("SPYTEST_TEXTFSM_USE_BUNDLED_PARSER")
@@ -12,12 +14,56 @@ if bundled_parser:
 import textfsm  # noqa: E402
 try:
     import clitable
+    import texttable
 except Exception:
     from textfsm import clitable
+    from textfsm import texttable
 
 from spytest import env  # noqa: E402
 import utilities.common as utils  # noqa: E402
 
+# compiled templates, index tables and command lookups are shared
+# by the Template objects of all the devices in the process
+cache_lock = threading.Lock()
+fsm_cache = dict()  # template path => [TextFSM, lock]
+table_cache = dict()  # index path => CliTable
+cmd_cache = dict()  # (root, indexes, platform, cli, command) => (template, templates to parse)
+cmd_cache_max = 10000
+
+
+def get_cli_table(index, root):
+    path = os.path.join(root, index)
+    with cache_lock:
+        if path not in table_cache:
+            table_cache[path] = clitable.CliTable(index, root)
+        return table_cache[path]
+
+
+def get_fsm(tmpl_path):
+    with cache_lock:
+        entry = fsm_cache.get(tmpl_path)
+    if entry is None:
+        with open(tmpl_path, "r") as tmpl_fp:
+            entry = [textfsm.TextFSM(tmpl_fp), threading.Lock()]
+        with cache_lock:
+            entry = fsm_cache.setdefault(tmpl_path, entry)
+    return entry
+
+
+def parse_text(tmpl_path, data):
+    fsm, lock = get_fsm(tmpl_path)
+    with lock:
+        fsm.Reset()
+        rows = fsm.ParseText(data)
+        return list(fsm.header), rows, fsm.GetValuesByAttrib('Key')
+
+
+def clear_cache():
+    with cache_lock:
+        fsm_cache.clear()
+        table_cache.clear()
+        cmd_cache.clear()
+
 
 class Template(object):
 
@@ -38,18 +84,14 @@ class Template(object):
         for index in index.split(","):
             if not os.path.exists(os.path.join(self.root, index)):
                 index = "index"
-            self.cli_tables[index] = clitable.CliTable(index, self.root)
+            self.cli_tables[index] = get_cli_table(index, self.root)
         self.platform = platform
         self.cli = cli
+        self.cache_key = (self.root, tuple(self.cli_tables), platform, cli)
 
     # find the template given command
     def get_tmpl(self, cmd):
-        attrs = dict(Command=cmd)
-        for cli_table in self.cli_tables.values():
-            row_idx = cli_table.index.GetRowMatch(attrs)
-            if row_idx != 0:
-                return cli_table.index.index[row_idx]['Template']
-        return None
+        return self.lookup(cmd)[0]
 
     def get_table(self, cmd):
         attrs = dict(Command=cmd)
@@ -82,24 +124,61 @@ class Template(object):
                 return [tmpl_file, data]
         return [tmpl_file, ""]
 
-    # find template the given command and apply on given data
-    def apply(self, output, cmd):
+    # find the template of the given command and the templates
+    # to parse its output, remembered for the exact command
+    def lookup(self, cmd):
+        key = self.cache_key + (cmd,)
+        entry = cmd_cache.get(key)
+        if entry is not None:
+            return entry
+
         attrs = dict(Command=cmd)
         if self.platform:
             attrs["Platform"] = self.platform
         if self.cli:
             attrs["cli"] = self.cli
 
-        tmpl_file = self.get_tmpl(cmd)
+        tmpl_file, templates = None, None
+        for cli_table in self.cli_tables.values():
+            row_idx = cli_table.index.GetRowMatch(dict(Command=cmd))
+            if row_idx != 0:
+                tmpl_file = cli_table.index.index[row_idx]['Template']
+                row_idx = cli_table.index.GetRowMatch(attrs)
+                if row_idx != 0:
+                    templates = cli_table.index.index[row_idx]['Template'].split(':')
+                break
+
+        entry = (tmpl_file, templates, attrs)
+        with cache_lock:
+            if len(cmd_cache) >= cmd_cache_max:
+                cmd_cache.clear()
+            cmd_cache[key] = entry
+        return entry
+
+    # find template the given command and apply on given data
+    def apply(self, output, cmd):
+        tmpl_file, templates, attrs = self.lookup(cmd)
         if not tmpl_file:
             raise ValueError('Unknown command "%s"' % (cmd))
+        if not templates:
+            raise clitable.CliTableError('No template found for attributes: "%s"' % attrs)
 
-        cli_table = self.get_table(cmd)
-        if not cli_table:
-            raise ValueError('Unable to parse command "%s"' % (cmd))
-
-        cli_table.ParseCmd(output, attrs)
-        objs = self.result(cli_table.header, cli_table)
+        header, rows, keys = parse_text(os.path.join(self.root, templates[0]), output)
+        if len(templates) > 1:
+            # merge the additional columns like CliTable.ParseCmd
+            table = texttable.TextTable()
+            table.header = header
+            for row in rows:
+                table.Append(row)
+            for tmpl in templates[1:]:
+                header2, rows2, _ = parse_text(os.path.join(self.root, tmpl), output)
+                table2 = texttable.TextTable()
+                table2.header = header2
+                for row in rows2:
+                    table2.Append(row)
+                table.extend(table2, set(keys))
+            header, rows = table.header, table
+        objs = self.result(header, rows)
         return [tmpl_file, objs]
 
     def result(self, header, rows):
@@ -159,19 +238,60 @@ class Template(object):
 
     # apply the given template on given data
     def apply_textfsm(self, tmpl_file, data):
-        tmpl_file2 = os.path.join(self.root, tmpl_file)
-        tmpl_fp = open(tmpl_file2, "r")
-        re_table = textfsm.TextFSM(tmpl_fp)
-        out = re_table.ParseText(data)
-        tmpl_fp.close()
-        objs = self.result(re_table.header, out)
-        return re_table.header, objs
+        header, out, _ = parse_text(os.path.join(self.root, tmpl_file), data)
+        objs = self.result(header, out)
+        return header, objs
+
+    # time the lookup and parsing of the indexed commands
+    # with the sample outputs, without and with the caches
+    def benchmark(self, iterations=100):
+        cmds = []
+        for cli_table in self.cli_tables.values():
+            for row in cli_table.index.index:
+                cmd = row['Command']
+                if not re.search(r"[\\.*+?()\[\]|^$]", cmd):
+                    cmds.append(cmd)
+        samples = [[cmd] + self.read_sample(cmd) for cmd in cmds]
+        results = OrderedDict()
+
+        # index scans and template compiling on every call
+        start = time.time()
+        for _ in range(iterations):
+            for cmd, _, data in samples:
+                attrs = self.lookup(cmd)[2]
+                cli_table = self.get_table(cmd)
+                cli_table.index.GetRowMatch(dict(Command=cmd))
+                cli_table.ParseCmd(data, attrs)
+        results["clitable"] = time.time() - start
+
+        clear_cache()
+        start = time.time()
+        for cmd, _, data in samples:
+            self.apply(data, cmd)
+        results["cold"] = time.time() - start
+
+        start = time.time()
+        for _ in range(iterations):
+            for cmd, _, data in samples:
+                self.apply(data, cmd)
+        results["cached"] = time.time() - start
+        return len(samples), results
 
 
 if __name__ == "__main__":
     template = Template()
+    if len(sys.argv) > 1 and sys.argv[1] == "--benchmark":
+        iterations = int(sys.argv[2]) if len(sys.argv) > 2 else 100
+        count, results = template.benchmark(iterations)
+        print("Commands: {} Iterations: {}".format(count, iterations))
+        for name, elapsed in results.items():
+            calls = count * (iterations if name != "cold" else 1)
+            print("{:10s} {:8.3f} sec {:10.1f} usec/call".format(name, elapsed, elapsed * 1000000 / max(calls, 1)))
+        sys.exit(0)
+
     if len(sys.argv) <= 2:
         print("USAGE: template.py <command> <data file> [<template file>]")
+        print("       template.py --benchmark [<iterations>]")
         sys.exit(0)
 
     cmd, data_file = sys.argv[1:3]
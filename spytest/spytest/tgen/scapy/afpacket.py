@@ -1,11 +1,14 @@
 """
-AF_PACKET receive support
+AF_PACKET receive and batched send support
 
 When VLAN offload is enabled on the NIC Linux will not deliver the VLAN tag
 in the data returned by recv. Instead, it delivers the VLAN TCI in a control
 message. Python 2.x doesn't have built-in support for recvmsg, so we have to
 use ctypes to call it. The recv function exported by this module reconstructs
 the VLAN tag if it was offloaded.
+
+Python doesn't have built-in support for sendmmsg either, the send function
+exported by this module uses it to send a batch of packets in one system call.
 """
 
 import struct
@@ -24,6 +27,8 @@ from ctypes import c_ushort
 from ctypes import c_uint
 from ctypes import Structure
 from ctypes import c_uint32
+from ctypes import c_char_p
+from ctypes import addressof
 
 ETH_P_8021Q = 0x8100
 SOL_PACKET = 263
@@ -70,10 +75,20 @@ class struct_tpacket_auxdata(Structure):
     ]
 
 
-libc = CDLL("libc.so.6")
+class struct_mmsghdr(Structure):
+    _fields_ = [
+        ("msg_hdr", struct_msghdr),
+        ("msg_len", c_uint),
+    ]
+
+
+libc = CDLL("libc.so.6", use_errno=True)
 recvmsg = libc.recvmsg
 recvmsg.argtypes = [c_int, POINTER(struct_msghdr), c_int]
 recvmsg.retype = c_int
+sendmmsg = libc.sendmmsg
+sendmmsg.argtypes = [c_int, POINTER(struct_mmsghdr), c_uint, c_int]
+sendmmsg.restype = c_int
 
 
 def enable_auxdata(sk):
@@ -131,3 +146,33 @@ def recv(sk, bufsize):
         return buf.raw[:12] + tag + buf.raw[12:rv]
     else:
         return buf.raw[:rv]
+
+
+def send(sk, frames):
+    """
+    Send packets on an AF_PACKET socket using sendmmsg
+    @sk Socket bound to the interface
+    @frames List of packets
+    Returns the number of packets sent
+    """
+    count = len(frames)
+    bufs = [c_char_p(frame) for frame in frames]
+    iovs = (struct_iovec * count)()
+    msgs = (struct_mmsghdr * count)()
+    for index, frame in enumerate(frames):
+        iovs[index].iov_base = cast(bufs[index], c_void_p)
+        iovs[index].iov_len = len(frame)
+        msgs[index].msg_hdr.msg_iov = pointer(iovs[index])
+        msgs[index].msg_hdr.msg_iovlen = 1
+
+    sent = 0
+    while sent < count:
+        msgvec = cast(addressof(msgs) + sent * sizeof(struct_mmsghdr), POINTER(struct_mmsghdr))
+        rv = sendmmsg(sk.fileno(), msgvec, count - sent, 0)
+        if rv < 0:
+            if sent:
+                break
+            msg = "sendmmsg failed: rv=%d errno=%d" % (rv, get_errno())
+            raise RuntimeError(msg)
+        sent = sent + rv
+    return sent
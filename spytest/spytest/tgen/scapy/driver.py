@@ -410,23 +410,27 @@ class ScapyDriver(object):
                 self.pwa_wait(pwa)
                 try:
                     send_start_time = self.utils.clock()
-                    pkt = self.send_packet(pwa, pwa.stream.stream_id)
-                    bytesSent = len(pkt)
+                    if pwa.fast:
+                        # fast path sends the packets of the burst together
+                        pkts, pwa_next = self.send_burst(pwa, pwa.stream.stream_id)
+                    else:
+                        pkts = [self.send_packet(pwa, pwa.stream.stream_id)]
+                    bytesSent = sum(len(pkt) for pkt in pkts)
                     send_time = self.utils.clock() - send_start_time
 
                     # increment port counters
-                    framesSent = self.port.incrStat('framesSent')
+                    framesSent = self.port.incrStat('framesSent', len(pkts))
                     self.port.incrStat('bytesSent', bytesSent)
                     if self.dbg > 2:
                         self.logger.debug("{} framesSent: {}".format(self.iface, framesSent))
-                    pwa.stream.incrStat('framesSent')
+                    pwa.stream.incrStat('framesSent', len(pkts))
                     pwa.stream.incrStat('bytesSent', bytesSent)
-                    tx_count = tx_count + 1
+                    tx_count = tx_count + len(pkts)
 
                     # increment stream counters
-                    stream_tx = self.stream_pkts[pwa.stream.stream_id] + 1
+                    stream_tx = self.stream_pkts[pwa.stream.stream_id] + len(pkts)
                     self.stream_pkts[pwa.stream.stream_id] = stream_tx
-                    if self.dbg > 2 or (self.dbg > 1 and stream_tx % 100 == 99):
+                    if self.dbg > 2 or (self.dbg > 1 and (stream_tx + 1) // 100 != (stream_tx + 1 - len(pkts)) // 100):
                         self.logger.debug("{}/{} framesSent: {}".format(self.iface,
                                           pwa.stream.stream_id, stream_tx))
                 except Exception as e:
@@ -434,7 +438,8 @@ class ScapyDriver(object):
                     pwa.stream.enable2 = False
                 else:
                     build_start_time = self.utils.clock()
-                    pwa_next = self.packet.build_next(pwa)
+                    if not pwa.fast:
+                        pwa_next = self.packet.build_next(pwa)
                     if not pwa_next:
                         pwa.stream.enable2 = False
                         self.logger.debug("{} {} Completed Stream {}".format(func, self.iface, pwa.stream.stream_id))
@@ -468,6 +473,9 @@ class ScapyDriver(object):
     def send_packet(self, pwa, stream_name):
         return self.packet.send_packet(pwa, self.iface, stream_name, pwa.left)
 
+    def send_burst(self, pwa, stream_name):
+        return self.packet.send_burst(pwa, self.iface, stream_name)
+
     def createInterface(self, intf):
         return self.packet.if_create(intf)
 
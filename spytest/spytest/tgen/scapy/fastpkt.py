@@ -0,0 +1,146 @@
+import struct
+import binascii
+
+# fields which can be changed per packet: name => (size in bytes, bits)
+FIELD_SIZES = {
+    "mac_src": (6, 48),
+    "mac_dst": (6, 48),
+    "arp_src_hw": (6, 48),
+    "arp_dst_hw": (6, 48),
+    "ip_src": (4, 32),
+    "ip_dst": (4, 32),
+    "ipv6_src": (16, 128),
+    "ipv6_dst": (16, 128),
+    "vlan_id": (2, 12),
+    "tcp_src_port": (2, 16),
+    "tcp_dst_port": (2, 16),
+    "udp_src_port": (2, 16),
+    "udp_dst_port": (2, 16),
+}
+
+
+def bytes2int(data):
+    return int(binascii.hexlify(data), 16)
+
+
+def int2bytes(value, size):
+    return binascii.unhexlify("{:0{}x}".format(value, size * 2))
+
+
+def csum_words(data):
+    return sum(struct.unpack("!{}H".format(len(data) // 2), data))
+
+
+def csum_update(csum, old, new):
+    """
+    update the internet checksum for the changed bytes (RFC 1624)
+    """
+    # ~HC + ~m + m' where ~m of each word is 0xFFFF - m
+    total = (~csum & 0xFFFF) + len(old) // 2 * 0xFFFF - csum_words(old) + csum_words(new)
+    while total >> 16:
+        total = (total & 0xFFFF) + (total >> 16)
+    return ~total & 0xFFFF
+
+
+class PacketTemplate(object):
+    """
+    bytes of a stream packet built once by scapy along with the offsets
+    of the fields changed per packet and the checksums covering them
+    """
+
+    def __init__(self, data):
+        self.data = bytearray(data)
+        self.fields = dict()  # name => offset
+        self.csums = dict()  # name => list of (offset, zero means no checksum)
+        self.values = dict()  # name => current value
+        self.parse()
+
+    def parse(self):
+        data = self.data
+        self.fields["mac_dst"] = 0
+        self.fields["mac_src"] = 6
+        (ether_type,) = struct.unpack_from("!H", data, 12)
+        l3 = 14
+        if ether_type == 0x8100 and len(data) >= 18:
+            self.fields["vlan_id"] = 14
+            (ether_type,) = struct.unpack_from("!H", data, 16)
+            l3 = 18
+
+        l4, proto, csums = None, None, []
+        if ether_type == 0x0806 and len(data) >= l3 + 28:
+            self.fields["arp_src_hw"] = l3 + 8
+            self.fields["arp_dst_hw"] = l3 + 18
+        elif ether_type == 0x0800 and len(data) >= l3 + 20:
+            ihl = (data[l3] & 0x0F) * 4
+            self.fields["ip_src"] = l3 + 12
+            self.fields["ip_dst"] = l3 + 16
+            csums = [(l3 + 10, False)]
+            l4, proto = l3 + ihl, data[l3 + 9]
+        elif ether_type == 0x86DD and len(data) >= l3 + 40:
+            self.fields["ipv6_src"] = l3 + 8
+            self.fields["ipv6_dst"] = l3 + 24
+            l4, proto = l3 + 40, data[l3 + 6]
+
+        # layer 4 checksums covering the addresses in pseudo header
+        l4_csum = None
+        if proto == 6 and len(data) >= l4 + 20:
+            self.fields["tcp_src_port"] = l4
+            self.fields["tcp_dst_port"] = l4 + 2
+            l4_csum = (l4 + 16, False)
+        elif proto == 17 and len(data) >= l4 + 8:
+            self.fields["udp_src_port"] = l4
+            self.fields["udp_dst_port"] = l4 + 2
+            l4_csum = (l4 + 6, True)
+        elif proto == 58 and "ipv6_src" in self.fields and len(data) >= l4 + 4:
+            l4_csum = (l4 + 2, False)
+        elif proto is not None and "ipv6_src" in self.fields:
+            # unknown next header may have a checksum over the addresses
+            for name in ["ipv6_src", "ipv6_dst"]:
+                self.fields.pop(name)
+
+        for name in ["ip_src", "ip_dst"]:
+            if name in self.fields:
+                self.csums[name] = csums + ([l4_csum] if l4_csum else [])
+        for name in ["ipv6_src", "ipv6_dst"]:
+            if name in self.fields:
+                self.csums[name] = [l4_csum] if l4_csum else []
+        for name in ["tcp_src_port", "tcp_dst_port", "udp_src_port", "udp_dst_port"]:
+            if name in self.fields:
+                self.csums[name] = [l4_csum]
+
+        for name, offset in self.fields.items():
+            size, bits = FIELD_SIZES[name]
+            value = bytes2int(bytes(data[offset:offset + size]))
+            self.values[name] = value & ((1 << bits) - 1)
+
+    def supports(self, name):
+        return name in self.fields
+
+    def get(self, name):
+        return self.values[name]
+
+    def set(self, name, value):
+        size, bits = FIELD_SIZES[name]
+        offset, mask = self.fields[name], (1 << bits) - 1
+        value = value & mask
+        self.values[name] = value
+        old = bytes(self.data[offset:offset + size])
+        if bits % 8:
+            value = (bytes2int(old) & ~mask) | value
+        new = int2bytes(value, size)
+        if new == old:
+            return
+        self.data[offset:offset + size] = new
+        for csum_offset, zero_is_none in self.csums.get(name, []):
+            (csum,) = struct.unpack_from("!H", self.data, csum_offset)
+            if zero_is_none and csum == 0:
+                continue
+            csum = csum_update(csum, old, new)
+            if zero_is_none and csum == 0:
+                csum = 0xFFFF
+            struct.pack_into("!H", self.data, csum_offset, csum)
+
+    def build(self, pad_len=0):
+        if pad_len > 0:
+            return bytes(self.data) + b"\x00" * pad_len
+        return bytes(self.data)
@@ -31,6 +31,7 @@ from interface import PacketInterface
 from bgp_exabgp import ExaBgp
 from dot1x import Dot1x
 from dhcps import Dhcps
+from fastpkt import PacketTemplate
 
 try:
     print("SCAPY VERSION = {}".format(Conf().version))
@@ -126,6 +127,24 @@ stale_list_ignore = [
     "ipv6_dst_count",
 ]
 
+# per packet changes supported by the fast path, same as build_next_dma
+# field, layer, modes, default step, option used to reset, default reset value
+fast_path_fields = [
+    ["mac_src", None, ["increment", "decrement", "list"], "00:00:00:00:00:01", "mac_src", None],
+    ["mac_dst", None, ["increment", "decrement", "list"], "00:00:00:00:00:01", "mac_dst", None],
+    ["arp_src_hw", ARP, ["increment", "decrement"], "00:00:00:00:00:01", "arp_src_hw_addr", "00:00:01:00:00:02"],
+    ["arp_dst_hw", ARP, ["increment", "decrement"], "00:00:00:00:00:01", "arp_dst_hw_addr", "00:00:00:00:00:00"],
+    ["ip_src", IP, ["increment", "decrement"], "0.0.0.1", "ip_src_addr", "0.0.0.0"],
+    ["ip_dst", IP, ["increment", "decrement"], "0.0.0.1", "ip_dst_addr", "192.0.0.1"],
+    ["ipv6_src", IPv6, ["increment", "decrement"], "::1", "ipv6_src_addr", "fe80:0:0:0:0:0:0:12"],
+    ["ipv6_dst", IPv6, ["increment", "decrement"], "::1", "ipv6_dst_addr", "fe80:0:0:0:0:0:0:22"],
+    ["vlan_id", Dot1Q, ["increment", "decrement"], 1, "vlan_id", 0],
+    ["tcp_src_port", TCP, ["increment", "decrement", "incr", "decr"], 1, "tcp_src_port", 0],
+    ["tcp_dst_port", TCP, ["increment", "decrement", "incr", "decr"], 1, "tcp_dst_port", 0],
+    ["udp_src_port", UDP, ["increment", "decrement", "incr", "decr"], 1, "udp_src_port", 0],
+    ["udp_dst_port", UDP, ["increment", "decrement", "incr", "decr"], 1, "udp_dst_port", 0],
+]
+
 
 class ScapyPacket(object):
 
@@ -140,6 +159,8 @@ class ScapyPacket(object):
             self.logger.info("SCAPY VERSION = UNKNOWN")
         self.utils = Utils(self.dry, logger=self.logger)
         self.max_rate_pps = self.utils.get_env_int("SPYTEST_SCAPY_MAX_RATE_PPS", 100)
+        self.use_fast_path = bool(os.getenv("SPYTEST_SCAPY_FAST_PATH", "1") != "0")
+        self.tx_batch_size = self.utils.get_env_int("SPYTEST_SCAPY_TX_BATCH_SIZE", 64)
         self.dbg = dbg
         self.show_summary = bool(self.dbg > 2)
         self.hex = bool(os.getenv("SPYTEST_SCAPY_HEXDUMP", "0") != "0")
@@ -327,6 +348,10 @@ class ScapyPacket(object):
         self.stats_lock.release()
         self.trace_stats()
 
+        # parse the packet only for tracing
+        if pkt is None and self.dbg > 2:
+            pkt = Ether(data)
+
         if self.dbg > 2 or (self.dbg > 1 and left != 0):
             cmd = "" if not self.show_summary else pkt.command()
             msg = "sendp:{}:{} len:{} count:{} {}".format
@@ -337,6 +362,32 @@ class ScapyPacket(object):
 
         return self.send(data, iface)
 
+    def sendp_batch(self, frames, iface, stream_name, left):
+        if self.dbg > 2 or (self.dbg > 1 and left != 0) or self.dry:
+            for data in frames:
+                self.sendp(None, data, iface, stream_name, left)
+            return
+
+        self.stats_lock.acquire()
+        self.tx_count = self.tx_count + len(frames)
+        self.stats_lock.release()
+        self.trace_stats()
+
+        if not self.tx_sock:
+            self.send(frames[0], iface)
+            frames = frames[1:]
+
+        # try sending all frames with one system call
+        if self.tx_sock and frames:
+            try:
+                sent = afpacket.send(self.tx_sock.outs, frames)
+                frames = frames[sent:]
+            except Exception as exp:
+                self.logger.debug(self.expmsg(frames[0], iface, exp, "sock-send-batch"))
+
+        for data in frames:
+            self.send(data, iface)
+
     def mkcmd(self, data):
         try:
             pkt = Ether(data)
@@ -414,7 +465,30 @@ class ScapyPacket(object):
             self.logger.debug(hexdump(pkt, dump=True))
 
     def send_packet(self, pwa, iface, stream_name, left):
-        if pwa.padding:
+        bstr = self.build_frame(pwa)
+        self.sendp(None, bstr, iface, stream_name, left)
+        return bstr
+
+    def send_burst(self, pwa, iface, stream_name):
+        """
+        send the packets of the current burst of a fast path stream together
+        returns the packets sent and the next packet info, None when the stream is done
+        """
+        frames, left = [], pwa.left
+        pwa_next = pwa
+        while len(frames) < self.tx_batch_size:
+            frames.append(self.build_frame(pwa_next))
+            pwa_next = self.build_next(pwa_next)
+            # same check as build_ipg for the packets without gap
+            if not pwa_next or pwa_next.burst_sent == 0 or pwa_next.burst_sent >= pwa_next.pkts_per_burst:
+                break
+        self.sendp_batch(frames, iface, stream_name, left)
+        return frames, pwa_next
+
+    def build_frame(self, pwa):
+        if pwa.fast:
+            strpkt = pwa.fast.build(pwa.pad_len)
+        elif pwa.padding:
             strpkt = self.utils.tobytes(pwa.pkt / pwa.padding)
         else:
             strpkt = self.utils.tobytes(pwa.pkt)
@@ -432,9 +506,7 @@ class ScapyPacket(object):
             crc = binascii.unhexlify(crc1)
         except Exception:
             crc = binascii.unhexlify('00' * 4)
-        bstr = strpkt + self.utils.tobytes(crc)
-        self.sendp(Ether(bstr), bstr, iface, stream_name, left)
-        return bstr
+        return strpkt + self.utils.tobytes(crc)
 
     def check(self, pkt):
         pkt.do_build()
@@ -915,20 +987,90 @@ class ScapyPacket(object):
         pwa.frame_size_max = frame_size_max
         pwa.frame_size_step = frame_size_step
         self.add_padding(pwa, True)
+        pwa.fast = self.build_fast(pwa)
+
+        return pwa
+
+    def build_fast(self, pwa):
+        """
+        build the packet template for the fast path, which patches the bytes
+        of the changing fields instead of building scapy packets every time
+        """
+        if not self.use_fast_path:
+            return None
+        try:
+            tmpl = PacketTemplate(self.utils.tobytes(pwa.pkt))
+        except Exception as exp:
+            self.logger.debug("fast path not supported: {}".format(exp))
+            return None
+        kws = pwa.stream.kws
+        tmpl.changes = []
+        for field, layer, modes, step, reset, default in fast_path_fields:
+            mode = kws.get(field + "_mode", "fixed").strip()
+            if mode == "fixed" or (layer and layer not in pwa.pkt):
+                continue
+            if mode not in modes or not tmpl.supports(field):
+                # leave the unhandled options to build_next_dma
+                return None
+            step = self.fast_value(field, kws.get(field + "_step", step))
+            if mode in ["decrement", "decr"]:
+                step = -step
+            count = self.utils.intval(kws, field + "_count", 0)
+            values = None
+            if mode == "list":
+                values = [self.fast_value(field, value) for value in kws[reset]]
+            if field in ["mac_src", "mac_dst"]:
+                reset = self.fast_value(field, kws[reset][0])
+            else:
+                reset = self.fast_value(field, kws.get(reset, default))
+            # field, step, count, reset value, list values, changed packets
+            tmpl.changes.append([field, step, count, reset, values, 0])
+        return tmpl
+
+    def fast_value(self, field, value):
+        if field.startswith("mac_") or field.startswith("arp_"):
+            return int(str(value).replace(":", "").replace(".", ""), 16)
+        if field.startswith("ipv6_"):
+            return int(binascii.hexlify(socket.inet_pton(socket.AF_INET6, str(value))), 16)
+        if field.startswith("ip_"):
+            return int(binascii.hexlify(socket.inet_aton(str(value))), 16)
+        return int(float(value))
+
+    def build_next_fast(self, pwa):
+        tmpl = pwa.fast
+        for change in tmpl.changes:
+            field, step, count, reset, values, counter = change
+            counter = counter + 1
+            if values is not None:
+                if counter >= len(values):
+                    counter = 0
+                tmpl.set(field, values[counter])
+            elif count > 0 and counter >= count:
+                counter = 0
+                tmpl.set(field, reset)
+            else:
+                tmpl.set(field, tmpl.get(field) + step)
+            change[5] = counter
+
+        # add padding based on length_mode
+        self.add_padding(pwa, False)
 
         return pwa
 
     def add_padding(self, pwa, first):
         pwa.padding = None
+        pwa.pad_len = 0
         if pwa.length_mode == "random":
-            pktLen = len(pwa.pkt)
+            pktLen = len(pwa.fast.data) if pwa.get("fast") else len(pwa.pkt)
             frame_size = random.randrange(pwa.frame_size_min, pwa.frame_size_max + 1)
             padLen = int(frame_size - pktLen - 4)
             if padLen > 0:
-                pwa.padding = Padding(binascii.unhexlify('00' * padLen))
+                pwa.pad_len = padLen
+                if not pwa.get("fast"):
+                    pwa.padding = Padding(binascii.unhexlify('00' * padLen))
                 pwa.add_signature = True
         elif pwa.length_mode in ["increment", "incr"]:
-            pktLen = len(pwa.pkt)
+            pktLen = len(pwa.fast.data) if pwa.get("fast") else len(pwa.pkt)
             if first:
                 frame_size = pwa.frame_size_min
             else:
@@ -939,11 +1081,16 @@ class ScapyPacket(object):
                 pwa.frame_size_current = frame_size
             padLen = int(pwa.frame_size_current - pktLen - 4)
             if padLen > 0:
-                pwa.padding = Padding(binascii.unhexlify('00' * padLen))
+                pwa.pad_len = padLen
+                if not pwa.get("fast"):
+                    pwa.padding = Padding(binascii.unhexlify('00' * padLen))
                 pwa.add_signature = True
 
     def build_next_dma(self, pwa):
 
+        if pwa.fast:
+            return self.build_next_fast(pwa)
+
         # Change Ether SRC MAC
         mac_src_mode = pwa.stream.kws.get("mac_src_mode", "fixed").strip()
         mac_src_step = pwa.stream.kws.get("mac_src_step", "00:00:00:00:00:01")
@@ -1133,9 +1280,9 @@ class ScapyPacket(object):
             tcp_dst_port_count = self.utils.intval(pwa.stream.kws, "tcp_dst_port_count", 0)
             if tcp_dst_port_mode in ["increment", "decrement", "incr", "decr"]:
                 if tcp_dst_port_mode in ["increment", "incr"]:
-                    pwa.pkt[TCP].dport = pwa.pkt[TCP].sport + tcp_dst_port_step
+                    pwa.pkt[TCP].dport = pwa.pkt[TCP].dport + tcp_dst_port_step
                 else:
-                    pwa.pkt[TCP].dport = pwa.pkt[TCP].sport - tcp_dst_port_step
+                    pwa.pkt[TCP].dport = pwa.pkt[TCP].dport - tcp_dst_port_step
                 pwa.tcp_dst_port_count = pwa.tcp_dst_port_count + 1
                 if tcp_dst_port_count > 0 and pwa.tcp_dst_port_count >= tcp_dst_port_count:
                     pwa.pkt[TCP].dport = self.utils.intval(pwa.stream.kws, "tcp_dst_port", 0)
@@ -1167,9 +1314,9 @@ class ScapyPacket(object):
             udp_dst_port_count = self.utils.intval(pwa.stream.kws, "udp_dst_port_count", 0)
             if udp_dst_port_mode in ["increment", "decrement", "incr", "decr"]:
                 if udp_dst_port_mode in ["increment", "incr"]:
-                    pwa.pkt[UDP].dport = pwa.pkt[UDP].sport + udp_dst_port_step
+                    pwa.pkt[UDP].dport = pwa.pkt[UDP].dport + udp_dst_port_step
                 else:
-                    pwa.pkt[UDP].dport = pwa.pkt[UDP].sport - udp_dst_port_step
+                    pwa.pkt[UDP].dport = pwa.pkt[UDP].dport - udp_dst_port_step
                 pwa.udp_dst_port_count = pwa.udp_dst_port_count + 1
                 if udp_dst_port_count > 0 and pwa.udp_dst_port_count >= udp_dst_port_count:
                     pwa.pkt[UDP].dport = self.utils.intval(pwa.stream.kws, "udp_dst_port", 0)
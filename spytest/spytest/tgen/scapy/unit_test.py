@@ -6,8 +6,10 @@ exec $(dirname $0)/../../../bin/python "$0" "$@"
 
 import os
 import sys
+import copy
 import json
 import time
+import struct
 import logging
 
 from spytest.tgen.tg_scapy import ScapyClient
@@ -444,7 +446,124 @@ def test_sample(ipaddr, port=8009):
     raw_input("press any key")
 
 
+fast_path_base = dict(mac_src="00:00:00:00:00:01", mac_dst="00:00:00:00:00:02", rate_pps=100,
+                      transmit_mode="single_burst", pkts_per_burst=1000)
+fast_path_streams = [
+    dict(l3_protocol="ipv4", ip_src_addr="1.0.0.1", ip_dst_addr="2.0.0.2", ip_src_mode="increment",
+         ip_dst_mode="decrement", ip_src_step="0.0.1.1", ip_dst_count=7, l4_protocol="udp", udp_src_port=100,
+         udp_dst_port=200, udp_src_port_mode="incr", udp_src_port_count=5, udp_dst_port_mode="decrement",
+         udp_dst_port_count=5),
+    dict(l3_protocol="ipv4", ip_src_addr="1.0.0.1", ip_src_mode="increment", l4_protocol="tcp", tcp_src_port=1000,
+         tcp_src_port_mode="increment", tcp_src_port_step=3, tcp_dst_port=80, tcp_dst_port_mode="increment",
+         tcp_dst_port_step=7, vlan_id=10, vlan_id_mode="increment",
+         vlan_id_count=5, mac_src_mode="increment", mac_src_count=4, mac_dst_mode="decrement",
+         mac_dst="00:00:00:00:10:02", frame_size=128),
+    dict(l3_protocol="ipv6", ipv6_src_addr="2001::1", ipv6_src_mode="increment", ipv6_dst_mode="decrement",
+         ipv6_dst_step="::1:0", l4_protocol="udp", udp_src_port=5000, udp_src_port_mode="decrement",
+         length_mode="increment", frame_size_min=80, frame_size_max=300, frame_size_step=17),
+    dict(l3_protocol="ipv6", ipv6_src_addr="2001::1", ipv6_src_mode="increment", l4_protocol="icmp", icmp_type=136),
+    dict(l3_protocol="arp", arp_src_hw_mode="increment", arp_dst_hw_mode="decrement",
+         arp_dst_hw_addr="00:00:00:00:00:20", arp_dst_hw_count=9,
+         mac_src=["00:00:00:00:00:01", "00:00:00:00:00:05", "00:00:00:00:00:09"], mac_src_mode="list"),
+    dict(l3_protocol="ipv4", ip_src_mode="increment", l4_protocol="udp", data_pattern="01 02 03 04",
+         frame_size=100, transmit_mode="continuous", duration2=1, rate_pps=50),
+]
+
+
+def fast_path_frames(sp, kws, fast, count):
+    """
+    build the frames of a stream on the fast path or on the scapy path, in dry mode
+    along with the packet bytes before padding, signature and CRC
+    """
+    from port import ScapyStream
+    sp.use_fast_path = fast
+    stream = ScapyStream(1, 2, "s1", None, **copy.deepcopy(kws))
+    pwa = sp.build_first(stream)
+    assert bool(pwa.fast) == fast, "fast path not used for {}".format(kws)
+    frames, packets = [], []
+    while pwa and len(frames) < count:
+        frames.append(sp.build_frame(pwa))
+        packets.append(pwa.fast.build() if pwa.fast else sp.utils.tobytes(pwa.pkt))
+        pwa = sp.build_next(pwa)
+    return frames, packets
+
+
+def check_checksums(data):
+    """
+    the checksums of the packet bytes must be the ones scapy computes
+    """
+    from scapy.layers.l2 import Ether
+    from scapy.layers.inet import IP, UDP, TCP
+    from scapy.layers.inet6 import ICMPv6ND_NA
+    pkt = Ether(data)
+    for layer, field in [(IP, "chksum"), (UDP, "chksum"), (TCP, "chksum"), (ICMPv6ND_NA, "cksum")]:
+        if layer in pkt:
+            delattr(pkt[layer], field)
+    expected = bytes(pkt)
+    assert data == expected, "checksums differ from scapy\n{}\n{}".format(data.hex(), expected.hex())
+
+
+def test_fast_path(count=1000):
+    """
+    build the streams on the scapy path and on the fast path (PacketTemplate),
+    the frames must be byte-identical and have the checksums scapy computes
+    """
+    print("============= test_fast_path ==============")
+    from packet import ScapyPacket
+    sp = ScapyPacket("", dbg=0, dry=True)
+    for kws in fast_path_streams:
+        kws = dict(fast_path_base, **kws)
+        frames, _ = fast_path_frames(sp, kws, False, count)
+        fast_frames, fast_packets = fast_path_frames(sp, kws, True, count)
+        assert len(frames) == len(fast_frames), kws
+        for index, (frame, fast_frame) in enumerate(zip(frames, fast_frames)):
+            assert frame == fast_frame, "frame {} differs {}\n{}\n{}".format(index, kws, frame.hex(), fast_frame.hex())
+        for data in fast_packets:
+            check_checksums(data)
+        print("{} frames identical: {}".format(len(frames), kws))
+
+
+def test_fast_path_checksums():
+    """
+    incremental checksum updates of PacketTemplate against the checksums scapy computes,
+    including the updates to and from 0x0000 and 0xFFFF and the disabled UDP checksum 0
+    """
+    print("============= test_fast_path_checksums ==============")
+    from scapy.layers.l2 import Ether
+    from scapy.layers.inet import IP, UDP, TCP
+    from scapy.layers.inet6 import IPv6
+    from fastpkt import PacketTemplate
+    for l4, field, csum_offset in [(TCP(sport=0, dport=80), "tcp_src_port", 14 + 20 + 16),
+                                   (UDP(sport=0, dport=80), "udp_src_port", 14 + 20 + 6)]:
+        data = bytes(Ether() / IP(src="10.0.0.1", dst="10.0.0.2") / l4 / b"payload")
+        (csum0,) = struct.unpack_from("!H", data, csum_offset)
+        tmpl = PacketTemplate(data)
+        # the port taking the one's complement sum to 0xFFFF makes the checksum 0x0000, which UDP sends as 0xFFFF
+        for value in [csum0, csum0 ^ 0xFFFF, 0, 0xFFFF, csum0 + 1, 1, csum0]:
+            tmpl.set(field, value)
+            check_checksums(tmpl.build())
+        tmpl.set(field, csum0)
+        (csum,) = struct.unpack_from("!H", tmpl.build(), csum_offset)
+        assert csum == (0xFFFF if field.startswith("udp") else 0), hex(csum)
+        for name, value in [("ip_src", 0x0A000001 + csum0), ("ip_dst", 0xFFFFFFFF), ("ip_src", 0), (field, 1)]:
+            tmpl.set(name, value)
+            check_checksums(tmpl.build())
+
+    # UDP checksum 0 is no checksum, it stays 0
+    for pkt in [Ether() / IP() / UDP(chksum=0) / b"payload", Ether() / IPv6() / UDP(chksum=0) / b"payload"]:
+        tmpl = PacketTemplate(bytes(pkt))
+        for name in ["ip_src", "ipv6_src", "udp_src_port", "udp_dst_port"]:
+            if tmpl.supports(name):
+                tmpl.set(name, tmpl.get(name) + 12345)
+        assert Ether(tmpl.build())[UDP].chksum == 0
+    print("checksums same as scapy")
+
+
 if __name__ == '__main__':
+    if sys.argv[1:2] == ["fast-path"]:
+        test_fast_path()
+        test_fast_path_checksums()
+        sys.exit(0)
     ipaddr = sys.argv[1] if len(sys.argv) > 1 else "10.250.0.188"
     port = sys.argv[2] if len(sys.argv) > 2 else 8009
     test_sample(ipaddr, port)
@@ -1,12 +1,15 @@
 
 
+import contextlib
+import fcntl
 import inspect
+import json
 import logging
 import os
 import pickle
-import random
 import shutil
 import sys
+import tempfile
 import time
 
 from collections import defaultdict
@@ -22,6 +25,9 @@ CACHE_LOCATION = os.path.join(CURRENT_PATH, '../../../_cache')
 
 SIZE_LIMIT = 1000000000  # 1G bytes, max disk usage allowed by cache
 ENTRY_LIMIT = 1000000    # Max number of pickle files allowed in cache.
+ENTRY_TTL = 30 * 24 * 3600  # Entries not accessed for 30 days are evicted first when the limits are reached.
+MANIFEST_FILE = '.manifest.json'
+LOCK_FILE = '.lock'
 DISABLE_CACHE_PARAM = "disable_cache"
 
 
@@ -43,6 +49,9 @@ class FactsCache(with_metaclass(Singleton, object)):
 
     Used singleton design pattern. Only a single instance of this class can be initialized.
 
+    The cache folder can be shared by multiple processes, like pytest-xdist workers or parallel runs. Writes are
+    serialized by a fcntl lock, and cached facts in memory are reloaded when another process replaced the cache file.
+
     Args:
         with_metaclass ([function]): Python 2&3 compatible function from the six library for adding metaclass.
     """
@@ -53,26 +62,199 @@ class FactsCache(with_metaclass(Singleton, object)):
         self._cache_location = os.path.abspath(cache_location)
         self._cache = defaultdict(dict)
         self._write_lock = Lock()
-
-    def _check_usage(self):
-        """Check cache usage, raise exception if usage exceeds the limitations.
+        # Manifest of the cache files, {zone: {key: {"size": bytes, "access": timestamp}}}, lazily loaded
+        self._manifest = None
+        self._manifest_stat = None
+        self._total_size = 0
+        self._total_entries = 0
+        # Access time of entries not yet recorded in the manifest, {(zone, key): timestamp}
+        self._accessed = {}
+        # Stat of the cache files loaded in memory, {zone: {key: (st_ino, st_mtime_ns)}}
+        self._file_stats = defaultdict(dict)
+
+    def _facts_file(self, zone, key):
+        return os.path.join(self._cache_location, '{}/{}.pickle'.format(zone, key))
+
+    def _manifest_file(self):
+        return os.path.join(self._cache_location, MANIFEST_FILE)
+
+    def _scan_usage(self):
+        """Build the manifest by scanning the cache folder.
+
+        Only used when there is no valid manifest, for example the cache folder was populated by an older version.
         """
-        total_size = 0
-        total_entries = 0
+        manifest = defaultdict(dict)
         for root, _, files in os.walk(self._cache_location):
+            zone = os.path.relpath(root, self._cache_location)
             for f in files:
-                fp = os.path.join(root, f)
-                total_size += os.path.getsize(fp)
-                total_entries += 1
+                if f.startswith('.') or not f.endswith('.pickle') or zone == '.':
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, f))
+                except OSError:
+                    continue
+                manifest[zone][f[:-len('.pickle')]] = {'size': stat.st_size, 'access': stat.st_mtime}
+        return manifest
+
+    @staticmethod
+    def _stat(path):
+        try:
+            stat = os.stat(path)
+            return stat.st_ino, stat.st_mtime_ns
+        except OSError:
+            return None
+
+    @contextlib.contextmanager
+    def _flock(self, lock_file):
+        lock_dir = os.path.dirname(lock_file)
+        if not os.path.exists(lock_dir):
+            os.makedirs(lock_dir, exist_ok=True)
+        with open(lock_file, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def lock(self, zone, key):
+        """Lock an entry across processes.
+
+        Used to make sure only one process computes the facts, other processes wait and read the cached result.
+
+        Args:
+            zone (str): Zone name of cached facts.
+            key (str): Name of cached facts.
+
+        Returns:
+            contextmanager: Holds an exclusive fcntl lock of the entry.
+        """
+        return self._flock(os.path.join(self._cache_location, zone, '.{}.lock'.format(key)))
+
+    def _load_manifest(self):
+        """Load the manifest and the usage counters, the cache folder is scanned only if there is no manifest yet.
+
+        The manifest is reloaded if another process has updated it. Must be called with the cache lock held.
+        """
+        manifest_stat = self._stat(self._manifest_file())
+        if self._manifest is None or manifest_stat != self._manifest_stat:
+            self._reload_manifest(manifest_stat)
+        for (zone, key), access in self._accessed.items():
+            if key in self._manifest.get(zone, {}):
+                entry = self._manifest[zone][key]
+                entry['access'] = max(entry['access'], access)
+        self._accessed = {}
+
+    def _reload_manifest(self, manifest_stat):
+        manifest = None
+        try:
+            with open(self._manifest_file()) as f:
+                manifest = defaultdict(dict, json.load(f))
+        except (IOError, ValueError) as e:
+            if os.path.exists(self._cache_location):
+                logger.info('[Cache] Load manifest failed, rebuild it from cache files: {}'.format(repr(e)))
+        if manifest is None:
+            manifest = self._scan_usage()
+        self._manifest = manifest
+        self._manifest_stat = manifest_stat
+        self._total_size = sum(entry['size'] for entries in manifest.values() for entry in entries.values())
+        self._total_entries = sum(len(entries) for entries in manifest.values())
+
+    def _save_manifest(self):
+        if self._manifest is None or not os.path.exists(self._cache_location):
+            return
+        try:
+            self._atomic_write(self._manifest_file(), lambda f: f.write(json.dumps(self._manifest).encode()))
+            self._manifest_stat = self._stat(self._manifest_file())
+        except (IOError, OSError, ValueError) as e:
+            logger.warning('[Cache] Save manifest failed with exception: {}'.format(repr(e)))
 
-        if total_size > SIZE_LIMIT or total_entries > ENTRY_LIMIT:
-            msg = 'Cache usage exceeds limitations. total_size={}, SIZE_LIMIT={}, total_entries={}, ENTRY_LIMIT={}' \
-                .format(total_size, SIZE_LIMIT, total_entries, ENTRY_LIMIT)
-            raise Exception(msg)
+    def _atomic_write(self, path, dump):
+        """Write a file through a temp file and a rename, readers never see a partially written file.
+
+        Args:
+            path (str): Path of the file.
+            dump (function): Function writing content to the opened temp file.
+
+        Returns:
+            int: Size of the written file.
+        """
+        fd, tmp_file = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.{}.'.format(os.path.basename(path)),
+                                        suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                dump(f)
+                size = f.tell()
+            os.rename(tmp_file, path)
+        except BaseException:
+            try:
+                os.remove(tmp_file)
+            except OSError:
+                pass
+            raise
+        return size
+
+    def _forget(self, zone, key=None):
+        """Remove a zone or an entry from the manifest and update the usage counters.
+        """
+        if self._manifest is None or zone not in self._manifest:
+            return
+        keys = [key] if key else list(self._manifest[zone].keys())
+        for k in keys:
+            entry = self._manifest[zone].pop(k, None)
+            if entry:
+                self._total_size -= entry['size']
+                self._total_entries -= 1
+        if not self._manifest[zone]:
+            del self._manifest[zone]
+
+    def _evict(self, zone, size):
+        """Evict entries until an entry of the given size fits the cache limitations.
+
+        Entries not accessed within ENTRY_TTL are evicted first. Then zones are evicted in least recently used
+        order, oldest entries of a zone first. Entries of the zone being written go last.
+
+        Args:
+            zone (str): Zone of the entry to be written.
+            size (int): Size of the entry to be written.
+        """
+        def over_limit():
+            return self._total_size + size > SIZE_LIMIT or self._total_entries + 1 > ENTRY_LIMIT
+
+        if not over_limit():
+            return
+        now = time.time()
+        expired = [(z, k) for z, entries in self._manifest.items() for k, entry in entries.items()
+                   if now - entry['access'] > ENTRY_TTL]
+        zones = sorted(self._manifest.keys(),
+                       key=lambda z: (z == zone, max(entry['access'] for entry in self._manifest[z].values())))
+        lru = [(z, k) for z in zones for k, _ in sorted(self._manifest[z].items(), key=lambda item: item[1]['access'])]
+
+        evicted = 0
+        for z, k in expired + lru:
+            if not over_limit():
+                break
+            if k not in self._manifest.get(z, {}):
+                continue
+            try:
+                os.remove(self._facts_file(z, k))
+            except OSError as e:
+                logger.debug('[Cache] Remove evicted cache file {}.{} failed: {}'.format(z, k, repr(e)))
+            self._cache.get(z, {}).pop(k, None)
+            self._forget(z, k)
+            evicted += 1
+        logger.info('[Cache] Evicted {} entries, total_size={}, total_entries={}'
+                    .format(evicted, self._total_size, self._total_entries))
+
+    def _touch(self, zone, key):
+        """Record access of an entry for LRU eviction. Persisted to the manifest by the next write.
+        """
+        self._accessed[(zone, key)] = time.time()
 
     def _read_facts_file(self, facts_file, z, k):
         with open(facts_file, 'rb') as f:
+            file_stat = os.fstat(f.fileno())
             self._cache[z][k] = pickle.load(f)
+            self._file_stats[z][k] = (file_stat.st_ino, file_stat.st_mtime_ns)
             logger.debug('[Cache] Loaded cached facts "{}.{}" from {}'.format(z, k, facts_file))
             return self._cache[z][k]
 
@@ -87,35 +269,27 @@ class FactsCache(with_metaclass(Singleton, object)):
         Returns:
             obj: Cached object, usually a dictionary.
         """
-        # Lazy load
-        if zone in self._cache and key in self._cache[zone]:
+        # Lazy load. Facts in memory are still valid if no other process has replaced or removed the cache file.
+        if zone in self._cache and key in self._cache[zone] \
+                and self._stat(self._facts_file(zone, key)) == self._file_stats[zone].get(key):
             logger.debug('[Cache] Read cached facts "{}.{}"'.format(zone, key))
+            self._touch(zone, key)
             return self._cache[zone][key]
         else:
-            facts_file = os.path.join(self._cache_location, '{}/{}.pickle'.format(zone, key))
+            facts_file = self._facts_file(zone, key)
             try:
-                return self._read_facts_file(facts_file, zone, key)
+                facts = self._read_facts_file(facts_file, zone, key)
+                self._touch(zone, key)
+                return facts
             except (IOError, ValueError) as e:
                 logger.info('[Cache] Load cache file "{}" failed with IOError or ValueError: {}'
                             .format(os.path.abspath(facts_file), repr(e)))
+                # The cache file may have been removed by another process
+                self._cache.get(zone, {}).pop(key, None)
                 return self.NOTEXIST
             except (EOFError, UnpicklingError) as e:
-                # When parallel run is enabled, multiple processes may try to read/write the same cache file,
-                # so there will be a chance that
-                #   - a file is being written by process1 while process2 is reading it, causing EOFError in process2
-                #   - a file is being read by multiple processes at the same time, causing UnpicklingError in some of
-                #     the processes
-                # In these cases, we will retry to read the file after a short random sleep. If we still get the same
-                # error after retrying, we will return NOTEXIST to overwrite the file.
-                retry_attempts = 3
-                for attempt in range(retry_attempts):
-                    time.sleep(random.randint(3, 6))
-                    try:
-                        return self._read_facts_file(facts_file, zone, key)
-                    except (EOFError, UnpicklingError):
-                        logger.warning('[Cache] Retry {}/{} failed for file "{}"'
-                                       .format(attempt + 1, retry_attempts, facts_file))
-
+                # Cache files are replaced atomically, so a truncated or corrupted file is not caused by a concurrent
+                # writer. Return NOTEXIST to overwrite the file.
                 logger.error('[Cache] Load cache file "{}" failed with EOFError or UnpicklingError: {}'
                              .format(facts_file, repr(e)))
                 return self.NOTEXIST
@@ -127,6 +301,9 @@ class FactsCache(with_metaclass(Singleton, object)):
     def write(self, zone, key, value):
         """Store facts to cache.
 
+        When the cache usage would exceed SIZE_LIMIT or ENTRY_LIMIT, expired and least recently used entries are
+        evicted to make room.
+
         Args:
             zone (str): Cached facts are organized by zones. This argument is to specify the zone name.
                 The zone name could be hostname.
@@ -137,23 +314,36 @@ class FactsCache(with_metaclass(Singleton, object)):
             boolean: Caching facts is successful or not.
         """
         with self._write_lock:
-            self._check_usage()
-            facts_file = os.path.join(self._cache_location, '{}/{}.pickle'.format(zone, key))
+            facts_file = self._facts_file(zone, key)
             try:
-                cache_subfolder = os.path.join(self._cache_location, zone)
-                if not os.path.exists(cache_subfolder):
-                    logger.info('[Cache] Create cache dir {}'.format(cache_subfolder))
-                    os.makedirs(cache_subfolder)
-
-                with open(facts_file, 'wb') as f:
-                    pickle.dump(value, f, pickle.HIGHEST_PROTOCOL)
-                    self._cache[zone][key] = value
-                    logger.info('[Cache] Cached facts "{}.{}" to {}'.format(zone, key, facts_file))
-                    return True
-            except (IOError, ValueError) as e:
+                data = pickle.dumps(value, pickle.HIGHEST_PROTOCOL)
+                with self._flock(os.path.join(self._cache_location, LOCK_FILE)):
+                    return self._write(zone, key, value, data)
+            except (IOError, OSError, ValueError, pickle.PicklingError) as e:
                 logger.error('[Cache] Dump cache file "{}" failed with exception: {}'.format(facts_file, repr(e)))
                 return False
 
+    def _write(self, zone, key, value, data):
+        facts_file = self._facts_file(zone, key)
+        self._load_manifest()
+        self._forget(zone, key)
+        self._evict(zone, len(data))
+
+        cache_subfolder = os.path.join(self._cache_location, zone)
+        if not os.path.exists(cache_subfolder):
+            logger.info('[Cache] Create cache dir {}'.format(cache_subfolder))
+            os.makedirs(cache_subfolder, exist_ok=True)
+
+        size = self._atomic_write(facts_file, lambda f: f.write(data))
+        self._cache[zone][key] = value
+        self._file_stats[zone][key] = self._stat(facts_file)
+        self._manifest[zone][key] = {'size': size, 'access': time.time()}
+        self._total_size += size
+        self._total_entries += 1
+        self._save_manifest()
+        logger.info('[Cache] Cached facts "{}.{}" to {}'.format(zone, key, facts_file))
+        return True
+
     def cleanup(self, zone=None, key=None):
         """Cleanup cached files.
 
@@ -163,10 +353,20 @@ class FactsCache(with_metaclass(Singleton, object)):
                 will be cleaned up.
             key (str): Name of cached facts. Default is None.
         """
+        with self._write_lock:
+            if zone:
+                with self._flock(os.path.join(self._cache_location, LOCK_FILE)):
+                    self._cleanup(zone, key)
+            else:
+                self._cleanup()
+
+    def _cleanup(self, zone=None, key=None):
         if zone:
+            self._load_manifest()
             if key:
                 if zone in self._cache and key in self._cache[zone]:
                     del self._cache[zone][key]
+                    self._file_stats[zone].pop(key, None)
                     logger.debug('[Cache] Removed "{}.{}" from cache.'.format(zone, key))
                 try:
                     cache_file = os.path.join(self._cache_location, zone, '{}.pickle'.format(key))
@@ -175,9 +375,11 @@ class FactsCache(with_metaclass(Singleton, object)):
                 except OSError as e:
                     logger.error('[Cache] Cleanup cache {}.{}.pickle failed with exception: {}'
                                  .format(zone, key, repr(e)))
+                self._forget(zone, key)
             else:
                 if zone in self._cache:
                     del self._cache[zone]
+                    self._file_stats.pop(zone, None)
                     logger.debug('[Cache] Removed zone "{}" from cache'.format(zone))
                 try:
                     cache_subfolder = os.path.join(self._cache_location, zone)
@@ -185,8 +387,12 @@ class FactsCache(with_metaclass(Singleton, object)):
                     logger.debug('[Cache] Removed cache subfolder "{}"'.format(cache_subfolder))
                 except OSError as e:
                     logger.error('[Cache] Remove cache subfolder "{}" failed with exception: {}'.format(zone, repr(e)))
+                self._forget(zone)
+            self._save_manifest()
         else:
             self._cache = defaultdict(dict)
+            self._file_stats = defaultdict(dict)
+            self._manifest = None
             try:
                 shutil.rmtree(self._cache_location)
                 logger.debug('[Cache] Removed all cache files under "{}"'.format(self._cache_location))
@@ -274,13 +480,29 @@ def cached(name, zone_getter=None, after_read=None, before_write=None):
             _zone_getter = zone_getter or _get_default_zone
             zone = _zone_getter(target, args, kargs)
 
-            cached_facts = cache.read(zone, name)
-            if after_read:
-                cached_facts = after_read(cached_facts, target, args, kargs)
+            def read_cache():
+                cached_facts = cache.read(zone, name)
+                if after_read:
+                    cached_facts = after_read(cached_facts, target, args, kargs)
+                if cached_facts is not FactsCache.NOTEXIST:
+                    logger.debug(f"[Cache] Use cache for func[{target}], zone[{zone}], key[{name}]")
+                return cached_facts
+
+            cached_facts = read_cache()
             if cached_facts is not FactsCache.NOTEXIST:
-                logger.debug(f"[Cache] Use cache for func[{target}], zone[{zone}], key[{name}]")
                 return cached_facts
-            else:
+
+            # Only one process gathers the facts, other processes wait for the lock and read the cached result
+            with contextlib.ExitStack() as stack:
+                try:
+                    stack.enter_context(cache.lock(zone, name))
+                except OSError as e:
+                    # Cache folder not writable, gather the facts without the lock, caching them is best effort
+                    logger.warning('[Cache] Lock "{}.{}" failed with exception: {}'.format(zone, name, repr(e)))
+                else:
+                    cached_facts = read_cache()
+                    if cached_facts is not FactsCache.NOTEXIST:
+                        return cached_facts
                 facts = target(*args, **kargs)
                 if before_write:
                     _facts = before_write(facts, target, args, kargs)
@@ -0,0 +1,348 @@
+import glob
+import json
+import multiprocessing
+import os
+import pickle
+import shutil
+import tempfile
+import time
+import unittest
+from unittest import mock
+
+from tests.common.cache import facts_cache
+from tests.common.cache.facts_cache import MANIFEST_FILE, FactsCache, cached
+
+# Pickled size of a value of VALUE_LENGTH characters is a bit more than VALUE_LENGTH bytes, SIZE_LIMIT fits 3 of them
+VALUE_LENGTH = 1000
+SIZE_LIMIT = 3500
+
+
+def new_cache(cache_location):
+    """Create a FactsCache of its own, bypassing the singleton metaclass."""
+    return type.__call__(FactsCache, cache_location)
+
+
+class Clock(object):
+    """Stand-in of the time module, each call of time() is one second later than the previous one."""
+
+    def __init__(self):
+        self.now = time.time()
+
+    def time(self):
+        self.now = self.now + 1
+        return self.now
+
+
+def write_values(cache_location, zone, key, writer, count, start):
+    """Write a value of the writer to the same entry for count times, as one of the concurrent writers."""
+    cache = new_cache(cache_location)
+    start.wait()
+    for index in range(count):
+        assert cache.write(zone, key, [writer] * 100000), "write {} of writer {} failed".format(index, writer)
+
+
+def read_values(cache_location, zone, key, writers, done):
+    """Read the entry until the writers are done, each read value must be a whole value of one writer."""
+    cache = new_cache(cache_location)
+    facts_file = cache._facts_file(zone, key)
+    reads = 0
+    while not done.is_set() or reads == 0:
+        with open(facts_file, "rb") as f:
+            value = pickle.load(f)
+        assert len(value) == 100000 and set(value) <= set(writers), "torn file {}".format(facts_file)
+        value = cache.read(zone, key)
+        assert value is not FactsCache.NOTEXIST, "read {}.{} failed".format(zone, key)
+        assert len(value) == 100000 and len(set(value)) == 1, "torn value of {}.{}".format(zone, key)
+        reads += 1
+
+
+def write_entries(cache_location, zone, count, start):
+    """Write new entries, evicting entries written by other processes."""
+    cache = new_cache(cache_location)
+    start.wait()
+    for index in range(count):
+        assert cache.write(zone, "{}-{}".format(zone, index), "x" * VALUE_LENGTH), "write {} failed".format(index)
+
+
+class FactsCacheTestBase(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.cache_location = os.path.join(self.tmpdir, "_cache")
+        self.cache = new_cache(self.cache_location)
+        patcher = mock.patch.object(facts_cache, "SIZE_LIMIT", SIZE_LIMIT)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def write(self, zone, key, cache=None):
+        self.assertTrue((cache or self.cache).write(zone, key, key * VALUE_LENGTH))
+
+    def cached_files(self):
+        return {(zone, key) for zone, entries in self.cache._scan_usage().items() for key in entries}
+
+    def load_manifest(self):
+        with open(os.path.join(self.cache_location, MANIFEST_FILE)) as f:
+            return json.load(f)
+
+    def age_files(self, *entries):
+        """Set mtime of the cache files, older for entries given first, like the files were written in that order."""
+        for index, (zone, key) in enumerate(entries):
+            mtime = time.time() - 100 + index
+            os.utime(os.path.join(self.cache_location, zone, key + ".pickle"), (mtime, mtime))
+
+    def assert_manifest_consistent(self, cache=None):
+        """Manifest file and usage counters match the cache files on disk."""
+        cache = cache or self.cache
+        manifest = self.load_manifest()
+        on_disk = {zone: {key: entry["size"] for key, entry in entries.items()}
+                   for zone, entries in cache._scan_usage().items()}
+        self.assertEqual({zone: {key: entry["size"] for key, entry in entries.items()}
+                          for zone, entries in manifest.items()}, on_disk)
+        self.assertEqual(cache._total_size, sum(size for entries in on_disk.values() for size in entries.values()))
+        self.assertEqual(cache._total_entries, sum(len(entries) for entries in on_disk.values()))
+
+
+class TestFactsCache(FactsCacheTestBase):
+
+    def setUp(self):
+        super(TestFactsCache, self).setUp()
+        self.clock = Clock()
+        patcher = mock.patch.object(facts_cache, "time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_lru_eviction_within_size_limit(self):
+        for key in ["a", "b", "c"]:
+            self.write("dut-1", key)
+        self.assertEqual(self.cached_files(), {("dut-1", "a"), ("dut-1", "b"), ("dut-1", "c")})
+
+        self.write("dut-1", "d")
+        self.assertEqual(self.cached_files(), {("dut-1", "b"), ("dut-1", "c"), ("dut-1", "d")})
+        self.assertLessEqual(self.cache._total_size, SIZE_LIMIT)
+        self.assertIs(self.cache.read("dut-1", "a"), FactsCache.NOTEXIST)
+        self.assert_manifest_consistent()
+
+        # Entries of the zone being written go last, even if other zones are used more recently
+        self.write("dut-2", "e")
+        self.assertEqual(self.cached_files(), {("dut-1", "c"), ("dut-1", "d"), ("dut-2", "e")})
+        self.write("dut-1", "f")
+        self.assertEqual(self.cached_files(), {("dut-1", "c"), ("dut-1", "d"), ("dut-1", "f")})
+        self.assertLessEqual(self.cache._total_size, SIZE_LIMIT)
+        self.assert_manifest_consistent()
+
+    def test_entry_limit(self):
+        with mock.patch.object(facts_cache, "ENTRY_LIMIT", 2):
+            for key in ["a", "b", "c"]:
+                self.write("dut-1", key)
+        self.assertEqual(self.cached_files(), {("dut-1", "b"), ("dut-1", "c")})
+        self.assert_manifest_consistent()
+
+    def test_rewrite_entry_not_counted_twice(self):
+        for key in ["a", "b", "c", "a", "b"]:
+            self.write("dut-1", key)
+        self.assertEqual(self.cached_files(), {("dut-1", "a"), ("dut-1", "b"), ("dut-1", "c")})
+        self.assert_manifest_consistent()
+
+    def test_expired_entries_evicted_first(self):
+        for key in ["a", "b", "c"]:
+            self.write("dut-1", key)
+        self.clock.now = self.clock.now + facts_cache.ENTRY_TTL
+        self.cache.read("dut-1", "a")
+        self.write("dut-1", "b")
+        # "c" is the only entry not accessed within ENTRY_TTL
+        self.write("dut-1", "d")
+        self.assertEqual(self.cached_files(), {("dut-1", "a"), ("dut-1", "b"), ("dut-1", "d")})
+        self.assert_manifest_consistent()
+
+    def test_read_updates_lru_order(self):
+        for key in ["a", "b", "c"]:
+            self.write("dut-1", key)
+        self.assertEqual(self.cache.read("dut-1", "a"), "a" * VALUE_LENGTH)
+        self.write("dut-1", "d")
+        self.assertEqual(self.cached_files(), {("dut-1", "a"), ("dut-1", "c"), ("dut-1", "d")})
+
+        # Access of an entry loaded from the file, not from memory, is recorded as well
+        cache = new_cache(self.cache_location)
+        self.assertEqual(cache.read("dut-1", "c"), "c" * VALUE_LENGTH)
+        self.write("dut-1", "e", cache)
+        self.assertEqual(self.cached_files(), {("dut-1", "c"), ("dut-1", "d"), ("dut-1", "e")})
+
+        # Access is persisted to the manifest by the next write
+        manifest = self.load_manifest()
+        self.assertGreater(manifest["dut-1"]["c"]["access"], manifest["dut-1"]["d"]["access"])
+        self.assert_manifest_consistent(cache)
+
+    def test_manifest_rebuilt_when_missing(self):
+        for key in ["a", "b"]:
+            self.write("dut-1", key)
+        self.write("dut-2", "c")
+        os.remove(os.path.join(self.cache_location, MANIFEST_FILE))
+        self.age_files(("dut-1", "a"), ("dut-1", "b"), ("dut-2", "c"))
+
+        # Entries of the rebuilt manifest are counted for the size limit, and evicted in the order of their mtime
+        cache = new_cache(self.cache_location)
+        self.write("dut-2", "d", cache)
+        self.assertEqual(self.cached_files(), {("dut-1", "b"), ("dut-2", "c"), ("dut-2", "d")})
+        self.assert_manifest_consistent(cache)
+
+    def test_manifest_rebuilt_when_corrupt(self):
+        for key in ["a", "b"]:
+            self.write("dut-1", key)
+        with open(os.path.join(self.cache_location, MANIFEST_FILE), "w") as f:
+            f.write('{"dut-1": {"a": ')
+        self.age_files(("dut-1", "a"), ("dut-1", "b"))
+
+        cache = new_cache(self.cache_location)
+        self.write("dut-1", "c", cache)
+        self.assert_manifest_consistent(cache)
+        self.write("dut-1", "d", cache)
+        self.assertEqual(self.cached_files(), {("dut-1", "b"), ("dut-1", "c"), ("dut-1", "d")})
+        self.assert_manifest_consistent(cache)
+
+    def test_cleanup_keeps_manifest_consistent(self):
+        for key in ["a", "b"]:
+            self.write("dut-1", key)
+        self.write("dut-2", "c")
+
+        self.cache.cleanup("dut-1", "a")
+        self.assertEqual(self.cached_files(), {("dut-1", "b"), ("dut-2", "c")})
+        self.assertIs(self.cache.read("dut-1", "a"), FactsCache.NOTEXIST)
+        self.assert_manifest_consistent()
+
+        self.cache.cleanup("dut-2")
+        self.assertEqual(self.cached_files(), {("dut-1", "b")})
+        self.assertNotIn("dut-2", self.load_manifest())
+        self.assert_manifest_consistent()
+
+        # Cleaned up entries don't take room, 3 new entries fit without evicting "b"
+        for key in ["d", "e"]:
+            self.write("dut-2", key)
+        self.assertEqual(self.cached_files(), {("dut-1", "b"), ("dut-2", "d"), ("dut-2", "e")})
+
+        self.cache.cleanup()
+        self.assertFalse(os.path.exists(self.cache_location))
+        self.write("dut-1", "f")
+        self.assertEqual(self.load_manifest().keys(), {"dut-1"})
+        self.assertEqual(self.cached_files(), {("dut-1", "f")})
+        self.assert_manifest_consistent()
+
+
+class TestFactsCacheProcesses(FactsCacheTestBase):
+    """FactsCache instances in processes sharing one cache folder, like pytest-xdist workers."""
+
+    def setUp(self):
+        super(TestFactsCacheProcesses, self).setUp()
+        self.context = multiprocessing.get_context("fork")
+
+    def run_processes(self, processes):
+        for process in processes:
+            process.start()
+        for process in processes:
+            process.join(120)
+            self.assertEqual(process.exitcode, 0, "{} failed".format(process.name))
+
+    def test_concurrent_writes_not_torn(self):
+        writers = list(range(4))
+        self.assertTrue(self.cache.write("dut-1", "facts", [writers[0]] * 100000))
+        start = self.context.Event()
+        processes = [self.context.Process(target=write_values, name="writer-{}".format(writer),
+                                          args=(self.cache_location, "dut-1", "facts", writer, 20, start))
+                     for writer in writers]
+        for process in processes:
+            process.start()
+        done = self.context.Event()
+        reader = self.context.Process(target=read_values, name="reader",
+                                      args=(self.cache_location, "dut-1", "facts", writers, done))
+        reader.start()
+        start.set()
+        for process in processes:
+            process.join(120)
+            self.assertEqual(process.exitcode, 0, "{} failed".format(process.name))
+        done.set()
+        reader.join(120)
+        self.assertEqual(reader.exitcode, 0, "reader failed")
+
+        value = new_cache(self.cache_location).read("dut-1", "facts")
+        self.assertEqual(len(value), 100000)
+        self.assertEqual(len(set(value)), 1)
+        # No temp file is left behind, the manifest counts the entry once
+        self.assertEqual(glob.glob(os.path.join(self.cache_location, "**", "*.tmp"), recursive=True), [])
+        self.assertEqual(list(self.load_manifest()["dut-1"].keys()), ["facts"])
+
+    def test_read_sees_value_replaced_by_other_process(self):
+        self.assertTrue(self.cache.write("dut-1", "facts", "old"))
+        self.assertEqual(self.cache.read("dut-1", "facts"), "old")
+
+        self.run_processes([self.context.Process(target=lambda: new_cache(self.cache_location)
+                                                 .write("dut-1", "facts", "new"))])
+        self.assertEqual(self.cache.read("dut-1", "facts"), "new")
+
+        # Removed by another process, the value in memory is not used anymore
+        self.run_processes([self.context.Process(target=lambda: new_cache(self.cache_location)
+                                                 .cleanup("dut-1", "facts"))])
+        self.assertIs(self.cache.read("dut-1", "facts"), FactsCache.NOTEXIST)
+
+    def test_concurrent_eviction_keeps_manifest_consistent(self):
+        zones = ["dut-{}".format(index) for index in range(4)]
+        start = self.context.Event()
+        processes = [self.context.Process(target=write_entries, name=zone,
+                                          args=(self.cache_location, zone, 20, start))
+                     for zone in zones]
+        for process in processes:
+            process.start()
+        start.set()
+        for process in processes:
+            process.join(120)
+            self.assertEqual(process.exitcode, 0, "{} failed".format(process.name))
+
+        cache = new_cache(self.cache_location)
+        cache._load_manifest()
+        self.assert_manifest_consistent(cache)
+        self.assertLessEqual(cache._total_size, SIZE_LIMIT)
+        # Each process evicts entries of other processes, the last entry of a process is evicted only by others
+        self.assertGreater(cache._total_entries, 0)
+        self.assertEqual(glob.glob(os.path.join(self.cache_location, "**", "*.tmp"), recursive=True), [])
+
+
+class TestCachedDecorator(FactsCacheTestBase):
+
+    def setUp(self):
+        super(TestCachedDecorator, self).setUp()
+        # Functions decorated in the tests use this cache, instead of the FactsCache singleton
+        patcher = mock.patch.dict(facts_cache.Singleton._instances, {FactsCache: self.cache})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_cached_without_writable_cache_folder(self):
+        class Host(object):
+            hostname = "dut-1"
+
+            def __init__(self):
+                self.calls = 0
+
+            @cached(name="facts")
+            def get_facts(self):
+                self.calls += 1
+                return {"calls": self.calls}
+
+        host = Host()
+        self.assertEqual(host.get_facts(), {"calls": 1})
+        self.assertEqual(host.get_facts(), {"calls": 1})
+
+        # Cache folder can't be created, the facts are gathered every time instead of failing
+        not_a_folder = os.path.join(self.tmpdir, "not_a_folder")
+        with open(not_a_folder, "w") as f:
+            f.write("")
+        host = Host()
+        with mock.patch.object(self.cache, "_cache_location", os.path.join(not_a_folder, "_cache")), \
+                mock.patch.object(facts_cache, "logger") as logger:
+            self.assertEqual(host.get_facts(), {"calls": 1})
+            self.assertEqual(host.get_facts(), {"calls": 2})
+        self.assertEqual(logger.warning.call_count, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -10,15 +10,23 @@ Main features:
 - Compare snapshots and generate detailed diffs
 - Filter out volatile/transient data that changes frequently
 - Provide metrics on database differences
+
+Snapshots are stored in a compact format, a gzip compressed file with one line per top-level key holding a digest of
+the key's content with the volatile values removed, the counts of its values and its content. Two snapshots are diffed
+by their digests first, only the keys whose digests differ are loaded and diffed value by value.
 """
 
 from enum import Enum
+import functools
+import gzip
+import hashlib
+import io
 import json
 import logging
 import os
 import re
 import copy
-from typing import Dict, List, Tuple
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
 from collections import Counter
 from dataclasses import dataclass
 
@@ -40,12 +48,21 @@ def match_key(key, kset):
     Returns:
         bool: True if the key matches any pattern in kset, False otherwise
     """
-    for k in kset:
-        if key.startswith(k):
-            return True
-        elif re.match(k, key):
-            return True
-    return False
+    return _compile_key_patterns(frozenset(kset)).match(key) is not None
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_key_patterns(kset):
+    """
+    Compile the patterns of match_key() into one regular expression.
+
+    A prefix is matched as the escaped prefix and a pattern as itself, so the expression matches a key at the start
+    exactly when match_key() would.
+    """
+    if not kset:
+        # Matches nothing
+        return re.compile(r"(?!)")
+    return re.compile("|".join("(?:{})|(?:{})".format(re.escape(k), k) for k in sorted(kset)))
 
 
 def dut_dump(redis_cmd, duthost, data_dir, fname):
@@ -89,6 +106,13 @@ class DBType(Enum):
     STATE = 6
 
 
+# Version of the compact snapshot format, written in the header of the snapshot files
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_FILE_SUFFIX = ".snapshot.gz"
+# Encoders of the snapshot files, reused since json.dumps() with arguments makes a new encoder on each call
+_COMPACT_ENCODER = json.JSONEncoder(separators=(",", ":"), default=str)
+_CANONICAL_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"), default=str)
+
 # These are the keys/fields that are always ignored during comparison due to their volatile nature
 VOLATILE_VALUES = {
     DBType.APPL: {
@@ -292,21 +316,47 @@ class DbComparisonMetrics:
 class SnapshotDiff:
     """Container for differing values and metrics of a snapshot comparison for a singleDB supporting metric tracking
     """
-    def __init__(self, db_type: DBType, snapshot_a: dict, snapshot_b: dict, label_a: str = "a", label_b: str = "b"):
+    def __init__(self, db_type: DBType, snapshot_a, snapshot_b, label_a: str = "a", label_b: str = "b"):
+        """
+        Diff two snapshots of a DB.
+
+        Two CompactSnapshot are diffed by the digests of their keys first, and only the keys whose digests differ are
+        loaded. Otherwise the snapshots are diffed as the dicts loaded from redis-dump.
+
+        Args:
+            db_type (DBType): Type of the snapshotted DB
+            snapshot_a: The first snapshot, a CompactSnapshot or the dict loaded from a redis-dump
+            snapshot_b: The second snapshot, a CompactSnapshot or the dict loaded from a redis-dump
+            label_a (str): Label of the first snapshot in the diff
+            label_b (str): Label of the second snapshot in the diff
+        """
         self._db_type = db_type
-        self._snapshot_a = snapshot_a
-        self._snapshot_b = snapshot_b
         self._label_a = label_a
         self._label_b = label_b
 
         # Start building metrics on snapshot
         self._metrics = DbComparisonMetrics()
-        self._metrics.total_a_keys = len(self._snapshot_a)
-        self._metrics.total_a_values_incl_volatile, self._metrics.total_a_values_excl_volatile = \
-            _sum_total_values(db_type, self._snapshot_a)
-        self._metrics.total_b_keys = len(self._snapshot_b)
-        self._metrics.total_b_values_incl_volatile, self._metrics.total_b_values_excl_volatile = \
-            _sum_total_values(db_type, self._snapshot_b)
+        if isinstance(snapshot_a, CompactSnapshot) and isinstance(snapshot_b, CompactSnapshot):
+            self._metrics.total_a_keys = len(snapshot_a.index())
+            self._metrics.total_a_values_incl_volatile, self._metrics.total_a_values_excl_volatile = \
+                snapshot_a.sum_total_values()
+            self._metrics.total_b_keys = len(snapshot_b.index())
+            self._metrics.total_b_values_incl_volatile, self._metrics.total_b_values_excl_volatile = \
+                snapshot_b.sum_total_values()
+
+            # Only the keys whose digests differ can have a diff, load only those
+            expand_a, expand_b = _keys_to_expand(db_type, snapshot_a.index(), snapshot_b.index())
+            self._snapshot_a = snapshot_a.load(expand_a)
+            self._snapshot_b = snapshot_b.load(expand_b)
+        else:
+            self._snapshot_a = snapshot_a.load() if isinstance(snapshot_a, CompactSnapshot) else snapshot_a
+            self._snapshot_b = snapshot_b.load() if isinstance(snapshot_b, CompactSnapshot) else snapshot_b
+            self._metrics.total_a_keys = len(self._snapshot_a)
+            self._metrics.total_a_values_incl_volatile, self._metrics.total_a_values_excl_volatile = \
+                _sum_total_values(db_type, self._snapshot_a)
+            self._metrics.total_b_keys = len(self._snapshot_b)
+            self._metrics.total_b_values_incl_volatile, self._metrics.total_b_values_excl_volatile = \
+                _sum_total_values(db_type, self._snapshot_b)
 
         # Build the diff
         if db_type == DBType.STATE:
@@ -377,6 +427,8 @@ class SnapshotDiff:
 
         result = {}
         always_ignore_keys = set(VOLATILE_VALUES.get(db_type, []))
+        # Values of keys only in one of the dicts are removed by match_key() patterns, compiled once for all keys
+        ignore_pattern = _compile_key_patterns(frozenset(always_ignore_keys))
 
         a_keys = set(dict_a.keys()) - always_ignore_keys
         b_keys = set(dict_b.keys()) - always_ignore_keys
@@ -388,8 +440,7 @@ class SnapshotDiff:
         for key in a_only_keys:
             if isinstance(dict_a[key], dict):
                 # Remove always ignore keys
-                val = copy.deepcopy(dict_a[key])
-                _recursively_remove_keys_matching_pattern(val, always_ignore_keys)
+                val = _copy_without_matching_keys(dict_a[key], ignore_pattern)
             else:
                 val = dict_a[key]
             result[key] = {
@@ -401,8 +452,7 @@ class SnapshotDiff:
         for key in b_only_keys:
             if isinstance(dict_b[key], dict):
                 # Remove always ignore keys
-                val = copy.deepcopy(dict_b[key])
-                _recursively_remove_keys_matching_pattern(val, always_ignore_keys)
+                val = _copy_without_matching_keys(dict_b[key], ignore_pattern)
             else:
                 val = dict_b[key]
             result[key] = {
@@ -500,24 +550,20 @@ class SnapshotDiff:
         del self._diff[top_level_key]
 
 
-def _recursively_remove_keys_matching_pattern(d_for_removal, patterns):
+def _copy_without_matching_keys(value, pattern):
     """
-    Recursively remove keys from a dictionary that match any pattern in the given set.
-
-    This function traverses a dictionary structure and removes any keys that match
-    patterns in the provided set. It modifies the dictionary in-place and recursively
-    processes nested dictionaries.
+    Copy a value without the dictionary keys matching the pattern, recursively.
 
     Args:
-        d_for_removal (dict): Dictionary to remove keys from (modified in-place)
-        patterns (iterable): Set of patterns to match against keys using match_key()
+        value: Value to copy, dictionaries are copied without the matching keys and other values are deep-copied
+        pattern (re.Pattern): Compiled patterns of match_key(), from _compile_key_patterns()
+
+    Returns:
+        The copy of the value
     """
-    if isinstance(d_for_removal, dict):
-        keys_to_remove = [k for k in d_for_removal if match_key(k, patterns)]
-        for k in keys_to_remove:
-            del d_for_removal[k]
-        for v in d_for_removal.values():
-            _recursively_remove_keys_matching_pattern(v, patterns)
+    if isinstance(value, dict):
+        return {k: _copy_without_matching_keys(v, pattern) for k, v in value.items() if not pattern.match(k)}
+    return copy.deepcopy(value)
 
 
 def _sum_total_values(db_type: DBType, db_dump: dict) -> Tuple[int, int]:
@@ -535,6 +581,255 @@ def _sum_total_values(db_type: DBType, db_dump: dict) -> Tuple[int, int]:
     return total_incl_volatile, total_excl_volatile
 
 
+def _strip_volatile(value, volatile_values):
+    """Copy of a value without the dictionary keys in volatile_values at any level, as _diff_dict() skips them."""
+    if isinstance(value, dict):
+        return {k: _strip_volatile(v, volatile_values) if isinstance(v, dict) else v
+                for k, v in value.items() if k not in volatile_values}
+    return value
+
+
+def _key_info(db_type: DBType, content) -> Tuple[str, str]:
+    """
+    Get the digest and the value counts of a top-level key of a DB dump.
+
+    The digest is taken on the content without the volatile values, so two keys have the same digest exactly when
+    _diff_dict() finds no difference between them.
+
+    Returns:
+        tuple: The digest, and the number of entries below "value" including and excluding the volatile ones as
+            'incl,excl'. The counts are empty if the content has no "value".
+    """
+    volatile_values = VOLATILE_VALUES.get(db_type, set())
+    canonical = _CANONICAL_ENCODER.encode(_strip_volatile(content, volatile_values))
+    digest = hashlib.blake2b(canonical.encode(), digest_size=16).hexdigest()
+    if not isinstance(content, dict) or "value" not in content:
+        return digest, ""
+    values = content["value"]
+    return digest, f"{len(values)},{sum(1 for key in values if key not in volatile_values)}"
+
+
+def _keys_to_expand(db_type: DBType, index_a: dict, index_b: dict) -> Tuple[Set[str], Set[str]]:
+    """
+    Get the keys of each snapshot to load for the diff, from the indexes of CompactSnapshot.index().
+
+    These are the keys missing from the other snapshot and the keys whose digests differ. All the 'PROCESS_STATS|*' keys
+    of STATE_DB are loaded since they are diffed by the processes, not by the keys.
+    """
+    expand_a = {key for key, info in index_a.items() if key not in index_b or index_b[key][0] != info[0]}
+    expand_b = {key for key, info in index_b.items() if key not in index_a or index_a[key][0] != info[0]}
+    if db_type == DBType.STATE:
+        process_stats = json.dumps("PROCESS_STATS|")[:-1]
+        for index, expand in ((index_a, expand_a), (index_b, expand_b)):
+            expand.update(key for key in index if key.startswith(process_stats))
+    return expand_a, expand_b
+
+
+def write_snapshot_file(db_type: DBType, items: Iterable[Tuple[str, dict]], path: str) -> int:
+    """
+    Write the top-level keys of a DB dump to a compact snapshot file.
+
+    The file is gzip compressed. Its first line is a JSON header with the format version, the DB and the volatile
+    values the digests were taken without. Each following line is a top-level key with the fields separated by tabs:
+    the JSON encoded key, the digest, the value counts 'incl,excl' (empty if the content has no "value") and the JSON
+    encoded content.
+
+    Args:
+        db_type (DBType): Type of the dumped DB
+        items (Iterable[Tuple[str, dict]]): Top-level keys and their contents
+        path (str): Path of the snapshot file
+
+    Returns:
+        int: Number of keys written
+    """
+    header = {
+        "format": SNAPSHOT_FORMAT_VERSION,
+        "db": db_type.name,
+        "volatile": sorted(VOLATILE_VALUES.get(db_type, [])),
+    }
+    num_keys = 0
+    with gzip.open(path, "wt", compresslevel=6) as f:
+        f.write(json.dumps(header) + "\n")
+        for key, content in items:
+            digest, counts = _key_info(db_type, content)
+            f.write(f"{_COMPACT_ENCODER.encode(key)}\t{digest}\t{counts}\t{_COMPACT_ENCODER.encode(content)}\n")
+            num_keys += 1
+    return num_keys
+
+
+class CompactSnapshot:
+    """
+    Snapshot of one DB in a file written by write_snapshot_file().
+
+    index() reads the digests and the value counts of all the top-level keys without decoding their contents, load()
+    decodes the contents of the given keys only.
+    """
+
+    def __init__(self, db_type: DBType, path: str):
+        self._db_type = db_type
+        self._path = path
+        self._index = None
+
+    def _records(self) -> Iterator[Tuple[str, Optional[str], str, str]]:
+        """
+        Read the records of the snapshot file.
+
+        Yields:
+            tuple: The JSON encoded key, the digest, the value counts and the JSON encoded content. The digest is None
+                if it was taken without other volatile values than the current ones.
+        """
+        # Read through a large buffer, reading line by line from GzipFile itself is several times slower
+        with io.TextIOWrapper(io.BufferedReader(gzip.GzipFile(self._path), buffer_size=1 << 20)) as f:
+            header = json.loads(f.readline())
+            assert header.get("format") == SNAPSHOT_FORMAT_VERSION, \
+                f"Unsupported snapshot format of {self._path}: {header}"
+            digest_valid = header.get("volatile") == sorted(VOLATILE_VALUES.get(self._db_type, []))
+            for line in f:
+                key_json, digest, counts, content = line.rstrip("\n").split("\t", 3)
+                yield key_json, digest if digest_valid else None, counts, content
+
+    def index(self) -> Dict[str, Tuple[str, str]]:
+        """
+        Get the digests and the value counts of the top-level keys.
+
+        Returns:
+            dict: The digest and the value counts of each top-level key, like _key_info(). The keys are JSON encoded,
+                so they are not decoded for keys that are not loaded.
+        """
+        if self._index is None:
+            self._index = {}
+            for key_json, digest, counts, content in self._records():
+                if digest is None:
+                    # VOLATILE_VALUES changed since the snapshot was taken
+                    self._index[key_json] = _key_info(self._db_type, json.loads(content))
+                else:
+                    self._index[key_json] = (digest, counts)
+        return self._index
+
+    def sum_total_values(self) -> Tuple[int, int]:
+        """Summarize the number of total values in the DB snapshot, like _sum_total_values()."""
+        total_incl_volatile = 0
+        total_excl_volatile = 0
+        for key_json, (_, counts) in self.index().items():
+            if not counts:
+                content = self.load({key_json})
+                assert False, f"Unexpected entry in {self._db_type.name} DB: {content}"
+            incl_volatile, excl_volatile = counts.split(",")
+            total_incl_volatile += int(incl_volatile)
+            total_excl_volatile += int(excl_volatile)
+        return total_incl_volatile, total_excl_volatile
+
+    def load(self, keys: Optional[Set[str]] = None) -> dict:
+        """
+        Load the contents of the top-level keys.
+
+        Args:
+            keys (Set[str]): JSON encoded top-level keys to load, as in index(). All the keys are loaded if None.
+
+        Returns:
+            dict: Content of each of the keys, in the order of the snapshot
+        """
+        if keys is not None and not keys:
+            return {}
+        return {json.loads(key_json): json.loads(content) for key_json, _, _, content in self._records()
+                if keys is None or key_json in keys}
+
+
+def _iter_dump_items(text: str) -> Iterator[Tuple[str, dict]]:
+    """
+    Decode the top-level JSON object of a redis-dump one key at a time.
+
+    Args:
+        text (str): Output of redis-dump
+
+    Yields:
+        tuple: A top-level key and its content
+    """
+    decoder = json.JSONDecoder()
+    whitespace = re.compile(r"\s*")
+
+    def _expect(pos, char):
+        pos = whitespace.match(text, pos).end()
+        if text[pos:pos + 1] != char:
+            raise ValueError(f"Expecting '{char}' at {pos} of redis-dump output")
+        return whitespace.match(text, pos + 1).end()
+
+    pos = _expect(0, "{")
+    if text[pos:pos + 1] == "}":
+        return
+    while True:
+        key, pos = decoder.raw_decode(text, pos)
+        pos = _expect(pos, ":")
+        content, pos = decoder.raw_decode(text, pos)
+        yield key, content
+        pos = whitespace.match(text, pos).end()
+        if text[pos:pos + 1] == "}":
+            return
+        pos = _expect(pos, ",")
+
+
+def dut_dump_snapshot(duthost, db_type: DBType, snapshot_dir: str) -> str:
+    """
+    Dump a DB on the DUT and store it as a compact snapshot file.
+
+    The dump is compressed on the DUT before it is fetched, and converted to the snapshot file one top-level key at a
+    time, so the contents of the whole DB are never loaded at once.
+
+    Args:
+        duthost: The DUT host object with shell and fetch capabilities
+        db_type (DBType): The DB to dump
+        snapshot_dir (str): Local directory where the snapshot file is stored
+
+    Returns:
+        str: Path of the snapshot file
+
+    Raises:
+        AssertionError: If the Redis command fails or file operations fail
+    """
+    dump_file = f"/tmp/{db_type.name}.json.gz"
+    redis_cmd = f"redis-dump -d {db_type.value} -o /tmp/{db_type.name}.json"
+    ret = duthost.shell(f"{redis_cmd} && gzip -f /tmp/{db_type.name}.json")
+    assert ret["rc"] == 0, "Failed to run cmd:{}".format(redis_cmd)
+
+    try:
+        ret = duthost.fetch(src=dump_file, dest=snapshot_dir)
+    finally:
+        duthost.shell(f"rm -f {dump_file}", module_ignore_errors=True)
+    dest_file = ret.get("dest", None)
+
+    assert dest_file is not None, "Failed to fetch src={} dest:{}".format(dump_file, snapshot_dir)
+    assert os.path.exists(dest_file), "Fetched file not exist: {}".format(dest_file)
+
+    with gzip.open(dest_file, "rt") as f:
+        text = f.read()
+    os.remove(dest_file)
+
+    path = os.path.join(snapshot_dir, f"{db_type.name}{SNAPSHOT_FILE_SUFFIX}")
+    num_keys = write_snapshot_file(db_type, _iter_dump_items(text), path)
+    logger.info(f"Wrote {num_keys} keys of {db_type.name} DB to {path}")
+    return path
+
+
+def _open_snapshot(db_type: DBType, path: str):
+    """Open a compact snapshot file, or load a JSON file of a redis-dump taken by older versions."""
+    if path.endswith(SNAPSHOT_FILE_SUFFIX):
+        return CompactSnapshot(db_type, path)
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def _list_snapshot_files(snapshot_dir: str) -> Dict[str, str]:
+    """Get the snapshot file of each DB in a snapshot directory, by the DB name."""
+    files = {}
+    for f in os.listdir(snapshot_dir):
+        if f.endswith(SNAPSHOT_FILE_SUFFIX):
+            # Preferred over a JSON file of the same DB
+            files[f[:-len(SNAPSHOT_FILE_SUFFIX)]] = os.path.join(snapshot_dir, f)
+        elif f.endswith(".json"):
+            files.setdefault(f[:-len(".json")], os.path.join(snapshot_dir, f))
+    return files
+
+
 class SonicRedisDBSnapshotter:
     """
     Class for taking and comparing Redis database snapshots on SONiC devices.
@@ -567,7 +862,7 @@ class SonicRedisDBSnapshotter:
         Take a snapshot of specified Redis databases on the DUT.
 
         This method captures the current state of the specified Redis databases
-        and stores them as JSON files in a snapshot directory.
+        and stores them as compact snapshot files in a snapshot directory.
 
         Args:
             snapshot_name (str): Name identifier for this snapshot
@@ -578,10 +873,7 @@ class SonicRedisDBSnapshotter:
         snapshot_dir = f"{self._snapshot_base_dir}/{snapshot_name}/"
         os.makedirs(snapshot_dir, exist_ok=True)
         for db in snapshot_dbs:
-            cmd = f"redis-dump -d {db.value} --pretty"
-            dump = dut_dump(cmd, self._duthost, snapshot_dir, db.name)
-            with open(f"{snapshot_dir}/{db.name}.json", "w") as f:
-                f.write(json.dumps(dump, indent=4, default=str))
+            dut_dump_snapshot(self._duthost, db, snapshot_dir)
 
         logger.info(f"Snapshot {snapshot_name} taken for {self._duthost.hostname} at {snapshot_dir}")
 
@@ -604,25 +896,21 @@ class SonicRedisDBSnapshotter:
         Raises:
             AssertionError: If the snapshots don't contain the same database types
         """
-        snapshot_a_dir = f"{self._snapshot_base_dir}/{snapshot_a}"
-        snapshot_a_dbs = [f for f in os.listdir(snapshot_a_dir) if f.endswith(".json")]
-
-        snapshot_b_dir = f"{self._snapshot_base_dir}/{snapshot_b}"
-        snapshot_b_dbs = [f for f in os.listdir(snapshot_b_dir) if f.endswith(".json")]
+        snapshot_a_dbs = _list_snapshot_files(f"{self._snapshot_base_dir}/{snapshot_a}")
+        snapshot_b_dbs = _list_snapshot_files(f"{self._snapshot_base_dir}/{snapshot_b}")
 
         assert set(snapshot_a_dbs) == set(snapshot_b_dbs), "Snapshotted dbs do not match. Cannot compare"
 
         result = {}
 
-        for db_file in snapshot_a_dbs:
-            db_name = db_file.replace(".json", "")
+        for db_name, db_file_a in snapshot_a_dbs.items():
             db_type = DBType[db_name]
             if db_type == DBType.ASIC:
                 # NOTE: ASIC DB diffing not currently supported
                 continue
-            db_dump_a = json.load(open(os.path.join(snapshot_a_dir, db_file), 'r'))
-            db_dump_b = json.load(open(os.path.join(snapshot_b_dir, db_file), 'r'))
-            snapshot_diff = SnapshotDiff(db_type, db_dump_a, db_dump_b, label_a=snapshot_a, label_b=snapshot_b)
+            db_snapshot_a = _open_snapshot(db_type, db_file_a)
+            db_snapshot_b = _open_snapshot(db_type, snapshot_b_dbs[db_name])
+            snapshot_diff = SnapshotDiff(db_type, db_snapshot_a, db_snapshot_b, label_a=snapshot_a, label_b=snapshot_b)
 
             result[db_type] = snapshot_diff
 
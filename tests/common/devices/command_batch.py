@@ -0,0 +1,139 @@
+"""
+Run a batch of shell commands in one remote execution.
+
+The commands are joined into one /bin/sh script. Each command is run by its own /bin/sh with stdin from /dev/null, like
+the ansible shell module runs it, so a syntax error or 'exit' of a command doesn't stop the script. Output of each
+command is framed by delimiter lines on both stdout and stderr, the delimiter after the output carries the exit code. A
+delimiter contains a random token, so it can't be mistaken for the output of a command.
+"""
+import re
+import shlex
+import uuid
+
+# Commands in one script
+DEFAULT_BATCH_SIZE = 256
+# Characters in one script, the shell module runs the script as one argument of /bin/sh and the kernel limits a single
+# argument to 128 KiB (MAX_ARG_STRLEN)
+DEFAULT_BATCH_BYTES = 64 * 1024
+
+
+def new_marker():
+    return "__BATCH_{}__".format(uuid.uuid4().hex)
+
+
+def build_batch_script(cmds, marker):
+    """
+    Build the script running the commands one after another.
+
+    Args:
+        cmds (list): Shell commands.
+        marker (str): Token of the delimiters, from new_marker().
+
+    Returns:
+        str: The script.
+    """
+    return "\n".join(_build_cmd_script(index, cmd, marker) for index, cmd in enumerate(cmds))
+
+
+def _build_cmd_script(index, cmd, marker):
+    """Build the part of the script running one command."""
+    lines = []
+    lines.append("echo '{0}:{1}:begin'; echo '{0}:{1}:begin' >&2".format(marker, index))
+    # Newline is printed before the end delimiter, output not ending with a newline is kept as is
+    lines.append("/bin/sh -c {} < /dev/null".format(shlex.quote(cmd)))
+    lines.append("printf '\\n{0}:{1}:end:%d\\n' $?; printf '\\n{0}:{1}:end\\n' >&2".format(marker, index))
+    return "\n".join(lines)
+
+
+def split_batches(cmds, batch_size=DEFAULT_BATCH_SIZE, batch_bytes=DEFAULT_BATCH_BYTES):
+    """
+    Split the commands into batches, each run by one script.
+
+    A batch has at most batch_size commands, and its script built by build_batch_script() has at most batch_bytes
+    characters. A command whose script alone is longer than batch_bytes is put in a batch of its own.
+
+    Args:
+        cmds (list): Shell commands.
+        batch_size (int): Max number of commands in one batch.
+        batch_bytes (int): Max length of the script of one batch.
+
+    Returns:
+        list: Lists of commands, in the order of cmds.
+    """
+    # Markers have the same length, the length of the script doesn't depend on which one is used
+    marker = new_marker()
+    batches = []
+    batch = []
+    length = 0
+    for cmd in cmds:
+        cmd_length = len(_build_cmd_script(len(batch), cmd, marker)) + (1 if batch else 0)
+        if batch and (len(batch) >= batch_size or length + cmd_length > batch_bytes):
+            batches.append(batch)
+            batch = []
+            cmd_length = len(_build_cmd_script(0, cmd, marker))
+            length = 0
+        batch.append(cmd)
+        length = length + cmd_length
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+def _split_output(output, marker, count):
+    """Get output of each command from the output of the script, None for commands having no end delimiter."""
+    outputs = [None] * count
+    rcs = [None] * count
+    pattern = re.compile(r"^{0}:(\d+):begin\n(.*?)\n{0}:\1:end(?::(-?\d+))?\n".format(re.escape(marker)),
+                         re.DOTALL | re.MULTILINE)
+    for match in pattern.finditer(output):
+        index = int(match.group(1))
+        if index < count:
+            outputs[index] = match.group(2)
+            rcs[index] = int(match.group(3)) if match.group(3) is not None else None
+    return outputs, rcs
+
+
+def parse_batch_output(cmds, marker, stdout, stderr):
+    """
+    Split output of the script into the results of the commands.
+
+    Args:
+        cmds (list): Commands of the script.
+        marker (str): Token of the delimiters used to build the script.
+        stdout (str): Standard output of the script.
+        stderr (str): Standard error of the script.
+
+    Returns:
+        list: A result for each command, with keys 'cmd', 'rc', 'stdout', 'stderr', 'stdout_lines', 'stderr_lines',
+            'msg', 'changed' and 'failed' like the ansible shell module. A command not run to the end, like when the
+            script is killed, has rc -1.
+    """
+    if not stdout.endswith("\n"):
+        stdout += "\n"
+    if not stderr.endswith("\n"):
+        stderr += "\n"
+    outputs, rcs = _split_output(stdout, marker, len(cmds))
+    errors, _ = _split_output(stderr, marker, len(cmds))
+
+    results = []
+    for index, cmd in enumerate(cmds):
+        rc = rcs[index]
+        out = (outputs[index] or "").rstrip("\r\n")
+        err = (errors[index] or "").rstrip("\r\n")
+        if rc is None:
+            rc = -1
+            msg = "command did not finish"
+        else:
+            msg = "non-zero return code" if rc != 0 else ""
+        results.append({
+            "cmd": cmd,
+            "rc": rc,
+            "stdout": out,
+            "stderr": err,
+            "stdout_lines": out.splitlines(),
+            "stderr_lines": err.splitlines(),
+            "msg": msg,
+            "changed": True,
+            "failed": rc != 0,
+        })
+    return results
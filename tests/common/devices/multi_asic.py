@@ -162,10 +162,21 @@ class MultiAsicSonicHost(object):
                 return getattr(self.asic_instance(asic_index), multi_asic_attr)(*module_args, **asic_complex_args)
             elif type(asic_index) == str and asic_index.lower() == "all":
                 # All ASICs/namespace
+                if multi_asic_attr == "run_batch":
+                    return self._run_batch_on_asics(self.asics, *module_args, **asic_complex_args)
                 return [getattr(asic, multi_asic_attr)(*module_args, **asic_complex_args) for asic in self.asics]
             else:
                 raise ValueError("Argument 'asic_index' must be an int or string 'all'.")
 
+    def _run_batch_on_asics(self, asics, cmds, **kwargs):
+        """Run the shell commands on each of the asics with one SonicHost.run_batch for all of them.
+
+        Returns:
+            list: For each asic, the list of the results of the commands, like run_batch on each asic.
+        """
+        results = self.sonichost.run_batch([asic.get_batch_cmd(cmd) for asic in asics for cmd in cmds], **kwargs)
+        return [results[i:i + len(cmds)] for i in range(0, len(results), len(cmds))] if cmds else [[] for _ in asics]
+
     def get_dut_iface_mac(self, iface_name):
         """
         Gets the MAC address of specified interface.
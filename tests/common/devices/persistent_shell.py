@@ -0,0 +1,200 @@
+"""
+Run shell commands on a host over one persistent SSH connection.
+
+Running the ansible shell/command module costs module packaging, a python interpreter start on the host and, without
+ControlPersist, an SSH handshake for every command. PersistentShell keeps one authenticated SSH transport per host and
+opens a new channel on it for each command, so a command costs one round trip. Channels of a transport are
+independent, commands can be run from several threads at the same time.
+
+The result has the same keys as the result of the ansible shell module.
+"""
+import logging
+import select
+import shlex
+import socket
+import threading
+import time
+
+from datetime import datetime
+
+import paramiko
+from paramiko.ssh_exception import AuthenticationException, SSHException
+
+logger = logging.getLogger(__name__)
+
+# Arguments of the shell/command module, other than the command, that PersistentShell can handle
+SUPPORTED_ARGS = frozenset(["module_ignore_errors", "verbose"])
+
+
+class PersistentShellError(Exception):
+    """
+    The command could not be run over the persistent connection, it should be run by the ansible module instead.
+    """
+
+
+class PersistentShellUnsupported(PersistentShellError):
+    """
+    The persistent connection can't be used for the host, like when sudo requires a password.
+    """
+
+
+class PersistentShell(object):
+    """
+    One persistent SSH connection to a host for running shell commands.
+
+    Args:
+        address (str): IP address or name to connect to.
+        username (str): SSH user.
+        passwords (list): Passwords to try in turn, the first one that works is used for reconnecting.
+        port (int): SSH port.
+        become (bool): Run the commands as root with 'sudo -n', like 'become' of ansible.
+        connect_timeout (int): Timeout in seconds of connecting and authenticating.
+    """
+
+    def __init__(self, address, username, passwords, port=22, become=True, connect_timeout=30):
+        self.address = address
+        self.username = username
+        self.passwords = [password for password in passwords if password]
+        self.port = port
+        self.become = become
+        self.connect_timeout = connect_timeout
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        last_error = None
+        for password in self.passwords:
+            client = paramiko.SSHClient()
+            client.set_missing_host_key_policy(paramiko.AutoAddPolicy())
+            try:
+                client.connect(self.address, port=self.port, username=self.username, password=password,
+                               timeout=self.connect_timeout, banner_timeout=self.connect_timeout,
+                               auth_timeout=self.connect_timeout, allow_agent=False, look_for_keys=False)
+            except AuthenticationException as e:
+                last_error = e
+                client.close()
+                continue
+            except (SSHException, OSError) as e:
+                client.close()
+                raise PersistentShellError("Failed to connect to {}: {}".format(self.address, repr(e)))
+            transport = client.get_transport()
+            transport.set_keepalive(30)
+            # Commands are small request/response exchanges, don't let Nagle delay them
+            transport.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            # Password working now is tried first on reconnecting
+            self.passwords.remove(password)
+            self.passwords.insert(0, password)
+            return client
+        raise PersistentShellUnsupported("Failed to authenticate to {} as {}: {}".format(
+            self.address, self.username, repr(last_error)))
+
+    def _open_channel(self):
+        with self._lock:
+            transport = self._client.get_transport() if self._client else None
+            if transport is None or not transport.is_active():
+                if self._client:
+                    self._client.close()
+                self._client = None
+                self._client = self._connect()
+                transport = self._client.get_transport()
+            try:
+                return transport.open_session(timeout=self.connect_timeout)
+            except SSHException as e:
+                # Transport is gone, reconnect on next command
+                self._client.close()
+                self._client = None
+                raise PersistentShellError("Failed to open channel to {}: {}".format(self.address, repr(e)))
+
+    @staticmethod
+    def _read_channel(channel, timeout):
+        stdout, stderr = [], []
+        deadline = time.monotonic() + timeout if timeout else None
+        while True:
+            while channel.recv_ready():
+                stdout.append(channel.recv(65536))
+            while channel.recv_stderr_ready():
+                stderr.append(channel.recv_stderr(65536))
+            if channel.exit_status_ready() and not channel.recv_ready() and not channel.recv_stderr_ready():
+                break
+            if deadline and time.monotonic() > deadline:
+                channel.close()
+                raise PersistentShellError("Command did not finish in {} seconds".format(timeout))
+            # The channel is readable on data, end of data and channel close
+            select.select([channel], [], [], 0.1)
+        return channel.recv_exit_status(), b"".join(stdout), b"".join(stderr)
+
+    def wrap_command(self, cmd, shell=True):
+        """
+        Get the command line run on the host, it is run by /bin/sh like the ansible shell module. Arguments of a
+        command module command are split and quoted, so the shell doesn't expand them like the command module.
+        """
+        if not shell:
+            cmd = " ".join(shlex.quote(arg) for arg in shlex.split(cmd))
+        if self.become:
+            return "sudo -n -- /bin/sh -c {}".format(shlex.quote(cmd))
+        return "/bin/sh -c {}".format(shlex.quote(cmd))
+
+    def run(self, cmd, shell=True, timeout=None):
+        """
+        Run a command and wait for it to finish.
+
+        Args:
+            cmd (str): The command.
+            shell (bool): True to run it like the shell module, False like the command module.
+            timeout (int): Seconds to wait for the command, None to wait until it finishes.
+
+        Raises:
+            PersistentShellError: The command was not run, it should be run by the ansible module. Errors after the
+                command is started are returned as a failed result with rc -1 and 'msg'.
+
+        Returns:
+            dict: A result like the result of the ansible shell module, with keys 'cmd', 'rc', 'stdout', 'stderr',
+                'stdout_lines', 'stderr_lines', 'start', 'end', 'delta', 'msg', 'changed' and 'failed'.
+        """
+        channel = self._open_channel()
+        start = datetime.now()
+        try:
+            channel.exec_command(self.wrap_command(cmd, shell))
+        except SSHException as e:
+            channel.close()
+            raise PersistentShellError("Failed to run command on {}: {}".format(self.address, repr(e)))
+
+        # The command is started, it must not be run again by the caller on errors from now on
+        msg = ""
+        try:
+            channel.shutdown_write()
+            rc, stdout, stderr = self._read_channel(channel, timeout)
+        except (SSHException, OSError, EOFError, PersistentShellError) as e:
+            rc, stdout, stderr = -1, b"", b""
+            msg = "Failed to get result of command: {}".format(repr(e))
+        finally:
+            channel.close()
+        end = datetime.now()
+
+        stdout = stdout.decode("utf-8", errors="replace").rstrip("\r\n")
+        stderr = stderr.decode("utf-8", errors="replace").rstrip("\r\n")
+        if self.become and rc == 1 and stderr.startswith("sudo:") and "password is required" in stderr:
+            raise PersistentShellUnsupported("sudo on {} requires a password".format(self.address))
+        if rc != 0 and not msg:
+            msg = "non-zero return code"
+
+        return {
+            "cmd": cmd,
+            "rc": rc,
+            "stdout": stdout,
+            "stderr": stderr,
+            "stdout_lines": stdout.splitlines(),
+            "stderr_lines": stderr.splitlines(),
+            "start": str(start),
+            "end": str(end),
+            "delta": str(end - start),
+            "msg": msg,
+            "changed": True,
+            "failed": rc != 0,
+        }
+
+    def close(self):
+        with self._lock:
+            if self._client:
+                self._client.close()
+            self._client = None
@@ -0,0 +1,236 @@
+"""
+Parse tabulate style output of show commands.
+
+A table is the header lines, a separation line with '-' under each column header, and the content lines up to the first
+empty line. Positions of the columns are computed from the separation line once, then the values of a content line are
+taken by slicing the line at those positions, like 'show interface status':
+
+          Interface            Lanes    Speed    MTU    FEC    Alias             Vlan    Oper    Admin
+    ---------------  ---------------  -------  -----  -----  -------  ---------------  ------  -------
+          Ethernet0          0,1,2,3      40G   9100    N/A     etp1  PortChannel0002      up       up
+
+Rows of a ShowTable are built lazily when iterated, or all at once into lists of dicts or columns. Values are strings as
+in the output, columns of counters can be converted to int.
+
+Some commands print the same table as JSON of {<first column>: {<header>: <value>, ...}, ...} with option '-j', that
+output is parsed into the same ShowTable without slicing text.
+"""
+import json
+import logging
+import re
+from operator import itemgetter
+
+logger = logging.getLogger(__name__)
+
+SEP_LINE_PATTERN = re.compile(r"^ *-[ -]*$")
+INT_PATTERN = re.compile(r"^-?(?:\d{1,3}(?:,\d{3})+|\d+)$")
+# Values of a column joined by newlines, all of them are counters or 'N/A'
+INT_COLUMN_PATTERN = re.compile(r"(?:-?(?:\d{1,3}(?:,\d{3})+|\d+)|N/A)(?:\n(?:-?(?:\d{1,3}(?:,\d{3})+|\d+)|N/A))*\Z")
+
+# Value of a counter not supported by the platform, it is None in an int column
+NOT_AVAILABLE = "N/A"
+
+# (show command pattern, replacement of the matched command printing JSON, header of the column of the JSON keys)
+JSON_SHOW_COMMANDS = [
+    (re.compile(r"^(portstat|intfstat)((?:\s+-[ins]\s+\S+|\s+-a)*)\s*$"), r"\1\2 -j", "iface"),
+    (re.compile(r"^show\s+int(?:erfaces?)?\s+counters\s*$"), "portstat -j", "iface"),
+    (re.compile(r"^show\s+int(?:erfaces?)?\s+counters\s+rif\s*$"), "intfstat -j", "iface"),
+]
+
+
+def parse_column_positions(sep_line, sep_char='-'):
+    """Parse the position of each columns in the command output
+
+    Args:
+        sep_line: The output line separating actual data and column headers
+        sep_char: The character used in separation line. Defaults to '-'.
+
+    Returns:
+        Returns a list. Each item is a tuple with two elements. The first element is start position of a column.
+        The second element is the end position of the column.
+    """
+    return [match.span() for match in re.finditer("{}+".format(re.escape(sep_char)), sep_line)]
+
+
+def to_int(value):
+    """Convert a counter like '1,234' to int, None for 'N/A'. Raises ValueError for other values."""
+    if value == NOT_AVAILABLE:
+        return None
+    if not INT_PATTERN.match(value):
+        raise ValueError("Not a counter: {!r}".format(value))
+    return int(value.replace(",", ""))
+
+
+def _typed_column(column):
+    """Convert a column to int if all of its values are counters or 'N/A', and at least one is a counter."""
+    if not column:
+        return column
+    joined = "\n".join(column)
+    if not INT_COLUMN_PATTERN.match(joined):
+        return column
+    if NOT_AVAILABLE not in column:
+        return list(map(int, joined.replace(",", "").split("\n")))
+    if all(value == NOT_AVAILABLE for value in column):
+        return column
+    return [to_int(value) for value in column]
+
+
+class ShowTable(object):
+    """
+    A table parsed from show command output.
+
+    Attributes:
+        headers (list): Column headers in lowercase.
+    """
+    def __init__(self, headers, records, positions=None):
+        """
+        Args:
+            headers (list): Column headers.
+            records (list): Content lines if positions is given, otherwise tuples of values of each row.
+            positions (list): (start, end) of each column in the content lines.
+        """
+        self.headers = headers
+        self._records = records
+        self._positions = positions
+
+    @classmethod
+    def from_lines(cls, output_lines, header_len=1):
+        """
+        Parse a table from the lines of output.
+
+        Args:
+            output_lines (list): Lines of the output.
+            header_len (int): Number of header lines above the separation line.
+
+        Returns:
+            ShowTable: The table, it has no columns if no separation line is found.
+        """
+        for idx, line in enumerate(output_lines):
+            if SEP_LINE_PATTERN.match(line):
+                break
+        else:
+            logger.error('Failed to find separation line in the show command output')
+            return cls([], [])
+
+        header_lines = output_lines[idx - header_len:idx]
+        positions = parse_column_positions(output_lines[idx])
+        headers = [" ".join([header_line[left:right].strip().lower() for header_line in header_lines]).strip()
+                   for left, right in positions]
+
+        # When an empty line is encountered while parsing the tabulate content, it is highly possible that the
+        # tabulate content has been drained. The empty line and rest of the lines should not be parsed.
+        content_lines = output_lines[idx + 1:]
+        try:
+            content_lines = content_lines[:content_lines.index("")]
+        except ValueError:
+            pass
+        return cls(headers, content_lines, positions)
+
+    @classmethod
+    def from_json(cls, output, key_column):
+        """
+        Parse a table from JSON output of {<key>: {<header>: <value>, ...}, ...}.
+
+        Args:
+            output (str): The output, lines before the JSON object like 'Last cached time was ...' are skipped.
+            key_column (str): Header of the column of the keys.
+
+        Raises:
+            ValueError: The output is not a JSON object of objects.
+
+        Returns:
+            ShowTable: The table.
+        """
+        start = output.find("{")
+        if start < 0:
+            raise ValueError("No JSON object in the output")
+        data = json.loads(output[start:])
+        if not isinstance(data, dict) or not all(isinstance(row, dict) for row in data.values()):
+            raise ValueError("JSON output is not an object of objects")
+
+        headers = [key_column]
+        for row in data.values():
+            for header in row:
+                if header.lower() not in headers:
+                    headers.append(header.lower())
+        records = []
+        for key, row in data.items():
+            row = {header.lower(): value for header, value in row.items()}
+            records.append(tuple([key] + ["" if row.get(header) is None else str(row.get(header))
+                                          for header in headers[1:]]))
+        return cls(headers, records)
+
+    def __len__(self):
+        return len(self._records)
+
+    def values(self):
+        """Iterate the tuples of values of the rows lazily, in the order of headers."""
+        if self._positions is None:
+            return iter(self._records)
+        getter = itemgetter(*[slice(left, right) for left, right in self._positions])
+        if len(self._positions) == 1:
+            return ((getter(line).strip(),) for line in self._records)
+        return (tuple([value.strip() for value in getter(line)]) for line in self._records)
+
+    def __iter__(self):
+        headers = self.headers
+        for values in self.values():
+            yield dict(zip(headers, values))
+
+    def _columns(self):
+        if self._positions is None:
+            if not self._records:
+                return [[] for _ in self.headers]
+            return [list(column) for column in zip(*self._records)]
+        # Slicing one column of all lines at a time is faster than slicing all columns of one line at a time
+        lines = self._records
+        return [[line[left:right].strip() for line in lines] for left, right in self._positions]
+
+    def rows(self):
+        """Get all rows as a list of dicts keyed by headers, like SonicHost.show_and_parse()."""
+        headers = self.headers
+        return [dict(zip(headers, values)) for values in zip(*self._columns())]
+
+    def columns(self, typed=False):
+        """
+        Get the table as columns.
+
+        Args:
+            typed (bool): Convert a column to int, like counters with ',' separating thousands, if all of its values
+                are counters or 'N/A'. 'N/A' is None in an int column.
+
+        Returns:
+            dict: Header => list of values of the column.
+        """
+        columns = self._columns()
+        if typed:
+            columns = [_typed_column(column) for column in columns]
+        return dict(zip(self.headers, columns))
+
+    def column(self, header, typed=False):
+        """Get the values of a column, see columns() for 'typed'."""
+        index = self.headers.index(header)
+        if self._positions is None:
+            column = [values[index] for values in self._records]
+        else:
+            left, right = self._positions[index]
+            column = [line[left:right].strip() for line in self._records]
+        return _typed_column(column) if typed else column
+
+
+def parse_show(output_lines, header_len=1):
+    """Parse lines of tabulate output into a list of dicts keyed by lowercase headers, one dict for each row."""
+    return ShowTable.from_lines(output_lines, header_len).rows()
+
+
+def json_show_command(show_cmd):
+    """
+    Get the command printing the table of show_cmd as JSON.
+
+    Returns:
+        tuple: (JSON command, header of the key column), or (None, None) if show_cmd has no known JSON output.
+    """
+    for pattern, replacement, key_column in JSON_SHOW_COMMANDS:
+        if pattern.match(show_cmd):
+            return pattern.sub(replacement, show_cmd), key_column
+    return None, None
@@ -11,9 +11,17 @@ from collections import defaultdict
 from datetime import datetime, timedelta
 
 from ansible import constants as ansible_constants
+from ansible.parsing.dataloader import DataLoader
 from ansible.plugins.loader import connection_loader
+from ansible.template import Templar
+from pytest_ansible.results import ModuleResult
 
 from tests.common.devices.base import AnsibleHostBase
+from tests.common.devices.command_batch import (DEFAULT_BATCH_BYTES, DEFAULT_BATCH_SIZE, build_batch_script, new_marker,
+                                                parse_batch_output, split_batches)
+from tests.common.devices.show_parser import ShowTable, json_show_command, parse_column_positions, parse_show
+from tests.common.devices.persistent_shell import PersistentShell, PersistentShellError, PersistentShellUnsupported, \
+    SUPPORTED_ARGS
 from tests.common.devices.constants import ACL_COUNTERS_UPDATE_INTERVAL_IN_SEC
 from tests.common.helpers.dut_utils import is_supervisor_node, is_macsec_capable_node
 from tests.common.utilities import get_host_visible_vars
@@ -53,6 +61,12 @@ class SonicHost(AnsibleHostBase):
     """
     DEFAULT_ASIC_SERVICES = ["bgp", "database", "lldp", "swss", "syncd", "teamd"]
 
+    # Class-level flag for running plain shell/command module commands over a persistent SSH connection.
+    # Set by the persistent_shell_enabled fixture in conftest.py
+    _persistent_shell_mode = False
+    _persistent_shell = None
+    _persistent_shell_failed = False
+
     """
     setting either one of shell_user/shell_pw or ssh_user/ssh_passwd pair should yield the same result.
     """
@@ -62,6 +76,8 @@ class SonicHost(AnsibleHostBase):
         AnsibleHostBase.__init__(self, ansible_adhoc, hostname)
 
         self.DEFAULT_ASIC_SERVICES = ["bgp", "database", "lldp", "swss", "syncd", "teamd"]
+        # JSON commands of show_table() failed on this host, their text output is parsed instead
+        self._show_json_unsupported = set()
 
         if shell_user and shell_passwd:
             im = self.host.options['inventory_manager']
@@ -125,6 +141,122 @@ class SonicHost(AnsibleHostBase):
         if gbsyncd_enabled and self.facts["asic_type"] != "vs":
             self.DEFAULT_ASIC_SERVICES.append("gbsyncd")
 
+    @classmethod
+    def set_persistent_shell(cls, enabled: bool):
+        """Enable running plain shell/command module commands over a persistent SSH connection.
+
+        Called by the persistent_shell_enabled fixture in conftest.py.
+        """
+        cls._persistent_shell_mode = enabled
+        if enabled:
+            logger.info("Persistent shell mode enabled")
+
+    def _get_persistent_shell(self):
+        """Get the PersistentShell of this host, None if it can't be used."""
+        if self._persistent_shell is None and not self._persistent_shell_failed:
+            try:
+                im = self.host.options['inventory_manager']
+                vm = self.host.options['variable_manager']
+                hostvars = vm.get_vars(host=im.get_host(self.hostname))
+                templar = Templar(loader=DataLoader(), variables=hostvars)
+
+                def _var(*names):
+                    for name in names:
+                        if hostvars.get(name):
+                            return templar.template(hostvars[name])
+                    return None
+
+                passwords = [_var('ansible_ssh_pass', 'ansible_password'), _var('ansible_altpassword')]
+                passwords.extend(_var('ansible_altpasswords') or [])
+                self._persistent_shell = PersistentShell(
+                    self.mgmt_ip, _var('ansible_ssh_user', 'ansible_user'), passwords,
+                    port=int(_var('ansible_ssh_port', 'ansible_port') or 22))
+            except Exception as e:
+                logger.warning("Persistent shell is not used for {}: {}".format(self.hostname, repr(e)))
+                self._persistent_shell_failed = True
+        return self._persistent_shell
+
+    def _run_shell_module(self, module_name, module_args, complex_args):
+        """Run a shell/command module command over the persistent SSH connection if enabled, else by ansible.
+
+        Only a plain command with no module arguments other than 'module_ignore_errors' and 'verbose' is run over
+        the persistent SSH connection. The others, and commands of a host that the connection can't be used for, are
+        run by the ansible module.
+        """
+        if self._persistent_shell_mode and len(module_args) == 1 and isinstance(module_args[0], str) \
+                and set(complex_args) <= SUPPORTED_ARGS:
+            persistent_shell = self._get_persistent_shell()
+            if persistent_shell:
+                try:
+                    start = time.time()
+                    res = ModuleResult(persistent_shell.run(module_args[0], shell=(module_name == "shell")))
+                except PersistentShellError as e:
+                    # Connection is tried again by next command, unless it can't be used for this host
+                    logger.warning("Fall back to ansible module, persistent shell failed on {}: {}".format(
+                        self.hostname, repr(e)))
+                    persistent_shell.close()
+                    if isinstance(e, PersistentShellUnsupported):
+                        self._persistent_shell_failed = True
+                        self._persistent_shell = None
+                else:
+                    logger.debug("[{}] PersistentShell::{} {} => rc={}, {:.3f} seconds".format(
+                        self.hostname, module_name, module_args[0], res['rc'], time.time() - start))
+                    if res.is_failed and not complex_args.get('module_ignore_errors', False):
+                        raise RunAnsibleModuleFail("run module {} failed".format(module_name), res)
+                    return res
+        return self._run(module_name, *module_args, **complex_args)
+
+    def shell(self, *module_args, **complex_args):
+        return self._run_shell_module("shell", module_args, complex_args)
+
+    def command(self, *module_args, **complex_args):
+        return self._run_shell_module("command", module_args, complex_args)
+
+    def run_batch(self, cmds, module_ignore_errors=False, batch_size=DEFAULT_BATCH_SIZE,
+                  batch_bytes=DEFAULT_BATCH_BYTES):
+        """Run shell commands with one remote execution for each batch of commands.
+
+        The commands are run one after another by one /bin/sh script, like the shell module runs each of them, so a
+        loop running a command for each of hundreds of ports costs one or a few round trips instead of one for each
+        port. A failed command doesn't stop the commands after it.
+
+        Args:
+            cmds (list): Shell commands.
+            module_ignore_errors (bool): Don't raise on failed commands.
+            batch_size (int): Max number of commands run by one script.
+            batch_bytes (int): Max length of one script, which is one argument of /bin/sh on the host.
+
+        Raises:
+            RunAnsibleModuleFail: A command failed and module_ignore_errors is False, the first failed result is in
+                the exception.
+
+        Returns:
+            list: A ModuleResult for each command, in the order of cmds, with keys 'cmd', 'rc', 'stdout', 'stderr',
+                'stdout_lines', 'stderr_lines', 'msg', 'changed' and 'failed'.
+        """
+        results = []
+        for batch in split_batches(cmds, batch_size, batch_bytes):
+            marker = new_marker()
+            start = time.time()
+            res = self.shell(build_batch_script(batch, marker), module_ignore_errors=True, verbose=False)
+            batch_results = [ModuleResult(result) for result in
+                             parse_batch_output(batch, marker, res.get("stdout", ""), res.get("stderr", ""))]
+            if res.get("rc", 0) != 0 and batch_results and batch_results[-1]["rc"] == -1:
+                # The script itself failed, like on timeout or lost connection
+                for result in batch_results:
+                    if result["rc"] == -1:
+                        result["msg"] = res.get("msg") or result["msg"]
+            logger.debug("[{}] run_batch {} commands => {} failed, {:.3f} seconds".format(
+                self.hostname, len(batch), sum(1 for result in batch_results if result["failed"]),
+                time.time() - start))
+            results.extend(batch_results)
+
+        if not module_ignore_errors:
+            for result in results:
+                if result["failed"]:
+                    raise RunAnsibleModuleFail("run batch command '{}' failed".format(result["cmd"]), result)
+        return results
+
     def __str__(self):
         return '<SonicHost {}>'.format(self.hostname)
 
@@ -1548,61 +1680,10 @@ Totals               6450                 6449
             Returns a list. Each item is a tuple with two elements. The first element is start position of a column.
             The second element is the end position of the column.
         """
-        prev = ' ',
-        positions = []
-        for pos, char in enumerate(sep_line + ' '):
-            if char == sep_char:
-                if char != prev:
-                    left = pos
-            else:
-                if char != prev:
-                    right = pos
-                    positions.append((left, right))
-            prev = char
-        return positions
+        return parse_column_positions(sep_line, sep_char)
 
     def _parse_show(self, output_lines, header_len=1):
-
-        result = []
-
-        sep_line_pattern = re.compile(r"^( *-+ *)+$")
-        sep_line_found = False
-        for idx, line in enumerate(output_lines):
-            if sep_line_pattern.match(line):
-                sep_line_found = True
-                header_lines = output_lines[idx - header_len:idx]
-                sep_line = output_lines[idx]
-                content_lines = output_lines[idx + 1:]
-                break
-
-        if not sep_line_found:
-            logging.error('Failed to find separation line in the show command output')
-            return result
-
-        try:
-            positions = self._parse_column_positions(sep_line)
-        except Exception as e:
-            logging.error('Possibly bad command output, exception: {}'.format(repr(e)))
-            return result
-
-        headers = []
-        for (left, right) in positions:
-            header = " ".join([header_line[left:right].strip().lower() for header_line in header_lines]).strip()
-            headers.append(header)
-
-        for content_line in content_lines:
-            # When an empty line is encountered while parsing the tabulate content, it is highly possible that the
-            # tabulate content has been drained. The empty line and rest of the lines should not be parsed.
-            if len(content_line) == 0:
-                break
-            item = {}
-            for idx, (left, right) in enumerate(positions):
-                k = headers[idx]
-                v = content_line[left:right].strip()
-                item[k] = v
-            result.append(item)
-
-        return result
+        return parse_show(output_lines, header_len)
 
     def show_and_parse(self, show_cmd, header_len=1, **kwargs):
         """Run a show command and parse the output using a generic pattern.
@@ -1683,6 +1764,41 @@ Totals               6450                 6449
             output = output[start_line_index:end_line_index]
         return self._parse_show(output, header_len)
 
+    def show_table(self, show_cmd, header_len=1, prefer_json=True, **kwargs):
+        """Run a show command and parse the output into a ShowTable.
+
+        Same table as show_and_parse(), but rows are built lazily when the table is iterated, or all at once by
+        rows() and columns() of the table, and columns of counters can be converted to int by columns(typed=True).
+        For commands having JSON output of the same table, like 'show interfaces counters' by 'portstat -j', the JSON
+        output is parsed instead of the text. A JSON command failed on the host is not tried again, the text output is
+        parsed instead.
+
+        Args:
+            show_cmd: The show command that will be executed.
+            header_len: Number of header lines above the separation line.
+            prefer_json: Run the JSON command for commands having one.
+
+        Returns:
+            ShowTable: The parsed table.
+        """
+        json_cmd, key_column = json_show_command(show_cmd) if prefer_json else (None, None)
+        if json_cmd and json_cmd not in self._show_json_unsupported:
+            json_kwargs = dict(kwargs, module_ignore_errors=True)
+            json_kwargs.pop("start_line_index", None)
+            json_kwargs.pop("end_line_index", None)
+            res = self.shell(json_cmd, **json_kwargs)
+            if res.get("rc", 1) == 0:
+                try:
+                    return ShowTable.from_json(res["stdout"], key_column)
+                except ValueError as e:
+                    logger.warning("Failed to parse JSON output of '{}': {}".format(json_cmd, repr(e)))
+            self._show_json_unsupported.add(json_cmd)
+
+        start_line_index = kwargs.pop("start_line_index", 0)
+        end_line_index = kwargs.pop("end_line_index", None)
+        output = self.shell(show_cmd, **kwargs)["stdout_lines"]
+        return ShowTable.from_lines(output[start_line_index:end_line_index], header_len)
+
     @cached(name='mg_facts')
     def get_extended_minigraph_facts(self, tbinfo, namespace=DEFAULT_NAMESPACE):
         mg_facts = self.minigraph_facts(host=self.hostname, namespace=namespace)['ansible_facts']
@@ -2649,6 +2765,22 @@ Totals               6450                 6449
         else:
             return None
 
+    def get_ports_fec(self, portnames):
+        """Get FEC mode of the ports with one remote execution, like get_port_fec for each port.
+
+        Raises:
+            Exception: Getting FEC mode of a port failed, with the stderr of the command, like get_port_fec.
+
+        Returns:
+            dict: Port name to FEC mode, None for ports having no FEC configured.
+        """
+        results = self.run_batch(['redis-cli -n 4 HGET "PORT|{}" "fec"'.format(portname) for portname in portnames],
+                                 module_ignore_errors=True)
+        for out in results:
+            assert_exit_non_zero(out)
+        return {portname: out["stdout_lines"][0] if out["stdout_lines"] and out["stdout_lines"][0] != "(nil)"
+                else None for portname, out in zip(portnames, results)}
+
     def set_port_fec(self, portname, state):
         if not state:
             state = 'none'
@@ -2,6 +2,7 @@ import json
 import logging
 import socket
 import re
+import shlex
 
 from tests.common.cache import cached
 from tests.common.helpers.assertions import pytest_assert
@@ -598,6 +599,16 @@ class SonicAsic(object):
     def shell(self, *module_args, **complex_args):
         return self.sonichost.shell(*module_args, **complex_args)
 
+    def get_batch_cmd(self, cmd):
+        """Get the command running a shell command of run_batch in the namespace of this ASIC."""
+        if not self.ns_arg:
+            return cmd
+        return "{}/bin/sh -c {}".format(self.ns_arg, shlex.quote(cmd))
+
+    def run_batch(self, cmds, **kwargs):
+        """Run shell commands in the namespace of this ASIC by SonicHost.run_batch."""
+        return self.sonichost.run_batch([self.get_batch_cmd(cmd) for cmd in cmds], **kwargs)
+
     def port_on_asic(self, portname):
         cmd = 'sudo sonic-cfggen {} -v "PORT.keys()" -d'.format(self.cli_ns_option)
         ports = self.shell(cmd)["stdout_lines"][0]
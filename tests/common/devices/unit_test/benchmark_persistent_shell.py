@@ -0,0 +1,136 @@
+"""Microbenchmark of PersistentShell against a local SSH server standing in for a DUT.
+
+Runs the same command a number of times with:
+    persistent: PersistentShell, one SSH connection and a channel per command
+    reconnect: a new SSH connection per command, the cost of SSH setup without ControlPersist
+    ansible: the ansible shell module run in-process like pytest-ansible does, over OpenSSH with ControlPersist and
+             pipelining like ansible.cfg of sonic-mgmt
+
+and prints the commands/sec of each.
+
+Run it from the root of sonic-mgmt repo:
+    python -m tests.common.devices.unit_test.benchmark_persistent_shell --count 200
+"""
+import argparse
+import contextlib
+import logging
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+import paramiko
+
+from tests.common.devices.persistent_shell import PersistentShell
+from tests.common.devices.unit_test.sshd_stand_in import StandInSshd
+
+USERNAME = "admin"
+PASSWORD = "password"
+
+
+def run_persistent(sshd, cmd, count):
+    shell = PersistentShell("127.0.0.1", USERNAME, [PASSWORD], port=sshd.port, become=False)
+    try:
+        for _ in range(count):
+            shell.run(cmd)
+    finally:
+        shell.close()
+
+
+def run_reconnect(sshd, cmd, count):
+    for _ in range(count):
+        shell = PersistentShell("127.0.0.1", USERNAME, [PASSWORD], port=sshd.port, become=False)
+        try:
+            shell.run(cmd)
+        finally:
+            shell.close()
+
+
+def run_ansible(sshd, cmd, count):
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        key_file = os.path.join(tmp_dir, "id_rsa")
+        sshd.client_key.write_private_key_file(key_file)
+        _run_ansible(sshd.port, cmd, count, key_file, tmp_dir)
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+def _run_ansible(port, cmd, count, key_file, tmp_dir):
+    from ansible import context
+    from ansible.executor.task_queue_manager import TaskQueueManager
+    from ansible.inventory.manager import InventoryManager
+    from ansible.module_utils.common.collections import ImmutableDict
+    from ansible.parsing.dataloader import DataLoader
+    from ansible.playbook.play import Play
+    from ansible.plugins.loader import init_plugin_loader
+    from ansible.vars.manager import VariableManager
+
+    init_plugin_loader([])
+    context.CLIARGS = ImmutableDict(connection="ssh", forks=1, check=False, diff=False, verbosity=0)
+    loader = DataLoader()
+    inventory = InventoryManager(loader=loader, sources="127.0.0.1,")
+    host = inventory.get_host("127.0.0.1")
+    # Same ssh_args and pipelining as ansible.cfg of sonic-mgmt, the connection is kept by ControlPersist and the
+    # module is piped to python instead of copied to the host
+    host.set_variable("ansible_connection", "ssh")
+    host.set_variable("ansible_port", port)
+    host.set_variable("ansible_user", USERNAME)
+    host.set_variable("ansible_ssh_private_key_file", key_file)
+    host.set_variable("ansible_ssh_common_args", "-o ControlMaster=auto -o ControlPersist=7200s "
+                      "-o ControlPath={}/%C -o UserKnownHostsFile=/dev/null "
+                      "-o StrictHostKeyChecking=no".format(tmp_dir))
+    host.set_variable("ansible_pipelining", True)
+    host.set_variable("ansible_python_interpreter", sys.executable)
+    # The stand-in runs commands as the local user, home of the SSH user may not exist
+    host.set_variable("ansible_remote_tmp", tmp_dir)
+    variable_manager = VariableManager(loader=loader, inventory=inventory)
+    play = Play().load({"hosts": "127.0.0.1", "gather_facts": "no",
+                        "tasks": [{"shell": cmd}]}, variable_manager=variable_manager, loader=loader)
+    ok = 0
+    try:
+        for _ in range(count):
+            tqm = TaskQueueManager(inventory=inventory, variable_manager=variable_manager, loader=loader,
+                                   passwords={})
+            try:
+                with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+                    tqm.run(play)
+                ok += tqm._stats.summarize("127.0.0.1")["ok"]
+            finally:
+                tqm.cleanup()
+    finally:
+        subprocess.call(["ssh", "-o", "ControlPath={}/%C".format(tmp_dir), "-p", str(port), "-O", "exit",
+                         "{}@127.0.0.1".format(USERNAME)], stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    if ok != count:
+        raise RuntimeError("{} of {} ansible runs failed".format(count - ok, count))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200, help="number of commands of each mode")
+    parser.add_argument("--ansible_count", type=int, default=20, help="number of commands of ansible mode")
+    parser.add_argument("--cmd", default="echo '{\"Ethernet0\": {\"oper\": \"up\"}}'", help="command to run")
+    parser.add_argument("--skip_ansible", action="store_true", help="don't run ansible mode")
+    args = parser.parse_args()
+
+    modes = [("persistent", run_persistent, args.count), ("reconnect", run_reconnect, args.count)]
+    if not args.skip_ansible:
+        modes.append(("ansible", run_ansible, args.ansible_count))
+
+    # Connection reset of every closed connection is logged by the server side
+    logging.getLogger("paramiko").setLevel(logging.CRITICAL)
+    client_key = paramiko.RSAKey.generate(2048)
+    with StandInSshd(USERNAME, PASSWORD, authorized_key=client_key) as sshd:
+        sshd.client_key = client_key
+        for name, func, count in modes:
+            start = time.time()
+            func(sshd, args.cmd, count)
+            elapsed = time.time() - start
+            print("{:<12} {:>6} commands {:>8.3f}s {:>10.1f} commands/sec {:>9.2f} ms/command".format(
+                name, count, elapsed, count / elapsed, elapsed * 1000 / count))
+
+
+if __name__ == "__main__":
+    main()
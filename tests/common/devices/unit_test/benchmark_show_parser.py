@@ -0,0 +1,92 @@
+"""Microbenchmark of parsing large show command output.
+
+Parses outputs generated in the layout of the output of these commands on a 512 port DUT, random counters included:
+    interface_counters: 'show interfaces counters', one row for each port
+    queue_counters: 'show queue counters', one row for each of 20 queues of each port
+    interface_counters_json: 'portstat -j', the JSON output of 'show interfaces counters'
+
+with:
+    reference: the character by character parser SonicHost._parse_show used before ShowTable
+    rows: ShowTable.rows(), what show_and_parse() returns
+    columns: ShowTable.columns(), values of each column as strings
+    typed: ShowTable.columns(typed=True), counters converted to int
+
+and prints the ms per parse of each.
+
+Run it from the root of sonic-mgmt repo:
+    python -m tests.common.devices.unit_test.benchmark_show_parser --ports 512
+"""
+import argparse
+import json
+import random
+import time
+
+from tests.common.devices.show_parser import ShowTable
+from tests.common.devices.unit_test.unittest_show_parser import parse_show_reference
+
+COUNTER_HEADERS = ["IFACE", "STATE", "RX_OK", "RX_BPS", "RX_UTIL", "RX_ERR", "RX_DRP", "RX_OVR", "TX_OK", "TX_BPS",
+                   "TX_UTIL", "TX_ERR", "TX_DRP", "TX_OVR"]
+QUEUE_HEADERS = ["Port", "TxQ", "Counter/pkts", "Counter/bytes", "Drop/pkts", "Drop/bytes"]
+
+
+def counter():
+    return "{:,}".format(random.choice([0, random.randint(0, 10 ** 12)]))
+
+
+def tabulate(headers, rows):
+    widths = [max([len(header) for header in headers]) for headers in zip(*[headers] + rows)]
+    lines = ["  ".join(value.rjust(width) for value, width in zip(headers, widths)),
+             "  ".join("-" * width for width in widths)]
+    lines.extend("  ".join(value.rjust(width) for value, width in zip(row, widths)) for row in rows)
+    return lines
+
+
+def interface_counters_rows(ports):
+    return [["Ethernet{}".format(port * 8), "U", counter(), "{:.2f} KB/s".format(random.random() * 1000),
+             "0.01%", counter(), counter(), "N/A", counter(), "{:.2f} MB/s".format(random.random() * 1000), "0.02%",
+             counter(), counter(), "N/A"] for port in range(ports)]
+
+
+def queue_counters_rows(ports):
+    return [["Ethernet{}".format(port * 8), "{}{}".format(kind, queue), counter(), counter(), counter(), counter()]
+            for port in range(ports) for kind in ("UC", "MC") for queue in range(10)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ports", type=int, default=512, help="number of ports of the DUT")
+    parser.add_argument("--count", type=int, default=20, help="number of parses of each output by each parser")
+    args = parser.parse_args()
+
+    random.seed(0)
+    counter_rows = interface_counters_rows(args.ports)
+    outputs = [
+        ("interface_counters", "text", tabulate(COUNTER_HEADERS, counter_rows) +
+         ["", "Reminder: Please execute 'show interface counters -d all' to include internal links"]),
+        ("queue_counters", "text", tabulate(QUEUE_HEADERS, queue_counters_rows(args.ports))),
+        ("interface_counters_json", "json", json.dumps(
+            {row[0]: dict(zip(COUNTER_HEADERS[1:], row[1:])) for row in counter_rows}, indent=4)),
+    ]
+    parsers = {
+        "text": [("reference", parse_show_reference),
+                 ("rows", lambda output: ShowTable.from_lines(output).rows()),
+                 ("columns", lambda output: ShowTable.from_lines(output).columns()),
+                 ("typed", lambda output: ShowTable.from_lines(output).columns(typed=True))],
+        "json": [("rows", lambda output: ShowTable.from_json(output, "iface").rows()),
+                 ("columns", lambda output: ShowTable.from_json(output, "iface").columns()),
+                 ("typed", lambda output: ShowTable.from_json(output, "iface").columns(typed=True))],
+    }
+
+    for name, kind, output in outputs:
+        for parser_name, func in parsers[kind]:
+            start = time.time()
+            for _ in range(args.count):
+                func(output)
+            elapsed = time.time() - start
+            print("{:<24} {:<10} {:>6} rows {:>9.2f} ms/parse".format(
+                name, parser_name, len(ShowTable.from_lines(output)) if kind == "text" else args.ports,
+                elapsed * 1000 / args.count))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""A local SSH server standing in for a DUT in the unit tests and benchmark of PersistentShell.
+
+It accepts password and public key authentication and runs the command of each exec request with /bin/sh on the local
+host. There is no SFTP subsystem, ansible must use pipelining.
+"""
+import socket
+import subprocess
+import threading
+
+import paramiko
+
+
+class StandInServer(paramiko.ServerInterface):
+
+    def __init__(self, username, password, authorized_key=None):
+        self.username = username
+        self.password = password
+        self.authorized_key = authorized_key
+        self.commands = []
+
+    def check_auth_password(self, username, password):
+        if username == self.username and password == self.password:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def check_auth_publickey(self, username, key):
+        if username == self.username and self.authorized_key is not None and key == self.authorized_key:
+            return paramiko.AUTH_SUCCESSFUL
+        return paramiko.AUTH_FAILED
+
+    def get_allowed_auths(self, username):
+        return "password,publickey"
+
+    def check_channel_request(self, kind, chanid):
+        if kind == "session":
+            return paramiko.OPEN_SUCCEEDED
+        return paramiko.OPEN_FAILED_ADMINISTRATIVELY_PROHIBITED
+
+    def check_channel_exec_request(self, channel, command):
+        self.commands.append(command)
+        threading.Thread(target=self._exec, args=(channel, command), daemon=True).start()
+        return True
+
+    @staticmethod
+    def _exec(channel, command):
+        proc = subprocess.Popen(command, shell=True, stdin=subprocess.PIPE,
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+        # Input is read until the client shuts down writing, like the module piped in by ansible pipelining
+        stdin = []
+        while True:
+            data = channel.recv(65536)
+            if not data:
+                break
+            stdin.append(data)
+        stdout, stderr = proc.communicate(b"".join(stdin))
+        channel.sendall(stdout)
+        channel.sendall_stderr(stderr)
+        channel.send_exit_status(proc.returncode)
+        channel.close()
+
+
+class StandInSshd(object):
+    """
+    SSH server on 127.0.0.1 with a random port, serving each connection in a thread.
+
+    Usage:
+        with StandInSshd("admin", "password") as sshd:
+            shell = PersistentShell("127.0.0.1", "admin", ["password"], port=sshd.port, become=False)
+    """
+
+    host_key = None
+
+    def __init__(self, username, password, authorized_key=None):
+        if StandInSshd.host_key is None:
+            StandInSshd.host_key = paramiko.RSAKey.generate(2048)
+        self.server = StandInServer(username, password, authorized_key)
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        self.sock.bind(("127.0.0.1", 0))
+        self.sock.listen(16)
+        self.port = self.sock.getsockname()[1]
+        self.connections = 0
+        self.transports = []
+        self._stopped = False
+
+    def _serve(self):
+        while not self._stopped:
+            try:
+                client, _ = self.sock.accept()
+            except OSError:
+                break
+            self.connections += 1
+            client.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            transport = paramiko.Transport(client)
+            transport.add_server_key(self.host_key)
+            transport.start_server(server=self.server)
+            self.transports.append(transport)
+
+    def __enter__(self):
+        threading.Thread(target=self._serve, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self._stopped = True
+        self.sock.close()
+        for transport in self.transports:
+            transport.close()
+        return False
@@ -0,0 +1,98 @@
+import subprocess
+import unittest
+
+from tests.common.devices.command_batch import build_batch_script, new_marker, parse_batch_output, split_batches
+from tests.common.devices.unit_test.unittest_persistent_shell import ansible_like_result
+
+
+def run_batch_locally(cmds, **kwargs):
+    """Run the batch script with /bin/sh like SonicHost.run_batch runs it by the shell module."""
+    marker = new_marker()
+    proc = subprocess.run(build_batch_script(cmds, marker), shell=True, capture_output=True, **kwargs)
+    # The shell module strips trailing newlines of stdout/stderr
+    stdout = proc.stdout.decode().rstrip("\r\n")
+    stderr = proc.stderr.decode().rstrip("\r\n")
+    return parse_batch_output(cmds, marker, stdout, stderr)
+
+
+class TestCommandBatch(unittest.TestCase):
+
+    def test_same_results_as_separate_commands(self):
+        cmds = [
+            "echo hello; echo world",
+            "echo out; echo err >&2; exit 3",
+            "printf 'no newline'",
+            "printf 'two\\n\\n'",
+            "true",
+            "",
+            "echo $((1 + 2)) | grep 3 && echo 'quoted \"string\"'",
+            "printf 'err no newline' >&2",
+            "cat",  # stdin is /dev/null, doesn't read the rest of the script
+            "for i in $(seq 1 2000); do echo line $i; done",
+            "false",
+            "if then",  # syntax error of one command
+        ]
+        results = run_batch_locally(cmds)
+        self.assertEqual(len(results), len(cmds))
+        for cmd, res in zip(cmds, results):
+            expected = ansible_like_result(cmd)
+            for key, value in expected.items():
+                self.assertEqual(res[key], value, "{} of '{}'".format(key, cmd))
+            self.assertEqual(res["cmd"], cmd)
+            self.assertEqual(res["msg"], "non-zero return code" if expected["rc"] else "")
+
+    def test_exit_and_variables_stay_in_command(self):
+        results = run_batch_locally(["X=1; exit 5", "echo ${X:-unset}; cd /tmp", "pwd"], cwd="/")
+        self.assertEqual([res["rc"] for res in results], [5, 0, 0])
+        self.assertEqual(results[1]["stdout"], "unset")
+        self.assertEqual(results[2]["stdout"], "/")
+
+    def test_output_looking_like_delimiter(self):
+        results = run_batch_locally(["echo '__BATCH_0__:0:end:0'", "echo ':1:begin'"])
+        self.assertEqual(results[0]["stdout"], "__BATCH_0__:0:end:0")
+        self.assertEqual(results[1]["stdout"], ":1:begin")
+
+    def test_unfinished_commands(self):
+        cmds = ["echo first", "echo second; kill -9 $$", "echo third"]
+        marker = new_marker()
+        proc = subprocess.run(build_batch_script(cmds, marker), shell=True, capture_output=True)
+        # Script killed like on timeout, keep the output of the commands finished before
+        stdout = proc.stdout.decode()
+        stdout = stdout[:stdout.index("second")]
+        results = parse_batch_output(cmds, marker, stdout, proc.stderr.decode())
+        self.assertEqual((results[0]["rc"], results[0]["stdout"]), (0, "first"))
+        for res in results[1:]:
+            self.assertEqual(res["rc"], -1)
+            self.assertTrue(res["failed"])
+            self.assertEqual(res["msg"], "command did not finish")
+
+    def test_split_batches(self):
+        cmds = ["echo {}".format(index) for index in range(10)]
+        self.assertEqual(split_batches(cmds, batch_size=4), [cmds[0:4], cmds[4:8], cmds[8:10]])
+        self.assertEqual(split_batches([]), [])
+
+        # Each script is within the length limit, a command longer than the limit is alone in its batch
+        marker = new_marker()
+        cmds = ["echo {}".format("x" * length) for length in [100, 100, 100, 1000, 100, 100]]
+        batch_bytes = len(build_batch_script(cmds[0:2], marker))
+        batches = split_batches(cmds, batch_size=256, batch_bytes=batch_bytes)
+        self.assertEqual(batches, [cmds[0:2], cmds[2:3], cmds[3:4], cmds[4:6]])
+        self.assertEqual(sum(batches, []), cmds)
+        for batch in batches[0:2] + batches[3:]:
+            self.assertLessEqual(len(build_batch_script(batch, new_marker())), batch_bytes)
+
+    def test_batch_bytes_below_argument_limit(self):
+        # Output of 2000 commands whose scripts together are several times the 128 KiB limit of one argument
+        cmds = ["echo {} {}".format(index, "x" * 200) for index in range(2000)]
+        batches = split_batches(cmds)
+        self.assertGreater(len(build_batch_script(cmds, new_marker())), 4 * 128 * 1024)
+        results = []
+        for batch in batches:
+            script = build_batch_script(batch, new_marker())
+            self.assertLess(len(script.encode()), 128 * 1024)
+            results.extend(run_batch_locally(batch))
+        self.assertEqual([res["stdout"] for res in results], [cmd[len("echo "):] for cmd in cmds])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,85 @@
+import subprocess
+import unittest
+
+from tests.common.devices.persistent_shell import PersistentShell, PersistentShellUnsupported
+from tests.common.devices.unit_test.sshd_stand_in import StandInSshd
+
+USERNAME = "admin"
+PASSWORD = "password"
+
+
+def ansible_like_result(cmd, shell=True):
+    """The keys of ansible shell/command module result compared with PersistentShell result."""
+    proc = subprocess.run(cmd if shell else cmd.split(), shell=shell, capture_output=True)
+    stdout = proc.stdout.decode().rstrip("\r\n")
+    stderr = proc.stderr.decode().rstrip("\r\n")
+    return {
+        "rc": proc.returncode,
+        "stdout": stdout,
+        "stderr": stderr,
+        "stdout_lines": stdout.splitlines(),
+        "stderr_lines": stderr.splitlines(),
+        "failed": proc.returncode != 0,
+    }
+
+
+class TestPersistentShell(unittest.TestCase):
+
+    def setUp(self):
+        self.sshd = StandInSshd(USERNAME, PASSWORD).__enter__()
+        self.shell = PersistentShell("127.0.0.1", USERNAME, ["wrong", PASSWORD], port=self.sshd.port, become=False)
+
+    def tearDown(self):
+        self.shell.close()
+        self.sshd.__exit__(None, None, None)
+
+    def assert_result(self, cmd, shell=True):
+        res = self.shell.run(cmd, shell=shell)
+        expected = ansible_like_result(cmd, shell)
+        for key, value in expected.items():
+            self.assertEqual(res[key], value, "{} of '{}'".format(key, cmd))
+        self.assertEqual(res["cmd"], cmd)
+        self.assertEqual(res["msg"], "non-zero return code" if expected["rc"] else "")
+        for key in ["start", "end", "delta", "changed"]:
+            self.assertIn(key, res)
+
+    def test_shell_results(self):
+        self.assert_result("echo hello; echo world")
+        self.assert_result("echo out; echo err >&2; exit 3")
+        self.assert_result("printf 'no newline'")
+        self.assert_result("printf 'two\\n\\n'")
+        self.assert_result("for i in $(seq 1 20000); do echo line $i; done")
+        self.assert_result("echo $((1 + 2)) | grep 3 && echo 'quoted \"string\"'")
+        self.assert_result("true")
+
+    def test_command_results(self):
+        # Command module doesn't expand shell syntax
+        res = self.shell.run("echo $HOME '*' |", shell=False)
+        self.assertEqual(res["stdout"], "$HOME * |")
+        self.assert_result("ls /", shell=False)
+
+    def test_one_connection(self):
+        for i in range(10):
+            self.assertEqual(self.shell.run("echo {}".format(i))["stdout"], str(i))
+        self.assertEqual(self.sshd.connections, 2)  # first password is wrong
+        self.assertEqual(self.shell.passwords[0], PASSWORD)
+
+    def test_reconnect(self):
+        self.shell.run("true")
+        for transport in self.sshd.transports:
+            transport.close()
+        self.shell._client.get_transport().close()
+        self.assertEqual(self.shell.run("echo again")["stdout"], "again")
+
+    def test_become(self):
+        self.shell.become = True
+        self.assertEqual(self.shell.wrap_command("echo 'a b'"), "sudo -n -- /bin/sh -c 'echo '\"'\"'a b'\"'\"''")
+
+    def test_authentication_failure(self):
+        shell = PersistentShell("127.0.0.1", USERNAME, ["wrong"], port=self.sshd.port, become=False)
+        with self.assertRaises(PersistentShellUnsupported):
+            shell.run("true")
+
+
+if __name__ == '__main__':
+    unittest.main()
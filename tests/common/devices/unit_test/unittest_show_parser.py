@@ -0,0 +1,135 @@
+import json
+import re
+import unittest
+
+from tests.common.devices.show_parser import ShowTable, json_show_command, parse_column_positions, parse_show, to_int
+
+INTERFACE_STATUS = """\
+      Interface            Lanes    Speed    MTU    FEC    Alias             Vlan    Oper    Admin
+---------------  ---------------  -------  -----  -----  -------  ---------------  ------  -------
+      Ethernet0          0,1,2,3      40G   9100    N/A     etp1  PortChannel0002      up       up
+      Ethernet4          4,5,6,7      40G   9100    N/A     etp2           routed    down       up
+""".splitlines()
+
+INTERFACE_COUNTERS = """\
+    IFACE    STATE      RX_OK     RX_BPS    RX_UTIL    RX_ERR    RX_DRP    RX_OVR    TX_OK
+---------  -------  ---------  ---------  ---------  --------  --------  --------  -------
+Ethernet0        U  1,234,567  0.00 B/s      0.00%         0         2       N/A       15
+Ethernet4        D          0  0.00 B/s      0.00%         0     1,000       N/A        0
+
+Reminder: Please execute 'show interface counters -d all' to include internal links
+""".splitlines()
+
+
+def parse_show_reference(output_lines, header_len=1):
+    """Parse like SonicHost._parse_show did before ShowTable, the separation line character by character"""
+    result = []
+
+    sep_line_pattern = re.compile(r"^( *-+ *)+$")
+    sep_line_found = False
+    for idx, line in enumerate(output_lines):
+        if sep_line_pattern.match(line):
+            sep_line_found = True
+            header_lines = output_lines[idx - header_len:idx]
+            sep_line = output_lines[idx]
+            content_lines = output_lines[idx + 1:]
+            break
+
+    if not sep_line_found:
+        return result
+
+    prev = ' '
+    positions = []
+    for pos, char in enumerate(sep_line + ' '):
+        if char == '-':
+            if char != prev:
+                left = pos
+        else:
+            if char != prev:
+                right = pos
+                positions.append((left, right))
+        prev = char
+
+    headers = []
+    for (left, right) in positions:
+        header = " ".join([header_line[left:right].strip().lower() for header_line in header_lines]).strip()
+        headers.append(header)
+
+    for content_line in content_lines:
+        if len(content_line) == 0:
+            break
+        item = {}
+        for idx, (left, right) in enumerate(positions):
+            k = headers[idx]
+            v = content_line[left:right].strip()
+            item[k] = v
+        result.append(item)
+
+    return result
+
+
+class TestShowParser(unittest.TestCase):
+
+    def test_parse_column_positions(self):
+        self.assertEqual(parse_column_positions("---  -- -"), [(0, 3), (5, 7), (8, 9)])
+        self.assertEqual(parse_column_positions("  ===  =", sep_char="="), [(2, 5), (7, 8)])
+
+    def test_same_as_reference(self):
+        for lines, header_len in [(INTERFACE_STATUS, 1), (INTERFACE_COUNTERS, 1),
+                                  (["Name  Value", "Long  Total", "----  -----", "a     1", "bb    22"], 2),
+                                  (["Name", "----", "a", "  b  ", "", "c"], 1),
+                                  (["  Name  Id", "  ----  --", "  a     1"], 1)]:
+            self.assertEqual(parse_show(lines, header_len), parse_show_reference(lines, header_len))
+
+    def test_parse_rows(self):
+        rows = parse_show(INTERFACE_STATUS)
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1]["interface"], "Ethernet4")
+        self.assertEqual(rows[1]["vlan"], "routed")
+        self.assertEqual(rows[0]["lanes"], "0,1,2,3")
+        self.assertEqual(list(rows[0].keys())[0], "interface")
+
+    def test_stop_at_empty_line(self):
+        table = ShowTable.from_lines(INTERFACE_COUNTERS)
+        self.assertEqual(len(table), 2)
+        self.assertEqual([row["iface"] for row in table], ["Ethernet0", "Ethernet4"])
+
+    def test_indented_table_and_no_separation_line(self):
+        self.assertEqual(parse_show(["  Name  Id", "  ----  --", "  a     1"]), [{"name": "a", "id": "1"}])
+        with self.assertLogs("tests.common.devices.show_parser", level="ERROR"):
+            self.assertEqual(parse_show(["no table here"]), [])
+            self.assertEqual(ShowTable.from_lines([]).columns(), {})
+
+    def test_typed_columns(self):
+        columns = ShowTable.from_lines(INTERFACE_COUNTERS).columns(typed=True)
+        self.assertEqual(columns["rx_ok"], [1234567, 0])
+        self.assertEqual(columns["rx_drp"], [2, 1000])
+        self.assertEqual(columns["rx_ovr"], ["N/A", "N/A"])
+        self.assertEqual(columns["rx_bps"], ["0.00 B/s", "0.00 B/s"])
+        lanes = ShowTable.from_lines(INTERFACE_STATUS).column("lanes", typed=True)
+        self.assertEqual(lanes, ["0,1,2,3", "4,5,6,7"])
+        self.assertEqual(ShowTable.from_lines(INTERFACE_STATUS).column("mtu", typed=True), [9100, 9100])
+        self.assertIsNone(to_int("N/A"))
+        self.assertRaises(ValueError, to_int, "12,34")
+
+    def test_from_json(self):
+        data = {"Ethernet0": {"STATE": "U", "RX_OK": "1,234,567"}, "Ethernet4": {"STATE": "D", "RX_OK": "0"}}
+        output = "Last cached time was 2024-01-01T00:00:00\n" + json.dumps(data, indent=4)
+        table = ShowTable.from_json(output, "iface")
+        self.assertEqual(table.headers, ["iface", "state", "rx_ok"])
+        self.assertEqual(table.rows()[0], {"iface": "Ethernet0", "state": "U", "rx_ok": "1,234,567"})
+        self.assertEqual(table.column("rx_ok", typed=True), [1234567, 0])
+        self.assertRaises(ValueError, ShowTable.from_json, "Error: no such option -j", "iface")
+        self.assertRaises(ValueError, ShowTable.from_json, '{"a": 1}', "iface")
+
+    def test_json_show_command(self):
+        self.assertEqual(json_show_command("show interfaces counters"), ("portstat -j", "iface"))
+        self.assertEqual(json_show_command("show int counters rif"), ("intfstat -j", "iface"))
+        self.assertEqual(json_show_command("portstat -i Ethernet0 -a"), ("portstat -i Ethernet0 -a -j", "iface"))
+        self.assertEqual(json_show_command("show interfaces counters fec-stats"), (None, None))
+        self.assertEqual(json_show_command("portstat -c"), (None, None))
+        self.assertEqual(json_show_command("show interfaces status"), (None, None))
+
+
+if __name__ == "__main__":
+    unittest.main()
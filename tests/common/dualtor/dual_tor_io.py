@@ -7,16 +7,15 @@ import ipaddress
 import logging
 import jinja2
 import json
+import numpy as np
 import os
-import six
 import scapy.all as scapyall
 import ptf.testutils as testutils
-from itertools import groupby
 
 from tests.common.dualtor.dual_tor_common import CableType
+from tests.common.helpers.pcap_flow import mac_to_int, read_tcp_flow
 from tests.common.utilities import wait_until, convert_scapy_packet_to_bytes
 from natsort import natsorted
-from collections import defaultdict
 
 TCP_DST_PORT = 5000
 SOCKET_RECV_BUFFER_SIZE = 10 * 1024 * 1024
@@ -129,7 +128,7 @@ class DualTorIO:
         else:
             self.packets_per_server = self.packets_to_send // len(self.test_interfaces)
 
-        self.all_packets = []
+        self.flow = None
 
     def setup_ptf_sniffer(self):
         """Setup ptf sniffer supervisor config."""
@@ -622,8 +621,8 @@ class DualTorIO:
         """Fetch the captured packet file generated by the ptf sniffer."""
         logger.info('Fetching pcap file from ptf')
         self.ptfhost.fetch(src=self.capture_pcap, dest='/tmp/', flat=True, fail_on_missing=False)
-        self.all_packets = scapyall.rdpcap(self.capture_pcap)
-        logger.info("Number of all packets captured: {}".format(len(self.all_packets)))
+        self.flow = read_tcp_flow(self.capture_pcap, payload_pad="X")
+        logger.info("Number of all packets captured: {}".format(self.flow.total_packets))
 
     def send_packets(self):
         """Send packets generated."""
@@ -687,50 +686,31 @@ class DualTorIO:
         examine_start = datetime.datetime.now()
         logger.info("Packet flow examine started {}".format(str(examine_start)))
 
-        if not self.all_packets:
-            logger.error("self.all_packets not defined.")
+        if self.flow is None or not self.flow.total_packets:
+            logger.error("self.flow not defined.")
             return None
 
-        # Filter out packets:
-        filtered_packets = [pkt for pkt in self.all_packets if
-                            scapyall.TCP in pkt and
-                            scapyall.ICMP not in pkt and
-                            pkt[scapyall.TCP].sport == self.tcp_sport and
-                            pkt[scapyall.TCP].dport == TCP_DST_PORT and
-                            self.check_tcp_payload(pkt) and
-                            (
-                                pkt[scapyall.Ether].dst == self.sent_pkt_dst_mac or
-                                pkt[scapyall.Ether].src in self.received_pkt_src_mac
-                            )]
+        # Filter out packets, the flow only has TCP packets with valid TCP sequential payload:
+        flow = self.flow
+        filtered_packets = flow.take(
+            (flow.sport == self.tcp_sport) & (flow.dport == TCP_DST_PORT) &
+            (
+                (flow.dst_mac == mac_to_int(self.sent_pkt_dst_mac)) |
+                np.isin(flow.src_mac, [mac_to_int(mac) for mac in self.received_pkt_src_mac])
+            ))
         logger.info("Number of filtered packets captured: {}".format(len(filtered_packets)))
-        if not filtered_packets or len(filtered_packets) == 0:
+        if len(filtered_packets) == 0:
             logger.error("Sniffer failed to capture any traffic")
 
-        server_to_packet_map = defaultdict(list)
-
-        # Split packets into separate lists based on server IP
-        for packet in filtered_packets:
-            server_addr = self.get_server_address(packet)
-            server_to_packet_map[server_addr].append(packet)
-
-        # E731 Use a def instead of a lambda
-        def get_packet_sort_key(packet):
-            payload_bytes = convert_scapy_packet_to_bytes(packet[scapyall.TCP].payload)
-            if six.PY2:
-                payload_int = int(payload_bytes.replace('X', ''))
-            else:
-                payload_int = int(payload_bytes.decode().replace('X', ''))
-            return (payload_int, packet.time)
-
-        # For each server's packet list, sort by payload then timestamp
+        # Split packets into separate lists based on server IP,
+        # then sort each server's packet list by payload then timestamp
         # (in case of duplicates)
-        for server in list(server_to_packet_map.keys()):
-            server_to_packet_map[server].sort(key=get_packet_sort_key)
+        server_to_packet_map = self.split_by_server_address(filtered_packets.sort_by_payload())
 
         logger.info("Measuring traffic disruptions...")
         for server_ip, packet_list in list(server_to_packet_map.items()):
             filename = '/tmp/capture_filtered_{}.pcap'.format(server_ip)
-            scapyall.wrpcap(filename, packet_list)
+            packet_list.write_pcap(filename)
             logger.info("Filtered pcap dumped to {}".format(filename))
 
         self.test_results = {}
@@ -741,54 +721,47 @@ class DualTorIO:
                         .format(server_ip, json.dumps(result, indent=4)))
             self.test_results[server_ip] = result
 
+    def split_by_server_address(self, flow):
+        """Split the packets of the flow by server address, like get_server_address."""
+        if self.traffic_direction in ("t1_to_server", "t1_to_soc"):
+            return flow.split_by_ip(source=False)
+        return flow.split_by_ip(source=True)
+
     def examine_each_packet(self, server_ip, packets):
-        num_sent_packets = 0
-        received_packet_list = list()
-        duplicate_packet_list = list()
-        disruption_ranges = list()
         disruption_before_traffic = False
         disruption_after_traffic = False
         duplicate_ranges = []
 
-        for packet in packets:
-            if packet[scapyall.Ether].dst == self.sent_pkt_dst_mac:
-                # This is a sent packet
-                num_sent_packets += 1
-                continue
-            if packet[scapyall.Ether].src in self.received_pkt_src_mac:
-                # This is a received packet.
-                # scapy 2.4.5 will use Decimal to calulcate time, but json.dumps
-                # can't recognize Decimal, transform to float here
-                curr_time = float(packet.time)
-                curr_payload_bytes = convert_scapy_packet_to_bytes(packet[scapyall.TCP].payload)
-                if six.PY2:
-                    curr_payload = int(curr_payload_bytes.replace('X', ''))
-                else:
-                    curr_payload = int(curr_payload_bytes.decode().replace('X', ''))
-
-                # Look back at the previous received packet to check for gaps/duplicates
-                # Only if we've already received some packets
-                if len(received_packet_list) > 0:
-                    prev_payload, prev_time = received_packet_list[-1]
-
-                    if prev_payload == curr_payload:
-                        # Duplicate packet detected, increment the counter
-                        duplicate_packet_list.append((curr_payload, curr_time))
-                    if prev_payload + 1 < curr_payload:
-                        # Non-sequential packets indicate a disruption
-                        disruption_dict = {
-                            'start_time': prev_time,
-                            'end_time': curr_time,
-                            'start_id': prev_payload,
-                            'end_id': curr_payload
-                        }
-                        disruption_ranges.append(disruption_dict)
-
-                # Save packets as (payload_id, timestamp) tuples
-                # for easier timing calculations later
-                received_packet_list.append((curr_payload, curr_time))
-
-        if len(received_packet_list) == 0:
+        # This is a sent packet
+        sent = packets.dst_mac == mac_to_int(self.sent_pkt_dst_mac)
+        num_sent_packets = int(np.count_nonzero(sent))
+        # This is a received packet.
+        received = ~sent & np.isin(packets.src_mac, [mac_to_int(mac) for mac in self.received_pkt_src_mac])
+        # Received packets as payload_id and timestamp arrays
+        # for easier timing calculations later
+        received_payloads = packets.payload_id[received]
+        received_times = packets.time[received]
+        num_received_packets = len(received_payloads)
+
+        # Look back at the previous received packet to check for gaps/duplicates
+        steps = np.diff(received_payloads)
+        # Duplicate packet detected
+        duplicated = np.flatnonzero(steps == 0) + 1
+        # Non-sequential packets indicate a disruption
+        disrupted = np.flatnonzero(steps > 1) + 1
+        disruption_ranges = [
+            {
+                'start_time': start_time,
+                'end_time': end_time,
+                'start_id': start_id,
+                'end_id': end_id
+            }
+            for start_time, end_time, start_id, end_id in zip(
+                received_times[disrupted - 1].tolist(), received_times[disrupted].tolist(),
+                received_payloads[disrupted - 1].tolist(), received_payloads[disrupted].tolist())
+        ]
+
+        if num_received_packets == 0:
             logger.error("Sniffer failed to filter any traffic from DUT")
         else:
             # Find ranges of consecutive packets that have been duplicated
@@ -814,31 +787,33 @@ class DualTorIO:
             #         "duplication_count": 2
             #     }
             # ]
-            for _, grouper in groupby(duplicate_packet_list, lambda d: d[0]):
-                duplicates = list(grouper)
-                duplicate_start, duplicate_end = duplicates[0], duplicates[-1]
+            duplicate_payloads = received_payloads[duplicated]
+            duplicate_times = received_times[duplicated]
+            group_starts = np.flatnonzero(np.diff(duplicate_payloads, prepend=-1) != 0)
+            group_ends = np.append(group_starts[1:], len(duplicate_payloads)) - 1
+            for start, end in zip(group_starts.tolist(), group_ends.tolist()):
                 duplicate_dict = {
-                    'start_time': duplicate_start[1],
-                    'end_time': duplicate_end[1],
-                    'start_id': duplicate_start[0],
-                    'end_id': duplicate_end[0],
-                    'duplication_count': len(duplicates)
+                    'start_time': float(duplicate_times[start]),
+                    'end_time': float(duplicate_times[end]),
+                    'start_id': int(duplicate_payloads[start]),
+                    'end_id': int(duplicate_payloads[end]),
+                    'duplication_count': end - start + 1
                 }
                 duplicate_ranges.append(duplicate_dict)
 
             # If the first packet we received is not #0, some disruption started
             # before traffic started. Store the id of the first received packet
-            if received_packet_list[0][0] != 0:
-                disruption_before_traffic = received_packet_list[0][0]
+            if received_payloads[0] != 0:
+                disruption_before_traffic = int(received_payloads[0])
             # If the last packet we received does not match the number of packets
             # sent, some disruption continued after the traffic finished.
             # Store the id of the last received packet
-            if received_packet_list[-1][0] != self.packets_sent_per_server.get(server_ip) - 1:
-                disruption_after_traffic = received_packet_list[-1][0]
+            if received_payloads[-1] != self.packets_sent_per_server.get(server_ip) - 1:
+                disruption_after_traffic = int(received_payloads[-1])
 
         result = {
             'sent_packets': num_sent_packets,
-            'received_packets': len(received_packet_list),
+            'received_packets': num_received_packets,
             'disruption_before_traffic': disruption_before_traffic,
             'disruption_after_traffic': disruption_after_traffic,
             'duplications': duplicate_ranges,
@@ -846,29 +821,9 @@ class DualTorIO:
         }
 
         if num_sent_packets < self.packets_sent_per_server.get(server_ip):
-            server_addr = self.get_server_address(packet)
             logger.error('Not all sent packets were captured. '
                          'Something went wrong!')
             logger.error('Dumping server {} results and continuing:\n{}'
-                         .format(server_addr, json.dumps(result, indent=4)))
+                         .format(server_ip, json.dumps(result, indent=4)))
 
         return result
-
-    def check_tcp_payload(self, packet):
-        """
-        @summary: Helper method
-
-        Returns: Bool: True if a packet is not corrupted and has a valid TCP
-            sequential TCP Payload
-        """
-        try:
-            payload_bytes = convert_scapy_packet_to_bytes(packet[scapyall.TCP].payload)
-            if six.PY2:
-                int(payload_bytes.replace('X', '')) in range(
-                    self.packets_to_send)
-            else:
-                int(payload_bytes.decode().replace('X', '')) in range(
-                    self.packets_to_send)
-            return True
-        except Exception:
-            return False
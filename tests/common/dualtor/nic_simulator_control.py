@@ -32,7 +32,8 @@ __all__ = [
     "toggle_active_active_simulator_ports",
     "stop_nic_grpc_server",
     "simulator_server_down_active_active",
-    "nic_simulator_flap_counter"
+    "nic_simulator_flap_counter",
+    "nic_simulator_rpc_latency"
 ]
 
 logger = logging.getLogger(__name__)
@@ -445,3 +446,32 @@ def nic_simulator_flap_counter(mux_config, nic_simulator_client):   # noqa: F811
         return [dict(zip(_.portid, _.flaps)) for _ in flap_counter_replies]
 
     return _get_nic_simulator_flap_counter
+
+
+@pytest.fixture
+def nic_simulator_rpc_latency(nic_simulator_client):
+    """
+    Return a helper function to retrieve the latency of the gRPC calls served by nic_simulator.
+
+    The helper returns a list of dicts of server (a NiC address, 'mgmt', or an OVS bridge for the OVS updates), rpc,
+    count, total_ms, max_ms and last_ms. Pass reset=True to clear the statistics after the query.
+    """
+
+    def _get_nic_simulator_rpc_latency(reset=False):
+        request = nic_simulator_grpc_mgmt_service_pb2.RpcLatencyRequest(reset=reset)
+        client_stub = nic_simulator_client()
+        response = call_grpc(client_stub.QueryRpcLatency, args=(request,))
+        logging.debug("Query rpc latency response:\n%s", response)
+        return [
+            {
+                "server": _.server,
+                "rpc": _.rpc,
+                "count": _.count,
+                "total_ms": _.total_ms,
+                "max_ms": _.max_ms,
+                "last_ms": _.last_ms
+            }
+            for _ in response.latencies
+        ]
+
+    return _get_nic_simulator_rpc_latency
@@ -126,6 +126,7 @@ class AdvancedReboot:
         self.vnetPkts = self.request.config.getoption("--vnet_pkts")
         self.rebootLimit = self.request.config.getoption("--reboot_limit")
         self.sniffTimeIncr = self.request.config.getoption("--sniff_time_incr")
+        self.sendRate = self.request.config.getoption("--send_rate")
         self.allowVlanFlooding = self.request.config.getoption("--allow_vlan_flooding")
         self.stayInTargetImage = self.request.config.getoption("--stay_in_target_image")
         self.newSonicImage = self.request.config.getoption("--new_sonic_image")
@@ -954,6 +955,9 @@ class AdvancedReboot:
             "packet_capture_location": self.rebootData['packet_capture_location']
         }
 
+        if self.sendRate:
+            params["send_interval"] = 1.0 / self.sendRate
+
         if self.packet_capture_location == PHYSICAL_PORT:
             params.update({
                 "vmhost_username": self.rebootData['vmhost_username'],
@@ -1,7 +1,12 @@
+import logging
 import multiprocessing.pool
+import threading
+import time
 from multiprocessing.pool import ThreadPool
 from typing import List
 
+logger = logging.getLogger(__name__)
+
 
 class SafeThreadPoolExecutor:
     """
@@ -78,3 +83,140 @@ class SafeThreadPoolExecutor:
         self.shutdown(wait=True)
         # Returning False to ensure that any exception in the "with" statement is not suppressed.
         return False
+
+
+class ScheduledTask:
+    """
+    A task of ResourceScheduler and the outcome of running it.
+
+    Attributes:
+        name: name of the task, used in logs and thread names.
+        resources: names of the resources used by the task. Tasks sharing a resource are not run at the same time.
+            ResourceScheduler.ALL_RESOURCES makes the task run alone.
+        budget: time budget of the task in seconds, None for no budget.
+        result: return value of the task.
+        exception: exception raised by the task, None if it didn't raise.
+        timed_out: True if the task was still running when its budget expired.
+        duration: seconds the task ran, or the budget if it timed out.
+    """
+
+    def __init__(self, name, fn, args, kwargs, resources, budget):
+        self.name = name
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.resources = frozenset(resources)
+        self.budget = budget
+        self.result = None
+        self.exception = None
+        self.timed_out = False
+        self.start_time = None
+        self.end_time = None
+
+    @property
+    def duration(self):
+        if self.start_time is None:
+            return 0.0
+        if self.timed_out:
+            return float(self.budget)
+        return self.end_time - self.start_time
+
+    @property
+    def exclusive(self):
+        return ResourceScheduler.ALL_RESOURCES in self.resources
+
+
+class ResourceScheduler:
+    """
+    Run tasks concurrently in at most `max_workers` threads. Tasks using a same resource are run one after another.
+
+    Example Usage:
+
+    scheduler = ResourceScheduler(max_workers=4)
+    scheduler.add("check_bgp", check_bgp, resources=["bgp"], budget=600)
+    scheduler.add("check_bfd", check_bfd, resources=["bgp"])
+    scheduler.add("check_cpu", check_cpu, resources=[ResourceScheduler.ALL_RESOURCES])
+    for task in scheduler.run():
+        print(task.name, task.result, task.duration)
+
+    Behavior Summary:
+      1. Tasks are started in the order they were added. A task waiting for a resource doesn't hold back the tasks
+         after it.
+      2. A task exceeding its budget is marked as timed out and its resources are released. Its thread can't be
+         stopped, it is left running as a daemon thread and its result is dropped.
+      3. Exceptions are not raised by run(), they are kept in `exception` of the tasks for the caller to handle.
+      4. With `max_workers` 1 the tasks are run one after another in the order they were added.
+    """
+
+    ALL_RESOURCES = "*"
+
+    def __init__(self, max_workers):
+        self.max_workers = max(1, max_workers)
+        self.tasks: List[ScheduledTask] = []
+        self._cond = threading.Condition()
+
+    def add(self, name, fn, args=(), kwargs=None, resources=(), budget=None):
+        """
+        Add task fn(*args, **kwargs) to be run by run(). Returns the ScheduledTask.
+        """
+        task = ScheduledTask(name, fn, args, kwargs or {}, resources, budget)
+        self.tasks.append(task)
+        return task
+
+    @staticmethod
+    def _conflicts(task, running):
+        if not running:
+            return False
+        if task.exclusive or any(other.exclusive for other in running):
+            return True
+        return any(task.resources & other.resources for other in running)
+
+    def _run_task(self, task):
+        try:
+            task.result = task.fn(*task.args, **task.kwargs)
+        except BaseException as e:
+            task.exception = e
+        finally:
+            with self._cond:
+                task.end_time = time.monotonic()
+                self._cond.notify_all()
+
+    def _start(self, task):
+        task.start_time = time.monotonic()
+        logger.debug("Start task {} using resources {}".format(task.name, sorted(task.resources)))
+        thread = threading.Thread(target=self._run_task, args=(task,), name="sched-{}".format(task.name))
+        thread.daemon = True
+        thread.start()
+
+    def run(self):
+        """
+        Run all the added tasks and wait until each of them is done or timed out. Returns the tasks in the order
+        they were added.
+        """
+        pending = list(self.tasks)
+        running = []
+        with self._cond:
+            while pending or running:
+                now = time.monotonic()
+                for task in list(running):
+                    if task.end_time is not None:
+                        running.remove(task)
+                    elif task.budget is not None and now - task.start_time >= task.budget:
+                        logger.warning("Task {} exceeded its time budget of {} seconds".format(task.name, task.budget))
+                        task.timed_out = True
+                        running.remove(task)
+
+                for task in list(pending):
+                    if len(running) >= self.max_workers:
+                        break
+                    if not self._conflicts(task, running):
+                        pending.remove(task)
+                        running.append(task)
+                        self._start(task)
+
+                if running:
+                    deadlines = [task.start_time + task.budget for task in running if task.budget is not None]
+                    timeout = max(0, min(deadlines) - time.monotonic()) if deadlines else None
+                    if all(task.end_time is None for task in running):
+                        self._cond.wait(timeout)
+        return list(self.tasks)
@@ -0,0 +1,406 @@
+"""
+Columnar reader of the TCP test flows of a packet capture.
+
+Traffic disruption checks like advanced-reboot and DualTorIO send TCP packets with sequential ids as payload and
+examine a capture of the sent and received copies. Loading the capture with scapy builds a full packet object for each
+of the packets, which takes minutes and GBs of memory for the millions of packets of a long capture. read_tcp_flow()
+maps the capture file and decodes only the fixed header fields into NumPy arrays, one element per TCP packet, so the
+checks can filter, sort and compare the packets with array operations.
+
+Both pcap and pcapng files of Ethernet frames are supported, with up to two VLAN tags and IPv4 or IPv6.
+
+This module is also used in the PTF container by ptftests/py3/advanced-reboot.py, it must only depend on the python
+standard library and NumPy. It can be imported without NumPy, NUMPY_AVAILABLE tells whether read_tcp_flow() can be
+used, callers fall back to examining the capture with scapy if it can't.
+"""
+import array
+import mmap
+import socket
+import struct
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+LINKTYPE_ETHERNET = 1
+
+ETH_P_IP = 0x0800
+ETH_P_IPV6 = 0x86DD
+ETH_P_8021Q = 0x8100
+ETH_P_8021AD = 0x88A8
+
+IPPROTO_TCP = 6
+IPPROTO_UDP = 17
+
+PCAP_MAGIC = {
+    b"\xd4\xc3\xb2\xa1": ("<", 1000000),
+    b"\xa1\xb2\xc3\xd4": (">", 1000000),
+    b"\x4d\x3c\xb2\xa1": ("<", 1000000000),
+    b"\xa1\xb2\x3c\x4d": (">", 1000000000),
+}
+PCAPNG_SHB = 0x0A0D0D0A
+PCAPNG_IDB = 1
+PCAPNG_PB = 2
+PCAPNG_SPB = 3
+PCAPNG_EPB = 6
+PCAPNG_OPT_TSRESOL = 9
+PCAPNG_BYTE_ORDER_MAGIC = 0x1A2B3C4D
+
+# Length of the VXLAN header between the UDP header and the inner frame
+VXLAN_HEADER_LEN = 8
+
+# Frames decoded at a time
+CHUNK_PACKETS = 1 << 18
+
+
+class PcapFlow(object):
+    """
+    TCP packets of a capture as columns, element i of each column belongs to packet i.
+
+    Columns:
+        index: Number of the packet in the capture, starting from 0.
+        time: Capture time in seconds, float.
+        src_mac, dst_mac: MAC addresses as integers, compare with mac_to_int().
+        ip_version: 4 or 6.
+        src_ip, dst_ip: IP addresses as integers, the upper 64 bits of IPv6 addresses in src_ip_hi and dst_ip_hi.
+        sport, dport: TCP ports.
+        payload_id: TCP payload decoded as an integer.
+        decap: True for packets decapsulated from a VXLAN packet.
+        frame_start, frame_end: Position of the Ethernet frame in the capture file.
+
+    Args:
+        buf: The mapped capture file.
+        columns (dict): Column name to array.
+        total_packets (int): Number of all packets of the capture.
+    """
+
+    COLUMNS = ("index", "time", "src_mac", "dst_mac", "ip_version", "src_ip_hi", "src_ip", "dst_ip_hi", "dst_ip",
+               "sport", "dport", "payload_id", "decap", "frame_start", "frame_end")
+
+    def __init__(self, buf, columns, total_packets):
+        self._buf = buf
+        self.total_packets = total_packets
+        for name in self.COLUMNS:
+            setattr(self, name, columns[name])
+
+    def __len__(self):
+        return len(self.index)
+
+    def take(self, rows):
+        """Get the packets of rows, a boolean mask or an array of row numbers, as a new PcapFlow."""
+        return PcapFlow(self._buf, {name: getattr(self, name)[rows] for name in self.COLUMNS}, self.total_packets)
+
+    def sort_by_payload(self):
+        """Sort the packets by payload id, then by capture time, then by capture order, decapsulated packets last."""
+        return self.take(np.lexsort((self.index, self.decap, self.time, self.payload_id)))
+
+    def split_by_ip(self, source=True):
+        """
+        Split the packets by source or destination IP address, keeping their order.
+
+        Returns:
+            dict: IP address string, like scapy shows it, to the PcapFlow of its packets.
+        """
+        hi, lo = (self.src_ip_hi, self.src_ip) if source else (self.dst_ip_hi, self.dst_ip)
+        keys = np.stack([self.ip_version.astype(np.uint64), hi, lo], axis=1)
+        unique, inverse = np.unique(keys, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        order = np.argsort(inverse, kind="stable")
+        bounds = np.searchsorted(inverse[order], np.arange(len(unique) + 1))
+        flows = {}
+        for i, (version, high, low) in enumerate(unique.tolist()):
+            if version == 4:
+                address = socket.inet_ntop(socket.AF_INET, struct.pack(">I", low))
+            else:
+                address = socket.inet_ntop(socket.AF_INET6, struct.pack(">QQ", high, low))
+            flows[address] = self.take(order[bounds[i]:bounds[i + 1]])
+        return flows
+
+    def frames(self):
+        """Get the Ethernet frame of each packet as bytes."""
+        for start, end in zip(self.frame_start.tolist(), self.frame_end.tolist()):
+            yield self._buf[start:end]
+
+    def write_pcap(self, filename):
+        """Write the packets, in their order in this PcapFlow, to a pcap file like scapy wrpcap."""
+        with open(filename, "wb") as f:
+            f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, LINKTYPE_ETHERNET))
+            for pkt_time, frame in zip(self.time.tolist(), self.frames()):
+                sec = int(pkt_time)
+                usec = int(round((pkt_time - sec) * 1000000))
+                f.write(struct.pack("<IIII", sec, usec, len(frame), len(frame)))
+                f.write(frame)
+
+
+def mac_to_int(mac):
+    """Get a MAC address string like '00:11:22:33:44:55' as an integer comparable to the MAC columns."""
+    return int(mac.replace(":", "").replace("-", ""), 16)
+
+
+def _new_columns():
+    return array.array("q"), array.array("q"), array.array("d")
+
+
+def _walk_pcap(buf, endian, rate):
+    starts, lengths, times = _new_columns()
+    header = struct.Struct(endian + "IIII")
+    _, _, _, _, _, linktype = struct.unpack_from(endian + "HHiIII", buf, 4)
+    if linktype & 0xFFFF != LINKTYPE_ETHERNET:
+        return starts, lengths, times, 0
+    pos, size, count = 24, len(buf), 0
+    while pos + 16 <= size:
+        sec, frac, caplen, _ = header.unpack_from(buf, pos)
+        pos += 16
+        starts.append(pos)
+        lengths.append(min(caplen, size - pos))
+        # Integer division rounds exactly like the Decimal time of scapy
+        times.append((sec * rate + frac) / rate)
+        pos += caplen
+        count += 1
+    return starts, lengths, times, count
+
+
+def _pcapng_tsresol(block, endian):
+    """Get the timestamp resolution of an interface description block, in ticks per second."""
+    pos = 8
+    while pos + 4 <= len(block):
+        code, length = struct.unpack_from(endian + "HH", block, pos)
+        if code == 0:
+            break
+        if code == PCAPNG_OPT_TSRESOL and length == 1:
+            value = block[pos + 4]
+            return (2 if value & 0x80 else 10) ** (value & 0x7F)
+        pos += 4 + (length + 3) // 4 * 4
+    return 1000000
+
+
+def _walk_pcapng(buf):
+    starts, lengths, times = _new_columns()
+    pos, size, count = 0, len(buf), 0
+    endian = "<"
+    interfaces = []
+    while pos + 12 <= size:
+        block_type, = struct.unpack_from(endian + "I", buf, pos)
+        if block_type == PCAPNG_SHB:
+            magic, = struct.unpack_from("<I", buf, pos + 8)
+            endian = "<" if magic == PCAPNG_BYTE_ORDER_MAGIC else ">"
+            interfaces = []
+        block_len, = struct.unpack_from(endian + "I", buf, pos + 4)
+        if block_len < 12:
+            break
+        body = pos + 8
+        if block_type == PCAPNG_IDB:
+            linktype, = struct.unpack_from(endian + "H", buf, body)
+            interfaces.append((linktype, _pcapng_tsresol(buf[body:pos + block_len - 4], endian)))
+        elif block_type in (PCAPNG_EPB, PCAPNG_PB):
+            if block_type == PCAPNG_EPB:
+                if_id, ts_high, ts_low, caplen, _ = struct.unpack_from(endian + "IIIII", buf, body)
+            else:
+                if_id, _, ts_high, ts_low, caplen, _ = struct.unpack_from(endian + "HHIIII", buf, body)
+            count += 1
+            if if_id < len(interfaces) and interfaces[if_id][0] == LINKTYPE_ETHERNET:
+                rate = interfaces[if_id][1]
+                starts.append(body + 20)
+                lengths.append(min(caplen, pos + block_len - 4 - body - 20))
+                times.append(((ts_high << 32) + ts_low) / rate)
+        elif block_type == PCAPNG_SPB:
+            count += 1
+        pos += block_len
+    return starts, lengths, times, count
+
+
+def _walk(buf):
+    """Get the start, captured length and time of each Ethernet frame in the capture, and the number of packets."""
+    magic = bytes(buf[:4])
+    if magic in PCAP_MAGIC:
+        return _walk_pcap(buf, *PCAP_MAGIC[magic])
+    if len(buf) >= 12 and struct.unpack_from("<I", buf, 0)[0] == PCAPNG_SHB:
+        return _walk_pcapng(buf)
+    raise ValueError("Not a pcap or pcapng file")
+
+
+class _Bytes(object):
+    """Reads fields at arrays of positions of the capture, positions out of their frame read 0."""
+
+    def __init__(self, buf):
+        self.data = np.frombuffer(buf, dtype=np.uint8) if len(buf) else np.zeros(1, dtype=np.uint8)
+
+    def u8(self, pos, end):
+        valid = pos < end
+        value = self.data[np.where(valid, pos, 0)].astype(np.uint64)
+        return np.where(valid, value, 0)
+
+    def be(self, pos, end, width):
+        value = np.zeros(len(pos), dtype=np.uint64)
+        for k in range(width):
+            value = (value << np.uint64(8)) | self.u8(pos + k, end)
+        return value
+
+
+def _decode(data, starts, ends):
+    """Decode the headers of the Ethernet frames between starts and ends."""
+    l3 = starts + 14
+    ether_type = data.be(starts + 12, ends, 2)
+    for _ in range(2):
+        tagged = (ether_type == ETH_P_8021Q) | (ether_type == ETH_P_8021AD)
+        ether_type = np.where(tagged, data.be(l3 + 2, ends, 2), ether_type)
+        l3 = np.where(tagged, l3 + 4, l3)
+
+    version = data.u8(l3, ends) >> np.uint64(4)
+    ipv4 = (ether_type == ETH_P_IP) & (version == 4) & (l3 + 20 <= ends)
+    ipv6 = (ether_type == ETH_P_IPV6) & (version == 6) & (l3 + 40 <= ends)
+
+    # IPv4 fragments other than the first one have no L4 header
+    first_fragment = (data.be(l3 + 6, ends, 2) & np.uint64(0x1FFF)) == 0
+    proto = np.where(ipv4, data.u8(l3 + 9, ends), np.where(ipv6, data.u8(l3 + 6, ends), 0))
+    l4 = np.where(ipv4, l3 + (data.u8(l3, ends) & np.uint64(0xF)).astype(np.int64) * 4, l3 + 40)
+    ip_len = np.where(ipv4, data.be(l3 + 2, ends, 2), data.be(l3 + 4, ends, 2) + 40).astype(np.int64)
+    # Headers must be in the IP packet, missing bytes of a truncated capture are not an error
+    ip_end = np.minimum(l3 + ip_len, ends)
+
+    ip = (ipv4 & first_fragment) | ipv6
+    tcp = ip & (proto == IPPROTO_TCP) & (l4 + 20 <= ip_end)
+    udp = ip & (proto == IPPROTO_UDP) & (l4 + 8 <= ip_end)
+    tcp_payload = l4 + (data.u8(l4 + 12, ends) >> np.uint64(4)).astype(np.int64) * 4
+
+    return {
+        "ipv4": ipv4,
+        "l3": l3,
+        "l4": l4,
+        "ip_end": ip_end,
+        "tcp": tcp,
+        "udp": udp,
+        "sport": data.be(l4, ends, 2),
+        "dport": data.be(l4 + 2, ends, 2),
+        "payload_start": np.where(tcp, tcp_payload, l4 + 8),
+    }
+
+
+def _columns(data, rows, starts, ends, times, index, headers, decap):
+    l3 = headers["l3"][rows]
+    ipv4 = headers["ipv4"][rows]
+    end = ends[rows]
+    start = starts[rows]
+    src_hi = np.where(ipv4, 0, data.be(l3 + 8, end, 8))
+    src_lo = np.where(ipv4, data.be(l3 + 12, end, 4), data.be(l3 + 16, end, 8))
+    dst_hi = np.where(ipv4, 0, data.be(l3 + 24, end, 8))
+    dst_lo = np.where(ipv4, data.be(l3 + 16, end, 4), data.be(l3 + 32, end, 8))
+    return {
+        "index": index[rows],
+        "time": times[rows],
+        "src_mac": data.be(start + 6, end, 6),
+        "dst_mac": data.be(start, end, 6),
+        "ip_version": np.where(ipv4, 4, 6).astype(np.uint8),
+        "src_ip_hi": src_hi.astype(np.uint64),
+        "src_ip": src_lo.astype(np.uint64),
+        "dst_ip_hi": dst_hi.astype(np.uint64),
+        "dst_ip": dst_lo.astype(np.uint64),
+        "sport": headers["sport"][rows].astype(np.uint16),
+        "dport": headers["dport"][rows].astype(np.uint16),
+        "decap": np.full(len(start), decap, dtype=bool),
+        "frame_start": start,
+        "frame_end": end,
+    }
+
+
+def _parse_payload_ids(buf, columns, payload_start, payload_end, payload_pad):
+    """Decode the TCP payloads into ids, get the rows that have a valid id."""
+    ids = np.zeros(len(payload_start), dtype=np.int64)
+    valid = np.zeros(len(payload_start), dtype=bool)
+    for row, (start, end) in enumerate(zip(payload_start.tolist(), payload_end.tolist())):
+        payload = buf[start:end]
+        try:
+            ids[row] = int(payload.decode().replace(payload_pad, "")) if payload_pad else int(payload)
+            valid[row] = True
+        except (ValueError, UnicodeDecodeError, OverflowError):
+            pass
+    columns["payload_id"] = ids
+    return valid
+
+
+def _chunks(*columns):
+    """Split the frame columns into chunks, to bound the memory of the temporary arrays of decoding."""
+    for start in range(0, max(len(columns[0]), 1), CHUNK_PACKETS):
+        yield tuple(column[start:start + CHUNK_PACKETS] for column in columns)
+
+
+def _decap(data, chunk, vxlan_sport):
+    """Get the frame columns of the inner frames of the VXLAN packets in a chunk."""
+    starts, ends, times, index = chunk
+    headers = _decode(data, starts, ends)
+    rows = headers["udp"] & (headers["sport"] == vxlan_sport)
+    inner_starts = headers["payload_start"][rows] + VXLAN_HEADER_LEN
+    inner_ends = ends[rows]
+    keep = inner_starts + 14 <= inner_ends
+    return inner_starts[keep], inner_ends[keep], times[rows][keep], index[rows][keep]
+
+
+def _read_chunk(buf, data, chunk, decap, sport, dport, payload_pad):
+    """Get the columns of the flow packets in a chunk of frames."""
+    starts, ends, times, index = chunk
+    headers = _decode(data, starts, ends)
+    rows = headers["tcp"]
+    if sport is not None:
+        rows &= headers["sport"] == sport
+    if dport is not None:
+        rows &= headers["dport"] == dport
+    columns = _columns(data, rows, starts, ends, times, index, headers, decap)
+    # Like the payload of scapy, the payload includes the bytes after the IP packet. Senders patching the payload
+    # of a parsed scapy packet leave the IP length of the original payload.
+    valid = _parse_payload_ids(buf, columns, headers["payload_start"][rows], ends[rows], payload_pad)
+    return {name: value[valid] for name, value in columns.items()}
+
+
+def _concat(parts):
+    return {name: np.concatenate([part[name] for part in parts]) for name in parts[0]}
+
+
+def read_tcp_flow(filename, sport=None, dport=None, payload_pad=None, vxlan_sport=None):
+    """
+    Read the TCP packets of a flow in a capture file.
+
+    A packet is in the flow if it is a TCP packet with the ports and its payload is an integer, like the payload
+    checks of the flows done with scapy. Like the TCP payload of scapy, the payload runs to the end of the frame.
+    Other packets, including TCP packets in ICMP errors and IPv4 fragments other than the first one, are skipped.
+
+    Args:
+        filename (str): A pcap or pcapng file.
+        sport (int): TCP source port of the flow, None for any.
+        dport (int): TCP destination port of the flow, None for any.
+        payload_pad (str): Characters padding the payload id, removed before decoding the id.
+        vxlan_sport (int): Also decapsulate UDP packets with this source port, as VXLAN packets, and read the flow
+            packets in them.
+
+    Returns:
+        PcapFlow: The packets of the flow, in capture order, then the decapsulated packets in capture order.
+
+    Raises:
+        ImportError: NumPy is not installed, see NUMPY_AVAILABLE.
+    """
+    if not NUMPY_AVAILABLE:
+        raise ImportError("read_tcp_flow() needs NumPy, examine {} with scapy instead".format(filename))
+    with open(filename, "rb") as f:
+        if f.seek(0, 2) == 0:
+            raise ValueError("Empty capture file {}".format(filename))
+        buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    starts, lengths, times, total = _walk(buf)
+    starts = np.frombuffer(starts, dtype=np.int64)
+    ends = starts + np.frombuffer(lengths, dtype=np.int64)
+    times = np.frombuffer(times, dtype=np.float64)
+    index = np.arange(len(starts), dtype=np.int64)
+    data = _Bytes(buf)
+
+    frames = [(starts, ends, times, index, False)]
+    if vxlan_sport is not None:
+        inner = [_decap(data, chunk, vxlan_sport) for chunk in _chunks(starts, ends, times, index)]
+        frames.append(tuple(np.concatenate([chunk[i] for chunk in inner]) for i in range(4)) + (True,))
+
+    parts = []
+    for frame_starts, frame_ends, frame_times, frame_index, decap in frames:
+        for chunk in _chunks(frame_starts, frame_ends, frame_times, frame_index):
+            parts.append(_read_chunk(buf, data, chunk, decap, sport, dport, payload_pad))
+
+    return PcapFlow(buf, _concat(parts), total)
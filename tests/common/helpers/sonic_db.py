@@ -2,24 +2,51 @@ import logging
 import json
 import six
 import ast
+import fnmatch
+import shlex
 from tests.common.helpers.constants import DEFAULT_NAMESPACE
 from tests.common.devices.sonic_asic import SonicAsic
 
 logger = logging.getLogger(__name__)
 
+# Lua script run by EVAL to get all the hashes whose keys match ARGV[1] in one call, as a JSON object of
+# {key: {field: value}}. Keys of other types are skipped.
+GET_TABLE_SCRIPT = " ".join([
+    "local result = {}",
+    "for _, key in ipairs(redis.call('KEYS', ARGV[1])) do",
+    "if redis.call('TYPE', key)['ok'] == 'hash' then",
+    "local fields = redis.call('HGETALL', key)",
+    "local entry = {}",
+    "for i = 1, #fields, 2 do entry[fields[i]] = fields[i + 1] end",
+    "result[key] = entry",
+    "end",
+    "end",
+    "return cjson.encode(result)",
+])
+
 
 class SonicDbCli(object):
     """Base class for interface to SonicDb using sonic-db-cli command.
 
+        In pipelined mode, a table is fetched as a whole by get_table() in one sonic-db-cli call and cached until
+        refresh(). hget_key_value(), hget_all() and get_keys() of the keys of a cached table, and the neighbor lookups
+        of the subclasses, are then lookups of the cached table instead of a sonic-db-cli call each.
+
         Attributes:
             host: a SonicHost or SonicAsic.  Commands will be run on this shell.
             database: database number.
+            pipelined: If True, tables are fetched as a whole and cached for the lookups.
         """
 
-    def __init__(self, host, database='APPL_DB'):
+    def __init__(self, host, database='APPL_DB', pipelined=False):
         """Initializes base class with defaults"""
         self.host = host
         self.database = database
+        self.pipelined = pipelined
+        # Tables fetched by get_table(), by key pattern
+        self._tables = {}
+        # Indexes of the cached tables by _get_table_index(), by key pattern
+        self._indexes = {}
 
     def _cli_prefix(self):
         """Builds opening of sonic-db-cli command for other methods."""
@@ -69,6 +96,63 @@ class SonicDbCli(object):
 
         return result
 
+    def get_table(self, pattern, refresh=False):
+        """
+        Gets all the hashes whose keys match a pattern in one sonic-db-cli call, by an EVAL of GET_TABLE_SCRIPT.
+
+        The table is cached until refresh() or a call with refresh=True.
+
+        Args:
+            pattern: Redis KEYS pattern of the table, like "NEIGH_TABLE:*".
+            refresh: If True, get a fresh copy from the DUT.
+
+        Returns:
+            Dictionary of the fields of each key, {key: {field: value}}.
+        """
+        if pattern in self._tables and refresh is False:
+            return self._tables[pattern]
+
+        cmd = self._cli_prefix() + "EVAL {} 0 {}".format(shlex.quote(GET_TABLE_SCRIPT), shlex.quote(pattern))
+        table = json.loads(self._run_and_raise(cmd)["stdout"])
+        # cjson encodes an empty Lua table the same as an empty array
+        self._tables[pattern] = table if isinstance(table, dict) else {}
+        logger.debug("Fetched %d keys of %s", len(self._tables[pattern]), pattern)
+        return self._tables[pattern]
+
+    def refresh(self):
+        """Drops the tables cached by get_table(), they are fetched again on next use."""
+        self._tables = {}
+        self._indexes = {}
+
+    def _get_table_index(self, pattern, index_of_key):
+        """
+        Returns a dictionary from an index of the keys of a table to the keys, like neighbor IP to neighbor key.
+
+        The index is built once for each fetch of the table. The first key is kept if several keys have the same index.
+
+        Args:
+            pattern: Redis KEYS pattern of the table.
+            index_of_key: Function getting the index of a key, None for keys not to index.
+        """
+        table = self.get_table(pattern)
+        if pattern not in self._indexes or self._indexes[pattern][0] is not table:
+            index = {}
+            for key in table:
+                value = index_of_key(key)
+                if value is not None:
+                    index.setdefault(value, key)
+            self._indexes[pattern] = (table, index)
+        return self._indexes[pattern][1]
+
+    def _cached_table_of(self, key):
+        """Returns the cached table the key would be in, None if the key is not covered by a cached table."""
+        if not self.pipelined:
+            return None
+        for pattern, table in self._tables.items():
+            if fnmatch.fnmatchcase(key, pattern):
+                return table
+        return None
+
     def hget_key_value(self, key, field):
         """
         Executes a sonic-db-cli hget command.
@@ -84,6 +168,13 @@ class SonicDbCli(object):
 
 
         """
+        table = self._cached_table_of(key)
+        if table is not None:
+            value = table.get(key, {}).get(field, "")
+            if value == "":
+                raise SonicDbKeyNotFound("Key: %s, field: %s not found in cached table" % (key, field))
+            return value
+
         cmd = self._cli_prefix() + "hget {} {}".format(key, field)
         result = self._run_and_check(cmd)
         if result == {}:
@@ -104,6 +195,10 @@ class SonicDbCli(object):
         Raises:
             SonicDbKeyNotFound: If the key is not found.
         """
+        table = self._cached_table_of(key)
+        if table is not None:
+            # Same as HGETALL of a missing key
+            return dict(table.get(key, {}))
 
         cmd = self._cli_prefix() + "HGETALL {}".format(key)
         result = self._run_and_check(cmd)
@@ -161,6 +256,12 @@ class SonicDbCli(object):
                 SonicDbKeyNotFound: If the key or field has no value or is not present.
 
         """
+        if self.pipelined and table in self._tables:
+            keys = list(self._tables[table])
+            if not keys and raise_error_when_not_found:
+                raise SonicDbKeyNotFound("No keys for %s found in cached table" % table)
+            return keys
+
         cmd = self._cli_prefix() + " keys {}".format(table)
         result = self._run_and_check(cmd)
         if result == {}:
@@ -224,14 +325,16 @@ class AsicDbCli(SonicDbCli):
     ASIC_ROUTERINTF_TABLE = "ASIC_STATE:SAI_OBJECT_TYPE_ROUTER_INTERFACE"
     ASIC_NEIGH_ENTRY_TABLE = "ASIC_STATE:SAI_OBJECT_TYPE_NEIGHBOR_ENTRY"
 
-    def __init__(self, host):
+    def __init__(self, host, pipelined=False):
         """
         Initializes a connection to the ASIC DB (database 1)
         """
-        super(AsicDbCli, self).__init__(host, 'ASIC_DB')
+        super(AsicDbCli, self).__init__(host, 'ASIC_DB', pipelined=pipelined)
         # cache this to improve speed
         self.hostif_portidlist = []
         self.hostif_table = []
+        # hostif key by port ID, of hostif_table
+        self.hostif_by_portid = {}
         self.system_port_key_list = []
         self.port_key_list = []
         self.lagid_key_list = []
@@ -289,6 +392,14 @@ class AsicDbCli(SonicDbCli):
         cmd = self._cli_prefix() + "KEYS %s:*" % AsicDbCli.ASIC_NEIGH_ENTRY_TABLE
         return self._run_and_raise(cmd)["stdout_lines"]
 
+    @staticmethod
+    def _neighbor_ip_of_key(key):
+        """Returns the IP of a neighbor key, like ASIC_STATE:SAI_OBJECT_TYPE_NEIGHBOR_ENTRY:{"ip":"10.0.0.1",...}"""
+        try:
+            return json.loads(key.split(":", 2)[2]).get("ip")
+        except (IndexError, ValueError, AttributeError):
+            return None
+
     def get_neighbor_key_by_ip(self, ipaddr):
         """Returns the key in the neighbor table that is for a specific IP neighbor
 
@@ -296,6 +407,14 @@ class AsicDbCli(SonicDbCli):
             ipaddr: The IP address to search for in the neighbor table.
 
         """
+        if self.pipelined:
+            neighbor_key = self._get_table_index("%s:*" % AsicDbCli.ASIC_NEIGH_ENTRY_TABLE,
+                                                 self._neighbor_ip_of_key).get(ipaddr)
+            if neighbor_key is None:
+                raise SonicDbKeyNotFound("Did not find key: %s*%s* in asicdb" %
+                                         (AsicDbCli.ASIC_NEIGH_ENTRY_TABLE, ipaddr))
+            return neighbor_key
+
         result = self._run_and_raise(self._cli_prefix() + "KEYS %s*%s*" % (AsicDbCli.ASIC_NEIGH_ENTRY_TABLE, ipaddr))
         match_str = '"ip":"%s"' % ipaddr
         for key in result["stdout_lines"]:
@@ -319,6 +438,11 @@ class AsicDbCli(SonicDbCli):
             neighbor_key: The full key of the neighbor table.
             field: The field to get in the neighbor hash table.
         """
+        table = self._cached_table_of(neighbor_key)
+        if table is not None:
+            # Same as the output of HGET of a missing key or field
+            return table.get(neighbor_key, {}).get(field, "")
+
         cmd = "%s ASIC_DB HGET '%s' %s" % (self.host.sonic_db_cli, neighbor_key, field)
 
         result = self.host.sonichost.shell(cmd)
@@ -342,6 +466,10 @@ class AsicDbCli(SonicDbCli):
         else:
             hostif_table = self.dump("%s:" % AsicDbCli.ASIC_HOSTIF_TABLE)
             self.hostif_table = hostif_table
+            self.hostif_by_portid = {}
+            for hostif_key in hostif_table:
+                self.hostif_by_portid.setdefault(hostif_table[hostif_key]['value']['SAI_HOSTIF_ATTR_OBJ_ID'],
+                                                 hostif_key)
 
         return hostif_table
 
@@ -380,12 +508,10 @@ class AsicDbCli(SonicDbCli):
         Raises:
             SonicDbKeyNotFound: If no hostif exists with the portid provided.
         """
-        hostif_table = self.get_hostif_table(refresh)
+        self.get_hostif_table(refresh)
 
-        for hostif_key in hostif_table:
-            hostif_portid = hostif_table[hostif_key]['value']['SAI_HOSTIF_ATTR_OBJ_ID']
-            if hostif_portid == portid:
-                return hostif_key
+        if portid in self.hostif_by_portid:
+            return self.hostif_by_portid[portid]
 
         raise SonicDbKeyNotFound("Can't find hostif in asicdb with portid: %s", portid)
 
@@ -408,11 +534,12 @@ class AsicDbCli(SonicDbCli):
         port_key_list = self.get_port_key_list(refresh=refresh)
         system_port_keylist = self.get_system_port_key_list(refresh=refresh)
         lag_keylist = self.get_asic_db_lag_list(refresh=refresh)
+        self.get_hostif_table()
 
         # could be a frontpanel port
         if "%s:%s" % (
                 AsicDbCli.ASIC_PORT_TABLE,
-                portid) in port_key_list and portid in self.get_hostif_portid_oidlist():
+                portid) in port_key_list and portid in self.hostif_by_portid:
             return "hostif"
         # could be a system port
         elif "%s:%s" % (AsicDbCli.ASIC_SYSPORT_TABLE, portid) in system_port_keylist:
@@ -445,8 +572,8 @@ class AppDbCli(SonicDbCli):
     APP_LAG_TABLE = "LAG_TABLE"
     APP_LAG_MEMBER_TABLE = "LAG_MEMBER_TABLE"
 
-    def __init__(self, host):
-        super(AppDbCli, self).__init__(host, 'APPL_DB')
+    def __init__(self, host, pipelined=False):
+        super(AppDbCli, self).__init__(host, 'APPL_DB', pipelined=pipelined)
 
     def get_neighbor_key_by_ip(self, ipaddr):
         """Returns the key in the neighbor table that is for a specific IP neighbor
@@ -455,6 +582,14 @@ class AppDbCli(SonicDbCli):
             ipaddr: The IP address to search for in the neighbor table.
 
         """
+        if self.pipelined:
+            # Keys are NEIGH_TABLE:<interface>:<ip>
+            index = self._get_table_index("%s:*" % AppDbCli.APP_NEIGH_TABLE,
+                                          lambda key: key.split(":", 2)[2] if key.count(":") >= 2 else None)
+            if ipaddr not in index:
+                raise SonicDbNoCommandOutput("No key for %s in cached %s" % (ipaddr, AppDbCli.APP_NEIGH_TABLE))
+            return index[ipaddr]
+
         result = self._run_and_raise(self._cli_prefix() + "KEYS %s:*%s" % (AppDbCli.APP_NEIGH_TABLE, ipaddr))
         neighbor_key = None
         for key in result["stdout_lines"]:
@@ -497,9 +632,9 @@ class VoqDbCli(SonicDbCli):
     SYSTEM_LAG_MEMBER_TABLE = "SYSTEM_LAG_MEMBER_TABLE"
     SYSTEM_NEIGHBOR_TABLE = "SYSTEM_NEIGH"
 
-    def __init__(self, host):
+    def __init__(self, host, pipelined=False):
         """Initializes the class with the database parameters and finds the IP address of the database"""
-        super(VoqDbCli, self).__init__(host, 'CHASSIS_APP_DB')
+        super(VoqDbCli, self).__init__(host, 'CHASSIS_APP_DB', pipelined=pipelined)
         output = host.command("grep chassis_db_address /etc/sonic/chassisdb.conf")
         self.ip = output['stdout'].split("=")[1]
 
@@ -510,6 +645,13 @@ class VoqDbCli(SonicDbCli):
             ipaddr: The IP address to search for in the neighbor table.
 
         """
+        if self.pipelined:
+            # Keys are SYSTEM_NEIGH|<slot>|<asic>|<interface>|<ip>
+            index = self._get_table_index("%s|*" % VoqDbCli.SYSTEM_NEIGHBOR_TABLE, lambda key: key.rsplit("|", 1)[1])
+            if ipaddr not in index:
+                raise SonicDbNoCommandOutput("No key for %s in cached %s" % (ipaddr, VoqDbCli.SYSTEM_NEIGHBOR_TABLE))
+            return index[ipaddr]
+
         cmd = self._cli_prefix() + 'KEYS "%s|*%s"' % (VoqDbCli.SYSTEM_NEIGHBOR_TABLE, ipaddr)
         result = self._run_and_raise(cmd)
         neighbor_key = None
@@ -562,6 +704,37 @@ class VoqDbCli(SonicDbCli):
         return self.dump(VoqDbCli.SYSTEM_NEIGHBOR_TABLE)
 
 
+class SonicDbCliCache(object):
+    """
+    Pipelined SonicDbCli instances shared by a series of checks, one for each class and host.
+
+    Create one for the checks of a state of the DBs, like checking all the neighbors after a link flap, so each table is
+    fetched once for all the checks. Call refresh() when the state is changed.
+    """
+
+    def __init__(self):
+        self._clis = {}
+
+    def get(self, cls, host):
+        """
+        Returns the shared instance of a SonicDbCli class for a host.
+
+        Args:
+            cls: AsicDbCli, AppDbCli or VoqDbCli.
+            host: a SonicHost or SonicAsic.
+        """
+        key = (cls, id(host))
+        if key not in self._clis:
+            # The host is kept so its id is not reused
+            self._clis[key] = (host, cls(host, pipelined=True))
+        return self._clis[key][1]
+
+    def refresh(self):
+        """Drops the cached tables of all the instances."""
+        for _, cli in self._clis.values():
+            cli.refresh()
+
+
 class SonicDbKeyNotFound(KeyError):
     """
     Raised when requested keys or fields are not found in the db.
@@ -0,0 +1,92 @@
+"""Benchmark of reading a disruption test capture with read_tcp_flow and with scapy.
+
+Writes a pcap file of a TCP test flow, a sent and a received copy of each packet with a few losses, then reads it:
+    columns: read_tcp_flow, then sorting by payload id
+    scapy: rdpcap, then filtering and sorting the packets like the flow checks did with scapy
+
+and prints the time and peak memory of each.
+
+Run it from the root of sonic-mgmt repo:
+    python -m tests.common.helpers.unit_test.benchmark_pcap_flow --count 100000
+"""
+import argparse
+import os
+import random
+import resource
+import struct
+import subprocess
+import sys
+import tempfile
+import time
+
+SENT_MAC = "00:11:22:33:44:55"
+RECEIVED_MAC = "00:aa:bb:cc:dd:ee"
+
+
+def write_capture(filename, count):
+    import scapy.all as scapyall
+    sent = bytes(scapyall.Ether(src="02:00:00:00:00:01", dst=SENT_MAC) /
+                 scapyall.IP(src="10.0.0.1", dst="192.168.0.2") / scapyall.TCP(sport=1234, dport=5000))
+    received = bytes(scapyall.Ether(src=RECEIVED_MAC, dst="02:00:00:00:00:02") /
+                     scapyall.IP(src="10.0.0.1", dst="192.168.0.2", ttl=63) / scapyall.TCP(sport=1234, dport=5000))
+    rnd = random.Random(0)
+    with open(filename, "wb") as f:
+        f.write(struct.pack("<IHHiIII", 0xA1B2C3D4, 2, 4, 0, 0, 65535, 1))
+        usec = 0
+        for i in range(count):
+            payload = str(i).encode() + b"X" * 60
+            for template in (sent, received) if rnd.random() > 0.001 else (sent,):
+                frame = bytearray(template + payload)
+                struct.pack_into(">H", frame, 16, len(frame) - 14)
+                usec += 100
+                f.write(struct.pack("<IIII", 1700000000 + usec // 1000000, usec % 1000000, len(frame), len(frame)))
+                f.write(frame)
+
+
+def read_columns(filename):
+    from tests.common.helpers.pcap_flow import read_tcp_flow
+    flow = read_tcp_flow(filename, sport=1234, dport=5000, payload_pad="X")
+    return len(flow.sort_by_payload())
+
+
+def read_scapy(filename):
+    import scapy.all as scapyall
+    packets = [pkt for pkt in scapyall.rdpcap(filename) if
+               scapyall.TCP in pkt and pkt[scapyall.TCP].sport == 1234 and pkt[scapyall.TCP].dport == 5000 and
+               (pkt[scapyall.Ether].dst == SENT_MAC or pkt[scapyall.Ether].src == RECEIVED_MAC)]
+    packets.sort(key=lambda pkt: (int(bytes(pkt[scapyall.TCP].payload).decode().replace("X", "")), pkt.time))
+    return len(packets)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=100000, help="number of packet ids of the flow")
+    parser.add_argument("--skip_scapy", action="store_true", help="don't read with scapy")
+    parser.add_argument("--mode", help=argparse.SUPPRESS)
+    parser.add_argument("--file", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        # Each mode runs in its own process, so that peak memory is its own
+        start = time.time()
+        packets = {"columns": read_columns, "scapy": read_scapy}[args.mode](args.file)
+        elapsed = time.time() - start
+        print("{:<8} {:>8} flow packets {:>8.2f}s {:>8.0f} MB peak RSS".format(
+            args.mode, packets, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024))
+        return
+
+    fd, filename = tempfile.mkstemp(suffix=".pcap")
+    os.close(fd)
+    try:
+        write_capture(filename, args.count)
+        print("capture of {} MB".format(os.path.getsize(filename) // (1024 * 1024)))
+        modes = ["columns"] if args.skip_scapy else ["columns", "scapy"]
+        for mode in modes:
+            subprocess.check_call([sys.executable, "-m", "tests.common.helpers.unit_test.benchmark_pcap_flow",
+                                   "--mode", mode, "--file", filename])
+    finally:
+        os.unlink(filename)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,188 @@
+import importlib
+import os
+import random
+import sys
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import scapy.all as scapyall
+
+from tests.common.helpers import pcap_flow
+from tests.common.helpers.pcap_flow import mac_to_int, read_tcp_flow
+
+MACS = ["00:11:22:33:44:55", "00:aa:bb:cc:dd:ee", "02:01:02:03:04:05"]
+IPV4 = ["10.0.0.1", "192.168.0.2", "192.168.0.3"]
+IPV6 = ["fc02:1000::2", "::ffff:10.0.0.1", "2001:db8::1:0:0:1"]
+
+
+def random_packets(seed, count=300):
+    """TCP flow packets mixed with other packets, with the scapy view of each flow packet."""
+    rnd = random.Random(seed)
+    packets = []
+    for i in range(count):
+        eth = scapyall.Ether(src=rnd.choice(MACS), dst=rnd.choice(MACS))
+        if rnd.random() < 0.2:
+            eth = eth / scapyall.Dot1Q(vlan=rnd.randint(1, 4094))
+        if rnd.random() < 0.3:
+            ip = scapyall.IPv6(src=rnd.choice(IPV6), dst=rnd.choice(IPV6))
+        else:
+            ip = scapyall.IP(src=rnd.choice(IPV4), dst=rnd.choice(IPV4),
+                             options=[scapyall.IPOption_NOP()] * 4 if rnd.random() < 0.1 else [])
+        kind = rnd.random()
+        payload = str(i).encode() + (b"X" * rnd.randint(0, 3) if rnd.random() < 0.5 else b"")
+        if kind < 0.05:
+            pkt = eth / ip / scapyall.UDP(sport=1234, dport=4789) / payload
+        elif kind < 0.1:
+            pkt = eth / scapyall.IP() / scapyall.ICMP() / scapyall.IP() / scapyall.TCP(sport=1234, dport=5000) / payload
+        elif kind < 0.15:
+            pkt = eth / ip / scapyall.TCP(sport=1234, dport=5000) / b"not an id"
+        elif kind < 0.2:
+            pkt = eth / ip / scapyall.TCP(sport=rnd.choice([1234, 80]), dport=rnd.choice([5000, 443])) / payload
+        else:
+            pkt = eth / ip / scapyall.TCP(sport=1234, dport=5000,
+                                          options=[("NOP", None)] * 4 if rnd.random() < 0.1 else []) / payload
+        pkt.time = 1700000000 + i * 0.001 + rnd.random() * 0.0005
+        packets.append(pkt)
+    return packets
+
+
+def scapy_flow(packets, payload_pad="X"):
+    """The flow packets and their columns, decoded by scapy."""
+    flow = []
+    for pkt in packets:
+        if scapyall.TCP not in pkt or scapyall.ICMP in pkt:
+            continue
+        ip = pkt[scapyall.IP] if scapyall.IP in pkt else pkt[scapyall.IPv6]
+        try:
+            payload_id = int(bytes(pkt[scapyall.TCP].payload).decode().replace(payload_pad, ""))
+        except ValueError:
+            continue
+        flow.append({
+            "time": float(pkt.time),
+            "src_mac": mac_to_int(pkt[scapyall.Ether].src),
+            "dst_mac": mac_to_int(pkt[scapyall.Ether].dst),
+            "src_ip": ip.src,
+            "dst_ip": ip.dst,
+            "sport": pkt[scapyall.TCP].sport,
+            "dport": pkt[scapyall.TCP].dport,
+            "payload_id": payload_id,
+        })
+    return flow
+
+
+class TestPcapFlow(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write(self, name, packets):
+        filename = os.path.join(self.tmp_dir, name)
+        if name.endswith(".pcapng"):
+            with scapyall.PcapNgWriter(filename) as writer:
+                for pkt in packets:
+                    writer.write(pkt)
+        else:
+            scapyall.wrpcap(filename, packets)
+        return filename
+
+    def assert_same_flow(self, flow, expected):
+        self.assertEqual(len(flow), len(expected))
+        for name in ["time", "src_mac", "dst_mac", "sport", "dport", "payload_id"]:
+            self.assertEqual(getattr(flow, name).tolist(), [pkt[name] for pkt in expected], name)
+        for source, name in [(True, "src_ip"), (False, "dst_ip")]:
+            addresses = [None] * len(flow)
+            for address, packets in flow.split_by_ip(source).items():
+                for row in packets.index.tolist():
+                    addresses[flow.index.tolist().index(row)] = address
+            self.assertEqual(addresses, [pkt[name] for pkt in expected], name)
+
+    def test_same_as_scapy(self):
+        for seed, name in enumerate(["capture.pcap", "capture.pcapng"]):
+            filename = self.write(name, random_packets(seed))
+            packets = scapyall.rdpcap(filename)
+            flow = read_tcp_flow(filename, payload_pad="X")
+            self.assertEqual(flow.total_packets, len(packets))
+            self.assert_same_flow(flow, scapy_flow(packets))
+            # Frames are decoded in chunks
+            with mock.patch.object(pcap_flow, "CHUNK_PACKETS", 7):
+                self.assert_same_flow(read_tcp_flow(filename, payload_pad="X"), scapy_flow(packets))
+
+    def test_port_filter(self):
+        filename = self.write("capture.pcap", random_packets(2))
+        packets = scapyall.rdpcap(filename)
+        flow = read_tcp_flow(filename, sport=1234, dport=5000, payload_pad="X")
+        self.assert_same_flow(flow, [pkt for pkt in scapy_flow(packets)
+                                     if pkt["sport"] == 1234 and pkt["dport"] == 5000])
+
+    def test_payload_to_end_of_frame(self):
+        template = scapyall.Ether() / scapyall.IP() / scapyall.TCP() / (b"0" * 46)
+        # Payload patched like the senders do, IP length is still the one of the template
+        patched = scapyall.Ether(bytes(template))
+        patched.load = b"0" * 60 + b"123"
+        padded = scapyall.Ether(bytes(scapyall.Ether() / scapyall.IP() / scapyall.TCP() / b"7") + b"\x00" * 20)
+        filename = self.write("capture.pcap", [patched, padded])
+        self.assertEqual(scapyall.rdpcap(filename)[0][scapyall.IP].len, 86)
+        self.assertEqual(read_tcp_flow(filename).payload_id.tolist(), [123])
+        self.assert_same_flow(read_tcp_flow(filename, payload_pad="X"), scapy_flow(scapyall.rdpcap(filename)))
+
+    def test_fragments(self):
+        fragments = [scapyall.Ether() / fragment for fragment in
+                     scapyall.fragment(scapyall.IP() / scapyall.TCP() / (b"12" + b" " * 3000), 1400)]
+        # Non-first fragments have no TCP header
+        self.assertEqual(read_tcp_flow(self.write("capture.pcap", fragments)).payload_id.tolist(), [12])
+
+    def test_vxlan_decap(self):
+        inner = scapyall.Ether(src=MACS[0], dst=MACS[1]) / scapyall.IP() / scapyall.TCP(sport=1234, dport=5000) / b"42"
+        outer = scapyall.Ether() / scapyall.IP() / scapyall.UDP(sport=1234, dport=4789) / scapyall.VXLAN() / inner
+        plain = scapyall.Ether() / scapyall.IP() / scapyall.TCP(sport=1234, dport=5000) / b"42"
+        outer.time, plain.time = 1.5, 1.5
+        filename = self.write("capture.pcap", [outer, plain])
+        self.assertEqual(len(read_tcp_flow(filename)), 1)
+        with mock.patch.object(pcap_flow, "CHUNK_PACKETS", 1):
+            flow = read_tcp_flow(filename, vxlan_sport=1234).sort_by_payload()
+        self.assertEqual(flow.decap.tolist(), [False, True])
+        self.assertEqual(flow.index.tolist(), [1, 0])
+        self.assertEqual(list(flow.frames())[1], bytes(inner))
+
+    def test_write_pcap(self):
+        packets = random_packets(3)
+        flow = read_tcp_flow(self.write("capture.pcapng", packets), payload_pad="X").sort_by_payload()
+        filename = os.path.join(self.tmp_dir, "filtered.pcap")
+        flow.write_pcap(filename)
+        written = scapyall.rdpcap(filename)
+        self.assertEqual([bytes(pkt) for pkt in written], list(flow.frames()))
+        expected = os.path.join(self.tmp_dir, "expected.pcap")
+        scapyall.wrpcap(expected, [scapyall.Ether(frame) for frame in flow.frames()])
+        for pkt, pkt_time in zip(written, flow.time.tolist()):
+            self.assertAlmostEqual(float(pkt.time), pkt_time, places=6)
+
+    def test_not_a_capture(self):
+        filename = os.path.join(self.tmp_dir, "capture.pcap")
+        with open(filename, "wb") as f:
+            f.write(b"not a capture file")
+        with self.assertRaises(ValueError):
+            read_tcp_flow(filename)
+
+    def test_without_numpy(self):
+        filename = self.write("capture.pcap", random_packets(4))
+        try:
+            # Importing numpy raises ImportError while pcap_flow is loaded again
+            with mock.patch.dict(sys.modules, {"numpy": None}):
+                importlib.reload(pcap_flow)
+            self.assertFalse(pcap_flow.NUMPY_AVAILABLE)
+            self.assertEqual(mac_to_int(MACS[0]), 0x001122334455)
+            with self.assertRaises(ImportError):
+                read_tcp_flow(filename)
+        finally:
+            importlib.reload(pcap_flow)
+        self.assertTrue(pcap_flow.NUMPY_AVAILABLE)
+        self.assertEqual(read_tcp_flow(filename, payload_pad="X").total_packets, 300)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,158 @@
+import ast
+import fnmatch
+import json
+import shlex
+import unittest
+
+from tests.common.helpers.sonic_db import (AppDbCli, AsicDbCli, GET_TABLE_SCRIPT, SonicDbCliCache,
+                                           SonicDbKeyNotFound, SonicDbNoCommandOutput, VoqDbCli)
+
+ASIC_NEIGH = "ASIC_STATE:SAI_OBJECT_TYPE_NEIGHBOR_ENTRY"
+
+DBS = {
+    "ASIC_DB": {
+        ASIC_NEIGH + ':{"ip":"10.0.0.1","rif":"oid:0x6000000000001","switch_id":"oid:0x21000000000000"}': {
+            "SAI_NEIGHBOR_ENTRY_ATTR_DST_MAC_ADDRESS": "52:54:00:00:00:01",
+            "SAI_NEIGHBOR_ENTRY_ATTR_ENCAP_INDEX": "1074790408",
+        },
+        ASIC_NEIGH + ':{"ip":"fc00::1","rif":"oid:0x6000000000002","switch_id":"oid:0x21000000000000"}': {
+            "SAI_NEIGHBOR_ENTRY_ATTR_DST_MAC_ADDRESS": "52:54:00:00:00:02",
+        },
+        "ASIC_STATE:SAI_OBJECT_TYPE_PORT:oid:0x1000000000002": {"SAI_PORT_ATTR_ADMIN_STATE": "true"},
+    },
+    "APPL_DB": {
+        "NEIGH_TABLE:Ethernet0:10.0.0.1": {"neigh": "52:54:00:00:00:01", "family": "IPv4"},
+        "NEIGH_TABLE:Ethernet4:fc00::1": {"neigh": "52:54:00:00:00:02", "family": "IPv6"},
+        "NEIGH_TABLE:Ethernet8:110.0.0.1": {"neigh": "52:54:00:00:00:03", "family": "IPv4"},
+        "PORT_TABLE:Ethernet0": {"admin_status": "up"},
+    },
+    "CHASSIS_APP_DB": {
+        "SYSTEM_NEIGH|Linecard1|Asic0|Ethernet0|10.0.0.1": {"neigh": "52:54:00:00:00:01", "encap_index": "1"},
+        "SYSTEM_NEIGH|Linecard1|Asic0|Ethernet4|fc00::1": {"neigh": "52:54:00:00:00:02", "encap_index": "2"},
+    },
+}
+
+
+class FakeHost(object):
+    """Runs sonic-db-cli commands on DBS, like the command module runs them on a DUT."""
+
+    hostname = "dut"
+    sonic_db_cli = "sonic-db-cli"
+
+    def __init__(self):
+        self.sonichost = self
+        self.commands = []
+
+    def _result(self, out):
+        return {"rc": 0, "stdout": out, "stdout_lines": out.splitlines()}
+
+    def run_sonic_db_cli_cmd(self, cmd):
+        self.commands.append(cmd)
+        args = shlex.split(cmd)
+        db, op, args = DBS[args[0]], args[1].upper(), args[2:]
+        if op == "EVAL":
+            assert args[0] == GET_TABLE_SCRIPT and args[1] == "0"
+            table = {key: value for key, value in db.items() if fnmatch.fnmatchcase(key, args[2])}
+            return self._result(json.dumps(table) if table else "{}")
+        if op == "KEYS":
+            return self._result("\n".join(key for key in db if fnmatch.fnmatchcase(key, args[0])))
+        if op == "HGET":
+            return self._result(db.get(args[0], {}).get(args[1], ""))
+        if op == "HGETALL":
+            return self._result(repr(db.get(args[0], {})))
+        raise NotImplementedError(cmd)
+
+    def shell(self, cmd):
+        return self.run_sonic_db_cli_cmd(cmd.split(" ", 1)[1])
+
+    def command(self, cmd):
+        return self._result("chassis_db_address=127.0.0.1")
+
+
+class TestSonicDbCli(unittest.TestCase):
+
+    def lookups(self, pipelined):
+        """Results of the lookups, and the commands run for them"""
+        host = FakeHost()
+        asicdb = AsicDbCli(host, pipelined=pipelined)
+        appdb = AppDbCli(host, pipelined=pipelined)
+        voqdb = VoqDbCli(host, pipelined=pipelined)
+        results = []
+        for ip in ["10.0.0.1", "fc00::1"]:
+            key = asicdb.get_neighbor_key_by_ip(ip)
+            results.append(key)
+            results.append(asicdb.get_neighbor_value(key, "SAI_NEIGHBOR_ENTRY_ATTR_DST_MAC_ADDRESS"))
+            results.append(asicdb.get_neighbor_value(key, "SAI_NEIGHBOR_ENTRY_ATTR_ENCAP_INDEX"))
+            key = appdb.get_neighbor_key_by_ip(ip)
+            results.append(key)
+            results.append(appdb.hget_key_value(key, "neigh"))
+            results.append(appdb.hget_all(key))
+            results.append(appdb.get_and_check_key_value(key, DBS["APPL_DB"][key]["neigh"], field="neigh"))
+            key = voqdb.get_neighbor_key_by_ip(ip)
+            results.append(key)
+            results.append(voqdb.hget_key_value(key, "encap_index"))
+        # A key not in a cached table is still looked up
+        results.append(appdb.hget_key_value("PORT_TABLE:Ethernet0", "admin_status"))
+        return results, host.commands
+
+    def test_pipelined_lookups_same_as_commands(self):
+        results, commands = self.lookups(pipelined=False)
+        pipelined_results, pipelined_commands = self.lookups(pipelined=True)
+        self.assertEqual(pipelined_results, results)
+        # One EVAL for each neighbor table, and the lookup not in a cached table
+        self.assertEqual(len(pipelined_commands), 4)
+        self.assertEqual(sum("EVAL" in cmd for cmd in pipelined_commands), 3)
+        self.assertEqual(len(commands), 19)
+
+    def test_missing_keys(self):
+        host = FakeHost()
+        asicdb = AsicDbCli(host, pipelined=True)
+        appdb = AppDbCli(host, pipelined=True)
+        with self.assertRaises(SonicDbKeyNotFound):
+            asicdb.get_neighbor_key_by_ip("10.0.0.9")
+        with self.assertRaises(SonicDbNoCommandOutput):
+            appdb.get_neighbor_key_by_ip("10.0.0.9")
+        # Exact match of the IP, 110.0.0.1 is not taken for 10.0.0.1
+        self.assertEqual(appdb.get_neighbor_key_by_ip("10.0.0.1"), "NEIGH_TABLE:Ethernet0:10.0.0.1")
+        with self.assertRaises(SonicDbKeyNotFound):
+            appdb.hget_key_value("NEIGH_TABLE:Ethernet0:10.0.0.1", "missing")
+        self.assertEqual(appdb.hget_all("NEIGH_TABLE:Ethernet0:10.0.0.9"),
+                         ast.literal_eval(host.run_sonic_db_cli_cmd("APPL_DB HGETALL missing")["stdout"]))
+
+    def test_refresh(self):
+        host = FakeHost()
+        appdb = AppDbCli(host, pipelined=True)
+        table = appdb.get_table("NEIGH_TABLE:*")
+        self.assertEqual(set(table), {key for key in DBS["APPL_DB"] if key.startswith("NEIGH_TABLE:")})
+        self.assertIs(appdb.get_table("NEIGH_TABLE:*"), table)
+        self.assertEqual(appdb.get_keys("NEIGH_TABLE:*"), list(table))
+        self.assertEqual(appdb.get_table("NOT_A_TABLE:*"), {})
+        self.assertEqual(len(host.commands), 2)
+
+        DBS["APPL_DB"]["NEIGH_TABLE:Ethernet12:10.0.0.5"] = {"neigh": "52:54:00:00:00:05"}
+        try:
+            with self.assertRaises(SonicDbNoCommandOutput):
+                appdb.get_neighbor_key_by_ip("10.0.0.5")
+            appdb.refresh()
+            self.assertEqual(appdb.get_neighbor_key_by_ip("10.0.0.5"), "NEIGH_TABLE:Ethernet12:10.0.0.5")
+        finally:
+            del DBS["APPL_DB"]["NEIGH_TABLE:Ethernet12:10.0.0.5"]
+
+    def test_cache(self):
+        host = FakeHost()
+        other_host = FakeHost()
+        db_clis = SonicDbCliCache()
+        appdb = db_clis.get(AppDbCli, host)
+        self.assertTrue(appdb.pipelined)
+        self.assertIs(db_clis.get(AppDbCli, host), appdb)
+        self.assertIsNot(db_clis.get(AppDbCli, other_host), appdb)
+        self.assertIsInstance(db_clis.get(AsicDbCli, host), AsicDbCli)
+        appdb.get_neighbor_key_by_ip("10.0.0.1")
+        appdb.get_neighbor_key_by_ip("fc00::1")
+        db_clis.refresh()
+        appdb.get_neighbor_key_by_ip("10.0.0.1")
+        self.assertEqual(len(host.commands), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -92,7 +92,14 @@ def check_host_arp_table(host, asic, neighbor_ip, neighbor_mac, interface, state
                       "table state %s is not %s" % (table[neighbor_ip]['state'].lower(), state.lower()))
 
 
-def check_local_neighbor_asicdb(asic, neighbor_ip, neighbor_mac):
+def _get_db_cli(db_clis, cls, host):
+    """Returns the shared pipelined instance of cls in db_clis, or a new instance if db_clis is None."""
+    if db_clis is not None:
+        return db_clis.get(cls, host)
+    return cls(host)
+
+
+def check_local_neighbor_asicdb(asic, neighbor_ip, neighbor_mac, db_clis=None):
     """
     Verifies the neighbor information of a sonic host in the asicdb for a locally attached neighbor.
 
@@ -100,6 +107,7 @@ def check_local_neighbor_asicdb(asic, neighbor_ip, neighbor_mac):
         asic: The SonicAsic instance to be checked.
         neighbor_ip: The IP address of the neighbor.
         neighbor_mac: The MAC address of the neighbor.
+        db_clis: Optional SonicDbCliCache, to look up the neighbor in tables shared by a series of checks.
 
     Returns:
         A dictionary with the encap ID from the ASIC neighbor table.
@@ -108,7 +116,7 @@ def check_local_neighbor_asicdb(asic, neighbor_ip, neighbor_mac):
         Pytest Failed exception when assertions fail.
 
     """
-    asicdb = AsicDbCli(asic)
+    asicdb = _get_db_cli(db_clis, AsicDbCli, asic)
     neighbor_key = asicdb.get_neighbor_key_by_ip(neighbor_ip)
     pytest_assert(neighbor_key is not None, "Did not find neighbor in asictable for IP: %s" % neighbor_ip)
     asic_mac = asicdb.get_neighbor_value(neighbor_key, 'SAI_NEIGHBOR_ENTRY_ATTR_DST_MAC_ADDRESS')
@@ -118,7 +126,7 @@ def check_local_neighbor_asicdb(asic, neighbor_ip, neighbor_mac):
     return {"encap_index": encap_idx}
 
 
-def check_local_neighbor(host, asic, neighbor_ip, neighbor_mac, interface):
+def check_local_neighbor(host, asic, neighbor_ip, neighbor_mac, interface, db_clis=None):
     """
     Verifies the neighbor information of a sonic host for a locally attached neighbor.
 
@@ -130,6 +138,7 @@ def check_local_neighbor(host, asic, neighbor_ip, neighbor_mac, interface):
         neighbor_ip: IP address if the neighbor to check.
         neighbor_mac: Expected ethernet MAC address of the neighbor.
         interface: Expected interface the neighbor was learned on.
+        db_clis: Optional SonicDbCliCache, to look up the neighbor in tables shared by a series of checks.
 
     Returns:
         A dictionary with the key into the LC APP DB neighbor table and the encap ID from the ASIC DB neighbor table.
@@ -144,10 +153,10 @@ def check_local_neighbor(host, asic, neighbor_ip, neighbor_mac, interface):
                 neighbor_ip, neighbor_mac, interface)
 
     # verify asic db
-    asic_dict = check_local_neighbor_asicdb(asic, neighbor_ip, neighbor_mac)
+    asic_dict = check_local_neighbor_asicdb(asic, neighbor_ip, neighbor_mac, db_clis=db_clis)
 
     # verify LC appdb
-    appdb = AppDbCli(asic)
+    appdb = _get_db_cli(db_clis, AppDbCli, asic)
     neighbor_key = appdb.get_neighbor_key_by_ip(neighbor_ip)
     appdb.get_and_check_key_value(neighbor_key, neighbor_mac, field="neigh")
     pytest_assert(":{}:".format(interface) in neighbor_key, "Port for %s does not match" % neighbor_key)
@@ -286,7 +295,8 @@ def check_neighbor_kernel_route(host, asicnum, ipaddr, interface, present=True):
     check_host_kernel_route(host, asicnum, ipaddr, ipver, interface, present)
 
 
-def check_voq_remote_neighbor(host, asic, neighbor_ip, neighbor_mac, interface, encap_idx, inband_mac):
+def check_voq_remote_neighbor(host, asic, neighbor_ip, neighbor_mac, interface, encap_idx, inband_mac,
+                              db_clis=None):
     """
     Verifies the neighbor information of a neighbor learned on a different host.
 
@@ -301,6 +311,7 @@ def check_voq_remote_neighbor(host, asic, neighbor_ip, neighbor_mac, interface,
         interface: Expected interface the neighbor was learned on.
         encap_idx: The encap index from the SONIC host the neighbor is directly attached to.
         inband_mac: The MAC of the inband port of the remote host.
+        db_clis: Optional SonicDbCliCache, to look up the neighbor in tables shared by a series of checks.
 
     Raises:
         Pytest Failed exception when assertions fail.
@@ -309,7 +320,7 @@ def check_voq_remote_neighbor(host, asic, neighbor_ip, neighbor_mac, interface,
                 str(asic.asic_index), neighbor_ip, neighbor_mac, interface)
 
     # asic db
-    asicdb = AsicDbCli(asic)
+    asicdb = _get_db_cli(db_clis, AsicDbCli, asic)
     neighbor_key = asicdb.get_neighbor_key_by_ip(neighbor_ip)
     pytest_assert(neighbor_key is not None, "Did not find neighbor in asic table for IP: %s" % neighbor_ip)
     pytest_assert(asicdb.get_neighbor_value(neighbor_key,
@@ -323,7 +334,7 @@ def check_voq_remote_neighbor(host, asic, neighbor_ip, neighbor_mac, interface,
                   "is local is not false in asicDB")
 
     # LC app db
-    appdb = AppDbCli(asic)
+    appdb = _get_db_cli(db_clis, AppDbCli, asic)
     neighbor_key = appdb.get_neighbor_key_by_ip(neighbor_ip)
     pytest_assert(":{}:".format(interface) in neighbor_key, "Port for %s does not match" % neighbor_key)
     if host.get_facts()['asic_type'] == "vs":
@@ -369,7 +380,7 @@ def check_rif_on_sup(systemintftable, slot, asic, port):
         raise SonicDbKeyNotFound("No keys for %s found in chassisdb SYSTEM_INTERFACE table" % key)
 
 
-def check_voq_neighbor_on_sup(sup, slot, asic, port, neighbor, encap_index, mac):
+def check_voq_neighbor_on_sup(sup, slot, asic, port, neighbor, encap_index, mac, db_clis=None):
     """
      Checks the neighbor entry on the supervisor card.
 
@@ -381,12 +392,13 @@ def check_voq_neighbor_on_sup(sup, slot, asic, port, neighbor, encap_index, mac)
          neighbor: The IP of the neighbor
          encap_index: The encap ID of the neighbor from the local asic db
          mac: The MAC address of the neighbor
+         db_clis: Optional SonicDbCliCache, to look up the neighbor in tables shared by a series of checks.
 
     Raises:
         Pytest Failed exception when assertions fail.
 
     """
-    voqdb = VoqDbCli(sup)
+    voqdb = _get_db_cli(db_clis, VoqDbCli, sup)
     neigh_key = voqdb.get_neighbor_key_by_ip(neighbor)
     logger.info("Neigh key: %s, slotnum: %s", neigh_key, slot)
     pytest_assert("|%s|" % slot in neigh_key,
@@ -594,7 +606,7 @@ def get_port_by_ip(cfg_facts, ipaddr):
     raise Exception("Dod not find port for IP %s" % ipaddr)
 
 
-def check_one_neighbor_present(duthosts, per_host, asic, neighbor, nbrhosts, all_cfg_facts):
+def check_one_neighbor_present(duthosts, per_host, asic, neighbor, nbrhosts, all_cfg_facts, db_clis=None):
     """
     Verifies a single neighbor entry is present in a voq system on local and remote sonic instances.
 
@@ -609,6 +621,8 @@ def check_one_neighbor_present(duthosts, per_host, asic, neighbor, nbrhosts, all
         neighbor: The IP address of the neighbor to check as a string.
         nbrhosts: The nbrhosts fixture.
         all_cfg_facts: The config facts fixture from voq/conftest.py
+        db_clis: Optional SonicDbCliCache. When checking several neighbors, the tables of each DB are then fetched
+            once for all the neighbors instead of a lookup per neighbor.
 
     """
     cfg_facts = all_cfg_facts[per_host.hostname][asic.asic_index]['ansible_facts']
@@ -631,7 +645,7 @@ def check_one_neighbor_present(duthosts, per_host, asic, neighbor, nbrhosts, all
     if neigh_mac is None:
         logger.error("Could not find neighbor MAC, must skip.  IP: %s, port: %s", local_ip, local_port)
 
-    local_dict = check_local_neighbor(per_host, asic, neighbor, neigh_mac, local_port)
+    local_dict = check_local_neighbor(per_host, asic, neighbor, neigh_mac, local_port, db_clis=db_clis)
     logger.info("Local_dict: %s", local_dict)
 
     # Check the same neighbor entry on the supervisor nodes
@@ -640,11 +654,11 @@ def check_one_neighbor_present(duthosts, per_host, asic, neighbor, nbrhosts, all
 
     if per_host.is_multi_asic and len(duthosts.supervisor_nodes) == 0:
         check_voq_neighbor_on_sup(per_host, slotname, asicname, local_port,
-                                  neighbor, local_dict['encap_index'], neigh_mac)
+                                  neighbor, local_dict['encap_index'], neigh_mac, db_clis=db_clis)
     else:
         for sup in duthosts.supervisor_nodes:
             check_voq_neighbor_on_sup(sup, slotname, asicname, local_port,
-                                      neighbor, local_dict['encap_index'], neigh_mac)
+                                      neighbor, local_dict['encap_index'], neigh_mac, db_clis=db_clis)
 
     # Check the neighbor entry on each remote linecard
     for rem_host in duthosts.frontend_nodes:
@@ -661,7 +675,7 @@ def check_one_neighbor_present(duthosts, per_host, asic, neighbor, nbrhosts, all
                 continue
             remote_inband_mac = get_sonic_mac(rem_host, rem_asic.asic_index, remote_inband_info['port'])
             check_voq_remote_neighbor(rem_host, rem_asic, neighbor, neigh_mac, remote_inband_info['port'],
-                                      local_dict['encap_index'], remote_inband_mac)
+                                      local_dict['encap_index'], remote_inband_mac, db_clis=db_clis)
 
 
 def check_all_neighbors_present(duthosts, nbrhosts, all_cfg_facts, nbr_macs, check_nbr_state=True):
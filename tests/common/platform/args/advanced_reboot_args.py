@@ -61,6 +61,14 @@ def add_advanced_reboot_args(parser):
         help="Sniff time increment",
     )
 
+    parser.addoption(
+        "--send_rate",
+        action="store",
+        type=int,
+        default=None,
+        help="Packets per second sent by the dataplane sender of advanced-reboot, default is about 285",
+    )
+
     parser.addoption(
         "--new_sonic_image",
         action="store",
@@ -447,6 +447,125 @@ def load_basic_facts(dut_name, session):
     return results
 
 
+class ConditionIndex(object):
+    """Compiled lookup structure over the loaded mark conditions.
+
+    Plain entries are stored in a character trie so that all entries which are a prefix of a nodeid are found in a
+    single walk over the nodeid, instead of calling `startswith` for every entry. Entries with `regex: True` are
+    pre-compiled, and a combined pattern of all of them is used to quickly rule out nodeids that match none.
+
+    The index also memoizes condition string evaluation results. Basic facts and issue status do not change within a
+    session, so each distinct condition string only needs to be evaluated once.
+    """
+
+    _TERMINAL = None
+
+    def __init__(self, conditions):
+        self.conditions = conditions
+        self._trie = {}
+        self._use_longest = set()
+        self._regex_entries = []
+        self._regex_prefilter = None
+        self._eval_cache = {}
+        self._eval_context = None
+
+        for position, condition in enumerate(conditions):
+            # condition is a dict which has only one item, so we use condition.keys()[0] to get its key.
+            condition_entry = list(condition.keys())[0]
+            condition_items = condition[condition_entry]
+            if "regex" in condition_items.keys():
+                assert isinstance(condition_items["regex"], bool), \
+                    "The value of 'regex' in the mark conditions yaml should be bool type."
+                if condition_items["regex"] is True:
+                    self._regex_entries.append((position, re.compile(condition_entry)))
+                continue
+
+            if "use_longest" in condition_items.keys():
+                assert isinstance(condition_items["use_longest"], bool), \
+                    "The value of 'use_longest' in the mark conditions yaml should be bool type."
+                if condition_items["use_longest"] is True:
+                    self._use_longest.add(position)
+
+            node = self._trie
+            for char in condition_entry:
+                node = node.setdefault(char, {})
+            node.setdefault(self._TERMINAL, []).append(position)
+
+        # Back references are numbered per pattern, they can't be safely combined into one alternation.
+        patterns = [regex.pattern for _, regex in self._regex_entries]
+        if patterns and not any(re.search(r'\\[1-9]|\(\?P=', pattern) for pattern in patterns):
+            try:
+                self._regex_prefilter = re.compile('|'.join('(?:{})'.format(pattern) for pattern in patterns))
+            except re.error:
+                self._regex_prefilter = None
+
+    def match(self, nodeid):
+        """Find all the condition entries matching the given test case name.
+
+        Args:
+            nodeid (str): Full test case name
+
+        Returns:
+            list: Matched conditions, in the same order as they appear in the conditions list.
+        """
+        positions = []
+        node = self._trie
+        for char in nodeid:
+            positions.extend(node.get(self._TERMINAL, ()))
+            node = node.get(char)
+            if node is None:
+                break
+        else:
+            positions.extend(node.get(self._TERMINAL, ()))
+
+        if self._regex_entries:
+            if self._regex_prefilter is None or self._regex_prefilter.search(nodeid):
+                positions.extend(position for position, regex in self._regex_entries if regex.search(nodeid))
+        positions.sort()
+
+        all_matches = []
+        for position in positions:
+            if position in self._use_longest:
+                all_matches = []
+            all_matches.append(self.conditions[position])
+        return all_matches
+
+    def evaluation_cache(self, basic_facts, session):
+        """Get the memo of condition string evaluation results for the given basic facts and session.
+
+        Args:
+            basic_facts (dict): A one level dict with basic facts.
+            session (obj): Pytest session object.
+
+        Returns:
+            dict: Condition string to evaluation result mapping. It is reset when facts or session change.
+        """
+        if self._eval_context is None or self._eval_context[0] is not basic_facts \
+                or self._eval_context[1] is not session:
+            self._eval_context = (basic_facts, session)
+            self._eval_cache = {}
+        return self._eval_cache
+
+
+_condition_index = None
+
+
+def get_condition_index(conditions):
+    """Get the compiled index of the given conditions list, the last built index is reused.
+
+    Args:
+        conditions (list): List of conditions
+
+    Returns:
+        ConditionIndex: The index of the conditions list.
+    """
+    global _condition_index
+
+    if _condition_index is None or _condition_index.conditions is not conditions:
+        _condition_index = ConditionIndex(conditions)
+    return _condition_index
+
+
 def find_all_matches(nodeid, conditions, session, dynamic_update_skip_reason, basic_facts):
     """Find all matches of the given test case name in the conditions list.
 
@@ -457,35 +576,13 @@ def find_all_matches(nodeid, conditions, session, dynamic_update_skip_reason, ba
     Returns:
         list: All match test case name or None if not found
     """
-    all_matches = []
     max_length = -1
     conditional_marks = {}
     matches = []
 
-    for condition in conditions:
-        # condition is a dict which has only one item, so we use condition.keys()[0] to get its key.
-        condition_entry = list(condition.keys())[0]
-        condition_items = condition[condition_entry]
-        if "regex" in condition_items.keys():
-            assert isinstance(condition_items["regex"], bool), \
-                "The value of 'regex' in the mark conditions yaml should be bool type."
-            if condition_items["regex"] is True:
-                match = re.search(condition_entry, nodeid)
-            else:
-                match = None
-
-        elif "use_longest" in condition_items.keys():
-            assert isinstance(condition_items["use_longest"], bool), \
-                "The value of 'use_longest' in the mark conditions yaml should be bool type."
-            if nodeid.startswith(condition_entry) and condition_items["use_longest"] is True:
-                all_matches = []
-
-            match = nodeid.startswith(condition_entry)
-        else:
-            match = nodeid.startswith(condition_entry)
-
-        if match:
-            all_matches.append(condition)
+    condition_index = get_condition_index(conditions)
+    all_matches = condition_index.match(nodeid)
+    eval_cache = condition_index.evaluation_cache(basic_facts, session)
 
     for match in all_matches:
         case_starting_substring = list(match.keys())[0]
@@ -498,7 +595,8 @@ def find_all_matches(nodeid, conditions, session, dynamic_update_skip_reason, ba
             condition_value = evaluate_conditions(dynamic_update_skip_reason, match[case_starting_substring][mark],
                                                   match[case_starting_substring][mark].get('conditions'), basic_facts,
                                                   match[case_starting_substring][mark].get(
-                                                      'conditions_logical_operator', 'AND').upper(), session)
+                                                      'conditions_logical_operator', 'AND').upper(), session,
+                                                  eval_cache=eval_cache)
 
             if condition_value:
                 if mark in conditional_marks:
@@ -566,7 +664,7 @@ def update_issue_status(condition_str, session):
     return condition_str
 
 
-def evaluate_condition(dynamic_update_skip_reason, mark_details, condition, basic_facts, session):
+def evaluate_condition(dynamic_update_skip_reason, mark_details, condition, basic_facts, session, eval_cache=None):
     """Evaluate a condition string based on supplied basic facts.
 
     Args:
@@ -578,6 +676,8 @@ def evaluate_condition(dynamic_update_skip_reason, mark_details, condition, basi
         basic_facts (dict): A one level dict with basic facts. Keys of the dict can be used as variables in the
             condition string evaluation.
         session (obj): Pytest session object, for getting cached data.
+        eval_cache (dict): Optional memo of raw condition string to evaluation result. See
+            ConditionIndex.evaluation_cache.
 
     Returns:
         bool: True or False based on condition string evaluation result.
@@ -585,6 +685,12 @@ def evaluate_condition(dynamic_update_skip_reason, mark_details, condition, basi
     if condition is None or condition.strip() == '':
         return True    # Empty condition item will be evaluated as True. Equivalent to be ignored.
 
+    if eval_cache is not None and condition in eval_cache:
+        condition_result = eval_cache[condition]
+        if condition_result and dynamic_update_skip_reason:
+            mark_details['reason'].append(condition)
+        return condition_result
+
     condition_str = update_issue_status(condition, session)
     try:
         safe_facts = {k: v for k, v in basic_facts.items()}
@@ -597,6 +703,8 @@ def evaluate_condition(dynamic_update_skip_reason, mark_details, condition, basi
                 safe_globals[var] = None
 
         condition_result = bool(eval(condition_str, safe_globals))
+        if eval_cache is not None:
+            eval_cache[condition] = condition_result
 
         if condition_result and dynamic_update_skip_reason:
             mark_details['reason'].append(condition)
@@ -608,7 +716,7 @@ def evaluate_condition(dynamic_update_skip_reason, mark_details, condition, basi
 
 
 def evaluate_conditions(dynamic_update_skip_reason, mark_details, conditions, basic_facts,
-                        conditions_logical_operator, session):
+                        conditions_logical_operator, session, eval_cache=None):
     """Evaluate all the condition strings.
 
     Evaluate a single condition or multiple conditions. If multiple conditions are supplied, apply AND or OR
@@ -623,6 +731,7 @@ def evaluate_conditions(dynamic_update_skip_reason, mark_details, conditions, ba
             condition string evaluation.
         conditions_logical_operator (str): logical operator which should be applied to conditions(by default 'AND')
         session (obj): Pytest session object, for getting cached data.
+        eval_cache (dict): Optional memo of raw condition string to evaluation result.
 
     Returns:
         bool: True or False based on condition strings evaluation result.
@@ -632,15 +741,18 @@ def evaluate_conditions(dynamic_update_skip_reason, mark_details, conditions, ba
     if isinstance(conditions, list):
         # Apply 'AND' or 'OR' operation to list of conditions based on conditions_logical_operator(by default 'AND')
         if conditions_logical_operator == 'OR':
-            return any([evaluate_condition(dynamic_update_skip_reason, mark_details, c, basic_facts, session)
+            return any([evaluate_condition(dynamic_update_skip_reason, mark_details, c, basic_facts, session,
+                                           eval_cache)
                         for c in conditions])
         else:
-            return all([evaluate_condition(dynamic_update_skip_reason, mark_details, c, basic_facts, session)
+            return all([evaluate_condition(dynamic_update_skip_reason, mark_details, c, basic_facts, session,
+                                           eval_cache)
                         for c in conditions])
     else:
         if conditions is None or conditions.strip() == '':
             return True
-        return evaluate_condition(dynamic_update_skip_reason, mark_details, conditions, basic_facts, session)
+        return evaluate_condition(dynamic_update_skip_reason, mark_details, conditions, basic_facts, session,
+                                  eval_cache)
 
 
 def pytest_collection(session):
@@ -692,6 +804,7 @@ def pytest_collection_modifyitems(session, config, items):
     basic_facts['constants'] = MARK_CONDITIONS_CONSTANTS
     # Normalize nodeids: strip root directory prefix if present (pytest 9.0+ includes it)
     root_prefix = os.path.basename(str(session.config.rootpath)) + "/"
+    eval_cache = get_condition_index(conditions).evaluation_cache(basic_facts, session)
     for item in items:
         nodeid = item.nodeid
         if nodeid.startswith(root_prefix):
@@ -717,7 +830,8 @@ def pytest_collection_modifyitems(session, config, items):
                             add_mark = True
                         else:
                             add_mark = evaluate_conditions(dynamic_update_skip_reason, mark_details, mark_conditions,
-                                                           basic_facts, conditions_logical_operator, session)
+                                                           basic_facts, conditions_logical_operator, session,
+                                                           eval_cache=eval_cache)
 
                     if add_mark:
                         reason = ''
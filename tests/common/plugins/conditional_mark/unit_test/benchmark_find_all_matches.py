@@ -0,0 +1,139 @@
+"""Collection time benchmark of the conditional mark plugin.
+
+Runs `find_all_matches` over nodeids derived from the real mark conditions files, once with the compiled
+ConditionIndex and once with the linear scan it replaced, verifies both return the same marks and prints the timing.
+
+Run it from the root of sonic-mgmt repo:
+    python -m tests.common.plugins.conditional_mark.unit_test.benchmark_find_all_matches --params 20
+"""
+import argparse
+import glob
+import re
+import time
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from tests.common.plugins import conditional_mark
+from tests.common.plugins.conditional_mark import MARK_CONDITIONS_CONSTANTS, find_all_matches, load_conditions
+from tests.common.plugins.conditional_mark.unit_test.unittest_find_all_matches import scan_all_matches
+
+CONDITIONS_FILES = 'tests/common/plugins/conditional_mark/tests_mark_conditions*.yaml'
+
+BASIC_FACTS = {
+    "asic_type": "vs",
+    "asic_gen": "unknown",
+    "asic_subtype": "",
+    "platform": "x86_64-kvm_x86_64-r0",
+    "hwsku": "Force10-S6000",
+    "release": "master",
+    "branch": "master",
+    "build_version": "master.100-abcdef",
+    "topo_type": "t0",
+    "topo_name": "t0",
+    "testbed": "vms-kvm-t0",
+    "is_multi_asic": False,
+    "num_asic": 1,
+    "is_chassis": False,
+    "is_chassis_config_absent": True,
+    "is_smartswitch": False,
+    "is_mgmt_ipv6_only": False,
+    "eth_mgmt_ctrl_available": False,
+    "feature_status": {"bgp": "enabled", "lldp": "enabled"},
+    "switch_type": "",
+    "type": "ToRRouter",
+    "macsec_en": False,
+    "minigraph_interfaces": [],
+    "minigraph_portchannels": {"PortChannel101": {"members": ["Ethernet0"]},
+                               "PortChannel102": {"members": ["Ethernet4"]}},
+    "minigraph_portchannel_interfaces": [],
+    "switch": {},
+    "constants": MARK_CONDITIONS_CONSTANTS,
+}
+
+
+class BenchmarkCache(object):
+    """Minimal stand-in of pytest config.cache."""
+
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, key, default):
+        return self.values.get(key, default)
+
+    def set(self, key, value):
+        self.values[key] = value
+
+
+class LinearScanIndex(object):
+    """Matches entries with a linear scan and does not memoize evaluation, like find_all_matches used to."""
+
+    def __init__(self, conditions):
+        self.conditions = conditions
+
+    def match(self, nodeid):
+        return scan_all_matches(nodeid, self.conditions)
+
+    def evaluation_cache(self, basic_facts, session):
+        return None
+
+
+def build_session(conditions_files, conditions):
+    issue_urls = set(re.findall('https?://[^ )"\']+', str(conditions)))
+    option = SimpleNamespace(mark_conditions_files=conditions_files)
+    # Every issue is considered active, the benchmark must not query issue trackers.
+    cache = BenchmarkCache({'ISSUE_STATUS': {url: True for url in issue_urls}, 'PROXIES': {}})
+    return SimpleNamespace(config=SimpleNamespace(option=option, cache=cache))
+
+
+def build_nodeids(conditions, params):
+    nodeids = []
+    for condition in conditions:
+        condition_entry = list(condition.keys())[0]
+        condition_items = condition[condition_entry]
+        # Skip regex entries and the yaml anchors holder, which no test case name starts with
+        if condition_items.get("regex", False) or "anchors" in condition_items:
+            continue
+        if "::" not in condition_entry:
+            condition_entry += "::test_case"
+        nodeids.append(condition_entry)
+        nodeids.extend("{}[param-{}]".format(condition_entry, i) for i in range(params))
+    return nodeids
+
+
+def run(nodeids, conditions, session):
+    start = time.time()
+    results = [find_all_matches(nodeid, conditions, session, False, BASIC_FACTS) for nodeid in nodeids]
+    return time.time() - start, results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark conditional mark matching at collection time")
+    parser.add_argument("--params", type=int, default=10, help="Number of parametrized nodeids per entry")
+    args = parser.parse_args()
+
+    conditions_files = glob.glob(CONDITIONS_FILES)
+    session = build_session(conditions_files, None)
+    conditions = load_conditions(session)
+    session = build_session(conditions_files, conditions)
+    nodeids = build_nodeids(conditions, args.params)
+    print("{} conditions entries, {} nodeids".format(len(conditions), len(nodeids)))
+
+    with patch.object(conditional_mark, "get_condition_index", LinearScanIndex):
+        linear_time, linear_results = run(nodeids, conditions, session)
+    print("linear scan:     {:8.3f}s".format(linear_time))
+
+    start = time.time()
+    conditional_mark.get_condition_index(conditions)
+    build_time = time.time() - start
+    index_time, index_results = run(nodeids, conditions, session)
+    print("condition index: {:8.3f}s (index built in {:.3f}s)".format(index_time, build_time))
+
+    mismatches = [nodeid for nodeid, linear, indexed in zip(nodeids, linear_results, index_results)
+                  if linear != indexed]
+    print("speedup: {:.1f}x, mismatches: {}".format(linear_time / max(index_time, 1e-9), len(mismatches)))
+    for nodeid in mismatches[:10]:
+        print("  mismatch: {}".format(nodeid))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,8 @@
 import logging
+import re
 import unittest
-from unittest.mock import MagicMock
-from tests.common.plugins.conditional_mark import find_all_matches, load_conditions
+from unittest.mock import MagicMock, patch
+from tests.common.plugins.conditional_mark import ConditionIndex, find_all_matches, load_conditions
 
 logger = logging.getLogger(__name__)
 
@@ -16,6 +17,26 @@ def load_test_conditions():
     return load_conditions(session_mock), session_mock
 
 
+def scan_all_matches(nodeid, conditions):
+    """Reference linear scan of the conditions list, the way entries were matched before ConditionIndex."""
+    all_matches = []
+    for condition in conditions:
+        condition_entry = list(condition.keys())[0]
+        condition_items = condition[condition_entry]
+        if "regex" in condition_items.keys():
+            match = re.search(condition_entry, nodeid) if condition_items["regex"] is True else None
+        elif "use_longest" in condition_items.keys():
+            if nodeid.startswith(condition_entry) and condition_items["use_longest"] is True:
+                all_matches = []
+            match = nodeid.startswith(condition_entry)
+        else:
+            match = nodeid.startswith(condition_entry)
+
+        if match:
+            all_matches.append(condition)
+    return all_matches
+
+
 class TestFindAllMatches(unittest.TestCase):
     """Test cases for find_all_matches function."""
 
@@ -292,6 +313,65 @@ class TestFindAllMatches(unittest.TestCase):
         self.assertEqual(len(marks_found), 1)
         self.assertIn('xfail', marks_found)
 
+    # Test case 12: Test regex entries
+    def test_regex_match(self):
+        conditions, session_mock = load_test_conditions()
+        nodeid = "test_conditional_mark.py::test_regex_10[ipv4-vs-t0]"
+
+        marks_found = []
+        matches = find_all_matches(nodeid, conditions, session_mock, DYNAMIC_UPDATE_SKIP_REASON, CUSTOM_BASIC_FACTS)
+
+        for match in matches:
+            for mark_name, mark_details in list(list(match.values())[0].items()):
+                marks_found.append(mark_name)
+
+                if mark_name == "skip":
+                    self.assertEqual(mark_details.get("reason"),
+                                     "Skip test_conditional_mark.py::test_regex_[0-9]+[*vs*]")
+
+        self.assertEqual(len(marks_found), 1)
+        self.assertIn('skip', marks_found)
+
+    def test_regex_no_match(self):
+        conditions, session_mock = load_test_conditions()
+        nodeid = "test_conditional_mark.py::test_regex_x[ipv4-vs-t0]"
+        matches = find_all_matches(nodeid, conditions, session_mock, DYNAMIC_UPDATE_SKIP_REASON, CUSTOM_BASIC_FACTS)
+        self.assertFalse(matches)
+
+    def test_regex_disabled(self):
+        conditions, session_mock = load_test_conditions()
+        nodeid = "test_conditional_mark.py::test_regex_disabled"
+        matches = find_all_matches(nodeid, conditions, session_mock, DYNAMIC_UPDATE_SKIP_REASON, CUSTOM_BASIC_FACTS)
+        self.assertFalse(matches)
+
+    # Test case 13: The index finds the same entries, in the same order, as a linear scan
+    def test_index_same_as_linear_scan(self):
+        conditions, _ = load_test_conditions()
+        # Same entry in more than one conditions file
+        conditions = conditions + conditions[:3]
+        condition_index = ConditionIndex(conditions)
+
+        nodeids = [list(condition.keys())[0] for condition in conditions]
+        nodeids += [nodeid + "[param]" for nodeid in nodeids]
+        nodeids += ["test_conditional_mark.py::test_regex_1[vs]", "test_conditional_mark.py::test_mark_9_1_1",
+                    "test_conditional", "", "other/test_conditional_mark.py::test_mark"]
+        for nodeid in nodeids:
+            self.assertEqual(condition_index.match(nodeid), scan_all_matches(nodeid, conditions), nodeid)
+
+    # Test case 14: Each distinct condition string is only evaluated once per session
+    def test_condition_evaluation_memoized(self):
+        conditions, session_mock = load_test_conditions()
+
+        with patch("tests.common.plugins.conditional_mark.update_issue_status",
+                   side_effect=lambda condition, session: condition) as update_issue_status_mock:
+            for nodeid in ["test_conditional_mark.py::test_mark", "test_conditional_mark.py::test_mark_1",
+                           "test_conditional_mark.py::test_mark"]:
+                find_all_matches(nodeid, conditions, session_mock, DYNAMIC_UPDATE_SKIP_REASON, CUSTOM_BASIC_FACTS)
+
+        evaluated = [call.args[0] for call in update_issue_status_mock.call_args_list]
+        self.assertEqual(sorted(evaluated), sorted(set(evaluated)))
+        self.assertIn("topo_type in ['t0']", evaluated)
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,91 @@
+"""Benchmark of log line classification of the loganalyzer.
+
+Classifies every line of a syslog file with the common match/ignore/expect regular expressions, once by calling
+line_is_expected()/line_matches() for each line and once with LineClassifier, verifies both give the same result
+and prints lines/sec of each.
+
+Run it from the root of sonic-mgmt repo, with a syslog recorded from a DUT:
+    python -m tests.common.plugins.loganalyzer.unit_test.benchmark_line_classifier --syslog /path/to/syslog
+Without --syslog, a synthetic syslog is generated.
+"""
+import argparse
+import os
+import random
+import re
+import time
+
+from tests.common.plugins.loganalyzer.system_msg_handler import AnsibleLogAnalyzer, LineClassifier
+
+LOGANALYZER_DIR = os.path.join(os.path.dirname(__file__), "..")
+COMMON_MATCH = os.path.join(LOGANALYZER_DIR, "loganalyzer_common_match.txt")
+COMMON_IGNORE = os.path.join(LOGANALYZER_DIR, "loganalyzer_common_ignore.txt")
+COMMON_EXPECT = os.path.join(LOGANALYZER_DIR, "loganalyzer_common_expect.txt")
+
+SYNTHETIC_LINES = [
+    "Oct 18 10:00:00.123456 vlab-01 INFO swss#orchagent: :- doPortTask: Set port Ethernet{} admin status to up",
+    "Oct 18 10:00:00.123456 vlab-01 NOTICE syncd#syncd: :- processQuadEvent: GET: SAI_OBJECT_TYPE_PORT oid:0x{}",
+    "Oct 18 10:00:00.123456 vlab-01 INFO bgp#bgpcfgd: Peer 10.0.0.{} admin state is set to 'up'",
+    "Oct 18 10:00:00.123456 vlab-01 INFO kernel: [ 1234.{}] Bridge: port 1(Ethernet0) entered forwarding state",
+    "Oct 18 10:00:00.123456 vlab-01 INFO lldp#lldpmgrd: Unable to retrieve description for port 'Ethernet{}'",
+    "Oct 18 10:00:00.123456 vlab-01 ERR snmp#snmp-subagent [ax_interface] ERROR: MIBUpdater.update {}",
+    "Oct 18 10:00:00.123456 vlab-01 ERR swss#orchagent: :- doTask: Failed to set port {} attribute",
+]
+
+
+def load_regex(analyzer, regex_file):
+    messages = analyzer.create_msg_regex([regex_file])[1]
+    return re.compile('|'.join(messages)) if messages else None
+
+
+def load_lines(syslog, count):
+    if syslog:
+        with open(syslog) as f:
+            return f.readlines()
+    random.seed(0)
+    # Mostly benign lines, like a real syslog
+    weights = [30, 30, 20, 10, 8, 1, 1]
+    return [random.choices(SYNTHETIC_LINES, weights)[0].format(random.randint(0, 255)) + "\n"
+            for _ in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loganalyzer line classification")
+    parser.add_argument("--syslog", help="Syslog file to classify, a synthetic one is generated if not specified")
+    parser.add_argument("--lines", type=int, default=200000, help="Number of lines of the synthetic syslog")
+    args = parser.parse_args()
+
+    analyzer = AnsibleLogAnalyzer("benchmark", False)
+    match_regex = load_regex(analyzer, COMMON_MATCH)
+    ignore_regex = load_regex(analyzer, COMMON_IGNORE)
+    expect_regex = load_regex(analyzer, COMMON_EXPECT)
+    lines = load_lines(args.syslog, args.lines)
+
+    start = time.time()
+    legacy_result = []
+    for line in lines:
+        if analyzer.line_is_expected(line, expect_regex):
+            legacy_result.append('expected')
+        elif analyzer.line_matches(line, match_regex, ignore_regex):
+            legacy_result.append('match')
+        else:
+            legacy_result.append(None)
+    legacy_time = time.time() - start
+
+    start = time.time()
+    line_classifier = LineClassifier(analyzer, match_regex, ignore_regex, expect_regex)
+    build_time = time.time() - start
+    start = time.time()
+    classifier_result = [line_classifier.classify(line) for line in lines]
+    classifier_time = time.time() - start
+
+    print("{} lines, {} matching, {} expected".format(
+        len(lines), legacy_result.count('match'), legacy_result.count('expected')))
+    print("line_is_expected/line_matches: {:12.0f} lines/sec".format(len(lines) / max(legacy_time, 1e-9)))
+    print("LineClassifier:                {:12.0f} lines/sec (built in {:.3f}s)".format(
+        len(lines) / max(classifier_time, 1e-9), build_time))
+    mismatches = sum(1 for legacy, classified in zip(legacy_result, classifier_result) if legacy != classified)
+    print("mismatches: {}".format(mismatches))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+import os
+import re
+import unittest
+
+from tests.common.plugins.loganalyzer.system_msg_handler import AnsibleLogAnalyzer, LineClassifier, \
+    MessagePatternSet, split_alternatives
+
+LOGANALYZER_DIR = os.path.join(os.path.dirname(__file__), "..")
+
+LOG_LINES = [
+    "Oct 18 10:00:00.123456 vlab-01 INFO swss#orchagent: :- doPortTask: Set port Ethernet0 admin status to up\n",
+    "Oct 18 10:00:00.123456 vlab-01 ERR swss#orchagent: :- doTask: Failed to set port Ethernet0 attribute\n",
+    "Oct 18 10:00:00.123456 vlab-01 ERR snmp#snmp-subagent [ax_interface] ERROR: MIBUpdater.update\n",
+    "Oct 18 10:00:00.123456 vlab-01 WARNING kernel: [ 1234.5678] Oops: 0002 [#1] SMP\n",
+    "Oct 18 10:00:00.123456 vlab-01 INFO kernel: [ 1234.5678] Bridge: port 1(Ethernet0) entered forwarding state\n",
+    "Oct 18 10:00:00.123456 vlab-01 NOTICE pmon#xcvrd: expected message\n",
+    "Oct 18 10:00:00.123456 vlab-01 INFO systemd[1]: teamd.service: crash detected\n",
+]
+
+
+class TestLineClassifier(unittest.TestCase):
+    """LineClassifier must classify lines as line_is_expected()/line_matches() do."""
+
+    def load_regex(self, analyzer, file_name):
+        messages = analyzer.create_msg_regex([os.path.join(LOGANALYZER_DIR, file_name)])[1]
+        return re.compile('|'.join(messages)) if messages else None
+
+    def legacy_classify(self, analyzer, line, match_regex, ignore_regex, expect_regex):
+        if analyzer.line_is_expected(line, expect_regex):
+            return 'expected'
+        if analyzer.line_matches(line, match_regex, ignore_regex):
+            return 'match'
+        return None
+
+    def assert_same_classification(self, analyzer, match_regex, ignore_regex, expect_regex):
+        line_classifier = LineClassifier(analyzer, match_regex, ignore_regex, expect_regex)
+        for line in LOG_LINES:
+            self.assertEqual(line_classifier.classify(line),
+                             self.legacy_classify(analyzer, line, match_regex, ignore_regex, expect_regex), line)
+
+    def test_common_files(self):
+        analyzer = AnsibleLogAnalyzer("test_run", False)
+        match_regex = self.load_regex(analyzer, "loganalyzer_common_match.txt")
+        ignore_regex = self.load_regex(analyzer, "loganalyzer_common_ignore.txt")
+        expect_regex = re.compile(analyzer.error_to_regx(["expected message"]))
+        self.assert_same_classification(analyzer, match_regex, ignore_regex, expect_regex)
+        self.assert_same_classification(analyzer, match_regex, None, None)
+
+    def test_advanced_reboot_expect_from_start(self):
+        analyzer = AnsibleLogAnalyzer("test_advanced_reboot_test_run", False)
+        match_regex = re.compile(r"ERR")
+        self.assert_same_classification(analyzer, match_regex, None, re.compile(r"expected message"))
+        self.assert_same_classification(analyzer, match_regex, None, re.compile(r".*expected message"))
+
+    def test_unanchored_regex(self):
+        analyzer = AnsibleLogAnalyzer("test_run", False)
+        self.assert_same_classification(analyzer, re.compile(r"\d+\.\d+\]|crash"), re.compile(r"[A-Z]{4}"), None)
+
+    def test_split_alternatives(self):
+        self.assertEqual(split_alternatives(r"a|b(c|d)|[|]|\||[]|]"), ["a", "b(c|d)", "[|]", r"\|", "[]|]"])
+        self.assertIsNone(split_alternatives(r"(a)\1|b"))
+
+    def test_literal_anchors(self):
+        pattern_set = MessagePatternSet(re.compile(r".* ERR syncd\d*#syncd: brcm_sai|kernel:.*Oops|(?:ab|cd)e+"))
+        anchors = [set(literals) for literals, _ in pattern_set.anchored]
+        self.assertEqual(anchors, [{"#syncd: brcm_sai"}, {"kernel:"}, {"ab", "cd"}])
+        self.assertFalse(pattern_set.unanchored)
+
+
+if __name__ == "__main__":
+    unittest.main()
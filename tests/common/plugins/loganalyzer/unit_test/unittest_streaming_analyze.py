@@ -0,0 +1,107 @@
+import os
+import re
+import shutil
+import tempfile
+import unittest
+
+from tests.common.plugins.loganalyzer import system_msg_handler
+from tests.common.plugins.loganalyzer.system_msg_handler import AnsibleLogAnalyzer
+
+RUN_ID = "test_run"
+MATCH_REGEX = re.compile("ERR|error")
+IGNORE_REGEX = re.compile("ignoreme")
+EXPECT_REGEX = re.compile("expected")
+
+LOG_LINES = [
+    "Jan 1 ERR before start marker",
+    "Jan 1 start-LogAnalyzer-test_run",
+    "Jan 1 ERR first",
+    "Jan 1 expected message",
+    "Jan 1 error but ignoreme",
+    "Jan 1 start-ignore-LogAnalyzer-test_run",
+    "Jan 1 ERR inside ignore range",
+    "Jan 1 end-ignore-LogAnalyzer-test_run",
+    "Jan 1 start-LogAnalyzer-test_run extract_log",
+    "Jan 1 ERR second",
+    "Jan 1 end-LogAnalyzer-test_run",
+    "Jan 1 ERR after end marker",
+]
+
+
+class TestStreamingAnalyze(unittest.TestCase):
+    """Streaming analysis must return the same result as analysis of the whole file."""
+
+    def setUp(self):
+        self.log_dir = tempfile.mkdtemp()
+        self.log_file = os.path.join(self.log_dir, "syslog")
+
+    def tearDown(self):
+        shutil.rmtree(self.log_dir)
+
+    def write_log(self, lines, newline="\n"):
+        with open(self.log_file, "w", newline="") as f:
+            f.write(newline.join(lines) + newline)
+
+    def analyze(self, streaming):
+        analyzer = AnsibleLogAnalyzer(RUN_ID, False, streaming=streaming)
+        try:
+            return analyzer.analyze_file(self.log_file, MATCH_REGEX, IGNORE_REGEX, EXPECT_REGEX)
+        except SystemExit as e:
+            return e.code
+
+    def assert_same_result(self):
+        expected = self.analyze(False)
+        self.assertEqual(self.analyze(True), expected)
+        # Second analysis starts from the offset recorded in the marker index
+        self.assertEqual(self.analyze(True), expected)
+        return expected
+
+    def test_same_result(self):
+        self.write_log(LOG_LINES)
+        matching_lines, expected_lines = self.assert_same_result()
+        self.assertEqual(matching_lines, ["Jan 1 ERR second\n", "Jan 1 ERR first\n"])
+        self.assertEqual(expected_lines, ["Jan 1 expected message\n"])
+
+    def test_crlf_line_endings(self):
+        self.write_log(LOG_LINES, newline="\r\n")
+        self.assert_same_result()
+
+    def test_small_search_blocks(self):
+        self.write_log(LOG_LINES)
+        block_size = system_msg_handler.MARKER_SEARCH_BLOCK_SIZE
+        system_msg_handler.MARKER_SEARCH_BLOCK_SIZE = 7
+        try:
+            self.assert_same_result()
+        finally:
+            system_msg_handler.MARKER_SEARCH_BLOCK_SIZE = block_size
+
+    def test_marker_index(self):
+        self.write_log(LOG_LINES)
+        analyzer = AnsibleLogAnalyzer(RUN_ID, False, streaming=True)
+        analyzer.analyze_file(self.log_file, MATCH_REGEX, IGNORE_REGEX, EXPECT_REGEX)
+
+        start_marker = analyzer.create_start_marker()
+        offset = analyzer.lookup_marker_offset(self.log_file, start_marker)
+        self.assertEqual(offset, len(LOG_LINES[0]) + 1)
+
+        # Index is ignored once the indexed line doesn't hold the marker anymore
+        self.write_log(["Jan 1 rotated"] + LOG_LINES)
+        self.assertIsNone(analyzer.lookup_marker_offset(self.log_file, start_marker))
+        self.assert_same_result()
+
+    def test_missing_end_marker(self):
+        self.write_log(LOG_LINES[:5])
+        self.assertEqual(self.assert_same_result(), system_msg_handler.err_no_end_marker)
+
+    def test_missing_start_marker(self):
+        self.write_log([line for line in LOG_LINES if "start-LogAnalyzer-test_run" not in line])
+        self.assertEqual(self.assert_same_result(), system_msg_handler.err_no_start_marker)
+
+    def test_unexpected_start_ignore_marker(self):
+        self.write_log([line.replace("start-ignore-LogAnalyzer-test_run", "start-ignore-LogAnalyzer-other_run")
+                        for line in LOG_LINES])
+        self.assertEqual(self.assert_same_result(), system_msg_handler.err_start_ignore_marker)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,13 +1,14 @@
 import logging
 import copy
 import json
+import time
 from contextlib import contextmanager
 
 import pytest
 
 from collections import defaultdict
 
-from tests.common.helpers.multi_thread_utils import SafeThreadPoolExecutor
+from tests.common.helpers.multi_thread_utils import ResourceScheduler, SafeThreadPoolExecutor
 from tests.common.helpers.parallel_utils import ParallelCoordinator, ParallelStatus
 from tests.common.plugins.sanity_check import constants
 from tests.common.plugins.sanity_check import checks
@@ -144,15 +145,49 @@ def filter_check_items(tbinfo, duthosts, check_items):
 
 
 def do_checks(request, check_items, *args, **kwargs):
-    check_results = []
+    """
+    @summary: Run the check items, concurrently if --sanity_check_workers is above 1. Check items sharing a resource
+        in constants.CHECK_ITEM_RESOURCES are run one after another. A check item running over its time budget is
+        reported as failed, it is abandoned and keeps running in the background. Duration of each check item is
+        recorded as 'check_duration' of its results.
+    @return: List of the check results, in the order of the check items.
+    """
+    max_workers = request.config.getoption("--sanity_check_workers", default=None)
+    if max_workers is None:
+        max_workers = constants.DEFAULT_CHECK_WORKERS
+
+    # Check fixtures must be resolved in the main thread
+    scheduler = ResourceScheduler(max_workers)
     for item in check_items:
         check_fixture = request.getfixturevalue(item)
-        results = check_fixture(*args, **kwargs)
+        scheduler.add(item, check_fixture, args, kwargs,
+                      resources=constants.CHECK_ITEM_RESOURCES.get(item, []),
+                      budget=constants.CHECK_ITEM_TIME_BUDGET.get(item, constants.DEFAULT_CHECK_ITEM_TIME_BUDGET))
+
+    start = time.time()
+    tasks = scheduler.run()
+    logger.info("Sanity check items took {:.1f} seconds with {} workers: {}".format(
+        time.time() - start, scheduler.max_workers,
+        ", ".join("{}={:.1f}s".format(task.name, task.duration) for task in tasks)))
+
+    check_results = []
+    for task in tasks:
+        if task.exception is not None:
+            logger.error("Check item {} raised exception: {}".format(task.name, repr(task.exception)))
+            raise task.exception
+        if task.timed_out:
+            results = {"failed": True, "check_item": task.name[len("check_"):],
+                       "failed_reason": "Check item did not finish in {} seconds".format(task.budget)}
+        else:
+            results = task.result
         logger.debug("check results of each item {}".format(results))
         if results and isinstance(results, list):
             check_results.extend(results)
         elif results:
             check_results.append(results)
+        for result in results if isinstance(results, list) else [results]:
+            if isinstance(result, dict):
+                result["check_duration"] = round(task.duration, 2)
     return check_results
 
 
@@ -19,6 +19,38 @@ INFRA_CHECK_ITEMS = [
     "mux_simulator"
 ]
 
+# Resources shared by the check items. Check items sharing a resource are not run at the same time, check items
+# using "*" are run alone. Check items not listed here don't share any resource.
+CHECK_ITEM_RESOURCES = {
+    # Measures orchagent CPU usage, other checks running on the DUT would raise it
+    "check_orchagent_usage": ["*"],
+    # Measures output buffer memory of redis, other checks reading DB tables would raise it
+    "check_dbmemory": ["*"],
+    # Compares the files changed in rw folder, ansible modules of other checks create temporary files
+    "check_secureboot": ["*"],
+    # May restart linkmgrd and change mux mode of the ports when the check fails
+    "check_mux_simulator": ["ports"],
+    "check_interfaces": ["ports"],
+    # Measures ping latency from the sonic-mgmt container
+    "check_ipv4_mgmt": ["mgmt_ping"],
+    "check_ipv6_mgmt": ["mgmt_ping"],
+}
+
+# Time budget of the check items in seconds. A check item running longer than its budget is reported as failed.
+# The budgets are above the parallel_run timeouts of the check items, so they only catch a hung check.
+# A check item over its budget is abandoned, not cancelled: its thread, and the processes it forked with
+# parallel_run, keep running while the next check items and the test run.
+DEFAULT_CHECK_ITEM_TIME_BUDGET = 900
+CHECK_ITEM_TIME_BUDGET = {
+    "check_interfaces": 1500,
+    "check_bgp": 1500,
+    "check_processes": 1200,
+}
+
+# Default number of check items run at the same time, 1 runs them one by one. Running check items concurrently is
+# opt-in with pytest option --sanity_check_workers, check items fork processes with parallel_run from their threads.
+DEFAULT_CHECK_WORKERS = 1
+
 # Recover related definitions
 RECOVER_METHODS = {
     "config_reload": {
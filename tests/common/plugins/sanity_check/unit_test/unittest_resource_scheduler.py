@@ -0,0 +1,114 @@
+import threading
+import time
+import unittest
+
+from tests.common.helpers.multi_thread_utils import ResourceScheduler
+
+
+class Recorder:
+    """Records the tasks running at the same time."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.running = set()
+        self.overlaps = []
+        self.order = []
+
+    def task(self, name, seconds, result=None):
+        def _run():
+            with self.lock:
+                self.order.append(name)
+                if self.running:
+                    self.overlaps.append((name, frozenset(self.running)))
+                self.running.add(name)
+            time.sleep(seconds)
+            with self.lock:
+                self.running.discard(name)
+            return result
+        return _run
+
+
+class TestResourceScheduler(unittest.TestCase):
+
+    def test_independent_tasks_run_concurrently(self):
+        recorder = Recorder()
+        scheduler = ResourceScheduler(max_workers=4)
+        for i in range(4):
+            scheduler.add("task{}".format(i), recorder.task("task{}".format(i), 0.3, result=i))
+        start = time.monotonic()
+        tasks = scheduler.run()
+        elapsed = time.monotonic() - start
+
+        self.assertLess(elapsed, 0.9)
+        self.assertEqual([task.result for task in tasks], [0, 1, 2, 3])
+        for task in tasks:
+            self.assertGreaterEqual(task.duration, 0.3)
+            self.assertFalse(task.timed_out)
+
+    def test_max_workers(self):
+        recorder = Recorder()
+        scheduler = ResourceScheduler(max_workers=1)
+        for i in range(3):
+            scheduler.add("task{}".format(i), recorder.task("task{}".format(i), 0.05))
+        scheduler.run()
+
+        self.assertEqual(recorder.overlaps, [])
+        self.assertEqual(recorder.order, ["task0", "task1", "task2"])
+
+    def test_shared_resources(self):
+        recorder = Recorder()
+        scheduler = ResourceScheduler(max_workers=4)
+        scheduler.add("a", recorder.task("a", 0.2), resources=["ports"])
+        scheduler.add("b", recorder.task("b", 0.2), resources=["ports", "bgp"])
+        scheduler.add("c", recorder.task("c", 0.2), resources=["bgp"])
+        scheduler.add("d", recorder.task("d", 0.2))
+        scheduler.run()
+
+        for name, others in recorder.overlaps:
+            self.assertFalse(name == "b" and others & {"a", "c"})
+            self.assertFalse(name in ("a", "c") and "b" in others)
+        # c waiting for b doesn't hold back d
+        self.assertEqual(recorder.order[:3], ["a", "c", "d"])
+
+    def test_exclusive_task(self):
+        recorder = Recorder()
+        scheduler = ResourceScheduler(max_workers=4)
+        scheduler.add("a", recorder.task("a", 0.1))
+        scheduler.add("alone", recorder.task("alone", 0.1), resources=[ResourceScheduler.ALL_RESOURCES])
+        scheduler.add("b", recorder.task("b", 0.1))
+        scheduler.run()
+
+        for name, others in recorder.overlaps:
+            self.assertNotEqual(name, "alone")
+            self.assertNotIn("alone", others)
+
+    def test_budget(self):
+        recorder = Recorder()
+        scheduler = ResourceScheduler(max_workers=2)
+        slow = scheduler.add("slow", recorder.task("slow", 2), resources=["ports"], budget=0.2)
+        fast = scheduler.add("fast", recorder.task("fast", 0.1, result="done"), resources=["ports"], budget=1)
+        start = time.monotonic()
+        scheduler.run()
+
+        self.assertLess(time.monotonic() - start, 1.5)
+        self.assertTrue(slow.timed_out)
+        self.assertEqual(slow.duration, 0.2)
+        self.assertFalse(fast.timed_out)
+        self.assertEqual(fast.result, "done")
+
+    def test_exception(self):
+        def _fail():
+            raise RuntimeError("check failed")
+
+        scheduler = ResourceScheduler(max_workers=2)
+        failed = scheduler.add("failed", _fail)
+        passed = scheduler.add("passed", lambda: True)
+        scheduler.run()
+
+        self.assertIsInstance(failed.exception, RuntimeError)
+        self.assertIsNone(passed.exception)
+        self.assertTrue(passed.result)
+
+
+if __name__ == '__main__':
+    unittest.main()
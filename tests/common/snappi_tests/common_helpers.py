@@ -26,6 +26,7 @@ from ipaddress import IPv6Network
 import ipaddress
 from tests.common.helpers.assertions import pytest_assert
 from tests.common.portstat_utilities import parse_portstat
+from tests.common.snappi_tests.counter_snapshot import CounterSnapshot
 from collections import defaultdict
 from tests.conftest import parse_override
 from tests.common.utilities import wait_until
@@ -1324,6 +1325,20 @@ def start_pfcwd_fwd(duthost, asic_value=None):
                       format(asic_value))
 
 
+def get_counter_snapshot(duthost, watermark=True):
+    """
+    Get the port, PFC, queue and watermark counters of all ports from SONiC CLI with one round trip.
+    Counters of a port and priority are got from the snapshot like get_pfc_frame_count() and get_egress_queue_count(),
+    and the counters increased during a traffic run by subtracting the snapshot before the run from the one after it.
+    Args:
+        duthost (Ansible host instance): device under test
+        watermark (bool): if the queue watermarks are collected too
+    Returns:
+        CounterSnapshot: counters of all ports
+    """
+    return CounterSnapshot.collect(duthost, watermark=watermark)
+
+
 def clear_counters(duthost, port=None, namespace=None):
     """
     Clear PFC, Queuecounters, Drop and generic counters from SONiC CLI.
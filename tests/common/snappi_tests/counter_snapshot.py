@@ -0,0 +1,299 @@
+"""
+Snapshots of the port, PFC, queue and watermark counters of all ports of a DUT.
+
+The helpers of common_helpers.py like get_pfc_frame_count() and get_egress_queue_count() run a show command for one
+port and one priority. A CounterSnapshot collects the counters of all ports with one SonicHost.run_batch() of
+portstat, pfcstat, queuestat and watermarkstat, and keeps each counter as an int64 array indexed by port, or by port
+and priority. The delta between two snapshots, like before and after a traffic run, is computed for all ports at once.
+
+Counters of 'N/A' are 0, like the helpers of common_helpers.py get them.
+"""
+import json
+import logging
+import re
+import time
+
+import numpy as np
+
+from tests.common.devices.show_parser import ShowTable
+
+logger = logging.getLogger(__name__)
+
+PORTSTAT_CMD = "portstat -j -s all"
+PFCSTAT_CMD = "pfcstat -s all"
+QUEUESTAT_CMD = "queuestat -j"
+WATERMARKSTAT_CMD = "watermarkstat -t q_shared_uni"
+
+PFC_PRIORITIES = 8
+NOT_AVAILABLE = "N/A"
+COUNTER_PATTERN = re.compile(r"^(?:-?[\d,]+|N/A)$")
+QUEUE_PATTERN = re.compile(r"^(?:UC|ALL)(\d+)$", re.IGNORECASE)
+# Field of queuestat JSON output of each queue counter
+QUEUE_FIELDS = {
+    "queue_pkts": "totalpacket",
+    "queue_bytes": "totalbytes",
+    "queue_drop_pkts": "droppacket",
+    "queue_drop_bytes": "dropbytes",
+}
+
+
+def _to_int(value):
+    value = str(value).replace(",", "")
+    return int(value) if value.lstrip("-").isdigit() else 0
+
+
+def _load_json(output):
+    """Load JSON output, lines before the JSON object like 'Last cached time was ...' are skipped."""
+    start = output.find("{")
+    return json.loads(output[start:]) if start >= 0 else {}
+
+
+def _tables(output_lines):
+    """Parse each of the tables separated by empty lines, like the Rx and Tx tables of pfcstat."""
+    tables = []
+    section = []
+    for line in output_lines + [""]:
+        if line.strip():
+            section.append(line)
+        elif section:
+            if any(set(section_line.strip()) <= {"-", " "} for section_line in section):
+                tables.append(ShowTable.from_lines(section))
+            section = []
+    return tables
+
+
+class CounterSnapshot(object):
+    """
+    Counters of all ports of a DUT at one time.
+
+    Attributes:
+        hostname (str): Hostname of the DUT.
+        timestamp (float): Time when the counters were collected.
+        ports (list): Names of the ports, in the order of the rows of the arrays.
+        port_counters (dict): Counter of portstat in lowercase, like 'rx_ok' and 'tx_drp' => array of ports.
+        pfc_rx (numpy.ndarray): Rx PFC frames, ports x priorities.
+        pfc_tx (numpy.ndarray): Tx PFC frames, ports x priorities.
+        queue_pkts, queue_bytes, queue_drop_pkts, queue_drop_bytes (numpy.ndarray): Counters of the unicast queues of
+            queuestat, ports x queues.
+        watermark (numpy.ndarray): Shared watermark of the unicast queues in bytes, ports x queues.
+    """
+    def __init__(self, hostname, ports, timestamp=None):
+        self.hostname = hostname
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.ports = list(ports)
+        self.port_index = {port: index for index, port in enumerate(self.ports)}
+        self.port_counters = {}
+        self.pfc_rx = np.zeros((len(self.ports), PFC_PRIORITIES), dtype=np.int64)
+        self.pfc_tx = np.zeros((len(self.ports), PFC_PRIORITIES), dtype=np.int64)
+        self.queue_pkts = np.zeros((len(self.ports), 0), dtype=np.int64)
+        self.queue_bytes = np.zeros((len(self.ports), 0), dtype=np.int64)
+        self.queue_drop_pkts = np.zeros((len(self.ports), 0), dtype=np.int64)
+        self.queue_drop_bytes = np.zeros((len(self.ports), 0), dtype=np.int64)
+        self.watermark = np.zeros((len(self.ports), 0), dtype=np.int64)
+
+    @classmethod
+    def collect(cls, duthost, watermark=True):
+        """
+        Collect the counters of all ports of the DUT with one round trip.
+
+        Args:
+            duthost: The DUT, SonicHost or MultiAsicSonicHost.
+            watermark (bool): Collect the queue watermarks. Reading watermarks doesn't clear them, but it is one more
+                command.
+
+        Returns:
+            CounterSnapshot: The snapshot. Counters of a failed command are 0, the failure is logged.
+        """
+        namespaces = duthost.get_frontend_asic_namespace_list() if duthost.is_multi_asic else [""]
+        ns_options = [" -n {}".format(namespace) if namespace else "" for namespace in namespaces]
+        cmds = [PORTSTAT_CMD, PFCSTAT_CMD]
+        cmds += [QUEUESTAT_CMD + ns_option for ns_option in ns_options]
+        if watermark:
+            cmds += [WATERMARKSTAT_CMD + ns_option for ns_option in ns_options]
+
+        start = time.time()
+        results = duthost.run_batch(cmds, module_ignore_errors=True)
+        for result in results:
+            if result["failed"]:
+                logger.warning("[{}] '{}' failed, its counters are 0: {}".format(
+                    duthost.hostname, result["cmd"], result["stderr"] or result["msg"]))
+        outputs = [result["stdout"] if not result["failed"] else "" for result in results]
+
+        queue_outputs = outputs[2:2 + len(namespaces)]
+        watermark_outputs = outputs[2 + len(namespaces):]
+        snapshot = cls.from_outputs(duthost.hostname, outputs[0], outputs[1], queue_outputs, watermark_outputs,
+                                    timestamp=start)
+        logger.info("[{}] Collected counters of {} ports in {:.3f} seconds".format(
+            duthost.hostname, len(snapshot.ports), time.time() - start))
+        return snapshot
+
+    @classmethod
+    def from_outputs(cls, hostname, portstat_output, pfcstat_output, queuestat_outputs, watermark_outputs=(),
+                     timestamp=None):
+        """
+        Build a snapshot from the outputs of the commands of collect().
+
+        Args:
+            hostname (str): Hostname of the DUT.
+            portstat_output (str): Output of 'portstat -j', it gives the ports of the snapshot.
+            pfcstat_output (str): Output of 'pfcstat'.
+            queuestat_outputs (list): Outputs of 'queuestat -j' of each namespace.
+            watermark_outputs (list): Outputs of 'watermarkstat -t q_shared_uni' of each namespace.
+            timestamp (float): Time when the counters were collected.
+
+        Returns:
+            CounterSnapshot: The snapshot.
+        """
+        port_stats = {port: stats for port, stats in _load_json(portstat_output).items() if isinstance(stats, dict)}
+        snapshot = cls(hostname, port_stats.keys(), timestamp)
+        snapshot._set_port_counters(port_stats)
+        snapshot._set_pfc_counters(pfcstat_output.splitlines())
+
+        queue_stats = {}
+        for output in queuestat_outputs:
+            queue_stats.update(_load_json(output))
+        snapshot._set_queue_counters(queue_stats)
+
+        watermark_rows = []
+        for output in watermark_outputs:
+            for table in _tables(output.splitlines()):
+                watermark_rows.extend(table.rows())
+        snapshot._set_watermarks(watermark_rows)
+        return snapshot
+
+    def _set_port_counters(self, port_stats):
+        fields = []
+        for stats in port_stats.values():
+            for field in stats:
+                if field not in fields:
+                    fields.append(field)
+        for field in fields:
+            values = [str(port_stats[port].get(field, NOT_AVAILABLE)) for port in self.ports]
+            # State, rates and utilization like 'U', '0.00 B/s' and '0.00%' are not counters
+            if all(COUNTER_PATTERN.match(value) for value in values) and \
+                    any(value != NOT_AVAILABLE for value in values):
+                self.port_counters[field.lower()] = np.array([_to_int(value) for value in values], dtype=np.int64)
+
+    def _set_pfc_counters(self, output_lines):
+        for table in _tables(output_lines):
+            if not table.headers or table.headers[0] not in ("port rx", "port tx"):
+                continue
+            counters = self.pfc_rx if table.headers[0] == "port rx" else self.pfc_tx
+            columns = table.columns()
+            ports = columns[table.headers[0]]
+            for prio in range(PFC_PRIORITIES):
+                values = columns.get("pfc{}".format(prio))
+                if values is None:
+                    continue
+                for port, value in zip(ports, values):
+                    if port in self.port_index:
+                        counters[self.port_index[port], prio] = _to_int(value)
+
+    def _set_queue_counters(self, queue_stats):
+        queues = 0
+        for stats in queue_stats.values():
+            if isinstance(stats, dict):
+                for queue in stats:
+                    match = QUEUE_PATTERN.match(queue)
+                    if match:
+                        queues = max(queues, int(match.group(1)) + 1)
+        for attr, field in QUEUE_FIELDS.items():
+            counters = np.zeros((len(self.ports), queues), dtype=np.int64)
+            for port, stats in queue_stats.items():
+                if port not in self.port_index or not isinstance(stats, dict):
+                    continue
+                for queue, values in stats.items():
+                    match = QUEUE_PATTERN.match(queue)
+                    if match and isinstance(values, dict):
+                        counters[self.port_index[port], int(match.group(1))] = _to_int(values.get(field))
+            setattr(self, attr, counters)
+
+    def _set_watermarks(self, rows):
+        queues = 0
+        for row in rows:
+            for header in row:
+                match = QUEUE_PATTERN.match(header)
+                if match:
+                    queues = max(queues, int(match.group(1)) + 1)
+        self.watermark = np.zeros((len(self.ports), queues), dtype=np.int64)
+        for row in rows:
+            port = row.get("port")
+            if port not in self.port_index:
+                continue
+            for header, value in row.items():
+                match = QUEUE_PATTERN.match(header)
+                if match:
+                    self.watermark[self.port_index[port], int(match.group(1))] = _to_int(value)
+
+    def _rows(self, ports):
+        return [self.port_index[port] for port in ports]
+
+    def port_counter(self, port, counter):
+        """Get a counter of portstat of a port, like port_counter('Ethernet0', 'tx_ok')."""
+        return int(self.port_counters[counter.lower()][self.port_index[port]])
+
+    def pfc_count(self, port, priority, is_tx=False):
+        """Get the PFC frame count of a port and priority, like get_pfc_frame_count()."""
+        counters = self.pfc_tx if is_tx else self.pfc_rx
+        return int(counters[self.port_index[port], priority])
+
+    def queue_count(self, port, priority):
+        """Get the packets and bytes of the unicast queue of a port and priority, like get_egress_queue_count()."""
+        index = self.port_index[port]
+        if priority >= self.queue_pkts.shape[1]:
+            return 0, 0
+        return int(self.queue_pkts[index, priority]), int(self.queue_bytes[index, priority])
+
+    def total_queue_pkts(self, ports, priority):
+        """Get the sum of the packets of the unicast queue of a priority of the ports."""
+        if priority >= self.queue_pkts.shape[1]:
+            return 0
+        return int(self.queue_pkts[self._rows(ports), priority].sum())
+
+    def delta(self, before):
+        """
+        Get the counters increased since an earlier snapshot, like snapshot_after.delta(snapshot_before).
+
+        Counters of the ports of this snapshot are subtracted by those of the same port in the earlier snapshot, for
+        all ports at once. A port not in the earlier snapshot keeps its counters. Watermarks are high water marks,
+        not counters, they are those of this snapshot.
+
+        Args:
+            before (CounterSnapshot): The earlier snapshot of the same DUT.
+
+        Returns:
+            CounterSnapshot: Counters increased between the snapshots, timestamp is the seconds between them.
+        """
+        delta = CounterSnapshot(self.hostname, self.ports, self.timestamp - before.timestamp)
+        if before.ports == self.ports:
+            rows, present = slice(None), None
+        else:
+            rows = np.array([before.port_index.get(port, 0) for port in self.ports], dtype=np.intp)
+            present = np.array([port in before.port_index for port in self.ports], dtype=bool)
+
+        def subtract(after_counters, before_counters):
+            if before_counters.ndim == 2 and before_counters.shape[1] != after_counters.shape[1]:
+                # Queues of only one of the snapshots are not subtracted
+                common = min(before_counters.shape[1], after_counters.shape[1])
+                aligned = np.zeros((before_counters.shape[0], after_counters.shape[1]), dtype=np.int64)
+                aligned[:, :common] = before_counters[:, :common]
+                before_counters = aligned
+            if len(before_counters) == 0:
+                return after_counters.copy()
+            previous = before_counters[rows]
+            if present is not None:
+                previous[~present] = 0
+            return after_counters - previous
+
+        for counter, values in self.port_counters.items():
+            if counter in before.port_counters:
+                delta.port_counters[counter] = subtract(values, before.port_counters[counter])
+            else:
+                delta.port_counters[counter] = values.copy()
+        for attr in ["pfc_rx", "pfc_tx"] + list(QUEUE_FIELDS):
+            setattr(delta, attr, subtract(getattr(self, attr), getattr(before, attr)))
+        delta.watermark = self.watermark.copy()
+        return delta
+
+    def __sub__(self, before):
+        return self.delta(before)
@@ -17,7 +17,7 @@ from tests.common.snappi_tests.common_helpers import config_capture_settings, ge
     pfc_class_enable_vector, get_lossless_buffer_size, get_pg_dropped_packets, \
     sec_to_nanosec, get_pfc_frame_count, packet_capture, get_tx_frame_count, get_rx_frame_count, \
     traffic_flow_mode, get_pfc_count, clear_counters, get_interface_stats, get_queue_count_all_prio, \
-    get_pfcwd_stats, get_interface_counters_detailed
+    get_pfcwd_stats, get_interface_counters_detailed, get_counter_snapshot
 from tests.common.snappi_tests.port import select_ports, select_tx_port
 from tests.common.snappi_tests.snappi_helpers import wait_for_arp, fetch_snappi_flow_metrics, \
     fetch_flow_metrics_for_macsec    # noqa: F401
@@ -1555,6 +1555,22 @@ def verify_egress_queue_frame_count(duthost,
                               "Queue counters should increment for invalid PFC pause frames")
 
 
+def get_dut_counter_snapshots(dutport_list):
+    """
+    Get the counter snapshot of each DUT of the (DUT, port) list, one round trip for each DUT
+
+    Args:
+        dutport_list (list): list of (DUT host object, port name)
+    Returns:
+        snapshots (dict): DUT hostname => CounterSnapshot
+    """
+    snapshots = {}
+    for dut, _ in dutport_list:
+        if dut.hostname not in snapshots:
+            snapshots[dut.hostname] = get_counter_snapshot(dut, watermark=False)
+    return snapshots
+
+
 def tgen_curr_stats(traf_metrics, flow_metrics, data_flow_names):
     """
     Print the current tgen metrics
@@ -1740,11 +1756,12 @@ def run_traffic_and_collect_stats(rx_duthost,
 
         logger.info("Polling DUT for Egress Queue statistics")
 
+        snapshots = get_dut_counter_snapshots(dutport_list)
         for lossless_prio in switch_tx_lossless_prios:
             count_frames = 0
             for n in range(port_map[0]):
                 dut, port = dutport_list[n]
-                count_frames = count_frames + (get_egress_queue_count(dut, port, lossless_prio)[0])
+                count_frames = count_frames + snapshots[dut.hostname].queue_count(port, lossless_prio)[0]
                 logger.info(
                     'Egress Queue Count for DUT:{}, Port:{}, Priority:{} - {}'.format(
                         dut.hostname, port, lossless_prio, count_frames
@@ -1754,7 +1771,7 @@ def run_traffic_and_collect_stats(rx_duthost,
             count_frames = 0
             for n in range(port_map[2]):
                 dut, port = dutport_list[-(n+1)]
-                count_frames = count_frames + (get_egress_queue_count(dut, port, lossless_prio)[0])
+                count_frames = count_frames + snapshots[dut.hostname].queue_count(port, lossless_prio)[0]
             switch_device_results["rx_frames"][lossless_prio].append(count_frames)
         later = datetime.now()
         time.sleep(abs(round(stats_interval - ((later - now).total_seconds()))))
@@ -1800,11 +1817,12 @@ def run_traffic_and_collect_stats(rx_duthost,
 
     time.sleep(5)
     # Counting egress queue frames at the end of the test.
+    snapshots = get_dut_counter_snapshots(dutport_list)
     for lossless_prio in switch_tx_lossless_prios:
         count_frames = 0
         for n in range(port_map[0]):
             dut, port = dutport_list[n]
-            count_frames = count_frames + (get_egress_queue_count(dut, port, lossless_prio)[0])
+            count_frames = count_frames + snapshots[dut.hostname].queue_count(port, lossless_prio)[0]
             logger.info(
                 'Final egress Queue Count for DUT:{},Port:{}, Priority:{} - {}'.format(
                     dut.hostname, port, lossless_prio, count_frames
@@ -1814,7 +1832,7 @@ def run_traffic_and_collect_stats(rx_duthost,
         count_frames = 0
         for n in range(port_map[2]):
             dut, port = dutport_list[-(n+1)]
-            count_frames = count_frames + (get_egress_queue_count(dut, port, lossless_prio)[0])
+            count_frames = count_frames + snapshots[dut.hostname].queue_count(port, lossless_prio)[0]
         switch_device_results["rx_frames"][lossless_prio].append(count_frames)
 
     # Dump per-flow statistics for final rows
@@ -0,0 +1,130 @@
+import json
+import unittest
+
+import numpy as np
+
+from tests.common.snappi_tests.counter_snapshot import CounterSnapshot
+
+PORTS = ["Ethernet0", "Ethernet8", "Ethernet16"]
+
+
+def portstat_output(rx_ok, tx_drp):
+    stats = {}
+    for port, rx, drp in zip(PORTS, rx_ok, tx_drp):
+        stats[port] = {"STATE": "U", "RX_OK": "{:,}".format(rx), "RX_BPS": "0.00 B/s", "RX_UTIL": "0.00%",
+                       "RX_OVR": "N/A", "TX_DRP": "{:,}".format(drp)}
+    return "Last cached time was 2024-01-01T00:00:00\n" + json.dumps(stats, indent=4)
+
+
+def pfcstat_output(rx, tx):
+    lines = []
+    for direction, counts in (("Rx", rx), ("Tx", tx)):
+        lines.append("  Port {}    PFC0    PFC1    PFC2    PFC3    PFC4    PFC5    PFC6    PFC7".format(direction))
+        lines.append("----------  ------  ------  ------  ------  ------  ------  ------  ------")
+        for port, port_counts in zip(PORTS, counts):
+            lines.append("{:>10}".format(port) + "".join("  {:>6}".format(count) for count in port_counts))
+        lines.append("")
+    return "\n".join(lines)
+
+
+def queuestat_output(ports, pkts):
+    stats = {}
+    for port, port_pkts in zip(ports, pkts):
+        stats[port] = {}
+        for queue, count in enumerate(port_pkts):
+            stats[port]["UC{}".format(queue)] = {"totalpacket": "{:,}".format(count), "totalbytes": str(count * 100),
+                                                 "droppacket": "N/A", "dropbytes": "0"}
+            stats[port]["MC{}".format(queue + len(port_pkts))] = {"totalpacket": "7", "totalbytes": "700",
+                                                                  "droppacket": "0", "dropbytes": "0"}
+    return json.dumps(stats)
+
+
+WATERMARK_OUTPUT = """\
+Egress shared pool occupancy per unicast queue:
+      Port    UC0    UC1
+----------  -----  -----
+ Ethernet0    100    N/A
+ Ethernet8      0   2048
+Ethernet16      0      0
+"""
+
+
+class FakeHost(object):
+    """Stand-in of a single ASIC SonicHost, run_batch gives the outputs of the commands"""
+    hostname = "dut"
+    is_multi_asic = False
+
+    def __init__(self, outputs):
+        self.outputs = outputs
+        self.batches = []
+
+    def run_batch(self, cmds, module_ignore_errors=False):
+        self.batches.append(cmds)
+        results = []
+        for cmd in cmds:
+            failed = cmd not in self.outputs
+            results.append({"cmd": cmd, "rc": 1 if failed else 0, "stdout": self.outputs.get(cmd, ""),
+                            "stderr": "Error" if failed else "", "msg": "", "failed": failed})
+        return results
+
+
+class TestCounterSnapshot(unittest.TestCase):
+
+    def snapshot(self, rx_ok, tx_drp, pfc_rx, pfc_tx, queue_pkts, timestamp):
+        return CounterSnapshot.from_outputs("dut", portstat_output(rx_ok, tx_drp), pfcstat_output(pfc_rx, pfc_tx),
+                                            [queuestat_output(PORTS, queue_pkts)], [WATERMARK_OUTPUT],
+                                            timestamp=timestamp)
+
+    def test_counters(self):
+        snapshot = self.snapshot([1234567, 0, 5], [0, 3, 0], [[0] * 8, [1] * 8, [0, 0, 0, 9, 0, 0, 0, 0]],
+                                 [[2] * 8, [0] * 8, [0] * 8], [[1, 2], [3, 4], [5, 6]], 10)
+        self.assertEqual(snapshot.ports, PORTS)
+        self.assertEqual(sorted(snapshot.port_counters), ["rx_ok", "tx_drp"])
+        self.assertEqual(snapshot.port_counter("Ethernet0", "RX_OK"), 1234567)
+        self.assertEqual(snapshot.pfc_count("Ethernet16", 3), 9)
+        self.assertEqual(snapshot.pfc_count("Ethernet0", 7, is_tx=True), 2)
+        self.assertEqual(snapshot.queue_pkts.shape, (3, 2))
+        self.assertEqual(snapshot.queue_count("Ethernet8", 1), (4, 400))
+        self.assertEqual(snapshot.queue_count("Ethernet8", 5), (0, 0))
+        self.assertEqual(snapshot.total_queue_pkts(["Ethernet0", "Ethernet16"], 0), 6)
+        np.testing.assert_array_equal(snapshot.watermark, [[100, 0], [0, 2048], [0, 0]])
+
+    def test_delta(self):
+        before = self.snapshot([100, 0, 5], [0, 3, 0], [[0] * 8] * 3, [[1] * 8] * 3, [[1, 2], [3, 4], [5, 6]], 10)
+        after = self.snapshot([150, 0, 5], [0, 13, 0], [[0] * 8, [4] * 8, [0] * 8], [[1] * 8] * 3,
+                              [[1, 2], [3, 4], [5, 60]], 12.5)
+        delta = after - before
+        self.assertEqual(delta.timestamp, 2.5)
+        np.testing.assert_array_equal(delta.port_counters["rx_ok"], [50, 0, 0])
+        np.testing.assert_array_equal(delta.port_counters["tx_drp"], [0, 10, 0])
+        np.testing.assert_array_equal(delta.pfc_rx[1], [4] * 8)
+        self.assertFalse(delta.pfc_tx.any())
+        self.assertEqual(delta.queue_count("Ethernet16", 1), (54, 5400))
+        np.testing.assert_array_equal(delta.watermark, after.watermark)
+
+    def test_delta_of_other_ports(self):
+        after = self.snapshot([0, 0, 0], [0, 0, 0], [[0] * 8] * 3, [[0] * 8] * 3, [[1, 2], [3, 4], [5, 6]], 1)
+        before = CounterSnapshot.from_outputs("dut", json.dumps({"Ethernet16": {"RX_OK": "1"},
+                                                                 "Ethernet8": {"RX_OK": "1"}}), "",
+                                              [queuestat_output(["Ethernet16", "Ethernet8"], [[1], [2]])], timestamp=0)
+        delta = after.delta(before)
+        np.testing.assert_array_equal(delta.queue_pkts, [[1, 2], [1, 4], [4, 6]])
+        np.testing.assert_array_equal(delta.port_counters["rx_ok"], [0, -1, -1])
+
+    def test_collect(self):
+        host = FakeHost({"portstat -j -s all": portstat_output([1, 2, 3], [0, 0, 0]),
+                         "pfcstat -s all": pfcstat_output([[0] * 8] * 3, [[0] * 8] * 3),
+                         "queuestat -j": queuestat_output(PORTS, [[1], [2], [3]])})
+        with self.assertLogs("tests.common.snappi_tests.counter_snapshot", level="WARNING") as logs:
+            snapshot = CounterSnapshot.collect(host)
+        self.assertEqual(len(host.batches), 1)
+        self.assertEqual(host.batches[0], ["portstat -j -s all", "pfcstat -s all", "queuestat -j",
+                                           "watermarkstat -t q_shared_uni"])
+        self.assertIn("watermarkstat", logs.output[0])
+        self.assertEqual(snapshot.port_counter("Ethernet16", "rx_ok"), 3)
+        self.assertEqual(snapshot.queue_count("Ethernet8", 0), (2, 200))
+        self.assertEqual(snapshot.watermark.shape, (3, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
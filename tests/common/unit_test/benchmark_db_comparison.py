@@ -0,0 +1,97 @@
+"""Benchmark of diffing DB snapshots in the compact snapshot format against diffing JSON dumps.
+
+Writes two APPL_DB like dumps of route entries, differing in a few of the routes, and runs:
+    json: loading the JSON dumps of redis-dump and diffing the dicts, like snapshots taken by older versions
+    convert: converting the dumps to compact snapshot files, like take_snapshot() does after fetching a dump
+    compact: diffing the compact snapshot files
+
+and prints the time and peak memory of each.
+
+Run it from the root of sonic-mgmt repo:
+    python -m tests.common.unit_test.benchmark_db_comparison --count 200000
+"""
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+import tracemalloc
+
+from tests.common import db_comparison
+from tests.common.db_comparison import CompactSnapshot, DBType, SNAPSHOT_FILE_SUFFIX, SnapshotDiff
+
+
+def make_dump(count, changed):
+    dump = {}
+    for i in range(count):
+        nexthop = "10.0.0.{}".format(i % 64 if i not in changed else 100)
+        dump["ROUTE_TABLE:192.{}.{}.0/24".format(i // 256 % 256, i % 256) + ("" if i < 65536 else "-{}".format(i))] = {
+            "expireat": 1700000000.0 + i,
+            "ttl": -0.001,
+            "type": "hash",
+            "value": {"ifname": "PortChannel10{}".format(i % 4), "nexthop": nexthop, "weight": "1"},
+        }
+    return dump
+
+
+def diff_json(path_a, path_b):
+    with open(path_a) as f:
+        dump_a = json.load(f)
+    with open(path_b) as f:
+        dump_b = json.load(f)
+    return SnapshotDiff(DBType.APPL, dump_a, dump_b)
+
+
+def convert_compact(path_a, path_b):
+    for path in (path_a, path_b):
+        with open(path) as f:
+            text = f.read()
+        items = db_comparison._iter_dump_items(text)
+        db_comparison.write_snapshot_file(DBType.APPL, items, path + SNAPSHOT_FILE_SUFFIX)
+
+
+def diff_compact(path_a, path_b):
+    return SnapshotDiff(DBType.APPL, CompactSnapshot(DBType.APPL, path_a + SNAPSHOT_FILE_SUFFIX),
+                        CompactSnapshot(DBType.APPL, path_b + SNAPSHOT_FILE_SUFFIX))
+
+
+def measure(func, *args):
+    """Time of a run, and peak memory of another run since tracing memory slows it down"""
+    start = time.time()
+    result = func(*args)
+    elapsed = time.time() - start
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--count", type=int, default=200000, help="number of keys of each dump")
+    parser.add_argument("--changed", type=int, default=100, help="number of keys differing between the dumps")
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp()
+    try:
+        path_a = os.path.join(tmp_dir, "a.json")
+        path_b = os.path.join(tmp_dir, "b.json")
+        with open(path_a, "w") as f:
+            json.dump(make_dump(args.count, set()), f)
+        with open(path_b, "w") as f:
+            json.dump(make_dump(args.count, set(range(0, args.count, max(1, args.count // args.changed)))), f)
+
+        for name, func in [("json", diff_json), ("convert", convert_compact), ("compact", diff_compact)]:
+            diff, elapsed, peak = measure(func, path_a, path_b)
+            print("{:<8} {:>8} keys {:>8} differing {:>8.3f}s {:>9.1f} MB peak".format(
+                name, args.count, len(diff.diff) if diff else "-", elapsed, peak / 1e6))
+        print("compact snapshot file {:.1f} MB, JSON dump {:.1f} MB".format(
+            os.path.getsize(path_a + SNAPSHOT_FILE_SUFFIX) / 1e6, os.path.getsize(path_a) / 1e6))
+    finally:
+        shutil.rmtree(tmp_dir)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from tests.common import db_comparison
+from tests.common.db_comparison import (CompactSnapshot, DBType, SNAPSHOT_FILE_SUFFIX, SnapshotDiff,
+                                        SonicRedisDBSnapshotter, match_key, write_snapshot_file)
+
+
+def hash_entry(value, **kwargs):
+    entry = {"type": "hash", "value": value}
+    entry.update(kwargs)
+    return entry
+
+
+STATE_A = {
+    "PORT_TABLE|Ethernet0": hash_entry({"oper_status": "up", "mtu": "9100"}, ttl=-1),
+    "PORT_TABLE|Ethernet4": hash_entry({"oper_status": "up"}),
+    "FAN_INFO|fan1": hash_entry({"speed": "50", "speed_target": "50", "presence": "True"}),
+    "TEMPERATURE_INFO|cpu": hash_entry({"temperature": "40", "high_threshold": "90"}),
+    "PROCESS_STATS|101": hash_entry({"CMD": "bgpd", "PPID": "1", "CPU": "0.1"}),
+    "PROCESS_STATS|102": hash_entry({"CMD": "zebra", "PPID": "1"}),
+    "WARM_RESTART_TABLE|bgp": hash_entry({"state": "reconciled", "restore_count": "1"}),
+}
+
+STATE_B = {
+    # Only volatile values differ
+    "PORT_TABLE|Ethernet0": hash_entry({"oper_status": "up", "mtu": "9100"}, ttl=100, expireat=1.5),
+    "PORT_TABLE|Ethernet4": hash_entry({"oper_status": "down"}),
+    "FAN_INFO|fan1": hash_entry({"speed": "60", "speed_target": "60", "presence": "True"}),
+    "FAN_INFO|fan2": hash_entry({"speed": "60", "presence": "True"}, ttl=5),
+    "PROCESS_STATS|201": hash_entry({"CMD": "bgpd", "PPID": "1"}),
+    "PROCESS_STATS|202": hash_entry({"CMD": "lldpd", "PPID": "1"}),
+}
+
+
+class TestDbComparison(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def write_snapshot(self, name, db_type, dump):
+        snapshot_dir = os.path.join(self.tmp_dir, name)
+        os.makedirs(snapshot_dir, exist_ok=True)
+        path = os.path.join(snapshot_dir, db_type.name + SNAPSHOT_FILE_SUFFIX)
+        text = json.dumps(dump, indent=4)
+        self.assertEqual(write_snapshot_file(db_type, db_comparison._iter_dump_items(text), path), len(dump))
+        return path
+
+    def test_diff(self):
+        diff = SnapshotDiff(DBType.STATE, STATE_A, STATE_B, label_a="a", label_b="b")
+        self.assertEqual(diff.diff, {
+            "PROCESS_STATS|*": {"value": {"CMD0": {"a": "zebra", "b": None}, "CMD1": {"a": None, "b": "lldpd"}}},
+            "PORT_TABLE|Ethernet4": {"value": {"oper_status": {"a": "up", "b": "down"}}},
+            "TEMPERATURE_INFO|cpu": {"a": {"type": "hash", "value": {"high_threshold": "90"}}, "b": None},
+            "WARM_RESTART_TABLE|bgp": {
+                "a": {"type": "hash", "value": {"state": "reconciled", "restore_count": "1"}}, "b": None},
+            "FAN_INFO|fan2": {"a": None, "b": {"type": "hash", "value": {"presence": "True"}}},
+        })
+        metrics = diff.metrics
+        self.assertEqual((metrics.total_a_keys, metrics.total_a_values_incl_volatile,
+                          metrics.total_a_values_excl_volatile), (7, 15, 9))
+        self.assertEqual((metrics.total_b_keys, metrics.total_b_values_incl_volatile,
+                          metrics.total_b_values_excl_volatile), (6, 12, 7))
+        self.assertEqual((metrics.num_overall_differing_keys, metrics.num_overall_differing_values), (3, 7))
+
+    def test_diff_files_same_as_dicts(self):
+        path_a = self.write_snapshot("a", DBType.STATE, STATE_A)
+        path_b = self.write_snapshot("b", DBType.STATE, STATE_B)
+        from_dicts = SnapshotDiff(DBType.STATE, STATE_A, STATE_B)
+        from_files = SnapshotDiff(DBType.STATE, CompactSnapshot(DBType.STATE, path_a),
+                                  CompactSnapshot(DBType.STATE, path_b))
+        self.assertEqual(from_files.diff, from_dicts.diff)
+        self.assertEqual(from_files.metrics, from_dicts.metrics)
+
+    def test_only_differing_keys_loaded(self):
+        path_a = self.write_snapshot("a", DBType.STATE, STATE_A)
+        path_b = self.write_snapshot("b", DBType.STATE, STATE_B)
+        snapshot_a = CompactSnapshot(DBType.STATE, path_a)
+        snapshot_b = CompactSnapshot(DBType.STATE, path_b)
+        with mock.patch.object(CompactSnapshot, "load", autospec=True, side_effect=CompactSnapshot.load) as load:
+            SnapshotDiff(DBType.STATE, snapshot_a, snapshot_b)
+        loaded = [{json.loads(key) for key in call.args[1]} for call in load.call_args_list]
+        # Keys whose only differences are volatile values are not loaded, PROCESS_STATS are always loaded
+        self.assertEqual(loaded, [
+            {"PORT_TABLE|Ethernet4", "TEMPERATURE_INFO|cpu", "PROCESS_STATS|101", "PROCESS_STATS|102",
+             "WARM_RESTART_TABLE|bgp"},
+            {"PORT_TABLE|Ethernet4", "FAN_INFO|fan2", "PROCESS_STATS|201", "PROCESS_STATS|202"},
+        ])
+
+    def test_volatile_values_changed_after_snapshot(self):
+        path_a = self.write_snapshot("a", DBType.CONFIG, {"PORT|Ethernet0": hash_entry({"mtu": "9100", "x": "1"})})
+        path_b = self.write_snapshot("b", DBType.CONFIG, {"PORT|Ethernet0": hash_entry({"mtu": "9100", "x": "2"})})
+        self.assertEqual(len(SnapshotDiff(DBType.CONFIG, CompactSnapshot(DBType.CONFIG, path_a),
+                                          CompactSnapshot(DBType.CONFIG, path_b)).diff), 1)
+        volatile_values = dict(db_comparison.VOLATILE_VALUES)
+        volatile_values[DBType.CONFIG] = volatile_values[DBType.CONFIG] | {"x"}
+        with mock.patch.object(db_comparison, "VOLATILE_VALUES", volatile_values):
+            diff = SnapshotDiff(DBType.CONFIG, CompactSnapshot(DBType.CONFIG, path_a),
+                                CompactSnapshot(DBType.CONFIG, path_b))
+        self.assertEqual(diff.diff, {})
+        self.assertEqual(diff.metrics.total_a_values_excl_volatile, 1)
+
+    def test_iter_dump_items(self):
+        for dump in [{}, STATE_A, {"a\tb": {"value": {"k": "v\n"}}, "": {"value": []}}]:
+            for indent in [None, 4]:
+                text = " \n" + json.dumps(dump, indent=indent) + "\n"
+                self.assertEqual(list(db_comparison._iter_dump_items(text)), list(dump.items()))
+        with self.assertRaises(ValueError):
+            list(db_comparison._iter_dump_items('{"a": {} "b": {}}'))
+
+    def test_match_key(self):
+        patterns = {"CPU", "setup.pid", "MEM%"}
+        self.assertTrue(match_key("CPU%", patterns))
+        self.assertTrue(match_key("setup_pid", patterns))
+        self.assertTrue(match_key("MEM%", patterns))
+        self.assertFalse(match_key("MEM", patterns))
+        self.assertFalse(match_key("xCPU", patterns))
+        self.assertFalse(match_key("CPU", set()))
+
+    def test_diff_snapshots(self):
+        self.write_snapshot("warm", DBType.STATE, STATE_A)
+        self.write_snapshot("cold", DBType.STATE, STATE_B)
+        # Snapshots taken by older versions are JSON files of redis-dump
+        self.write_snapshot("warm", DBType.CONFIG, {"PORT|Ethernet0": hash_entry({"mtu": "9100"})})
+        with open(os.path.join(self.tmp_dir, "cold", "CONFIG.json"), "w") as f:
+            json.dump({"PORT|Ethernet0": hash_entry({"mtu": "1500"})}, f)
+        result = SonicRedisDBSnapshotter(mock.Mock(), self.tmp_dir).diff_snapshots("warm", "cold")
+        self.assertEqual(set(result), {DBType.STATE, DBType.CONFIG})
+        self.assertEqual(result[DBType.STATE].diff, SnapshotDiff(DBType.STATE, STATE_A, STATE_B, "warm", "cold").diff)
+        self.assertEqual(result[DBType.CONFIG].diff,
+                         {"PORT|Ethernet0": {"value": {"mtu": {"warm": "9100", "cold": "1500"}}}})
+
+
+if __name__ == "__main__":
+    unittest.main()
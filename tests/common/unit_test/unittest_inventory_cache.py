@@ -0,0 +1,133 @@
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+from tests.common import utilities
+from tests.common.utilities import (clear_inventory_cache, get_group_visible_vars, get_host_vars,
+                                    get_host_visible_vars, get_inventory_cache, get_inventory_manager,
+                                    get_test_server_host, get_test_server_visible_vars, get_variable_manager)
+
+INVENTORY = """\
+all:
+  children:
+    sonic:
+      hosts:
+        dut-1:
+          ansible_host: 10.0.0.1
+          hwsku: Arista-7260CX3-C64
+        dut-2:
+          ansible_host: 10.0.0.2
+    server_1:
+      children:
+        vm_host_1:
+        vms_1:
+    vm_host_1:
+      hosts:
+        STR-ACS-SERV-01:
+          ansible_host: 10.0.0.100
+    vms_1:
+      hosts:
+        VM0100:
+          ansible_host: 10.0.0.101
+"""
+
+
+class TestInventoryCache(unittest.TestCase):
+
+    def setUp(self):
+        clear_inventory_cache()
+        self.tmpdir = tempfile.mkdtemp()
+        self.mtime = time.time()
+        self.inv_file = os.path.join(self.tmpdir, "lab")
+        with open(self.inv_file, "w") as inv:
+            inv.write(INVENTORY)
+        os.mkdir(os.path.join(self.tmpdir, "group_vars"))
+        self.write_group_vars("sonic", "ansible_user: admin\n")
+        # the cached functions also cache the vars into files
+        patcher = mock.patch.object(utilities.cache, "_cache_location", os.path.join(self.tmpdir, "_cache"))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(utilities.cache, "read", return_value=utilities.FactsCache.NOTEXIST)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        patcher = mock.patch.object(utilities.cache, "write")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        clear_inventory_cache()
+        shutil.rmtree(self.tmpdir)
+
+    def write_group_vars(self, group, content):
+        path = os.path.join(self.tmpdir, "group_vars", group + ".yml")
+        with open(path, "w") as group_vars:
+            group_vars.write(content)
+        self.touch(path)
+
+    def touch(self, path):
+        # mtime resolution of some file systems is coarse
+        self.mtime = self.mtime + 10
+        os.utime(path, (self.mtime, self.mtime))
+
+    def test_shared_managers(self):
+        inv_cache = get_inventory_cache([self.inv_file])
+        self.assertIs(get_inventory_cache(self.inv_file), inv_cache)
+        self.assertIs(get_inventory_manager([self.inv_file]), inv_cache.inventory_manager)
+        self.assertIs(get_variable_manager([self.inv_file]), inv_cache.variable_manager)
+        self.assertEqual(sorted(inv_cache.group_hosts["sonic"]), ["dut-1", "dut-2"])
+        self.assertEqual(sorted(inv_cache.group_hosts["server_1"]), ["STR-ACS-SERV-01", "VM0100"])
+        self.assertEqual(inv_cache.host_vars["dut-1"]["hwsku"], "Arista-7260CX3-C64")
+
+    def test_host_vars(self):
+        host_vars = get_host_vars([self.inv_file], "dut-1")
+        self.assertEqual(host_vars["ansible_host"], "10.0.0.1")
+        self.assertNotIn("ansible_user", host_vars)
+        host_vars["ansible_host"] = "changed"
+        self.assertEqual(get_host_vars([self.inv_file], "dut-1")["ansible_host"], "10.0.0.1")
+        with self.assertLogs(utilities.logger, level="ERROR"):
+            self.assertIsNone(get_host_vars([self.inv_file], "dut-3"))
+
+    def test_visible_vars(self):
+        self.assertEqual(get_host_visible_vars([self.inv_file], "dut-2")["ansible_user"], "admin")
+        self.assertEqual(get_group_visible_vars([self.inv_file], "sonic")["ansible_user"], "admin")
+        self.assertEqual(get_test_server_host([self.inv_file], "server_1").name, "STR-ACS-SERV-01")
+        server_vars = get_test_server_visible_vars([self.inv_file], "server_1")
+        self.assertEqual(server_vars["ansible_host"], "10.0.0.100")
+        self.assertNotIn("ansible_user", server_vars)
+        with self.assertLogs(utilities.logger, level="ERROR"):
+            self.assertIsNone(get_group_visible_vars([self.inv_file], "server_2"))
+
+    def test_reparse_on_change(self):
+        inv_cache = get_inventory_cache([self.inv_file])
+        self.assertEqual(get_host_visible_vars([self.inv_file], "dut-1")["ansible_user"], "admin")
+        self.write_group_vars("sonic", "ansible_user: sonic\n")
+        self.assertIsNot(get_inventory_cache([self.inv_file]), inv_cache)
+        self.assertEqual(get_host_visible_vars([self.inv_file], "dut-1")["ansible_user"], "sonic")
+
+        inv_cache = get_inventory_cache([self.inv_file])
+        with open(self.inv_file, "a") as inv:
+            inv.write("    ptf:\n      hosts:\n        ptf-1:\n")
+        self.touch(self.inv_file)
+        self.assertIsNot(get_inventory_cache([self.inv_file]), inv_cache)
+        self.assertEqual(get_inventory_cache([self.inv_file]).group_hosts["ptf"], ["ptf-1"])
+
+    def test_threads(self):
+        results = []
+        with mock.patch.object(utilities, "InventoryManager", wraps=utilities.InventoryManager) as inventory_manager:
+            threads = [threading.Thread(target=lambda: results.append(get_inventory_cache([self.inv_file])))
+                       for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        self.assertEqual(inventory_manager.call_count, 1)
+        self.assertEqual(len(results), 8)
+        self.assertTrue(all(result is results[0] for result in results))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -348,12 +348,101 @@ def join_all(threads, timeout):
                            [repr(thread) for thread in threads])
 
 
+class InventoryCache(object):
+    """Inventory files parsed by ansible once, with host -> vars and group -> hosts indexes.
+
+    The visible vars of a host are computed by the VariableManager on first use and kept, each lookup returns a
+    shallow copy of them.
+    """
+
+    def __init__(self, inv_files, key=None):
+        self.inv_files = inv_files
+        self.key = key
+        self.loader = DataLoader()
+        self.inventory_manager = InventoryManager(loader=self.loader, sources=inv_files)
+        self.variable_manager = VariableManager(loader=self.loader, inventory=self.inventory_manager)
+        self.host_vars = {name: host.vars for name, host in self.inventory_manager.hosts.items()}
+        self.group_hosts = {name: [host.name for host in group.get_hosts()]
+                            for name, group in self.inventory_manager.groups.items()}
+        self._visible_vars = {}
+        self._lock = threading.Lock()
+
+    def get_host(self, hostname):
+        with self._lock:
+            return self.inventory_manager.get_host(hostname)
+
+    def get_host_vars(self, hostname):
+        if hostname in self.host_vars:
+            return self.host_vars[hostname].copy()
+        host = self.get_host(hostname)
+        return None if host is None else host.vars.copy()
+
+    def get_visible_vars(self, hostname):
+        host = self.get_host(hostname)
+        if not host:
+            return None
+        with self._lock:
+            if hostname not in self._visible_vars:
+                self._visible_vars[hostname] = self.variable_manager.get_vars(host=host)
+            return self._visible_vars[hostname].copy()
+
+
+_inventory_caches = {}
+_inventory_caches_lock = threading.Lock()
+
+
+def _inventory_sources(inv_files):
+    if isinstance(inv_files, six.string_types):
+        inv_files = [inv_files]
+    return [os.path.abspath(inv_file) if os.path.exists(inv_file) else inv_file for inv_file in inv_files]
+
+
+def _inventory_cache_key(inv_files):
+    """Key of the inventory files: their paths and the latest mtime under each of them, and of the host_vars and
+    group_vars folders next to them, which are visible to the hosts too."""
+    key = []
+    for source in _inventory_sources(inv_files):
+        paths = [source]
+        if os.path.exists(source):
+            parent = source if os.path.isdir(source) else os.path.dirname(source)
+            paths.extend(os.path.join(parent, name) for name in ("host_vars", "group_vars"))
+        mtimes = [0]
+        for path in paths:
+            if os.path.isfile(path):
+                mtimes.append(os.stat(path).st_mtime)
+            for root, _, files in os.walk(path):
+                mtimes.append(os.stat(root).st_mtime)
+                mtimes.extend(os.stat(os.path.join(root, name)).st_mtime for name in files)
+        key.append((source, max(mtimes)))
+    return tuple(key)
+
+
+def get_inventory_cache(inv_files):
+    """Get the InventoryCache of the inventory files, which is shared by all threads of the process.
+
+    The inventory files are parsed again only if any of them, or of the host_vars/group_vars folders next to them, is
+    changed since the last parse.
+    """
+    key = _inventory_cache_key(inv_files)
+    sources = tuple(source for source, _ in key)
+    with _inventory_caches_lock:
+        inv_cache = _inventory_caches.get(sources)
+        if inv_cache is None or inv_cache.key != key:
+            inv_cache = _inventory_caches[sources] = InventoryCache(inv_files, key)
+        return inv_cache
+
+
+def clear_inventory_cache():
+    with _inventory_caches_lock:
+        _inventory_caches.clear()
+
+
 def get_inventory_manager(inv_files):
-    return InventoryManager(loader=DataLoader(), sources=inv_files)
+    return get_inventory_cache(inv_files).inventory_manager
 
 
 def get_variable_manager(inv_files):
-    return VariableManager(loader=DataLoader(), inventory=get_inventory_manager(inv_files))
+    return get_inventory_cache(inv_files).variable_manager
 
 
 def get_inventory_files(request):
@@ -423,12 +512,11 @@ def get_host_vars(inv_files, hostname):
     Returns:
         dict or None: dict if the host is found, None if the host is not found.
     """
-    im = get_inventory_manager(inv_files)
-    host = im.get_host(hostname)
-    if not host:
+    host_vars = get_inventory_cache(inv_files).get_host_vars(hostname)
+    if host_vars is None:
         logger.error("Unable to find host {} in {}".format(hostname, str(inv_files)))
         return None
-    return host.vars.copy()
+    return host_vars
 
 
 @cached(
@@ -451,13 +539,11 @@ def get_host_visible_vars(inv_files, hostname):
     Returns:
         dict or None: dict if the host is found, None if the host is not found.
     """
-    vm = get_variable_manager(inv_files)
-    im = vm._inventory
-    host = im.get_host(hostname)
-    if not host:
+    visible_vars = get_inventory_cache(inv_files).get_visible_vars(hostname)
+    if visible_vars is None:
         logger.error("Unable to find host {} in {}".format(hostname, str(inv_files)))
         return None
-    return vm.get_vars(host=host)
+    return visible_vars
 
 
 @cached(
@@ -479,31 +565,27 @@ def get_group_visible_vars(inv_files, group_name):
     Returns:
         dict or None: dict if the host is found, None if the host is not found.
     """
-    vm = get_variable_manager(inv_files)
-    im = vm._inventory
-    group = im.groups.get(group_name, None)
-    if not group:
+    inv_cache = get_inventory_cache(inv_files)
+    group_hosts = inv_cache.group_hosts.get(group_name, None)
+    if group_hosts is None:
         logger.error("Unable to find group {} in {}".format(group_name, str(inv_files)))
         return None
-    group_hosts = group.get_hosts()
     if len(group_hosts) == 0:
         logger.error("No host in group {}".format(group_name))
         return None
-    first_host = group_hosts[0]
-    return vm.get_vars(host=first_host)
+    return inv_cache.get_visible_vars(group_hosts[0])
 
 
 def get_test_server_host(inv_files, server):
     """Get test server ansible host from the 'server' column in testbed file."""
-    vm = get_variable_manager(inv_files)
-    im = vm._inventory
-    group = im.groups.get(server, None)
-    if not group:
+    inv_cache = get_inventory_cache(inv_files)
+    group_hosts = inv_cache.group_hosts.get(server, None)
+    if group_hosts is None:
         logger.error("Unable to find group {} in {}".format(server, str(inv_files)))
         return None
-    for host in group.get_hosts():
-        if not re.match(r'VM\d+', host.name):   # This must be the test server host
-            return host
+    for hostname in group_hosts:
+        if not re.match(r'VM\d+', hostname):   # This must be the test server host
+            return inv_cache.get_host(hostname)
     return None
 
 
@@ -561,12 +643,11 @@ def get_test_server_visible_vars(inv_files, server):
         dict or None: dict if the host is found, None if the host is not found.
     """
     test_server_host = get_test_server_host(inv_files, server)
-    vm = get_variable_manager(inv_files)
     if not test_server_host:
         logger.error("Unable to find host %s in %s", test_server_host, inv_files)
         return None
 
-    return vm.get_vars(host=test_server_host)
+    return get_inventory_cache(inv_files).get_visible_vars(test_server_host.name)
 
 
 def is_ipv4_address(ip_address):
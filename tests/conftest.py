@@ -137,6 +137,8 @@ def pytest_addoption(parser):
     parser.addoption("--testbed_file", action="store", default=None, help="testbed file name")
     parser.addoption("--ipv6_only_mgmt", action="store_true", default=False,
                      help="Use IPv6-only management network. DUT mgmt_ip will be set to IPv6 address.")
+    parser.addoption("--persistent_shell", action="store_true", default=False,
+                     help="Run plain shell/command module commands of DUTs over a persistent SSH connection.")
     parser.addoption("--uhd_config", action="store", help="Enable UHD config mode")
     parser.addoption("--save_uhd_config", action="store_true", help="Save UHD config mode")
     parser.addoption("--npu_dpu_startup", action="store_true", help="Startup NPU and DPUs and install configurations")
@@ -234,6 +236,8 @@ def pytest_addoption(parser):
                      help="Change (add|remove) post test check items based on pre test check items")
     parser.addoption("--recover_method", action="store", default="adaptive",
                      help="Set method to use for recover if sanity failed")
+    parser.addoption("--sanity_check_workers", action="store", default=None, type=int,
+                     help="Number of sanity check items run at the same time. Default: 1, run them one by one")
 
     ########################
     #   pre-test options   #
@@ -413,6 +417,25 @@ def ipv6_only_mgmt_enabled(request):
     return enabled
 
 
+@pytest.fixture(scope="session")
+def persistent_shell_enabled(request):
+    """
+    Fixture to check and configure the persistent shell mode.
+
+    When --persistent_shell is passed to pytest, shell and command module calls of SonicHost with a plain command
+    are run over one persistent SSH connection per DUT instead of the ansible modules. Other module calls are not
+    changed.
+
+    Returns:
+        bool: True if the persistent shell mode is enabled, False otherwise.
+    """
+    from tests.common.devices.sonic import SonicHost
+
+    enabled = request.config.getoption("persistent_shell", default=False)
+    SonicHost.set_persistent_shell(enabled)
+    return enabled
+
+
 @pytest.fixture(scope="session", autouse=True)
 def enhance_inventory(request, tbinfo):
     """
@@ -589,7 +612,8 @@ def pytest_sessionfinish(session, exitstatus):
 
 
 @pytest.fixture(name="duthosts", scope="session")
-def fixture_duthosts(enhance_inventory, ansible_adhoc, tbinfo, request, ipv6_only_mgmt_enabled):
+def fixture_duthosts(enhance_inventory, ansible_adhoc, tbinfo, request, ipv6_only_mgmt_enabled,
+                     persistent_shell_enabled):
     """
     @summary: fixture to get DUT hosts defined in testbed.
     @param enhance_inventory: fixture to enhance the capability of parsing the value of pytest cli argument
@@ -599,6 +623,7 @@ def fixture_duthosts(enhance_inventory, ansible_adhoc, tbinfo, request, ipv6_onl
     @param tbinfo: fixture provides information about testbed.
     @param request: pytest request object
     @param ipv6_only_mgmt_enabled: fixture to configure IPv6-only management mode before DUT initialization
+    @param persistent_shell_enabled: fixture to configure persistent shell mode before DUT initialization
     """
     try:
         host = DutHosts(ansible_adhoc, tbinfo, request, get_specified_duts(request),
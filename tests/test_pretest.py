@@ -574,11 +574,12 @@ def prepare_autonegtest_params(duthosts, fanouthosts):
         def select_test_ports(dut):
             all_ports = list_dut_fanout_connections(dut, fanouthosts)
             selected_ports = {}
+            fec_modes = dut.get_ports_fec([dut_port for dut_port, _, _ in all_ports])
             for dut_port, fanout, fanout_port in all_ports:
                 if len(selected_ports) == max_interfaces_per_dut:
                     break
                 auto_neg_mode = fanout.get_auto_negotiation_mode(fanout_port)
-                fec_mode = dut.get_port_fec(dut_port)
+                fec_mode = fec_modes[dut_port]
                 if auto_neg_mode is not None and fec_mode is not None:
                     speeds = get_common_supported_speeds(dut, dut_port, fanout, fanout_port)
                     selected_ports[dut_port] = {
@@ -25,6 +25,7 @@ from tests.common.helpers.voq_helpers import poll_neighbor_table_delete
 from tests.common.helpers.voq_helpers import get_inband_info
 from tests.common.helpers.voq_helpers import get_ptf_port
 from tests.common.helpers.voq_helpers import get_vm_with_ip
+from tests.common.helpers.sonic_db import SonicDbCliCache
 from tests.common.devices.eos import EosHost
 
 from tests.common.fixtures.ptfhost_utils import copy_ptftests_directory  # noqa: F401
@@ -1146,8 +1147,11 @@ class TestNeighborLinkFlap(LinkFlap):
             pytest_assert(wait_until(60, 2, 0, check_arptable_state_for_nbrs, per_host, asic, neighbors, "REACHABLE"),
                           "STATE for neighbors {} did not change to reachable".format(neighbors))
 
+            # Neighbors are all checked in the same state, fetch each table once for all of them
+            db_clis = SonicDbCliCache()
             for neighbor in neighbors:
-                check_one_neighbor_present(duthosts, per_host, asic, neighbor, nbrhosts, all_cfg_facts)
+                check_one_neighbor_present(duthosts, per_host, asic, neighbor, nbrhosts, all_cfg_facts,
+                                           db_clis=db_clis)
 
 
 class TestGratArp(object):